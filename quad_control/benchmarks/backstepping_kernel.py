@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+"""Report: outputs per second of the backends of BacksteppingVectorThrustController,
+and check that the generated backend (backstepping_kernel.py, derived with sympy
+by generate_backstepping_kernel.py) agrees with the hand-written one.
+
+For every double integrator controller of DI_CONTROLLERS, both backends are
+evaluated at the same --states pseudo-random states and gravities, with
+output and with output_batch: the largest relative difference from
+output of the hand-written backend is reported, and it fails (exit code 1)
+above --tolerance, or if backstepping_kernel.py is older than its generator.
+With a component-wise controller (the default one, ComponentWise3DDIC),
+the constructor must refuse the generated backend ("refused" in the
+report): it fails if it does not.
+The report also has, for each backend:
+    outputs/s: calls of output per second
+    batch outputs/s: states per second of output_batch, all states at once
+
+    backstepping_kernel.py [--states N] [--repetitions R] [--tolerance T] [--standalone]
+
+With --standalone, utilities/ros_stub.py replaces rospy, and no roscore is needed.
+"""
+
+import hashlib
+import os
+import sys
+import time
+
+import numpy
+
+
+# double integrator controllers (see double_integrator_controller_database.py):
+# the default one is component-wise, the others have Jacobians and Hessians
+DI_CONTROLLERS = [
+    ('Default', {}),
+    ('NOTComponentWise3DDIC', {}),
+    ('BoundedNotComponentWiseDIC', {'natural_frequency': 1.2, 'damping': 0.5, 'position_saturation': 0.5, 'velocity_saturation': 2.0}),
+]
+
+
+def states_of(number):
+    """number pseudo-random states (p, v, n, w) and gravities (ad, jd, sd),
+    the same on every run; n is a unit vector, mostly up"""
+    random_state = numpy.random.RandomState(0)
+    states = random_state.normal(size=(number, 12))
+    states[:,6:9] = random_state.normal(size=(number, 3))*0.3 + [0.0, 0.0, 1.0]
+    states[:,6:9] /= numpy.sqrt(numpy.sum(states[:,6:9]**2, axis=1))[:,None]
+    gravities = random_state.normal(size=(number, 9))
+    gravities[:,2] += 9.81
+    return states, gravities
+
+
+def largest_difference(outputs, reference):
+    """Largest |a - b|/max(1, |b|), over the states (first axis) and the outputs"""
+    largest = 0.0
+    for out, reference_out in zip(outputs, reference):
+        a = numpy.asarray(out, dtype=float)
+        b = numpy.asarray(reference_out, dtype=float)
+        if a.shape != b.shape:
+            return float('inf')
+        largest = max(largest, numpy.max(numpy.abs(a - b)/numpy.maximum(1.0, numpy.abs(b))))
+    return largest
+
+
+def loop_outputs(controller, states, gravities):
+    """Outputs of output, stacked over the states"""
+    outputs = [controller.output(x, g) for x, g in zip(states, gravities)]
+    return [numpy.array([output[index] for output in outputs]) for index in range(6)]
+
+
+def outputs_per_second(controller, states, gravities, repetitions):
+    start = time.time()
+    for repetition in range(repetitions):
+        for x, g in zip(states, gravities):
+            controller.output(x, g)
+    return repetitions*len(states)/(time.time() - start)
+
+
+def batch_outputs_per_second(controller, states, gravities, repetitions):
+    start = time.time()
+    for repetition in range(repetitions):
+        controller.output_batch(states, gravities)
+    return repetitions*len(states)/(time.time() - start)
+
+
+if __name__ == '__main__':
+
+    arguments = sys.argv[1:]
+    number = 100
+    repetitions = 5
+    tolerance = 1e-10
+    standalone = False
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--states':
+            number = int(arguments.pop(0))
+        elif argument == '--repetitions':
+            repetitions = int(arguments.pop(0))
+        elif argument == '--tolerance':
+            tolerance = float(arguments.pop(0))
+        elif argument == '--standalone':
+            standalone = True
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    if standalone:
+        from utilities import ros_stub
+        ros_stub.install()
+    else:
+        import rospy
+        rospy.init_node('backstepping_kernel', anonymous=True)
+
+    from controllers.double_integrator_controllers import double_integrator_controller_database
+    from controllers.vector_thrust_controllers.vector_thrust_controller_double_integrator_and_toque_backstepping import vector_thrust_controller as backstepping
+    from controllers.vector_thrust_controllers.vector_thrust_controller_double_integrator_and_toque_backstepping import backstepping_kernel
+
+    failed = False
+
+    # the hash of generate_backstepping_kernel.py (sympy is not needed to check it)
+    generator = os.path.join(os.path.dirname(os.path.abspath(backstepping.__file__)), 'generate_backstepping_kernel.py')
+    with open(generator, 'rb') as file_handle:
+        up_to_date = hashlib.sha1(file_handle.read()).hexdigest() == backstepping_kernel.SOURCE_HASH
+    if not up_to_date:
+        print('backstepping_kernel.py is older than ' + generator + ': run it')
+        failed = True
+
+    states, gravities = states_of(number)
+
+    print('%d states, %d repetitions' % (number, repetitions))
+    print('%-100s %-14s %12s %17s %14s' % ('double integrator controller', 'backend', 'outputs/s', 'batch outputs/s', 'difference'))
+    for name, di_arguments in DI_CONTROLLERS:
+        reference = None
+        for backend in backstepping.BACKENDS:
+            di_controller = double_integrator_controller_database.database[name](**di_arguments)
+            try:
+                controller = backstepping.BacksteppingVectorThrustController(
+                    di_controller=di_controller, backend=backend)
+            except ValueError:
+                refused = backstepping.component_wise(di_controller)
+                failed = failed or not refused
+                print('%-100s %-14s %12s %17s %14s' % (name + ' ' + str(di_arguments), backend, '-', '-',
+                    'refused' if refused else 'ERROR'))
+                continue
+            if backend == backstepping.GENERATED and backstepping.component_wise(di_controller):
+                print('%-100s %-14s %12s %17s %14s' % (name + ' ' + str(di_arguments), backend, '-', '-', 'NOT refused'))
+                failed = True
+                continue
+            outputs = loop_outputs(controller, states, gravities)
+            if reference is None:
+                reference = outputs
+            difference = max(largest_difference(outputs, reference),
+                largest_difference(controller.output_batch(states, gravities), reference))
+            failed = failed or not difference <= tolerance
+            print('%-100s %-14s %12.0f %17.0f %14.2e' % (name + ' ' + str(di_arguments), backend,
+                outputs_per_second(controller, states, gravities, repetitions),
+                batch_outputs_per_second(controller, states, gravities, repetitions), difference))
+
+    if failed:
+        print('the generated backend differs from the hand-written one by more than %.1e, or is not refused' % tolerance)
+        sys.exit(1)
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+"""Report: outputs per second of the bounded double integrator controllers,
+and check of their outputs against golden values.
+
+Every controller of CONTROLLERS (name in double_integrator_controller_database.py,
+and constructing arguments) is evaluated at the same --inputs pseudo-random
+positions and velocities: some of them are below the eps of the controllers,
+where the tensors are zero. The outputs (u, u_p, ..., V_v_v) of every
+controller are compared with those in GOLDEN_FILE, recorded with --record:
+the largest relative difference is reported, and it fails (exit code 1)
+above --tolerance. The outputs of output_lazy with need=LAZY_NEED (those
+of the PID controllers), and those of output_batch (all inputs in one
+call), are compared in the same way. The report also has, for each
+controller:
+    outputs/s: calls of output per second
+    lazy outputs/s: calls of output_lazy(p, v, LAZY_NEED) per second
+    batch outputs/s: states per second of output_batch, all inputs at once
+
+    double_integrator_controllers.py [--inputs N] [--repetitions R]
+        [--tolerance T] [--record] [--standalone]
+
+With --standalone, utilities/ros_stub.py replaces rospy, and no roscore is needed.
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy
+
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'double_integrator_controllers_golden.json')
+
+CONTROLLERS = [
+    ('ComponentWise3DDIC', {}),
+    ('ComponentWise3DDIC', {'natural_frequency': 1.2, 'damping': 0.5, 'position_saturation': 0.5, 'velocity_saturation': 2.0}),
+    ('NOTComponentWise3DDIC', {}),
+    ('NOTComponentWise3DDIC', {'proportional_gain': 2.0, 'derivative_gain': 1.5, 'position_saturation': 0.5, 'velocity_saturation': 2.0}),
+    ('BoundedNotComponentWiseDIC', {}),
+    ('BoundedNotComponentWiseDIC', {'natural_frequency': 1.2, 'damping': 0.5, 'position_saturation': 0.5, 'velocity_saturation': 2.0}),
+    ('OneDBoundedDIC', {}),
+    ('OneDBoundedDIC', {'proportional_gain': 2.0, 'derivative_gain': 1.5, 'position_saturation': 0.5, 'velocity_saturation': 2.0}),
+]
+
+
+# outputs that ThreeDPIDController needs
+LAZY_NEED = ('u', 'V_v')
+
+
+def inputs_of(name, number):
+    """number pseudo-random (position, velocity) pairs, the same on every run"""
+    random_state = numpy.random.RandomState(0)
+    size = 1 if name == 'OneDBoundedDIC' else 3
+    scales = numpy.array([1e-3, 0.1, 1.0, 10.0])
+    inputs = []
+    for index in range(number):
+        p = random_state.normal(size=size)*scales[index % 4]
+        v = random_state.normal(size=size)*scales[(index//4) % 4]
+        if size == 1:
+            inputs.append((float(p[0]), float(v[0])))
+        else:
+            inputs.append((p, v))
+    return inputs
+
+
+def key_of(name, arguments):
+    return name + ' ' + json.dumps(arguments, sort_keys=True)
+
+
+def outputs_of(controller, inputs):
+    """List (one per input) of lists of the outputs (as nested lists)"""
+    return [[numpy.asarray(out, dtype=float).tolist() for out in controller.output(p, v)]
+        for p, v in inputs]
+
+
+def lazy_outputs_of(controller, inputs):
+    """As outputs_of, with output_lazy: only the outputs in LAZY_NEED (others are [])"""
+    outputs = []
+    for p, v in inputs:
+        out = controller.output_lazy(p, v, LAZY_NEED)
+        outputs.append([numpy.asarray(getattr(out, name), dtype=float).tolist() if name in LAZY_NEED else []
+            for name in OUTPUTS])
+    return outputs
+
+
+def batch_outputs_of(controller, inputs):
+    """As outputs_of, with one call of output_batch for all inputs"""
+    positions  = numpy.array([p for p, v in inputs])
+    velocities = numpy.array([v for p, v in inputs])
+    outputs = controller.output_batch(positions, velocities)
+    return [[numpy.asarray(out[index], dtype=float).tolist() for out in outputs]
+        for index in range(len(inputs))]
+
+
+def largest_difference(outputs, golden):
+    """Largest |a - b|/max(1, |b|) over all outputs"""
+    largest = 0.0
+    for output, golden_output in zip(outputs, golden):
+        for out, golden_out in zip(output, golden_output):
+            a = numpy.array(out)
+            b = numpy.array(golden_out)
+            if a.size == 0:
+                # not computed (see lazy_outputs_of)
+                continue
+            if a.shape != b.shape:
+                return float('inf')
+            if a.size > 0:
+                largest = max(largest, numpy.max(numpy.abs(a - b)/numpy.maximum(1.0, numpy.abs(b))))
+    return largest
+
+
+def outputs_per_second(controller, inputs, repetitions):
+    start = time.time()
+    for repetition in range(repetitions):
+        for p, v in inputs:
+            controller.output(p, v)
+    return repetitions*len(inputs)/(time.time() - start)
+
+
+def lazy_outputs_per_second(controller, inputs, repetitions):
+    start = time.time()
+    for repetition in range(repetitions):
+        for p, v in inputs:
+            controller.output_lazy(p, v, LAZY_NEED)
+    return repetitions*len(inputs)/(time.time() - start)
+
+
+def batch_outputs_per_second(controller, inputs, repetitions):
+    positions  = numpy.array([p for p, v in inputs])
+    velocities = numpy.array([v for p, v in inputs])
+    start = time.time()
+    for repetition in range(repetitions):
+        controller.output_batch(positions, velocities)
+    return repetitions*len(inputs)/(time.time() - start)
+
+
+if __name__ == '__main__':
+
+    arguments = sys.argv[1:]
+    number = 16
+    repetitions = 100
+    tolerance = 1e-12
+    record = False
+    standalone = False
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--inputs':
+            number = int(arguments.pop(0))
+        elif argument == '--repetitions':
+            repetitions = int(arguments.pop(0))
+        elif argument == '--tolerance':
+            tolerance = float(arguments.pop(0))
+        elif argument == '--record':
+            record = True
+        elif argument == '--standalone':
+            standalone = True
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    if standalone:
+        from utilities import ros_stub
+        ros_stub.install()
+    else:
+        import rospy
+        rospy.init_node('double_integrator_controllers', anonymous=True)
+
+    from controllers.double_integrator_controllers import double_integrator_controller_database
+    from controllers.double_integrator_controllers.double_integrator_controller import OUTPUTS
+
+    golden = {}
+    if not record:
+        with open(GOLDEN_FILE) as file_handle:
+            golden = json.load(file_handle)
+
+    failed = False
+    print('%d inputs, %d repetitions' % (number, repetitions))
+    print('%-100s %12s %17s %17s %14s' % ('controller', 'outputs/s', 'lazy outputs/s', 'batch outputs/s', 'difference'))
+    for name, controller_arguments in CONTROLLERS:
+        controller = double_integrator_controller_database.database[name](**controller_arguments)
+        inputs = inputs_of(name, number)
+        outputs = outputs_of(controller, inputs)
+        key = key_of(name, controller_arguments)
+        if record:
+            golden[key] = outputs
+            difference = 0.0
+        elif key in golden:
+            # the inputs are the same for any --inputs: the first ones are compared
+            difference = max(largest_difference(outputs, golden[key]),
+                largest_difference(lazy_outputs_of(controller, inputs), golden[key]),
+                largest_difference(batch_outputs_of(controller, inputs), golden[key]))
+        else:
+            difference = float('nan')
+        failed = failed or not difference <= tolerance
+        print('%-100s %12.0f %17.0f %17.0f %14.2e' % (key, outputs_per_second(controller, inputs, repetitions),
+            lazy_outputs_per_second(controller, inputs, repetitions),
+            batch_outputs_per_second(controller, inputs, repetitions), difference))
+
+    if record:
+        with open(GOLDEN_FILE, 'w') as file_handle:
+            json.dump(golden, file_handle, sort_keys=True)
+        print('golden values: ' + GOLDEN_FILE)
+    elif failed:
+        print('outputs differ from the golden values by more than %.1e' % tolerance)
+        sys.exit(1)
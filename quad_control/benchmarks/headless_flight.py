@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+"""Report: a closed-loop flight, simulated without ROS, as fast as possible.
+
+The default controller, yaw controller and IrisPlusConverter (through
+missions/headless/headless_simulation.py) fly a simulator along a
+trajectory, in simulated time; rospy is replaced by utilities/ros_stub.py,
+so no roscore is needed. The report has the time it took, how many times
+faster than real time it is, and the tracking error.
+
+    headless_flight.py [--duration D] [--simulator Name] [--trajectory Name]
+                       [--param name value ...] [--budget seconds] [--save file.npz]
+
+The exit status is 1 if the flight takes longer than --budget seconds.
+"""
+
+import json
+import sys
+import time
+
+
+if __name__ == '__main__':
+
+    arguments = sys.argv[1:]
+    duration = 60.0
+    simulator_name = 'DoubleIntegratorSimulator'
+    trajectory_name = 'DescribeCircle'
+    parameters = {}
+    budget = None
+    save = None
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--duration':
+            duration = float(arguments.pop(0))
+        elif argument == '--simulator':
+            simulator_name = arguments.pop(0)
+        elif argument == '--trajectory':
+            trajectory_name = arguments.pop(0)
+        elif argument == '--param':
+            name = arguments.pop(0)
+            value = arguments.pop(0)
+            try:
+                parameters[name] = json.loads(value)
+            except ValueError:
+                parameters[name] = value
+        elif argument == '--budget':
+            budget = float(arguments.pop(0))
+        elif argument == '--save':
+            save = arguments.pop(0)
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    # before anything reads a ROS parameter
+    from utilities import ros_stub
+    ros_stub.install(parameters)
+
+    import numpy
+
+    from missions.headless import headless_simulation
+    from simulators.simulators_dictionary import simulators_dictionary
+    from trajectories import trajectories_database
+
+    mission_object = headless_simulation.HeadlessMission(
+        reference = trajectories_database.database[trajectory_name]())
+    simulator = simulators_dictionary[simulator_name]()
+    simulation = headless_simulation.HeadlessSimulation(mission_object, simulator)
+
+    start = time.time()
+    flight = simulation.run(duration)
+    seconds = time.time() - start
+
+    # position and desired position (see Mission.get_complete_data)
+    errors = numpy.sqrt(numpy.sum((flight.mission_data[:,1:4] - flight.mission_data[:,7:10])**2, axis=1))
+    last = flight.times >= flight.times[-1] - 10.0
+
+    print('%s, %s: %.1f s of flight' % (simulator_name, trajectory_name, duration))
+    print('took %.3f s, %.0f times faster than real time' % (seconds, duration/seconds))
+    print('position error (m): final %.3f, largest in the last 10 s %.3f' % (errors[-1], numpy.max(errors[last])))
+
+    if save is not None:
+        flight.save_npz(save)
+
+    if budget is not None and seconds > budget:
+        print('FAILED: more than %.3f s' % budget)
+        sys.exit(1)
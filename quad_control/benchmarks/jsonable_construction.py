@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Benchmark: construction of a nested Jsonable mission from its json string,
+as it happens when the GUI changes mission or controller mid-flight.
+
+It compares Jsonable.from_string with the previous implementation
+(which re-serialized every nested dictionary with json.dumps and parsed
+it again one level down), and the first (cold) and next (cached) calls
+of Jsonable.to_string.
+
+Needs a roscore and the parameters of a mission launch file:
+    roslaunch quad_control missions_gazebo.launch
+    rosrun quad_control jsonable_construction.py [MissionName] [repetitions]
+"""
+
+import json
+import sys
+import timeit
+
+import rospy
+
+import missions.missions_database
+
+from utilities import jsonable
+
+
+def legacy_from_string(cls, string):
+    """Jsonable.from_string before the schema cache"""
+    arg_dic = json.loads(string)
+    for key, value in arg_dic.items():
+        if key in cls.inner.keys():
+            InnerObjType = cls.inner[key][value[0]]
+            arg_dic[key] = legacy_from_string(InnerObjType, json.dumps(value[1]))
+    obj = cls(**arg_dic)
+    obj.constructing_string = string
+    return obj
+
+
+def default_inner(cls):
+    """The inner dictionary of to_string, choosing the 'Default' class of every inner"""
+    inner = {}
+    for arg, classes in cls.inner.items():
+        if 'Default' in classes:
+            InnerClass = classes['Default']
+            # use name of the class, not the alias
+            names = [name for name, value in classes.items() if value is InnerClass and name != 'Default']
+            name = names[0] if len(names) > 0 else 'Default'
+        else:
+            name = sorted(classes.keys())[0]
+        inner[arg] = [name, default_inner(classes[name])]
+    return inner
+
+
+def report(name, seconds, repetitions):
+    print('%-40s %10.1f us' % (name, seconds/repetitions*1e6))
+
+
+if __name__ == '__main__':
+
+    rospy.init_node('jsonable_construction_benchmark', anonymous=True)
+
+    mission_name = 'FireflyTrajectoryTracking'
+    if len(sys.argv) > 1:
+        mission_name = sys.argv[1]
+    repetitions = 200
+    if len(sys.argv) > 2:
+        repetitions = int(sys.argv[2])
+
+    MissionClass = missions.missions_database.database[mission_name]
+    inner = default_inner(MissionClass)
+
+    print(mission_name + ': ' + json.dumps(inner))
+
+    # to_string: first call builds the schemas of every class
+    start = timeit.default_timer()
+    string = MissionClass.to_string(inner)
+    report('to_string (cold)', timeit.default_timer() - start, 1)
+    report('to_string (cached)', timeit.timeit(lambda: MissionClass.to_string(inner), number=repetitions), repetitions)
+
+    report('combined_description', timeit.timeit(lambda: MissionClass.combined_description(inner), number=repetitions), repetitions)
+
+    # construction of the whole mission (includes subscribers and publishers)
+    report('from_string (legacy)', timeit.timeit(lambda: legacy_from_string(MissionClass, string), number=repetitions), repetitions)
+    report('from_string', timeit.timeit(lambda: MissionClass.from_string(string), number=repetitions), repetitions)
+
+    # construction of the controller only (what the GUI changes during a flight)
+    ControllerClass  = MissionClass.inner['controller'][inner['controller'][0]]
+    controller_string = ControllerClass.to_string(inner['controller'][1])
+    report('controller from_string (legacy)', timeit.timeit(lambda: legacy_from_string(ControllerClass, controller_string), number=repetitions), repetitions)
+    report('controller from_string', timeit.timeit(lambda: ControllerClass.from_string(controller_string), number=repetitions), repetitions)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Check: a patch of the controller through the service ServicePatchMission,
+with the mission IrisSimulatorTrajectoryTracking (whose controller and
+trajectory are kept in ControllerObject and TrajGenerator).
+
+A QuadController of cycle_quad_control_mission.py is set up in this
+process, in the namespace --namespace, and its control loop runs in a
+thread; the service is called as the GUI calls it. It fails (exit code 1)
+if the service does not answer received, if the controller of the mission
+does not have the patched parameter afterwards, or if the header of the
+mission (parametric_description, written in the telemetry file when data
+is saved) cannot be made.
+
+    patch_mission_service.py [--namespace NAME] [--gain G]
+
+Needs a roscore, and the messages and services of quad_control (source the
+devel/setup.bash of the catkin workspace).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+
+MISSION = 'IrisSimulatorTrajectoryTracking'
+
+
+if __name__ == '__main__':
+
+    arguments = sys.argv[1:]
+    namespace = 'patch_mission_check'
+    gain = 2.5
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--namespace':
+            namespace = arguments.pop(0)
+        elif argument == '--gain':
+            gain = float(arguments.pop(0))
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    sys.path.insert(0, SCRIPTS)
+
+    import rospy
+    rospy.init_node('patch_mission_service', anonymous=True)
+
+    from quad_control.srv import SrvCreateJsonableObjectByStr, SrvPatchJsonableByStr
+    from cycle_quad_control_mission import QuadController
+
+    controller = QuadController(namespace=namespace)
+    controller.read_parameters()
+    controller.setup()
+
+    # the control loop, that applies the patches
+    def control_loop():
+        while not rospy.is_shutdown():
+            controller.control_tick()
+            time.sleep(1.0/controller.frequency)
+    thread = threading.Thread(target=control_loop)
+    thread.daemon = True
+    thread.start()
+
+    change_mission = rospy.ServiceProxy(controller.resolve('ServiceChangeMission'), SrvCreateJsonableObjectByStr)
+    patch_mission  = rospy.ServiceProxy(controller.resolve('ServicePatchMission'), SrvPatchJsonableByStr)
+    rospy.wait_for_service(controller.resolve('ServicePatchMission'), 5.0)
+
+    failed = False
+
+    change_mission(jsonable_name=MISSION, string_parameters='{}')
+    mission_object = controller.mission_object
+    if mission_object.__class__.__name__ != MISSION:
+        print('the mission is ' + mission_object.__class__.__name__ + ', not ' + MISSION)
+        sys.exit(1)
+
+    patch = {'proportional_gain_xy': gain}
+    try:
+        response = patch_mission(jsonable_name='controller', patch=json.dumps(patch))
+    except rospy.ServiceException as exception:
+        print('ServicePatchMission failed: ' + str(exception))
+        sys.exit(1)
+    if not response.received:
+        print('patch refused: ' + response.message)
+        failed = True
+
+    patched_gain = mission_object.ControllerObject.get_constructing_dictionary().get('proportional_gain_xy')
+    print('proportional_gain_xy of ControllerObject: ' + str(patched_gain))
+    if patched_gain != gain:
+        failed = True
+
+    try:
+        header = mission_object.parametric_description(MISSION)
+    except Exception as exception:
+        print('no header: %r' % exception)
+        failed = True
+    else:
+        if json.dumps(gain) not in header:
+            print('the header does not have the patched gain')
+            failed = True
+
+    # a key that this mission cannot patch is refused, with a message
+    response = patch_mission(jsonable_name='yaw_reference', patch=json.dumps({}))
+    print('patch of yaw_reference: received %s, %s' % (response.received, response.message))
+    if response.received:
+        failed = True
+
+    if failed:
+        print('FAILED')
+        sys.exit(1)
+    print('OK')
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""Report: simulators with a quaternion state against those with a rotation matrix.
+
+Each pair of simulators (rotation matrix, quaternion) of the same vehicle
+is flown with the same rc commands (see simulator_integrators.py) and the
+default integrator, for --duration seconds with steps of --time-step seconds.
+For each simulator, the report has:
+    evaluations/s: evaluations of vector_field per second
+    steps/s: steps of the simulator per second (time of run only)
+and for each pair:
+    position difference: largest distance between the two trajectories (m)
+    attitude difference: largest |R_matrix - R_quaternion| (Frobenius norm)
+
+    quaternion_simulators.py [--time-step T] [--duration D] [--standalone]
+
+With --standalone, utilities/ros_stub.py replaces rospy, and no roscore is needed.
+"""
+
+import sys
+import time
+
+import numpy
+
+from simulator_integrators import command
+
+
+PAIRS = [
+    ('NoAttitudeInnerLoopSimulator', 'QuaternionNoAttitudeInnerLoopSimulator'),
+    ('AttitudeInnerLoopSimulator', 'QuaternionAttitudeInnerLoopSimulator'),
+]
+
+
+def evaluations_per_second(simulator, evaluations):
+    """Evaluations of the vector field per second, at the current state and control"""
+    state = numpy.array(simulator.get_state())
+    control = numpy.array(simulator.control)
+    start = time.time()
+    for index in range(evaluations):
+        simulator.vector_field(0.0, state, control)
+    return evaluations/(time.time() - start)
+
+
+def run_simulator(simulator, steps, time_step):
+    """Returns the seconds spent in run, the positions (steps,3)
+    and the rotation matrices (steps,3,3)"""
+    positions = numpy.zeros((steps, 3))
+    rotations = numpy.zeros((steps, 3, 3))
+    seconds = 0.0
+    for index in range(steps):
+        simulator.set_control(command(simulator.get_time()))
+        start = time.time()
+        simulator.run(time_step)
+        seconds += time.time() - start
+        positions[index] = simulator.get_position()
+        rotations[index] = simulator.get_rotation_matrix()
+    return seconds, positions, rotations
+
+
+if __name__ == '__main__':
+
+    arguments = sys.argv[1:]
+    time_step = 0.01
+    duration = 10.0
+    standalone = False
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--time-step':
+            time_step = float(arguments.pop(0))
+        elif argument == '--duration':
+            duration = float(arguments.pop(0))
+        elif argument == '--standalone':
+            standalone = True
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    if standalone:
+        from utilities import ros_stub
+        ros_stub.install()
+    else:
+        import rospy
+        rospy.init_node('quaternion_simulators', anonymous=True)
+
+    from simulators.simulators_dictionary import simulators_dictionary
+
+    steps = int(round(duration/time_step))
+
+    print('%d steps of %.4f s' % (steps, time_step))
+    print('%-40s %14s %10s %20s %20s' % ('simulator', 'evaluations/s', 'steps/s', 'position difference', 'attitude difference'))
+    for names in PAIRS:
+        results = []
+        for name in names:
+            simulator = simulators_dictionary[name]()
+            simulator.set_control(command(0.0))
+            evaluations = evaluations_per_second(simulator, 10*steps)
+            seconds, positions, rotations = run_simulator(simulator, steps, time_step)
+            results.append((name, evaluations, steps/seconds, positions, rotations))
+        position_difference = numpy.max(numpy.sqrt(numpy.sum((results[0][3] - results[1][3])**2, axis=-1)))
+        attitude_difference = numpy.max(numpy.sqrt(numpy.sum((results[0][4] - results[1][4])**2, axis=(-1,-2))))
+        for name, evaluations, steps_per_second, _, _ in results:
+            print('%-40s %14.0f %10.0f %20.2e %20.2e' % (
+                name, evaluations, steps_per_second, position_difference, attitude_difference))
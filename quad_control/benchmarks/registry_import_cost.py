@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+"""Report: how long it takes to import every entry of the databases
+of controllers, trajectories, missions and simulators.
+
+By default every entry is imported in a new python process, so that
+the time of an entry includes all the modules it needs (numpy, matplotlib,
+mavros_msgs, ...), as in a node that just started. With --shared, all
+entries are imported in this process, one after the other, and an entry
+only pays for the modules that no previous entry imported.
+
+Needs a roscore (some classes read ROS parameters when they are imported):
+    roscore &
+    rosrun quad_control registry_import_cost.py [--shared]
+"""
+
+import subprocess
+import sys
+import time
+
+# module: name of the LazyDatabase in it
+DATABASES = [
+    ('controllers.controllers_database', 'database'),
+    ('controllers.double_integrator_controllers.double_integrator_controller_database', 'database'),
+    ('controllers.quadruple_integrator_controllers.quadruple_integrator_controllers_database', 'database'),
+    ('controllers.fa_trajectory_tracking_controllers.fa_trajectory_tracking_controllers_database', 'database'),
+    ('controllers.vector_thrust_controllers.vector_thrust_controllers_database', 'database'),
+    ('controllers.single_load_transportation_controllers.single_load_transportation_controllers_database', 'database'),
+    ('yaw_rate_controllers.yaw_controllers_database', 'database'),
+    ('trajectories.trajectories_database', 'database'),
+    ('yaw_trajectories.yaw_trajectories_database', 'database'),
+    ('simulators.simulators_dictionary', 'simulators_dictionary'),
+    ('simulators.batch_simulators_dictionary', 'batch_simulators_dictionary'),
+    ('simulators.integrators.integrators_database', 'database'),
+    ('missions.gazebo.missions_database', 'database'),
+    ('missions.mocap.missions_database', 'database'),
+    ('missions.rviz.missions_database', 'database'),
+]
+
+# run in a child process: prints the time to import one entry
+CHILD = """
+import importlib, time
+database = getattr(importlib.import_module('%s'), '%s')
+start = time.time()
+database['%s']
+print(time.time() - start)
+"""
+
+
+def get_database(module_name, attribute):
+    module = __import__(module_name, fromlist=[attribute])
+    return getattr(module, attribute)
+
+
+def isolated_report():
+    report = []
+    for module_name, attribute in DATABASES:
+        database = get_database(module_name, attribute)
+        for name, import_path, _ in database.import_report():
+            try:
+                output = subprocess.check_output(
+                    [sys.executable, '-c', CHILD % (module_name, attribute, name)],
+                    stderr=subprocess.STDOUT)
+                seconds = float(output.decode().strip().splitlines()[-1])
+            except (subprocess.CalledProcessError, ValueError):
+                seconds = None
+            report.append((seconds, module_name + '[' + name + ']', import_path))
+    return report
+
+
+def shared_report():
+    report = []
+    for module_name, attribute in DATABASES:
+        database = get_database(module_name, attribute)
+        for name in database.keys():
+            if name == 'Default':
+                continue
+            try:
+                database[name]
+            except Exception:
+                pass
+        for name, import_path, seconds in database.import_report():
+            report.append((seconds, module_name + '[' + name + ']', import_path))
+    return report
+
+
+if __name__ == '__main__':
+
+    start = time.time()
+    if '--shared' in sys.argv:
+        report = shared_report()
+    else:
+        report = isolated_report()
+
+    report.sort(key=lambda item: -1.0 if item[0] is None else item[0], reverse=True)
+
+    print('%10s  %s' % ('import (ms)', 'entry'))
+    for seconds, name, import_path in report:
+        if seconds is None:
+            print('%10s  %s (%s)' % ('failed', name, import_path))
+        else:
+            print('%10.1f  %s' % (seconds*1e3, name))
+    print('total %.1f s' % (time.time() - start))
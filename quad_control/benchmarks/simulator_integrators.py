@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""Report: speed and accuracy of the integrators of the simulators.
+
+Every simulator (of simulators_dictionary.py, and of
+batch_simulators_dictionary.py with --vehicles vehicles) is run with every
+integrator of integrators_database.py for --duration seconds, with steps
+of --time-step seconds, and with rc commands that change at every step
+(as when a controller runs). The same simulator, with a dopri5 integrator
+with tight tolerances, is the reference. For each pair, the report has:
+    steps/s: steps of the simulator per second (time of run only)
+    position error: largest distance from the reference (m)
+    rotation drift: largest |R^T R - I| (Frobenius norm) of the rotation matrices
+A simulator that cannot be run is reported as failed.
+
+    simulator_integrators.py [--time-step T] [--duration D] [--sub-steps S]
+                             [--vehicles N] [--standalone]
+
+With --standalone, utilities/ros_stub.py replaces rospy, and no roscore is needed.
+"""
+
+import sys
+import time
+
+import numpy
+
+
+def command(time):
+    """Rc command (roll, pitch, throttle, yaw) that keeps the vehicle moving"""
+    return numpy.array([
+        1500.0 + 100.0*numpy.sin(time),
+        1500.0 + 100.0*numpy.cos(0.7*time),
+        1484.0 + 50.0*numpy.sin(0.3*time),
+        1500.0 + 50.0])
+
+
+def rotation_drift(rotations):
+    """Largest |R^T R - I| of rotations with shape (...,3,3)"""
+    errors = numpy.matmul(numpy.swapaxes(rotations, -1, -2), rotations) - numpy.identity(3)
+    return numpy.max(numpy.sqrt(numpy.sum(errors**2, axis=(-1,-2))))
+
+
+def run_simulator(simulator, steps, time_step):
+    """Returns the seconds spent in run, the positions (steps,...,3)
+    and the largest rotation drift"""
+    positions = []
+    drift = 0.0
+    seconds = 0.0
+    for index in range(steps):
+        if hasattr(simulator, 'set_commands'):
+            # batch simulator: the same command for all vehicles
+            simulator.set_commands(command(simulator.get_time()))
+        else:
+            simulator.set_control(command(simulator.get_time()))
+        start = time.time()
+        simulator.run(time_step)
+        seconds += time.time() - start
+        state = simulator.get_state()
+        positions.append(numpy.array(state[...,0:3]))
+        if hasattr(simulator, 'get_rotations'):
+            rotations = simulator.get_rotations()
+        else:
+            rotations = simulator.get_rotation_matrix()
+        drift = max(drift, rotation_drift(rotations))
+    return seconds, numpy.array(positions), drift
+
+
+if __name__ == '__main__':
+
+    arguments = sys.argv[1:]
+    time_step = 0.01
+    duration = 10.0
+    sub_steps = 1
+    vehicles = 10
+    standalone = False
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--time-step':
+            time_step = float(arguments.pop(0))
+        elif argument == '--duration':
+            duration = float(arguments.pop(0))
+        elif argument == '--sub-steps':
+            sub_steps = int(arguments.pop(0))
+        elif argument == '--vehicles':
+            vehicles = int(arguments.pop(0))
+        elif argument == '--standalone':
+            standalone = True
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    if standalone:
+        from utilities import ros_stub
+        ros_stub.install()
+    else:
+        import rospy
+        rospy.init_node('simulator_integrators', anonymous=True)
+
+    from simulators.simulators_dictionary import simulators_dictionary
+    from simulators.batch_simulators_dictionary import batch_simulators_dictionary
+    from simulators.integrators import integrators_database
+    from simulators.integrators import integrators
+
+    steps = int(round(duration/time_step))
+
+    # name, and function that constructs the simulator with an integrator
+    simulators = []
+    for name in simulators_dictionary.keys():
+        if name != 'Default':
+            simulators.append((name,
+                lambda integrator, name=name: simulators_dictionary[name](integrator=integrator)))
+    for name in batch_simulators_dictionary.keys():
+        if name != 'Default':
+            simulators.append((name + ' (%d vehicles)' % vehicles,
+                lambda integrator, name=name: batch_simulators_dictionary[name](
+                    number_of_vehicles=vehicles, integrator=integrator)))
+
+    print('%d steps of %.4f s, %d sub-steps' % (steps, time_step, sub_steps))
+    print('%-45s %-28s %10s %16s %16s' % ('simulator', 'integrator', 'steps/s', 'position error', 'rotation drift'))
+    for simulator_name, construct in simulators:
+        try:
+            reference = construct(integrators.Dopri5Integrator(rtol=1e-10, atol=1e-12))
+            _, reference_positions, _ = run_simulator(reference, steps, time_step)
+        except Exception as exception:
+            print('%-45s failed: %r' % (simulator_name, exception))
+            continue
+        for integrator_name in integrators_database.database.keys():
+            if integrator_name == 'Default':
+                continue
+            IntegratorClass = integrators_database.database[integrator_name]
+            try:
+                simulator = construct(IntegratorClass(sub_steps=sub_steps))
+                seconds, positions, drift = run_simulator(simulator, steps, time_step)
+            except Exception as exception:
+                # e.g., the geometric integrator needs a rotation matrix in the state (ValueError)
+                print('%-45s %-28s failed: %r' % (simulator_name, integrator_name, exception))
+                continue
+            error = numpy.max(numpy.sqrt(numpy.sum((positions - reference_positions)**2, axis=-1)))
+            print('%-45s %-28s %10.0f %16.2e %16.2e' % (
+                simulator_name, integrator_name, steps/seconds, error, drift))
@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+"""Startup profile of the quad_control nodes.
+
+Every entry point is started in a new python process, against a stand-in
+of the ROS master (an XML-RPC server with a parameter server, started by
+this script: no roscore is needed). The module of the node is executed
+(not as __main__, so the node does not start spinning), then the
+statements that the node runs at startup (e.g., loading the default mission).
+
+Every import is timed, and the report lists, for each entry point, the
+total startup time and the most expensive modules. The exit status is 1
+if an entry point fails to start, or takes longer than its budget.
+
+    startup_profile.py [--top N] [--budget SECONDS] [--budget entry=SECONDS]
+                       [--param name=value] [entry ...]
+
+The scripts and src directories of quad_control must be importable
+(source the devel/setup.bash of the catkin workspace).
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    # python 2
+    from SimpleXMLRPCServer import SimpleXMLRPCServer
+except ImportError:
+    from xmlrpc.server import SimpleXMLRPCServer
+
+SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts')
+
+# name: (script, statements run after the module of the script, budget in sec)
+ENTRY_POINTS = {
+    'cycle_quad_control_mission': (
+        'cycle_quad_control_mission.py',
+        'import missions.missions_database as db; db.database["Default"]',
+        2.0),
+    'multi_quad_control_mission': (
+        'multi_quad_control_mission.py',
+        'import missions.missions_database as db; db.database["Default"]',
+        2.0),
+    'quad_simulator': (
+        'quad_simulator.py',
+        'import simulators.simulators_dictionary as db; db.simulators_dictionary["Default"]',
+        2.0),
+    'plot_experiment': (
+        'plot_experiment.py',
+        '',
+        1.5),
+}
+
+# parameters of the parameter server (those of the launch files)
+PARAMETERS = {
+    '/mission_type': 'gazebo',
+}
+
+# the child prints its result after this line
+RESULT = 'STARTUP_PROFILE_RESULT'
+
+
+class MasterStandIn(object):
+    """The part of the ROS master API that the nodes use at startup"""
+
+    def __init__(self, parameters):
+        self.parameters = dict(parameters)
+
+    def _find(self, key):
+        if key in self.parameters:
+            return True, self.parameters[key]
+        # namespace: dictionary of the parameters in it
+        prefix = key.rstrip('/') + '/'
+        values = {}
+        for name, value in self.parameters.items():
+            if name.startswith(prefix):
+                keys = name[len(prefix):].split('/')
+                dictionary = values
+                for inner_key in keys[:-1]:
+                    dictionary = dictionary.setdefault(inner_key, {})
+                dictionary[keys[-1]] = value
+        return len(values) > 0, values
+
+    def getParam(self, caller_id, key):
+        found, value = self._find(key)
+        if not found:
+            return [-1, 'Parameter [%s] is not set' % key, 0]
+        return [1, '', value]
+
+    def hasParam(self, caller_id, key):
+        return [1, '', self._find(key)[0]]
+
+    def setParam(self, caller_id, key, value):
+        self.parameters[key] = value
+        return [1, '', 0]
+
+    def deleteParam(self, caller_id, key):
+        self.parameters.pop(key, None)
+        return [1, '', 0]
+
+    def searchParam(self, caller_id, key):
+        namespace = caller_id.rsplit('/', 1)[0]
+        while True:
+            name = namespace + '/' + key.lstrip('/')
+            if self._find(name)[0]:
+                return [1, '', name]
+            if namespace == '':
+                return [-1, 'Cannot find parameter [%s]' % key, '']
+            namespace = namespace.rsplit('/', 1)[0]
+
+    def getParamNames(self, caller_id):
+        return [1, '', list(self.parameters.keys())]
+
+    def subscribeParam(self, caller_id, caller_api, key):
+        return self.getParam(caller_id, key) if self._find(key)[0] else [1, '', {}]
+
+    def unsubscribeParam(self, caller_id, caller_api, key):
+        return [1, '', 1]
+
+    def getUri(self, caller_id):
+        return [1, '', self.uri]
+
+    def getPid(self, caller_id):
+        return [1, '', os.getpid()]
+
+    def registerPublisher(self, caller_id, topic, topic_type, caller_api):
+        return [1, '', []]
+
+    def registerSubscriber(self, caller_id, topic, topic_type, caller_api):
+        return [1, '', []]
+
+    def registerService(self, caller_id, service, service_api, caller_api):
+        return [1, '', 0]
+
+    def unregisterPublisher(self, caller_id, topic, caller_api):
+        return [1, '', 1]
+
+    def unregisterSubscriber(self, caller_id, topic, caller_api):
+        return [1, '', 1]
+
+    def unregisterService(self, caller_id, service, service_api):
+        return [1, '', 1]
+
+    def lookupService(self, caller_id, service):
+        return [-1, 'no provider', '']
+
+    def getPublishedTopics(self, caller_id, subgraph):
+        return [1, '', []]
+
+    def getTopicTypes(self, caller_id):
+        return [1, '', []]
+
+    def getSystemState(self, caller_id):
+        return [1, '', [[], [], []]]
+
+
+def start_master(parameters):
+    """Start the stand-in of the ROS master in a thread, and return its uri"""
+    server = SimpleXMLRPCServer(('127.0.0.1', 0), logRequests=False, allow_none=True)
+    master = MasterStandIn(parameters)
+    master.uri = 'http://127.0.0.1:%d/' % server.server_address[1]
+    server.register_instance(master)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    return master.uri
+
+
+def child(script, statements):
+    """Run in the child process: execute the script and time every import"""
+
+    try:
+        import __builtin__ as builtins
+    except ImportError:
+        import builtins
+    import importlib
+    import runpy
+
+    timer = time.time
+    # module name: [cumulative time, self time]
+    modules = {}
+    # time spent in the imports nested in the current import
+    nested = []
+
+    def timed(name, function, *args, **kwargs):
+        new = name not in sys.modules
+        nested.append(0.0)
+        start = timer()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = timer() - start
+            inner = nested.pop()
+            if nested:
+                nested[-1] += elapsed
+            if new:
+                entry = modules.setdefault(name, [0.0, 0.0])
+                entry[0] += elapsed
+                entry[1] += elapsed - inner
+
+    original_import = builtins.__import__
+    original_import_module = importlib.import_module
+
+    def timed_import(name, *args, **kwargs):
+        return timed(name, original_import, name, *args, **kwargs)
+
+    def timed_import_module(name, *args, **kwargs):
+        return timed(name, original_import_module, name, *args, **kwargs)
+
+    builtins.__import__ = timed_import
+    importlib.import_module = timed_import_module
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    error = None
+    start = timer()
+    try:
+        runpy.run_path(script, run_name='__startup_profile__')
+        if statements:
+            exec(statements, {})
+    except BaseException as exception:
+        error = repr(exception)
+    total = timer() - start
+
+    builtins.__import__ = original_import
+    importlib.import_module = original_import_module
+
+    print(RESULT)
+    print(json.dumps({'total': total, 'modules': modules, 'error': error}))
+
+
+def profile(script, statements, master_uri):
+    environment = dict(os.environ)
+    environment['ROS_MASTER_URI'] = master_uri
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--child', script, statements],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=environment)
+    output, errors = process.communicate()
+    output = output.decode()
+    if RESULT not in output:
+        return {'total': None, 'modules': {}, 'error': errors.decode().strip()[-500:]}
+    return json.loads(output.split(RESULT)[-1])
+
+
+def parse_value(string):
+    try:
+        return json.loads(string)
+    except ValueError:
+        return string
+
+
+if __name__ == '__main__':
+
+    arguments = sys.argv[1:]
+
+    if arguments[:1] == ['--child']:
+        child(arguments[1], arguments[2])
+        sys.exit(0)
+
+    top = 10
+    default_budget = None
+    budgets = {}
+    parameters = dict(PARAMETERS)
+    names = []
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--top':
+            top = int(arguments.pop(0))
+        elif argument == '--budget':
+            value = arguments.pop(0)
+            if '=' in value:
+                name, seconds = value.split('=', 1)
+                budgets[name] = float(seconds)
+            else:
+                default_budget = float(value)
+        elif argument == '--param':
+            name, value = arguments.pop(0).split('=', 1)
+            parameters['/' + name.lstrip('/')] = parse_value(value)
+        else:
+            names.append(argument)
+
+    if not names:
+        names = sorted(ENTRY_POINTS.keys())
+
+    master_uri = start_master(parameters)
+
+    over_budget = []
+    for name in names:
+        script, statements, budget = ENTRY_POINTS[name]
+        if default_budget is not None:
+            budget = default_budget
+        budget = budgets.get(name, budget)
+
+        result = profile(os.path.join(SCRIPTS, script), statements, master_uri)
+
+        print('')
+        if result['total'] is None:
+            print('%s: failed to start' % name)
+            print(result['error'])
+            over_budget.append(name)
+            continue
+
+        status = 'ok'
+        if result['error'] is not None:
+            # an entry point that does not start is not within its budget
+            status = 'FAILED: ' + result['error']
+            over_budget.append(name)
+        elif result['total'] > budget:
+            status = 'OVER BUDGET'
+            over_budget.append(name)
+        print('%s: %.3f s (budget %.3f s) %s' % (name, result['total'], budget, status))
+
+        ranked = sorted(result['modules'].items(), key=lambda item: item[1][1], reverse=True)
+        print('    %10s %10s  %s' % ('self (ms)', 'cumul (ms)', 'module'))
+        for module, (cumulative, self_time) in ranked[:top]:
+            print('    %10.1f %10.1f  %s' % (self_time*1e3, cumulative*1e3, module))
+
+    if over_budget:
+        print('')
+        print('over budget: ' + ', '.join(over_budget))
+        sys.exit(1)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+"""Report: latency of the state/command exchange between simulator and controller.
+
+A state is sent to another process (the controller), that sends a
+command back as soon as it receives it; the round trip is timed, for
+--samples states, one every --period seconds, through:
+    shared_memory: the rings in /dev/shm of utilities/shared_memory.py
+        (both processes poll the rings, sleeping --poll seconds in between:
+        with 0, they yield the processor, which matters on a single core)
+    ros: the topics quad_state and quad_cmd (needs a roscore, and the
+        messages of quad_control: source the devel/setup.bash of the workspace)
+The report has the median, 99th percentile and largest round trip (ms).
+
+    state_transport_latency.py [--samples N] [--period T] [--poll T]
+                               [--transport shared_memory|ros|all]
+"""
+
+import multiprocessing
+import sys
+import time
+
+import numpy
+
+from utilities import shared_memory
+
+
+STATE_TOPIC = '/transport_latency/quad_state'
+COMMAND_TOPIC = '/transport_latency/quad_cmd'
+
+
+def shared_memory_controller(poll):
+    """Answer every state of the state ring with a command (same time)"""
+    while True:
+        try:
+            state_ring = shared_memory.SeqlockRing(shared_memory.path_of(STATE_TOPIC), shared_memory.STATE_COLUMNS)
+            break
+        except (IOError, OSError, ValueError):
+            time.sleep(0.01)
+    command_ring = shared_memory.SeqlockRing(
+        shared_memory.path_of(COMMAND_TOPIC), shared_memory.COMMAND_COLUMNS, create=True)
+    state = numpy.zeros(shared_memory.STATE_COLUMNS)
+    command = numpy.zeros(shared_memory.COMMAND_COLUMNS)
+    last = 0
+    while True:
+        number = state_ring.read_latest(state)
+        if number != last and number != 0:
+            last = number
+            command[0] = state[0]
+            command_ring.write(command)
+        else:
+            time.sleep(poll)
+
+
+def shared_memory_round_trips(samples, period, poll):
+    state_ring = shared_memory.SeqlockRing(
+        shared_memory.path_of(STATE_TOPIC), shared_memory.STATE_COLUMNS, create=True)
+    controller = multiprocessing.Process(target=shared_memory_controller, args=(poll,))
+    controller.daemon = True
+    controller.start()
+    while True:
+        try:
+            command_ring = shared_memory.SeqlockRing(shared_memory.path_of(COMMAND_TOPIC), shared_memory.COMMAND_COLUMNS)
+            break
+        except (IOError, OSError, ValueError):
+            time.sleep(0.01)
+
+    state = numpy.zeros(shared_memory.STATE_COLUMNS)
+    command = numpy.zeros(shared_memory.COMMAND_COLUMNS)
+    round_trips = numpy.zeros(samples)
+    last = command_ring.head()
+    for sample in range(samples):
+        start = time.time()
+        state[0] = start
+        state_ring.write(state)
+        while True:
+            number = command_ring.read_latest(command)
+            if number != last and command[0] == start:
+                break
+            time.sleep(poll)
+        round_trips[sample] = time.time() - start
+        last = number
+        time.sleep(period)
+
+    controller.terminate()
+    state_ring.unlink()
+    command_ring.unlink()
+    return round_trips
+
+
+def ros_controller():
+    import rospy
+    from quad_control.msg import quad_cmd, quad_state
+    rospy.init_node('transport_latency_controller', anonymous=True)
+    publisher = rospy.Publisher(COMMAND_TOPIC, quad_cmd, queue_size=10)
+    command = quad_cmd()
+    def answer(state):
+        command.time = state.time
+        publisher.publish(command)
+    rospy.Subscriber(STATE_TOPIC, quad_state, answer)
+    rospy.spin()
+
+
+def ros_round_trips(samples, period):
+    import threading
+    import rospy
+    from quad_control.msg import quad_cmd, quad_state
+
+    controller = multiprocessing.Process(target=ros_controller)
+    controller.daemon = True
+    controller.start()
+
+    rospy.init_node('transport_latency', anonymous=True)
+    answered = threading.Event()
+    answers = []
+    def receive(command):
+        answers.append((command.time, time.time()))
+        answered.set()
+    publisher = rospy.Publisher(STATE_TOPIC, quad_state, queue_size=10)
+    rospy.Subscriber(COMMAND_TOPIC, quad_cmd, receive)
+    # until the controller is connected both ways
+    state = quad_state()
+    while not answered.is_set() and not rospy.is_shutdown():
+        state.time = time.time()
+        publisher.publish(state)
+        answered.wait(0.1)
+
+    round_trips = numpy.zeros(samples)
+    for sample in range(samples):
+        answered.clear()
+        del answers[:]
+        start = time.time()
+        state.time = start
+        publisher.publish(state)
+        while True:
+            answered.wait(1.0)
+            answered.clear()
+            if any(sent == start for sent, received in answers):
+                break
+        received = [received for sent, received in answers if sent == start][0]
+        round_trips[sample] = received - start
+        time.sleep(period)
+
+    controller.terminate()
+    return round_trips
+
+
+if __name__ == '__main__':
+
+    arguments = sys.argv[1:]
+    samples = 1000
+    period = 0.01
+    poll = 0.0
+    transports = ['shared_memory', 'ros']
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--samples':
+            samples = int(arguments.pop(0))
+        elif argument == '--period':
+            period = float(arguments.pop(0))
+        elif argument == '--poll':
+            poll = float(arguments.pop(0))
+        elif argument == '--transport':
+            transport = arguments.pop(0)
+            transports = ['shared_memory', 'ros'] if transport == 'all' else [transport]
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    print('%d round trips, one every %.4f s' % (samples, period))
+    print('%-16s %12s %12s %12s' % ('transport', 'median (ms)', 'p99 (ms)', 'max (ms)'))
+    for transport in transports:
+        if transport == 'shared_memory':
+            round_trips = shared_memory_round_trips(samples, period, poll)
+        else:
+            round_trips = ros_round_trips(samples, period)
+        round_trips = 1000.0*round_trips
+        print('%-16s %12.3f %12.3f %12.3f' % (transport,
+            numpy.median(round_trips), numpy.percentile(round_trips, 99), numpy.max(round_trips)))
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""Check: arrays allocated by the mission in a steady-state control tick.
+
+A mission is constructed (the default one, or the one given), and the parts
+of the control tick that belong to the mission (conversion of the force
+and yaw rate into an rc command, data for the log, attitude for the yaw
+controller, data for the GUI) are run many times. After some warm-up ticks,
+they should allocate no new arrays: every array is written into the
+buffers of Mission.workspace (and of the converters).
+
+The arrays are counted with tracemalloc (python 3 only), in the domain
+where numpy traces the data of arrays (views have no data, and python
+floats are not arrays, so they are not counted). At every opcode of a
+probed tick, the arrays allocated since the previous opcode are counted,
+with the line that allocated them, so arrays that only live during the
+tick are counted too. The exit status is 1 if a probed tick allocates
+an array. The ticks are slow to probe: --probed-ticks are probed, after
+--ticks steady-state ticks.
+The memory allocated during a tick and released at its end (tracemalloc
+peak, that includes python objects) is also reported; with --max-bytes,
+the exit status is 1 if the median is larger.
+With python 2 (no tracemalloc), only the arrays returned by the tick are
+checked: they must be the arrays returned by the previous tick.
+Controllers and trajectories are not part of the check.
+
+    tick_allocations.py [MissionName] [--ticks N] [--probed-ticks N] [--max-bytes B] [--standalone]
+
+With --standalone, the stand-in of the ROS master of startup_profile.py
+is used, and no roscore is needed.
+"""
+
+import os
+import sys
+
+try:
+    import tracemalloc
+except ImportError:
+    # python 2
+    tracemalloc = None
+
+
+import numpy
+
+# command of the controller, and yaw rate
+FORCE    = numpy.array([0.5, -0.2, 14.0])
+YAW_RATE = 0.1
+
+
+def tick(mission_object):
+    """Returns the arrays computed by the mission"""
+    mission_object.desired_3d_force_quad = FORCE
+    mission_object.rc_command(FORCE, YAW_RATE)
+    return [
+        mission_object.rc_output,
+        mission_object.get_quad_ea_rad(),
+        mission_object.get_ea_desired(),
+        mission_object.get_complete_data()]
+
+
+class AllocationProbe(object):
+    """Arrays allocated by the python code that a call runs: at every opcode,
+    the data of arrays (tracemalloc domain of numpy) allocated since the
+    previous opcode and not released yet, with the line that was running"""
+
+    def __init__(self):
+        self.filters = [tracemalloc.DomainFilter(True, numpy.lib.tracemalloc_domain)]
+        # (file name, line number) of every array
+        self.allocations = []
+
+    def trace(self, frame, event, arg):
+        frame.f_trace_opcodes = True
+        snapshot = tracemalloc.take_snapshot().filter_traces(self.filters)
+        for trace in snapshot.traces:
+            self.allocations.append((trace.traceback[0].filename, trace.traceback[0].lineno))
+        # the next opcode only sees what it allocates
+        tracemalloc.clear_traces()
+        return self.trace
+
+    def run(self, function, *args):
+        tracemalloc.start()
+        sys.settrace(self.trace)
+        try:
+            return function(*args)
+        finally:
+            sys.settrace(None)
+            tracemalloc.stop()
+
+
+if __name__ == '__main__':
+
+    arguments = sys.argv[1:]
+    ticks = 1000
+    probed_ticks = 20
+    max_bytes = None
+    standalone = False
+    mission_name = 'Default'
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--ticks':
+            ticks = int(arguments.pop(0))
+        elif argument == '--probed-ticks':
+            probed_ticks = int(arguments.pop(0))
+        elif argument == '--max-bytes':
+            max_bytes = int(arguments.pop(0))
+        elif argument == '--standalone':
+            standalone = True
+        else:
+            mission_name = argument
+
+    if standalone:
+        import startup_profile
+        os.environ['ROS_MASTER_URI'] = startup_profile.start_master(startup_profile.PARAMETERS)
+
+    import rospy
+    rospy.init_node('tick_allocations', anonymous=True)
+
+    import missions.missions_database
+    mission_object = missions.missions_database.database[mission_name]()
+
+    # warm-up: buffers are allocated by the first ticks
+    for index in range(10):
+        tick(mission_object)
+
+    failures = []
+
+    if tracemalloc is None:
+        names = ['rc_output', 'get_quad_ea_rad', 'get_ea_desired', 'get_complete_data']
+        new_arrays = [0]*len(names)
+        previous = tick(mission_object)
+        for index in range(ticks):
+            current = tick(mission_object)
+            for position in range(len(names)):
+                if current[position] is not previous[position]:
+                    new_arrays[position] += 1
+            previous = current
+        print('python 2: only the arrays returned by the tick are checked (needs tracemalloc)')
+        print('new arrays returned per tick: %.2f' % (float(sum(new_arrays))/ticks))
+        for name, count in zip(names, new_arrays):
+            if count > 0:
+                failures.append(name + ' returned a new array in %d of %d ticks' % (count, ticks))
+    else:
+        for index in range(ticks):
+            tick(mission_object)
+
+        probe = AllocationProbe()
+        for index in range(probed_ticks):
+            probe.run(tick, mission_object)
+        print('arrays allocated per tick: %.2f' % (float(len(probe.allocations))/probed_ticks))
+        if probe.allocations:
+            failures.append('%d arrays allocated in %d ticks' % (len(probe.allocations), probed_ticks))
+            lines = {}
+            for allocation in probe.allocations:
+                lines[allocation] = lines.get(allocation, 0) + 1
+            print('    %6s  %s' % ('arrays', 'line'))
+            for (filename, lineno), count in sorted(lines.items(), key=lambda item: item[1], reverse=True):
+                print('    %6d  %s:%d' % (count, filename, lineno))
+
+        tracemalloc.start()
+        transient = []
+        for index in range(ticks):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            tick(mission_object)
+            _, peak = tracemalloc.get_traced_memory()
+            transient.append(peak - before)
+        tracemalloc.stop()
+        transient.sort()
+        median = transient[len(transient)//2]
+        print('transient bytes per tick: median %d, max %d' % (median, transient[-1]))
+        if max_bytes is not None and median > max_bytes:
+            failures.append('a tick allocates %d bytes (median), more than %d' % (median, max_bytes))
+
+    for failure in failures:
+        print('FAILED: ' + failure)
+    if failures:
+        sys.exit(1)
+    print('ok')
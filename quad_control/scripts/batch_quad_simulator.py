@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# this is just to define file type
+
+# One node that simulates several vehicles: one (N,15) state array,
+# integrated by one integrator (see simulators/batch_simulator.py).
+# Every vehicle has the same topics and services as a quad_simulator.py
+# node running in its namespace (/Iris1/quad_cmd, /Iris1/quad_state,
+# /Iris1/StartSimulator, ...), so controllers and GUI do not change.
+#
+# parameters (private):
+#   namespaces: list of vehicles, e.g. ['Iris1', 'Iris2']
+#   simulator: name in simulators/batch_simulators_dictionary.py
+#   frequency, overrun_policy: as for quad_simulator.py
+#
+# ServiceChangeSimulator (in every namespace) changes the simulator of all
+# vehicles, since they share one state array: the batch is built again
+# with the batch class of the chosen simulator (see batch_simulator_of in
+# batch_simulators_dictionary.py), from its defaults.
+
+import rospy
+
+from quad_control.msg import quad_state
+from quad_control.msg import quad_cmd
+
+from quad_control.srv import *
+
+import numpy
+
+import threading
+
+from utilities import scheduler
+
+import simulators.batch_simulators_dictionary as bsd
+
+from visualization_msgs.msg import Marker
+
+
+class BatchSimulatorNode():
+
+
+    def __init__(self):
+
+        # frequency of node (Hz)
+        self.frequency = 100
+
+        # delay for starting simulator (sec)
+        self.TimeDelay = 2.0
+
+        # simulator class asked for by ServiceChangeSimulator, used from the next tick
+        self.pending_simulator = None
+        self.pending_simulator_lock = threading.Lock()
+
+
+    def resolve(self, namespace, name):
+        if namespace.strip('/') == '':
+            return name
+        return '/' + namespace.strip('/') + '/' + name
+
+
+    def get_input(self, data, index):
+        self.sim.set_command(index, [data.cmd_1, data.cmd_2, data.cmd_3, data.cmd_4])
+
+
+    def handle_Start_service(self, req, index):
+        # a vehicle only moves after the GUI starts it
+        self.StartFlags[index] = req.Start
+        return StartSimResponse(True)
+
+
+    def handle_Reset_service(self, req, index):
+        self.sim.reset_vehicle(index)
+        return StartSimResponse(True)
+
+
+    def handle_simulator_change_service(self, req, index):
+        # the name of a simulator of one vehicle, or of a batch simulator
+        simulator_name = bsd.batch_simulator_of.get(req.jsonable_name, req.jsonable_name)
+        if simulator_name not in bsd.batch_simulators_dictionary:
+            rospy.logwarn('no batch simulator for ' + req.jsonable_name + ': use one of ' + str(sorted(bsd.batch_simulator_of.keys())))
+            return SrvCreateJsonableObjectByStrResponse(received = False)
+        with self.pending_simulator_lock:
+            self.pending_simulator = bsd.batch_simulators_dictionary[simulator_name]
+        rospy.logwarn(self.namespaces[index] + ' asked for ' + req.jsonable_name + ': all vehicles are simulated with ' + simulator_name)
+        # return message: resquest will be fulfilled by the next tick
+        return SrvCreateJsonableObjectByStrResponse(received = True)
+
+
+    def apply_pending_simulator(self):
+        """Build the batch again with the class asked for (between two ticks)"""
+        if self.pending_simulator is None:
+            return
+        with self.pending_simulator_lock:
+            SimClass = self.pending_simulator
+            self.pending_simulator = None
+        self.sim = SimClass(number_of_vehicles=len(self.namespaces))
+
+
+    def simulation_tick(self):
+
+        self.apply_pending_simulator()
+
+        # we delay system the initialization of the system by a TimeDelay
+        if self.sim.get_time() >= self.TimeDelay:
+            running = self.StartFlags
+        else:
+            running = self.NotRunning
+        self.sim.run(1.0/self.frequency, running)
+
+        time       = self.sim.get_time()
+        positions  = self.sim.get_positions()
+        velocities = self.sim.get_velocities()
+        attitudes  = self.sim.get_attitudes()
+
+        for index in range(len(self.namespaces)):
+            # the same message on every tick: publish serializes it right away
+            state = self.states[index]
+            state.time = time
+            state.x  = positions[index,0];  state.y  = positions[index,1];  state.z  = positions[index,2]
+            state.vx = velocities[index,0]; state.vy = velocities[index,1]; state.vz = velocities[index,2]
+            state.roll = attitudes[index,0]; state.pitch = attitudes[index,1]; state.yaw = attitudes[index,2]
+            self.pubs[index].publish(state)
+
+            marker = self.markers[index]
+            marker.pose.position.x = positions[index,0]
+            marker.pose.position.y = positions[index,1]
+            marker.pose.position.z = positions[index,2]
+            self.pubs_rviz[index].publish(marker)
+
+
+    def create_marker(self, index):
+        marker = Marker()
+        marker.header.frame_id = "map"
+        marker.header.stamp = rospy.Time()
+        marker.ns = "my_namespace"
+        marker.id = index
+        marker.pose.orientation.w = 1.0
+        marker.scale.x = 1
+        marker.scale.y = 1
+        marker.scale.z = 1
+        marker.type = Marker.MESH_RESOURCE
+        marker.mesh_use_embedded_materials = True
+        marker.mesh_resource = "package://rotors_description/meshes/firefly.dae"
+        return marker
+
+
+    def simulate_quads(self):
+
+        rospy.init_node('simulate_quads', anonymous=True)
+
+        self.namespaces = rospy.get_param('~namespaces', ['Iris1'])
+        simulator_name  = rospy.get_param('~simulator', 'Default')
+
+        SimClass = bsd.batch_simulators_dictionary[simulator_name]
+        self.sim = SimClass(number_of_vehicles=len(self.namespaces))
+
+        # by default, no dynamics: everything stopped
+        self.StartFlags = numpy.zeros(len(self.namespaces), dtype=bool)
+        self.NotRunning = numpy.zeros(len(self.namespaces), dtype=bool)
+
+        self.pubs      = []
+        self.pubs_rviz = []
+        self.states    = []
+        self.markers   = []
+        # services must be kept
+        self.services  = []
+
+        for index, namespace in enumerate(self.namespaces):
+            rospy.Subscriber(self.resolve(namespace, 'quad_cmd'), quad_cmd, self.get_input, index)
+
+            self.pubs.append(rospy.Publisher(self.resolve(namespace, 'quad_state'), quad_state, queue_size=10))
+            self.states.append(quad_state())
+
+            self.pubs_rviz.append(rospy.Publisher(self.resolve(namespace, 'visualization_marker'), Marker, queue_size=10))
+            self.markers.append(self.create_marker(index))
+
+            # index is bound now, not when the service is called
+            self.services.append(rospy.Service(self.resolve(namespace, 'StartSimulator'), StartSim,
+                lambda req, index=index: self.handle_Start_service(req, index)))
+            self.services.append(rospy.Service(self.resolve(namespace, 'ResetSimulator'), StartSim,
+                lambda req, index=index: self.handle_Reset_service(req, index)))
+            self.services.append(rospy.Service(self.resolve(namespace, 'ServiceChangeSimulator'), SrvCreateJsonableObjectByStr,
+                lambda req, index=index: self.handle_simulator_change_service(req, index)))
+
+        # solve differential equations at frequency
+        self.frequency = rospy.get_param('~frequency', self.frequency)
+        # when late, the missed steps are simulated back to back, so that simulated time keeps up with real time
+        overrun_policy = rospy.get_param('~overrun_policy', scheduler.CATCH_UP)
+
+        rospy.logwarn('simulating ' + str(self.namespaces) + ' with ' + SimClass.__name__)
+
+        self.scheduler = scheduler.DeadlineScheduler(frequency=self.frequency, overrun_policy=overrun_policy)
+        self.scheduler.run(self.simulation_tick, rospy.is_shutdown)
+
+
+if __name__ == '__main__':
+    ABatchSimulatorNode = BatchSimulatorNode()
+    try:
+        ABatchSimulatorNode.simulate_quads()
+    except rospy.ROSInterruptException:
+        pass
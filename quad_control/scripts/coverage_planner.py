@@ -5,6 +5,7 @@ acts as a planner for a coverage task."""
 
 
 import utilities.coverage_utilities as cov
+import utilities.scheduler as sch
 import geometry_msgs.msg as gms
 import std_msgs.msg as sms
 import quad_control.msg as qms
@@ -91,7 +92,7 @@ def __pose_callback(pose):
     
 rp.init_node('coverage_planner')
 __initial_time = rp.get_time()
-__RATE = rp.Rate(1e2)
+__SCHEDULER = sch.DeadlineScheduler(frequency=1e2, overrun_policy=sch.SKIP)
 rp.Subscriber('pose_2d', gms.Pose2D, __pose_callback)
 rp.Service('trade_landmarks', qsv.TradeLandmarks, __trade_landmarks_handler)
 rp.Service('receive_token', qsv.ReceiveToken, __receive_token_handler)
@@ -157,6 +158,4 @@ def __work():
 
 
 
-while not rp.is_shutdown():
-    __work()
-    __RATE.sleep()
+__SCHEDULER.run(__work, rp.is_shutdown)
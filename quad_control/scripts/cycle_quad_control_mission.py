@@ -9,6 +9,9 @@ from quad_control.msg import quad_state_and_cmd
 # node will publish controller state if requested
 from quad_control.msg import Controller_State
 
+# node publishes timing of the control loop
+from quad_control.msg import LoopTiming
+
 # import services defined in quad_control
 # Four SERVICES ARE BEING USED: SaveData, ServiceTrajectoryDesired, Mocap_Id, StartSim
 # SaveData is for saving data in txt file
@@ -22,25 +25,54 @@ from rospkg import RosPack
 
 
 
+import json
+
 import numpy
 from numpy import *
 
 import missions.missions_database
+from missions import mission
+
+# for measuring how long each stage of the control loop takes
+from utilities import loop_timing
+from utilities import telemetry
+from utilities import scheduler
 
 class QuadController():
 
-    def __init__(self):
+    def __init__(self, namespace=''):
 
-        # frequency of controlling action!!
-        self.frequency = 35.0
+        # namespace of the vehicle, e.g. Iris1 (empty: namespace of the node)
+        # (several controllers, with different namespaces, can run in one node)
+        self.namespace = namespace
 
-        # initialize counter for publishing to GUI
-        # we only publish when self.PublishToGUI =1
-        self.PublishToGUI = 1
+        # frequency of controlling action!! (Hz)
+        # (default values: they can be changed by node parameters, see control_compute)
+        self.frequency = 35.0
         # Frequency of publishing to GUI (Hz)
-        frequency_PubToGui = 10
-        # we reset counter when self.PublishToGUI >= PublishToGUIBound
-        self.PublishToGUIBound = int(self.frequency/frequency_PubToGui)
+        self.frequency_gui = 10.0
+        # what to do when an iteration takes longer than the period: catch_up, skip or stretch
+        self.overrun_policy = scheduler.SKIP
+
+        # event driven mode: mission publishes as soon as a new state sample arrives
+        self.event_driven = False
+        # maximum frequency of publishing in event driven mode (Hz)
+        self.frequency_event_driven = 200.0
+        # if no state sample arrives for this long (sec), the control loop publishes instead
+        self.event_stale_timeout = 3.0/self.frequency
+
+        # lockstep mode: mission publishes for every state sample of the simulator
+        # a command stamped with its time (the simulator owns /clock, see quad_simulator.py)
+        self.lockstep = False
+
+        # shared memory mode: mission exchanges state and commands with a simulator
+        # on the same host through /dev/shm (see utilities/shared_memory.py)
+        self.shared_memory = False
+
+        # timing of the stages of the control loop
+        self.loop_timer = loop_timing.LoopTimer(period=1.0/self.frequency)
+        # Frequency of publishing loop timing (Hz)
+        self.frequency_loop_timing = 1.0
 
         # for saving data
         # determine ROS workspace directory
@@ -49,6 +81,12 @@ class QuadController():
         package_path = rp.get_path('quad_control')
         self.package_save_path = package_path+'/experimental_data/data/'
 
+    def resolve(self, name):
+        """Name of a topic or service of this vehicle"""
+        if self.namespace == '':
+            return name
+        return '/' + self.namespace.strip('/') + '/' + name
+
     # callback for when "saving data" is requested
     def _handle_save_data(self,req):
         
@@ -56,7 +94,7 @@ class QuadController():
             # if GUI request data to be saved create file
             
             # namespace, e.g. /Iris1/
-            namespace = rospy.get_namespace()
+            namespace = self.namespace or rospy.get_namespace()
             if not (namespace == ""):
                 # remove / symbol to namespace: e.g, we get namespace= Iris1
                 namespace = namespace.replace("/", "")
@@ -68,7 +106,12 @@ class QuadController():
             # file name provided by user in request 
             file_name         = req.file_name
             # note that "_" is necessary because time_stamp is a number (and file name cannot start with numbers)
-            self.file_handle  = file(self.package_save_path+'_'+time_stamp+'_'+file_name+namespace+'.txt', 'w')
+            # binary telemetry file: convert it to text with telemetry_to_text.py (plot_experiment.py does it automatically)
+            file_path = self.package_save_path+'_'+time_stamp+'_'+file_name+namespace+telemetry.EXTENSION
+
+            # if data was already being saved, close previous file
+            self._close_telemetry()
+            self.telemetry_writer = telemetry.TelemetryWriter(file_path)
 
             # if GUI request data to be saved, set flag to true
             self.SaveDataFlag = True
@@ -78,6 +121,7 @@ class QuadController():
         else:
             # if GUI request data NOT to be saved, set falg to False
             self.SaveDataFlag = False
+            self._close_telemetry()
 
         # return message to Gui, to let it know resquest has been fulfilled
         return SaveDataResponse(True)
@@ -161,6 +205,29 @@ class QuadController():
         # return message to Gui, to let it know resquest has been fulfilled
         return SrvCreateJsonableObjectByStrResponse(received = True)      
 
+    # callback for when patching parameters of controller, reference, ... is requested
+    def _handle_service_patch_mission(self,req):
+
+        try:
+            patch   = json.loads(req.patch)
+            # patched copy is constructed here, and swapped in by the control loop
+            applied = self.mission_object.request_patch(req.jsonable_name, patch)
+        except (ValueError, KeyError, TypeError) as error:
+            rospy.logwarn(str(error))
+            return SrvPatchJsonableByStrResponse(received = False, message = str(error))
+
+        # wait for the control loop, so that the header has the new parameters
+        if not applied.wait(1.0):
+            rospy.logwarn('patch of ' + req.jsonable_name + ' not applied yet')
+
+        telemetry_writer = self.telemetry_writer
+        if self.SaveDataFlag == True and telemetry_writer is not None:
+            telemetry_writer.write_note('patch ' + req.jsonable_name + ' ' + json.dumps(patch))
+        self._add_header_mission()
+
+        # return message to Gui, to let it know resquest has been fulfilled
+        return SrvPatchJsonableByStrResponse(received = True, message = '')
+
     # callback for when changing mission is requested
     def _handle_service_change_mission(self,req):
 
@@ -170,7 +237,14 @@ class QuadController():
         # chosen class taken from dictionary
         MissionClass = missions.missions_database.database[req.jsonable_name]
         
-        self.mission_object = MissionClass.from_string(req.string_parameters)
+        # old mission may still receive states, until it is garbage collected
+        self.mission_object.disable_event_driven()
+        self.mission_object.disable_shared_memory()
+
+        # topics of the mission are in the namespace of this vehicle
+        with mission.vehicle_namespace(self.namespace):
+            self.mission_object = MissionClass.from_string(req.string_parameters)
+        self._configure_mission()
         #rospy.logwarn(self.mission_object.__class__.__name__)
 
         self._add_header_mission()
@@ -194,10 +268,53 @@ class QuadController():
         # parametric description is a method of jsonable
         string = self.mission_object.parametric_description(self.mission_name)
 
-        if self.SaveDataFlag == True:
+        telemetry_writer = self.telemetry_writer
+        if self.SaveDataFlag == True and telemetry_writer is not None:
             rospy.logwarn(string)
             # if data is being saved, append mission header
-            numpy.savetxt(self.file_handle, [string], fmt="%s")
+            telemetry_writer.write_header(string)
+
+    def _close_telemetry(self):
+        # remaining records are written to disk by the writer thread
+        telemetry_writer = self.telemetry_writer
+        self.telemetry_writer = None
+        if telemetry_writer is not None:
+            telemetry_writer.close()
+
+    def _configure_mission(self):
+
+        self.mission_object.loop_timer = self.loop_timer
+
+        if self.shared_memory and not self.mission_object.enable_shared_memory():
+            rospy.logwarn(self.mission_object.__class__.__name__ + ' cannot use shared memory: topics only')
+
+        if self.lockstep:
+            self.mission_object.enable_lockstep()
+        elif self.event_driven:
+            self.mission_object.enable_event_driven(self.frequency_event_driven, self.event_stale_timeout)
+
+    # callback for when the full histograms of the loop timing are requested
+    def _handle_loop_timing_histograms(self,req):
+        return LoopTimingHistogramsResponse(histograms = self.loop_timer.histograms_to_string())
+
+    def publish_loop_timing(self):
+
+        summary = self.loop_timer.summary()
+
+        msg            = LoopTiming()
+        msg.time       = rospy.get_time()
+        msg.period     = self.loop_timer.period
+        msg.iterations = self.loop_timer.iteration.count
+        msg.overruns   = self.loop_timer.overruns
+
+        msg.stage_names = summary['stage_names']
+        msg.mean        = summary['mean']
+        msg.p50         = summary['p50']
+        msg.p95         = summary['p95']
+        msg.p99         = summary['p99']
+        msg.max         = summary['max']
+
+        self.pub_loop_timing.publish(msg)
 
     #callback for turning ON/OFF Mocap and turning OFF/ON the subscription to the simulator
     def handle_Mocap(self,req):
@@ -295,126 +412,178 @@ class QuadController():
 
     def PublishToGui(self):
 
-        # WE ONLY PUBLIS TO TO GUI AT A CERTAIN FREQEUNCY
-        # WHICH IS NOT NECESSARILY THE FREQUENCY OF THE NODE
-        if self.PublishToGUI <= self.PublishToGUIBound:
-            # if we dont publish, we increase counter
-            self.PublishToGUI = self.PublishToGUI + 1
-        else:
-            # if we publish, we increase counter
-            self.PublishToGUI = 1
+        # message of type quad_state_and_cmd
+        # (the same message on every call: publish serializes it right away)
+        st_cmd = self.gui_message
 
-            # create a message of type quad_state_and_cmd
-            st_cmd = quad_state_and_cmd()
+        # get current time
+        st_cmd.time  = rospy.get_time()
 
-            # get current time
-            st_cmd.time  = rospy.get_time()
+        position_velocity = self.mission_object.get_pv()
 
-            position_velocity = self.mission_object.get_pv()
+        # state of quad comes from QUALISYS, or other sensor
+        st_cmd.x     = position_velocity[0]; st_cmd.y     = position_velocity[1]; st_cmd.z     = position_velocity[2]
+        st_cmd.vx    = position_velocity[3]; st_cmd.vy    = position_velocity[4]; st_cmd.vz    = position_velocity[5]
 
-            # state of quad comes from QUALISYS, or other sensor
-            st_cmd.x     = position_velocity[0]; st_cmd.y     = position_velocity[1]; st_cmd.z     = position_velocity[2]
-            st_cmd.vx    = position_velocity[3]; st_cmd.vy    = position_velocity[4]; st_cmd.vz    = position_velocity[5]
+        euler_angle  = self.mission_object.get_euler_angles()
 
-            euler_angle  = self.mission_object.get_euler_angles()
+        st_cmd.roll  = euler_angle[0]; st_cmd.pitch = euler_angle[1]; st_cmd.yaw   = euler_angle[2]
+        ea_desired = self.mission_object.get_ea_desired()            
+        st_cmd.roll_d  = ea_desired[0]; st_cmd.pitch_d = ea_desired[1]; st_cmd.yaw_d   = ea_desired[2]
 
-            st_cmd.roll  = euler_angle[0]; st_cmd.pitch = euler_angle[1]; st_cmd.yaw   = euler_angle[2]
-            ea_desired = self.mission_object.get_ea_desired()            
-            st_cmd.roll_d  = ea_desired[0]; st_cmd.pitch_d = ea_desired[1]; st_cmd.yaw_d   = ea_desired[2]
+        position_velocity_desired = self.mission_object.get_pv_desired()
 
-            position_velocity_desired = self.mission_object.get_pv_desired()
+        st_cmd.xd    = position_velocity_desired[0]; st_cmd.yd    = position_velocity_desired[1]; st_cmd.zd    = position_velocity_desired[2]
+        st_cmd.vxd   = position_velocity_desired[3]; st_cmd.vyd   = position_velocity_desired[4]; st_cmd.vzd   = position_velocity_desired[5]
 
-            st_cmd.xd    = position_velocity_desired[0]; st_cmd.yd    = position_velocity_desired[1]; st_cmd.zd    = position_velocity_desired[2]
-            st_cmd.vxd   = position_velocity_desired[3]; st_cmd.vyd   = position_velocity_desired[4]; st_cmd.vzd   = position_velocity_desired[5]
+        rc_input_to_quad = self.mission_object.rc_output
+        st_cmd.cmd_1 = rc_input_to_quad[0]; st_cmd.cmd_2 = rc_input_to_quad[1]; st_cmd.cmd_3 = rc_input_to_quad[2]; st_cmd.cmd_4 = rc_input_to_quad[3]
 
-            rc_input_to_quad = self.mission_object.rc_output
-            st_cmd.cmd_1 = rc_input_to_quad[0]; st_cmd.cmd_2 = rc_input_to_quad[1]; st_cmd.cmd_3 = rc_input_to_quad[2]; st_cmd.cmd_4 = rc_input_to_quad[3]
+        st_cmd.cmd_5 = 1500.0; st_cmd.cmd_6 = 1500.0; st_cmd.cmd_7 = 1500.0; st_cmd.cmd_8 = 1500.0
 
-            st_cmd.cmd_5 = 1500.0; st_cmd.cmd_6 = 1500.0; st_cmd.cmd_7 = 1500.0; st_cmd.cmd_8 = 1500.0
+        self.pub.publish(st_cmd)
 
-            self.pub.publish(st_cmd)
+        # controller state is supposed to be published
+        if self.flagPublish_ctr_st:
+            # publish controller state
+            msg       = self.controller_state_message
+            msg.time  = rospy.get_time()
+            msg.d_est = self.ControllerObject.d_est
+            self.pub_ctr_st.publish(msg) 
 
-            # controller state is supposed to be published
-            if self.flagPublish_ctr_st:
-                # publish controller state
-                msg       = Controller_State()
-                msg.time  = rospy.get_time()
-                msg.d_est = self.ControllerObject.d_est
-                self.pub_ctr_st.publish(msg) 
+    def control_tick(self):
 
-    def control_compute(self):
+        # in event driven mode, this only publishes if state samples stopped arriving
+        self.mission_object.timer_publish()
 
-        # node will be named quad_control (see rqt_graph)
-        rospy.init_node('quad_control', anonymous=True)
+        with self.loop_timer.stage('logging'):
+            telemetry_writer = self.telemetry_writer
+            if self.SaveDataFlag == True and telemetry_writer is not None:
+                # if we want to save data: copied into a preallocated block, written to disk by another thread
+                telemetry_writer.append(self.mission_object.get_complete_data())
+
+    def read_parameters(self):
+
+        # rates of the control loop and of the GUI, and overrun policy (see utilities/scheduler.py)
+        self.frequency      = rospy.get_param('~control_frequency', self.frequency)
+        self.frequency_gui  = rospy.get_param('~gui_frequency', self.frequency_gui)
+        self.overrun_policy = rospy.get_param('~overrun_policy', self.overrun_policy)
+
+        # event driven mode (see Mission.enable_event_driven)
+        self.event_driven           = rospy.get_param('~event_driven', self.event_driven)
+        self.frequency_event_driven = rospy.get_param('~event_max_frequency', self.frequency_event_driven)
+        self.event_stale_timeout    = rospy.get_param('~event_stale_timeout', 3.0/self.frequency)
+
+        # lockstep mode (see Mission.enable_lockstep): needs /use_sim_time
+        self.lockstep = rospy.get_param('~lockstep', self.lockstep)
+
+        # shared memory mode (see Mission.enable_shared_memory)
+        self.shared_memory = rospy.get_param('~shared_memory', self.shared_memory)
+
+        self.loop_timer.set_period(1.0/self.frequency)
+
+    def setup(self):
+        """Create publishers, services and default mission of this vehicle"""
 
         # message published by quad_control to GUI 
-        self.pub = rospy.Publisher('quad_state_and_cmd', quad_state_and_cmd, queue_size=10)
+        self.pub = rospy.Publisher(self.resolve('quad_state_and_cmd'), quad_state_and_cmd, queue_size=10)
+        self.gui_message = quad_state_and_cmd()
 
         # for publishing state of the controller
-        self.pub_ctr_st = rospy.Publisher('ctr_state', Controller_State, queue_size=10)
+        self.pub_ctr_st = rospy.Publisher(self.resolve('ctr_state'), Controller_State, queue_size=10)
+        self.controller_state_message = Controller_State()
         # initialize flag for publishing controller state at false
         self.flagPublish_ctr_st = False
 
+        # for publishing timing of the control loop
+        self.pub_loop_timing = rospy.Publisher(self.resolve('loop_timing'), LoopTiming, queue_size=10)
+        # Service: full histograms of the timing of the control loop
+        rospy.Service(self.resolve('LoopTimingHistograms'), LoopTimingHistograms, self._handle_loop_timing_histograms)
+
         #-----------------------------------------------------------------------#
         # TO SAVE DATA FLAG
         # by default, NO data is saved
         self.SaveDataFlag = False
+        # writer of the binary telemetry file (None when no data is saved)
+        self.telemetry_writer = None
         # we will use this just for convenience, when generating the names of the files
         # where the data will be saved
         self.TimeSaveData = rospy.get_time()
         # Service is created, so that data is saved when GUI requests
-        Save_data_service = rospy.Service('SaveDataFromGui', SaveData, self._handle_save_data)
+        Save_data_service = rospy.Service(self.resolve('SaveDataFromGui'), SaveData, self._handle_save_data)
 
 
         #-----------------------------------------------------------------------#
         # service for selecting desired trajectory
         # by default, staying still in origin is desired trajectory
-        TrajDes_service = rospy.Service('ServiceTrajectoryDesired', SrvTrajectoryDesired, self._handle_service_trajectory_des)
+        TrajDes_service = rospy.Service(self.resolve('ServiceTrajectoryDesired'), SrvTrajectoryDesired, self._handle_service_trajectory_des)
 
 
         #-----------------------------------------------------------------------#
         # Service is created, so that Mocap is turned ON or OFF whenever we want
-        Save_MOCAP_service = rospy.Service('Mocap_Set_Id', Mocap_Id, self.handle_Mocap)
+        Save_MOCAP_service = rospy.Service(self.resolve('Mocap_Set_Id'), Mocap_Id, self.handle_Mocap)
 
         # Service for providing list of available mocap bodies to GUI
-        mocap_available_bodies = rospy.Service('MocapBodies', MocapBodies, self.handle_available_bodies)
+        mocap_available_bodies = rospy.Service(self.resolve('MocapBodies'), MocapBodies, self.handle_available_bodies)
 
         #-----------------------------------------------------------------------#
         # Services are created, so that user can change controller, reference, yaw_controller and yaw reference on GUI
-        rospy.Service('ServiceChangeController'   , SrvCreateJsonableObjectByStr, self._handle_service_change_controller)
-        rospy.Service('ServiceChangeReference'    , SrvCreateJsonableObjectByStr, self._handle_service_change_reference)
-        rospy.Service('ServiceChangeYawController', SrvCreateJsonableObjectByStr, self._handle_service_change_yaw_controller)
-        rospy.Service('ServiceChangeYawReference' , SrvCreateJsonableObjectByStr, self._handle_service_change_yaw_reference)
+        rospy.Service(self.resolve('ServiceChangeController')   , SrvCreateJsonableObjectByStr, self._handle_service_change_controller)
+        rospy.Service(self.resolve('ServiceChangeReference')    , SrvCreateJsonableObjectByStr, self._handle_service_change_reference)
+        rospy.Service(self.resolve('ServiceChangeYawController'), SrvCreateJsonableObjectByStr, self._handle_service_change_yaw_controller)
+        rospy.Service(self.resolve('ServiceChangeYawReference') , SrvCreateJsonableObjectByStr, self._handle_service_change_yaw_reference)
+
+        rospy.Service(self.resolve('ServiceChangeMission'), SrvCreateJsonableObjectByStr, self._handle_service_change_mission)
 
-        rospy.Service('ServiceChangeMission', SrvCreateJsonableObjectByStr, self._handle_service_change_mission)
+        # Service: change some parameters of controller, reference, ... keeping their state
+        rospy.Service(self.resolve('ServicePatchMission'), SrvPatchJsonableByStr, self._handle_service_patch_mission)
 
         #-----------------------------------------------------------------------#
         # Service: change neutral value that guarantees that a quad remains at a desired altitude
-        rospy.Service('IrisPlusResetNeutral', IrisPlusResetNeutral, self._handle_iris_plus_reset_neutral)
-        rospy.Service('IrisPlusSetNeutral', IrisPlusSetNeutral, self._handle_iris_plus_set_neutral)
+        rospy.Service(self.resolve('IrisPlusResetNeutral'), IrisPlusResetNeutral, self._handle_iris_plus_reset_neutral)
+        rospy.Service(self.resolve('IrisPlusSetNeutral'), IrisPlusSetNeutral, self._handle_iris_plus_set_neutral)
         #-----------------------------------------------------------------------#
 
         self.mission_name  = 'Default'
         # Default Mission Class
         MissionClass = missions.missions_database.database['Default']        
         # construct a default object
-        self.mission_object = MissionClass()
+        with mission.vehicle_namespace(self.namespace):
+            self.mission_object = MissionClass()
+        self._configure_mission()
 
-        rate = rospy.Rate(self.frequency)
+    def add_tasks(self, control_scheduler, prefix=''):
+        """Tasks of this vehicle that run at a lower rate than the control loop"""
 
-        while not rospy.is_shutdown():
+        # publish to GUI (it also contains publish state of Control to GUI)
+        control_scheduler.add_task(prefix+'gui_publish', self.frequency_gui, self.PublishToGui)
+        # WE ONLY PUBLISH LOOP TIMING AT A LOW FREQUENCY
+        control_scheduler.add_task(prefix+'loop_timing', self.frequency_loop_timing, self.publish_loop_timing)
 
-            self.mission_object.publish()
+    def close(self):
+        self.mission_object.disable_shared_memory()
+        self._close_telemetry()
 
-            # publish to GUI (it also contains publish state of Control to GUI)
-            self.PublishToGui()
+    def control_compute(self):
 
-            if self.SaveDataFlag == True:
-                # if we want to save data
-                numpy.savetxt(self.file_handle, [self.mission_object.get_complete_data()], delimiter=' ')
-            
-            # go to sleep
-            rate.sleep()
+        # node will be named quad_control (see rqt_graph)
+        rospy.init_node('quad_control', anonymous=True)
+
+        self.read_parameters()
+
+        self.setup()
+
+        # control loop at self.frequency, with absolute deadlines on a monotonic clock
+        self.scheduler = scheduler.DeadlineScheduler(
+            frequency=self.frequency,
+            overrun_policy=self.overrun_policy,
+            loop_timer=self.loop_timer)
+
+        self.add_tasks(self.scheduler)
+
+        self.scheduler.run(self.control_tick, rospy.is_shutdown)
+
+        self.close()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""Simulator node of the Firefly, in place of RotorS/Gazebo (no rendering).
+
+Subscribes to the motor speeds (mav_msgs/Actuators) and publishes the
+ground truth odometry (nav_msgs/Odometry), in the topics of RotorS, so
+that the missions in missions/gazebo run unchanged:
+    /<namespace>/command/motor_speed
+    /<namespace>/ground_truth/odometry
+The vehicle is FireflySimulator (simulators/firefly_simulator); the
+physics is integrated at ~physics_frequency, and the odometry is
+published at ~frequency.
+
+Parameters:
+    ~namespace            (firefly)
+    ~frequency            rate of the odometry (Hz, 100)
+    ~physics_frequency    integration steps per second (1000)
+    ~motor_time_constant  first order lag of the motors (sec, 0: none)
+    ~initial_position     [x, y, z] (m)
+"""
+
+import rospy
+
+from mav_msgs.msg import Actuators
+from nav_msgs.msg import Odometry
+
+import numpy
+
+from utilities import scheduler
+
+from simulators.firefly_simulator import firefly_simulator
+from simulators import quaternion_simulator
+
+
+class FireflySimulatorNode(object):
+
+    def __init__(self):
+
+        # rate of the odometry (Hz)
+        self.frequency = 100.0
+        # integration steps per second: physics_frequency/frequency steps per tick
+        self.physics_frequency = 1000.0
+
+        self.odometry = Odometry()
+
+    def get_motor_speeds(self, actuators):
+        self.sim.set_control(numpy.array(actuators.angular_velocities[0:6]))
+
+    def write_odometry(self):
+        """Odometry of RotorS: pose in the world frame, twist in the body frame"""
+        odometry = self.odometry
+        odometry.header.stamp = rospy.Time.now()
+
+        position = self.sim.get_position()
+        rotation = self.sim.get_rotation_matrix()
+        # velocity and angular velocity are in the body frame
+        velocity_body = numpy.dot(rotation.T, self.sim.get_velocity())
+        omega_body    = self.sim.get_angular_velocity()
+        quaternion    = quaternion_simulator.quaternion_from_rot(rotation)
+
+        pose = odometry.pose.pose
+        pose.position.x = position[0]; pose.position.y = position[1]; pose.position.z = position[2]
+        pose.orientation.x = quaternion[0]; pose.orientation.y = quaternion[1]
+        pose.orientation.z = quaternion[2]; pose.orientation.w = quaternion[3]
+
+        twist = odometry.twist.twist
+        twist.linear.x  = velocity_body[0]; twist.linear.y  = velocity_body[1]; twist.linear.z  = velocity_body[2]
+        twist.angular.x = omega_body[0];    twist.angular.y = omega_body[1];    twist.angular.z = omega_body[2]
+
+        return odometry
+
+    def simulation_tick(self):
+        time_step = 1.0/(self.sub_steps*self.frequency)
+        for step in range(self.sub_steps):
+            self.sim.run(time_step)
+        self.pub_odometry.publish(self.write_odometry())
+
+    def simulate(self):
+
+        rospy.init_node('firefly_simulator', anonymous=True)
+
+        namespace = '/' + rospy.get_param('~namespace', 'firefly').strip('/') + '/'
+
+        self.frequency         = rospy.get_param('~frequency', self.frequency)
+        self.physics_frequency = rospy.get_param('~physics_frequency', self.physics_frequency)
+        self.sub_steps         = max(1, int(round(float(self.physics_frequency)/self.frequency)))
+
+        self.sim = firefly_simulator.FireflySimulator(
+            initial_position    = numpy.array(rospy.get_param('~initial_position', [0.0, 0.0, 0.0]), dtype=float),
+            motor_time_constant = rospy.get_param('~motor_time_constant', 0.0))
+        self.odometry.header.frame_id = 'world'
+        self.odometry.child_frame_id  = namespace.strip('/') + '/base_link'
+
+        self.pub_odometry = rospy.Publisher(namespace + 'ground_truth/odometry', Odometry, queue_size=10)
+        rospy.Subscriber(namespace + 'command/motor_speed', Actuators, self.get_motor_speeds)
+
+        # when late, the missed steps are simulated back to back, so that simulated time keeps up with real time
+        self.scheduler = scheduler.DeadlineScheduler(frequency=self.frequency, overrun_policy=scheduler.CATCH_UP)
+        self.scheduler.run(self.simulation_tick, rospy.is_shutdown)
+
+
+if __name__ == '__main__':
+    simulator_node = FireflySimulatorNode()
+    simulator_node.simulate()
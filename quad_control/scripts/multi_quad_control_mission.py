@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# this line is just used to define the type of document
+
+# One node that controls several vehicles: one mission per namespace
+# (e.g., Iris1, Iris2, ...), ticked by one shared scheduler.
+# Every vehicle has the same topics and services as a
+# cycle_quad_control_mission.py node running in its namespace
+# (/Iris1/ServiceChangeMission, /Iris1/quad_cmd, ...), so the GUI does not change.
+#
+# parameters (private):
+#   namespaces: list of vehicles, e.g. ['Iris1', 'Iris2']
+#   workers: number of threads that tick the vehicles (0: tick them one after the other)
+#   and the parameters of cycle_quad_control_mission.py (control_frequency, gui_frequency, ...)
+#
+# Vehicles are ticked by threads, not processes: missions own rospy
+# publishers and subscribers, that cannot be shared with other processes.
+#
+# The timing of the shared loop (jitter, and the tick and the tasks of every
+# vehicle: Iris1/control_tick, Iris1/gui_publish, ...) is given by the
+# service ~LoopTimingHistograms.
+
+import rospy
+
+from multiprocessing.pool import ThreadPool
+
+from quad_control.srv import LoopTimingHistograms, LoopTimingHistogramsResponse
+
+# controller of one vehicle
+from cycle_quad_control_mission import QuadController
+
+from utilities import loop_timing
+from utilities import scheduler
+
+
+class MultiQuadController():
+
+    def __init__(self):
+
+        self.controllers = []
+        self.pool = None
+
+        # timing of the shared loop: the tick and the tasks of every vehicle
+        # are stages named after its namespace (e.g., Iris1/control_tick)
+        self.loop_timer = None
+        # namespace: stage of loop_timer that times the tick of the vehicle
+        self.tick_stages = {}
+
+    def _tick_vehicle(self, controller):
+        controller.loop_timer.begin_iteration()
+        with self.tick_stages[controller.namespace]:
+            controller.control_tick()
+        controller.loop_timer.end_iteration()
+
+    def control_tick(self):
+        if self.pool is None:
+            for controller in self.controllers:
+                self._tick_vehicle(controller)
+        else:
+            self.pool.map(self._tick_vehicle, self.controllers)
+
+    # callback for when the full histograms of the timing of the shared loop are requested
+    def _handle_loop_timing_histograms(self,req):
+        return LoopTimingHistogramsResponse(histograms = self.loop_timer.histograms_to_string())
+
+    def control_compute(self):
+
+        rospy.init_node('quad_control_host', anonymous=True)
+
+        namespaces = rospy.get_param('~namespaces', ['Iris1'])
+        workers    = rospy.get_param('~workers', 0)
+
+        for namespace in namespaces:
+            controller = QuadController(namespace=namespace)
+            controller.read_parameters()
+            controller.setup()
+            self.controllers.append(controller)
+
+        # all vehicles have the same rates (parameters of this node)
+        frequency      = self.controllers[0].frequency
+        overrun_policy = self.controllers[0].overrun_policy
+
+        if workers > 0:
+            self.pool = ThreadPool(min(workers, len(self.controllers)))
+
+        # the stages are created here: the workers only use them
+        self.loop_timer = loop_timing.LoopTimer(period=1.0/frequency)
+        for controller in self.controllers:
+            self.tick_stages[controller.namespace] = self.loop_timer.stage(controller.namespace+'/control_tick')
+        rospy.Service('~LoopTimingHistograms', LoopTimingHistograms, self._handle_loop_timing_histograms)
+
+        self.scheduler = scheduler.DeadlineScheduler(
+            frequency=frequency,
+            overrun_policy=overrun_policy,
+            loop_timer=self.loop_timer)
+
+        for controller in self.controllers:
+            controller.add_tasks(self.scheduler, prefix=controller.namespace+'/')
+
+        rospy.logwarn('controlling ' + str(namespaces) + ' at ' + str(frequency) + 'Hz')
+
+        self.scheduler.run(self.control_tick, rospy.is_shutdown)
+
+        for controller in self.controllers:
+            controller.close()
+
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+
+if __name__ == '__main__':
+    AMultiQuadController = MultiQuadController()
+    try:
+        AMultiQuadController.control_compute()
+    except rospy.ROSInterruptException:
+        pass
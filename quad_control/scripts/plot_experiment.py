@@ -5,26 +5,33 @@ import rospy
 import missions.missions_database
 
 from utilities import jsonable
+from utilities import telemetry
 
 # from quad_control.srv import PlotService
 import quad_control.srv
 
-import matplotlib
-# this is necessary because of threading and plotting
-matplotlib.use('Agg')
-from matplotlib import pyplot as plt
 
-import matplotlib.backends.backend_pdf
+def handle_plot_service(request):
 
-import pdfkit
+    # matplotlib, pdfkit and PyPDF2 are slow to import:
+    # they are imported by the first request, not when the node starts
+    import matplotlib
+    # this is necessary because of threading and plotting
+    matplotlib.use('Agg')
+    from matplotlib import pyplot as plt
 
-from PyPDF2 import PdfFileMerger, PdfFileReader 
+    import matplotlib.backends.backend_pdf
 
+    import pdfkit
 
-def handle_plot_service(request):
+    from PyPDF2 import PdfFileMerger, PdfFileReader 
 
     data_file = request.file_path
 
+    # binary telemetry files are converted to the text format first
+    if data_file.endswith(telemetry.EXTENSION):
+        data_file = telemetry.telemetry_to_text(data_file)
+
     # read mode by default
     read_file = open(data_file).read()
 
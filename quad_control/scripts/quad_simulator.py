@@ -37,11 +37,23 @@ from numpy import sin as s
 # from utility_functions import GetEulerAnglesDeg
 from utilities.utility_functions import euler_deg_from_rot
 
+from utilities import scheduler
+
+import threading
+
 import simulators.simulators_dictionary as shsd
 
 
 from visualization_msgs.msg import Marker
 
+# lockstep mode: the simulator publishes the ros time
+from rosgraph_msgs.msg import Clock
+
+import time
+
+# state and commands in shared memory, for a controller on the same host
+from utilities import shared_memory
+
 
 simdic = shsd.simulators_dictionary
 
@@ -76,9 +88,38 @@ class SimulatorNode():
         #TODO leading underscores for internal variables
 
 
-        # frequency of node (Hz)
+        # frequency of node (Hz): quad_state is published at this rate
         self.frequency = 100
         # self.frequency = 1
+        # integration steps per second: physics_frequency/frequency steps per tick
+        self.physics_frequency = 1000
+        # the rviz marker is published at this rate
+        self.marker_frequency = 30
+
+        # rates requested by the service, applied by the next tick
+        self.pending_rates = None
+        self.pending_rates_lock = threading.Lock()
+
+        # lockstep mode: this node owns /clock, and it advances time only when
+        # the controller has answered the current state with a command stamped with its time
+        self.lockstep = False
+        # wall time (sec) to wait for an acknowledgement, before advancing anyway
+        self.lockstep_timeout = 1.0
+        self.lockstep_timeouts = 0
+        # time of the state answered by the last command of the controller
+        self.acknowledged_time = None
+        self.acknowledged_condition = threading.Condition()
+
+        # shared memory mode: the state is also written in a ring in /dev/shm,
+        # and the commands are read from a ring written by the mission
+        # (see utilities/shared_memory.py); the topics are still published
+        self.shared_memory = False
+        self.state_ring = None
+        self.state_record = numpy.zeros(shared_memory.STATE_COLUMNS)
+        self.command_ring = None
+        self.command_record = numpy.zeros(shared_memory.COMMAND_COLUMNS)
+        # number of the last command read from the ring (0: none, commands come from quad_cmd)
+        self.command_number = 0
 
         # delay for starting simulator (sec)
         self.TimeDelay = 2.0
@@ -125,16 +166,24 @@ class SimulatorNode():
 
     # this is the callback function that is used when input is found to be published
     def get_input(self, data):
-        # create zero vector
-        U = numpy.zeros(4)
-        U[0] = data.cmd_1
-        U[1] = data.cmd_2
-        U[2] = data.cmd_3
-        U[3] = data.cmd_4
-
-        # update input 
-        self.U = U
-        self.sim.set_control(U)
+        # commands from shared memory (command_number > 0) are in the ring
+        # before they are on the topic, which is a mirror
+        if self.command_number == 0:
+            # create zero vector
+            U = numpy.zeros(4)
+            U[0] = data.cmd_1
+            U[1] = data.cmd_2
+            U[2] = data.cmd_3
+            U[3] = data.cmd_4
+
+            # update input 
+            self.U = U
+            self.sim.set_control(U)
+
+        # lockstep mode: the command answers the state of its time
+        with self.acknowledged_condition:
+            self.acknowledged_time = data.time
+            self.acknowledged_condition.notify()
 
 
     # callback used when starting simulator
@@ -171,6 +220,50 @@ class SimulatorNode():
         return SrvCreateJsonableObjectByStrResponse(received = True)
 
 
+    # callback used for changing the rates of physics, quad_state and marker
+    def _handle_rates_service(self, req):
+        physics_frequency = req.physics_frequency if req.physics_frequency > 0 else self.physics_frequency
+        state_frequency   = req.state_frequency if req.state_frequency > 0 else self.frequency
+        marker_frequency  = req.marker_frequency if req.marker_frequency > 0 else self.marker_frequency
+        physics_frequency = self.sub_steps_of(physics_frequency, state_frequency)*state_frequency
+        with self.pending_rates_lock:
+            self.pending_rates = (physics_frequency, state_frequency, marker_frequency)
+
+        # return message: resquest will be fulfilled by the next tick
+        return SimulatorRatesResponse(received=True, message='',
+            physics_frequency=physics_frequency,
+            state_frequency=state_frequency,
+            marker_frequency=marker_frequency)
+
+
+    @staticmethod
+    def sub_steps_of(physics_frequency, state_frequency):
+        """Integration steps in each period of quad_state (at least 1)"""
+        return max(1, int(round(float(physics_frequency)/state_frequency)))
+
+
+    def set_rates(self, physics_frequency, state_frequency, marker_frequency):
+        self.frequency = state_frequency
+        self.sub_steps = self.sub_steps_of(physics_frequency, state_frequency)
+        self.physics_frequency = self.sub_steps*state_frequency
+        self.marker_frequency = marker_frequency
+        if hasattr(self, 'scheduler'):
+            self.scheduler.set_frequency(self.frequency)
+            self.scheduler.get_task('marker').set_frequency(self.marker_frequency)
+
+
+    def apply_pending_rates(self):
+        """Apply the rates requested by the service (between two ticks)"""
+        if self.pending_rates is None:
+            return
+        with self.pending_rates_lock:
+            pending_rates = self.pending_rates
+            self.pending_rates = None
+        self.set_rates(*pending_rates)
+        rospy.loginfo('simulator rates (Hz): physics %g, quad_state %g, marker %g' % (
+            self.physics_frequency, self.frequency, self.marker_frequency))
+
+
     def write_state(self):
 
         # create a message of type quad_state_and_cmd
@@ -187,9 +280,8 @@ class SimulatorNode():
         state.vy = simstate[4]
         state.vz = simstate[5]
 
-        # rotation matrix
-        R  = simstate[6:15]
-        R  = numpy.reshape(R,(3,3))
+        # rotation matrix (the attitude state may be a quaternion)
+        R  = self.sim.get_rotation_matrix()
         ee = euler_deg_from_rot(R)
 
         state.roll  = ee[0]
@@ -199,6 +291,149 @@ class SimulatorNode():
         return state
 
 
+    def publish_state(self):
+        """Publish quad_state, and write it in shared memory"""
+        state = self.write_state()
+        self.pub.publish(state)
+
+        if self.state_ring is not None:
+            record = self.state_record
+            record[0] = state.time
+            record[1] = state.x;  record[2] = state.y;  record[3] = state.z
+            record[4] = state.vx; record[5] = state.vy; record[6] = state.vz
+            record[7] = state.roll; record[8] = state.pitch; record[9] = state.yaw
+            record[-1] = time.time()
+            self.state_ring.write(record)
+
+
+    def read_command_ring(self):
+        """Take the latest command of the mission from shared memory, if any"""
+        if self.command_ring is None:
+            try:
+                self.command_ring = shared_memory.SeqlockRing(
+                    shared_memory.path_of(rospy.resolve_name('quad_cmd')), shared_memory.COMMAND_COLUMNS)
+            except (IOError, OSError, ValueError):
+                # no mission in shared memory mode (yet)
+                return
+        number = self.command_ring.read_latest(self.command_record)
+        if number == 0 or not shared_memory.is_fresh(self.command_record):
+            # left in /dev/shm by a mission that is gone: commands come from
+            # quad_cmd, and the ring is opened again (a new mission makes a new one)
+            self.command_ring = None
+            self.command_number = 0
+            return
+        if number != self.command_number:
+            self.command_number = number
+            self.U = numpy.array(self.command_record[1:5])
+            self.sim.set_control(self.U)
+
+
+    def simulation_tick(self):
+        self.advance()
+        # create a message of type quad_state with current state, and publish it
+        self.publish_state()
+
+
+    def advance(self):
+        """Advance the simulator by one period of quad_state"""
+
+        if self.shared_memory:
+            self.read_command_ring()
+
+        # WARNING: IT IS VERY IMPORTANT THAT U0, U1, U2 AND U3 ARE PROVIDED THIS WAY
+        # I CANNOT PROVIDE SELF.U TO THE INTEGRATION BECAUSE IT IS CHANGING 
+        # AND IT MESSES UP THE INTEGRATION!!! 
+        # thid DOES NOT work: r.set_f_params(deepcopy(self.U),parameters)
+        
+        self.apply_pending_rates()
+
+        # we delay system the initialization of the system by a TimeDelay
+        simtime = self.sim.get_time()
+        if (simtime >= self.TimeDelay and self.StartFlag):
+            # sub_steps integration steps in each period of quad_state
+            time_step = 1.0/self.physics_frequency
+            for step in range(self.sub_steps):
+                self.sim.run(time_step)
+            # set dynamics vector accordinf to current input vector
+            # input vector is assumed constant during integration
+            #self.r.set_f_params(Input(self.U))
+            #  integrate equation for period of loop
+            #self.r.integrate(self.r.t + 1.0/self.frequency);
+            # reset initial state and initial time
+            #self.r.set_initial_value(self.r.y, self.r.t)
+        else:
+            # need to update initial state and time
+            #self.r.set_initial_value(self.r.y, self.r.t + 1.0/self.frequency)
+            # (the recorded trajectory is only cleared by ResetSimulator)
+            self.sim.hold(simtime+1.0/self.frequency)
+
+
+    def wait_acknowledgement(self, state_time):
+        """Wait until the command stamped with state_time (the answer of the
+        controller to the state of state_time) has arrived, for at most
+        lockstep_timeout (wall time). Returns False on timeout."""
+        deadline = time.time() + self.lockstep_timeout
+        with self.acknowledged_condition:
+            while self.acknowledged_time is None or self.acknowledged_time < state_time:
+                remaining = deadline - time.time()
+                if remaining <= 0.0 or rospy.is_shutdown():
+                    return False
+                self.acknowledged_condition.wait(remaining)
+        return True
+
+
+    def run_lockstep(self):
+        """Publish /clock and quad_state, wait for the controller, advance;
+        as fast as the slowest of simulator and controller"""
+
+        # time does not start until a controller is listening
+        while self.sub_command.get_num_connections() == 0 and not rospy.is_shutdown():
+            rospy.loginfo_throttle(5.0, 'lockstep: waiting for a controller on ' + self.sub_command.resolved_name)
+            time.sleep(0.1)
+
+        clock = Clock()
+        marker_time = self.sim.get_time()
+        while not rospy.is_shutdown():
+            simtime = self.sim.get_time()
+            clock.clock = rospy.Time.from_sec(simtime)
+            self.pub_clock.publish(clock)
+            self.publish_state()
+
+            # rviz marker, at marker_frequency in simulated time
+            if simtime >= marker_time:
+                self.publish_marker()
+                marker_time = simtime + 1.0/self.marker_frequency
+
+            if not self.wait_acknowledgement(simtime):
+                self.lockstep_timeouts += 1
+                rospy.logwarn_throttle(5.0, 'lockstep: no acknowledgement of state at %.3f s (%d timeouts)' % (simtime, self.lockstep_timeouts))
+
+            if self.StartFlag:
+                self.advance()
+            else:
+                # time stands still until the simulation is started
+                time.sleep(1.0/self.frequency)
+
+
+    def publish_marker(self):
+
+        simstate = self.sim.get_state()
+
+        # marker.pose.position.x = 0.1 + numpy.cos(2*3.14/5*rospy.get_time());
+        self.marker.pose.position.x = simstate[0]
+        self.marker.pose.position.y = simstate[1]
+        self.marker.pose.position.z = simstate[2]
+
+        # quaternion
+        # marker.pose.orientation.x = simstate[0]
+        # marker.pose.orientation.y = simstate[1]
+        # marker.pose.orientation.z = simstate[2]
+        # marker.pose.orientation.w = simstate[2]          
+
+        self.pub_rviz.publish( self.marker )
+
+        # rospy.logwarn(marker)
+
     def simulate_quad(self):
 
         # simulator node 
@@ -208,21 +443,31 @@ class SimulatorNode():
         #-----------------------------------------------------------------------#
 
         # Simulator subscribes to command inputs, published by a controller
-        rospy.Subscriber("quad_cmd", quad_cmd, self.get_input)
+        # (the subscriber counts the controllers, in lockstep mode)
+        self.sub_command = rospy.Subscriber("quad_cmd", quad_cmd, self.get_input)
 
         #-----------------------------------------------------------------------#
         #-----------------------------------------------------------------------#
 
         # this node is a simulator, thus it will publish the state of the quad
         # it uses the commands -- that it is subscribed to -- to solve differential equations 
-        pub = rospy.Publisher('quad_state', quad_state, queue_size=10)
+        self.pub = rospy.Publisher('quad_state', quad_state, queue_size=10)
+
+        # shared memory mode: state also written in /dev/shm (see utilities/shared_memory.py)
+        self.shared_memory = rospy.get_param('~shared_memory', self.shared_memory)
+        if self.shared_memory:
+            self.state_ring = shared_memory.SeqlockRing(
+                shared_memory.path_of(rospy.resolve_name('quad_state')), shared_memory.STATE_COLUMNS, create=True)
+            # removed from /dev/shm, so that no mission takes it for a running simulator
+            rospy.on_shutdown(self.state_ring.unlink)
         
 
         #-----------------------------------------------------------------------#
         #-----------------------------------------------------------------------#
         # TO SAVE FLAG
         # by default, no dynamics: everything stopped
-        self.StartFlag = False
+        # (unless ~start, e.g., to replay a mission without GUI)
+        self.StartFlag = rospy.get_param('~start', False)
         # Service is created, so that simulation can be started or stopped
         Start_service = rospy.Service('StartSimulator', StartSim, self.handle_Start_service)
         # Service is created, so that simulation can be reseted
@@ -240,12 +485,25 @@ class SimulatorNode():
         Chg_Simulator = rospy.Service('ServiceChangeSimulator', SrvCreateJsonableObjectByStr, self.__handle_simulator_change_service)
 
 
-        # solve differential equations at frequency
-        rate = rospy.Rate(self.frequency)
+        # Service is created, so that the rates can be changed while simulating
+        Rates_service = rospy.Service('ServiceSimulatorRates', SimulatorRates, self._handle_rates_service)
+
+
+        # publish quad_state at frequency, integrate at physics_frequency (a multiple of frequency),
+        # and publish the rviz marker at marker_frequency
+        self.set_rates(
+            rospy.get_param('~physics_frequency', self.physics_frequency),
+            rospy.get_param('~frequency', self.frequency),
+            rospy.get_param('~marker_frequency', self.marker_frequency))
+        # lockstep mode: simulated time, published in /clock (needs /use_sim_time)
+        self.lockstep         = rospy.get_param('~lockstep', self.lockstep)
+        self.lockstep_timeout = rospy.get_param('~lockstep_timeout', self.lockstep_timeout)
+        # when late, the missed steps are simulated back to back, so that simulated time keeps up with real time
+        overrun_policy = rospy.get_param('~overrun_policy', scheduler.CATCH_UP)
         
-        pub_rviz = rospy.Publisher("visualization_marker",Marker, queue_size=10);
+        self.pub_rviz = rospy.Publisher("visualization_marker",Marker, queue_size=10);
 
-        marker = Marker()
+        self.marker = marker = Marker()
         marker.header.frame_id = "map";
         marker.header.stamp = rospy.Time();
         marker.ns = "my_namespace";
@@ -279,58 +537,15 @@ class SimulatorNode():
         marker.mesh_resource = "package://rotors_description/meshes/firefly.dae"
         # marker.mesh_resource = "package://pr2_description/meshes/base_v0/base.dae";
 
-        while not rospy.is_shutdown():
+        if self.lockstep:
+            self.pub_clock = rospy.Publisher('/clock', Clock, queue_size=1)
+            self.run_lockstep()
+            return
 
-            
-            # WARNING: IT IS VERY IMPORTANT THAT U0, U1, U2 AND U3 ARE PROVIDED THIS WAY
-            # I CANNOT PROVIDE SELF.U TO THE INTEGRATION BECAUSE IT IS CHANGING 
-            # AND IT MESSES UP THE INTEGRATION!!! 
-            # thid DOES NOT work: r.set_f_params(deepcopy(self.U),parameters)
-            
-            # we delay system the initialization of the system by a TimeDelay
-            simtime = self.sim.get_time()
-            simstate = self.sim.get_state()
-            if (simtime >= self.TimeDelay and self.StartFlag):
-                self.sim.run(1.0/self.frequency)
-                # set dynamics vector accordinf to current input vector
-                # input vector is assumed constant during integration
-                #self.r.set_f_params(Input(self.U))
-                #  integrate equation for period of loop
-                #self.r.integrate(self.r.t + 1.0/self.frequency);
-                # reset initial state and initial time
-                #self.r.set_initial_value(self.r.y, self.r.t)
-            else:
-                # need to update initial state and time
-                #self.r.set_initial_value(self.r.y, self.r.t + 1.0/self.frequency)
-                self.sim.reset(
-                    initial_time=simtime+1.0/self.frequency,
-                    initial_state=simstate
-                )
-            
-            # create a message of type quad_state with current state
-            state = self.write_state()
-            # publish current state
-            # rospy.logwarn(state)
-            # rospy.logwarn('aaaaaaaaaaaaaaaaaaaaaaaaa')
-            pub.publish(state)
-
-            # marker.pose.position.x = 0.1 + numpy.cos(2*3.14/5*rospy.get_time());
-            marker.pose.position.x = simstate[0]
-            marker.pose.position.y = simstate[1]
-            marker.pose.position.z = simstate[2]
-
-            # quaternion
-            # marker.pose.orientation.x = simstate[0]
-            # marker.pose.orientation.y = simstate[1]
-            # marker.pose.orientation.z = simstate[2]
-            # marker.pose.orientation.w = simstate[2]          
-
-            pub_rviz.publish( marker )
-
-            # rospy.logwarn(marker)
-
-            # let node sleep
-            rate.sleep()
+        # solve differential equations with absolute deadlines on a monotonic clock
+        self.scheduler = scheduler.DeadlineScheduler(frequency=self.frequency, overrun_policy=overrun_policy)
+        self.scheduler.add_task('marker', self.marker_frequency, self.publish_marker)
+        self.scheduler.run(self.simulation_tick, rospy.is_shutdown)
 
         # spin() simply keeps python from exiting until this node is stopped
         rospy.spin()        
@@ -0,0 +1,20 @@
+#!/usr/bin/env python
+"""Convert binary telemetry files (written by cycle_quad_control_mission.py)
+into the text format read by plot_experiment.py.
+
+usage: rosrun quad_control telemetry_to_text.py file.tlm [file.tlm ...]
+"""
+
+import sys
+
+from utilities import telemetry
+
+
+if __name__ == '__main__':
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    for telemetry_path in sys.argv[1:]:
+        print(telemetry.telemetry_to_text(telemetry_path))
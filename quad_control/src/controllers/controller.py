@@ -24,3 +24,9 @@ class Controller(js.Jsonable):
         # reference ...    
         #TODO 
         raise NotImplementedError()
+
+
+    def output_batch(self, delta_t, states, references):
+        # as output, for N states and references at once:
+        # one row per state (N,...), and so for the result
+        raise NotImplementedError()
@@ -43,7 +43,16 @@ class ComponentWise3DDIC(dic.DoubleIntegratorController):
 
 
     def output(self, position, velocity):
-        return self._DI_Bounded_Component(position, velocity)
+        return self._DI_Bounded_Component(position, velocity).as_tuple()
+
+
+    def output_lazy(self, position, velocity, need=dic.OUTPUTS):
+        return self._DI_Bounded_Component(position, velocity, need)
+
+
+    def output_batch(self, positions, velocities):
+        # element-wise: the rows are just more components
+        return self._DI_Bounded_Component(positions, velocities).as_tuple()
 
 
     def __str__(self):
@@ -60,11 +69,13 @@ class ComponentWise3DDIC(dic.DoubleIntegratorController):
 
     def _sat(self,x):
 
-        sat     =  x/numpy.sqrt(1.0 + x**2)
-        Dsat    =  (1.0 + x**2)**(-3.0/2.0)
-        D2sat   =  -3.0*x*(1.0 + x**2)**(-5.0/2.0)
+        # x may be an array: element-wise
+        x2      =  1.0 + x**2
+        sat     =  x/numpy.sqrt(x2)
+        Dsat    =  x2**(-3.0/2.0)
+        D2sat   =  -3.0*x*x2**(-5.0/2.0)
         # primitive of saturation function
-        sat_Int =  numpy.sqrt(1.0 + x**2) - 1.0
+        sat_Int =  numpy.sqrt(x2) - 1.0
 
         return (sat,Dsat,D2sat,sat_Int)
 
@@ -85,7 +96,7 @@ class ComponentWise3DDIC(dic.DoubleIntegratorController):
     # print sat(2.0)
     # print fGain(2.0)
 
-    def  _DI_Bounded_Component(self,p,v):
+    def  _DI_Bounded_Component(self,p,v,need=dic.OUTPUTS):
 
         # gains
         kp = self.get_proportional_gain()
@@ -114,73 +125,86 @@ class ComponentWise3DDIC(dic.DoubleIntegratorController):
         f_v_v  = D2fgain/sigma_v**2
 
 
-        u     = -f*h1 - h2
+        # all components at once (element-wise); only the outputs in need
+        out = dic.DIOutput()
 
-        u_p   = -f*h1_p
-        u_p_p = -f*h1_p_p
+        out.u = -f*h1 - h2
 
-        u_v   = -f_v*h1  - h2_v
-        u_v_v = -f_v_v*h1 - h2_v_v
+        if 'u_p' in need:
+            out.u_p   = -f*h1_p
+        if 'u_p_p' in need:
+            out.u_p_p = -f*h1_p_p
 
-        u_p_v = -f_v*h1_p
+        if 'u_v' in need:
+            out.u_v   = -f_v*h1  - h2_v
+        if 'u_v_v' in need:
+            out.u_v_v = -f_v_v*h1 - h2_v_v
+
+        if 'u_p_v' in need:
+            out.u_p_v = -f_v*h1_p
 
 
         beta   = 1.0/(2.0*kp)
-        h1_int = kp*(sigma_p**2)*sat_Int_p
 
-        V  = beta*kv**2*h1_int    + \
-             beta*h1*h2           + \
-             sigma_v**2*fgain_int + \
-             h1_int               + \
-             beta*kv**2*sigma_v**2*(fgain_int - fgain_int2)
+        if 'V' in need:
+            h1_int = kp*(sigma_p**2)*sat_Int_p
 
-        VD = (-1)*(                    \
-                   beta*h2_v*f*h1**2 + \
-                   v*h2*(1.0/f - beta*h1_p) + beta/f*h2*(kv**2*v - h2*h2_v)\
-                  )
-              
-        V_p   = beta*kv**2*h1 + beta*h2*h1_p + h1  
+            out.V  = beta*kv**2*h1_int    + \
+                     beta*h1*h2           + \
+                     sigma_v**2*fgain_int + \
+                     h1_int               + \
+                     beta*kv**2*sigma_v**2*(fgain_int - fgain_int2)
 
-        V_v   = beta*h1*h2_v + v/f + beta/f*(kv**2*v - h2*h2_v)
+        if 'VD' in need:
+            out.VD = (-1)*(                    \
+                           beta*h2_v*f*h1**2 + \
+                           v*h2*(1.0/f - beta*h1_p) + beta/f*h2*(kv**2*v - h2*h2_v)\
+                          )
 
-        V_v_p = beta*h1_p*h2_v
+        if 'V_p' in need:
+            out.V_p   = beta*kv**2*h1 + beta*h2*h1_p + h1  
 
-        V_v_v = beta*h1*h2_v_v +\
-                1.0/f - v/f**2*f_v +\
-                (-1.0)*beta/f**2*f_v*(kv**2*v - h2*h2_v) +\
-                beta/f*(kv**2 - h2_v*h2_v - h2*h2_v_v)     
+        if 'V_v' in need:
+            out.V_v   = beta*h1*h2_v + v/f + beta/f*(kv**2*v - h2*h2_v)
 
-        return u,u_p,u_v,u_p_p,u_v_v,u_p_v,V,VD,V_p,V_v,V_v_p,V_v_v
+        if 'V_v_p' in need:
+            out.V_v_p = beta*h1_p*h2_v
+
+        if 'V_v_v' in need:
+            out.V_v_v = beta*h1*h2_v_v +\
+                        1.0/f - v/f**2*f_v +\
+                        (-1.0)*beta/f**2*f_v*(kv**2*v - h2*h2_v) +\
+                        beta/f*(kv**2 - h2_v*h2_v - h2*h2_v_v)     
+
+        return out
 
 
     def  _DI_Bounded_NOT_Component(self,p,v):
 
-        u      = numpy.zeros(3)
+        # all components at once (element-wise), then on the diagonals
+        u,u_p_c,u_v_c,u_p_p_c,u_v_v_c,u_p_v_c,V_c,VD_c,V_p,V_v,V_v_p_c,V_v_v_c = \
+            self._DI_Bounded_Component(p[0:3],v[0:3]).as_tuple()
+
+        i = numpy.arange(3)
+
         u_p    = numpy.zeros((3,3))
         u_v    = numpy.zeros((3,3))
+        V_v_p  = numpy.zeros((3,3))
+        V_v_v  = numpy.zeros((3,3))
+        u_p[i,i]   = u_p_c
+        u_v[i,i]   = u_v_c
+        V_v_p[i,i] = V_v_p_c
+        V_v_v[i,i] = V_v_v_c
+
         u_p_p  = numpy.zeros((3,3,3))
         u_v_v  = numpy.zeros((3,3,3))
         u_p_v  = numpy.zeros((3,3,3))
+        u_p_p[i,i,i] = u_p_p_c
+        u_v_v[i,i,i] = u_v_v_c
+        u_p_v[i,i,i] = u_p_v_c
 
-        # V     = numpy.zeros(1)
-        # VD    = numpy.zeros(1)
-
-        V_p   = numpy.zeros(3)
-        V_v   = numpy.zeros(3)
-        V_v_p = numpy.zeros((3,3))
-        V_v_v = numpy.zeros((3,3))
-
-        u[0],u_p[0,0],u_v[0,0],u_p_p[0,0,0],u_v_v[0,0,0],u_p_v[0,0,0],V0,VD0,V_p[0],V_v[0],V_v_p[0,0],V_v_v[0,0] =  \
-            self._DI_Bounded_Component(p[0],v[0])
-
-        u[1],u_p[1,1],u_v[1,1],u_p_p[1,1,1],u_v_v[1,1,1],u_p_v[1,1,1],V1,VD1,V_p[1],V_v[1],V_v_p[1,1],V_v_v[1,1] =  \
-            self._DI_Bounded_Component(p[1],v[1])
-
-        u[2],u_p[2,2],u_v[2,2],u_p_p[2,2,2],u_v_v[2,2,2],u_p_v[2,2,2],V2,VD2,V_p[2],V_v[2],V_v_p[2,2],V_v_v[2,2] =  \
-            self._DI_Bounded_Component(p[2],v[2])
-
-        V  = V0  + V1  + V2
-        VD = VD0 + VD1 + VD2
+        V  = V_c[0]  + V_c[1]  + V_c[2]
+        VD = VD_c[0] + VD_c[1] + VD_c[2]
 
         return u,u_p,u_v,u_p_p,u_v_v,u_p_v,V,VD,V_p,V_v,V_v_p,V_v_v
         
@@ -1,9 +1,170 @@
 #!/usr/bin/env python
 # this line is just used to define the type of document
 
+import numpy
+
 # from .. import controller
 from controllers import controller
 
+
+# outputs of a double integrator controller, in the order of output(p, v):
+# control law and its derivatives (u_p = d/d(p) u, u_p_v = d/d(v) [d/d(p) u], ...),
+# Lyapunov function and its time derivative,
+# and derivatives of the Lyapunov function (V_v_p = d/d(p) [dV/d(v)], ...)
+OUTPUTS = ('u','u_p','u_v','u_p_p','u_v_v','u_p_v','V','VD','V_p','V_v','V_v_p','V_v_v')
+
+
+class DIOutput(object):
+    """Outputs of output_lazy(p, v, need): the outputs that were not needed
+    may be None (see OUTPUTS)"""
+
+    __slots__ = OUTPUTS
+
+    def __init__(self, u=None, u_p=None, u_v=None, u_p_p=None, u_v_v=None, u_p_v=None,
+            V=None, VD=None, V_p=None, V_v=None, V_v_p=None, V_v_v=None):
+        self.u     = u
+        self.u_p   = u_p
+        self.u_v   = u_v
+        self.u_p_p = u_p_p
+        self.u_v_v = u_v_v
+        self.u_p_v = u_p_v
+        self.V     = V
+        self.VD    = VD
+        self.V_p   = V_p
+        self.V_v   = V_v
+        self.V_v_p = V_v_p
+        self.V_v_v = V_v_v
+
+    def as_tuple(self):
+        """The 12-tuple of output(p, v)"""
+        return (self.u,self.u_p,self.u_v,self.u_p_p,self.u_v_v,self.u_p_v,
+            self.V,self.VD,self.V_p,self.V_v,self.V_v_p,self.V_v_v)
+
+
+def radial_derivatives(x, xx, gain, sigma, sat, Dsat, D2sat, hessian=True):
+    """Jacobian (n,n) and Hessian tensor (n,n,n) of h(x) = gain*sat(|x|/sigma)*x,
+    with xx = |x| > 0, and sat, Dsat, D2sat evaluated at xx/sigma:
+        h_x[a,b]     = c1 x_a x_b + c0 delta_ab
+        h_x_x[a,b,i] = c2 x_a x_b x_i + c1 (delta_ab x_i + x_a delta_bi + delta_ai x_b)
+    (the tensor is built with broadcasting, with no loop over i).
+    With hessian=False, the tensor is not computed (None)."""
+    c0 = gain*sat
+    c1 = gain*Dsat/sigma/xx
+
+    I   = numpy.identity(len(x))
+    x_x = numpy.outer(x, x)
+
+    h_x = c1*x_x + c0*I
+
+    if not hessian:
+        return h_x, None
+
+    c2 = (gain*D2sat/sigma**2 - c1)/xx**2
+    # x_I[a,b,i] = x_a delta_bi
+    x_I   = x[:,None,None]*I
+    h_x_x = c2*x_x[:,:,None]*x + c1*(x_I.transpose(1,2,0) + x_I + x_I.transpose(1,0,2))
+
+    return h_x, h_x_x
+
+
+def radial_derivatives_batch(x, xx, gain, sigma, sat, Dsat, D2sat):
+    """radial_derivatives for N vectors: x (N,n), and xx, sat, Dsat, D2sat (N,)
+    (xx > 0); returns (N,n,n) and (N,n,n,n)"""
+    c0 = gain*sat
+    c1 = gain*Dsat/sigma/xx
+    c2 = (gain*D2sat/sigma**2 - c1)/xx**2
+
+    I   = numpy.identity(x.shape[1])
+    x_x = x[:,:,None]*x[:,None,:]
+
+    h_x = c1[:,None,None]*x_x + c0[:,None,None]*I
+
+    # x_I[k,a,b,i] = x_a delta_bi
+    x_I   = x[:,:,None,None]*I
+    h_x_x = (c2[:,None,None,None]*x_x[:,:,:,None]*x[:,None,None,:] +
+        c1[:,None,None,None]*(x_I.transpose(0,2,3,1) + x_I + x_I.transpose(0,2,1,3)))
+
+    return h_x, h_x_x
+
+
+def bounded_radial_outputs_batch(p, v, kp, kv, sigma_p, sigma_v, eps, sat_function):
+    """Outputs (the 12-tuple of output) of the bounded, not component-wise,
+    control law u = -kp*sat(|p|/sigma_p)*p - kv*sat(|v|/sigma_v)*v
+    (see NDimensionalBoundedDIC._DI_Bounded), for N states at once:
+    p and v are (N,n), and every output has N rows.
+    sat_function(x) returns sat, Dsat, D2sat and sat_Int (element-wise)."""
+    number, size = p.shape
+
+    pp = numpy.sqrt(numpy.sum(p*p, axis=1))
+    vv = numpy.sqrt(numpy.sum(v*v, axis=1))
+
+    sat_p,Dsat_p,D2sat_p,sat_Int_p = sat_function(pp/sigma_p)
+    sat_v,Dsat_v,D2sat_v,sat_Int_v = sat_function(vv/sigma_v)
+
+    I = numpy.identity(size)
+
+    # rows below eps: kp*I and 0 (the formulas are evaluated with |.| = 1 there)
+    small_p = pp < eps
+    small_v = vv < eps
+
+    h1 = (kp*sat_p)[:,None]*p
+    h1_p, h1_p_p = radial_derivatives_batch(p, numpy.where(small_p, 1.0, pp), kp, sigma_p, sat_p, Dsat_p, D2sat_p)
+    h1_p[small_p]   = kp*I
+    h1_p_p[small_p] = 0.0
+
+    h2 = (kv*sat_v)[:,None]*v
+    h2_v, h2_v_v = radial_derivatives_batch(v, numpy.where(small_v, 1.0, vv), kv, sigma_v, sat_v, Dsat_v, D2sat_v)
+    h2_v[small_v]   = kv*I
+    h2_v_v[small_v] = 0.0
+
+    u     = -h1 - h2
+    u_p   = -h1_p
+    u_p_p = -h1_p_p
+    u_v   = -h2_v
+    u_v_v = -h2_v_v
+    u_p_v = numpy.zeros((number,size,size,size))
+
+    beta   = 1.0/(2.0*kp)
+    h1_int = kp*sigma_p**2*sat_Int_p
+
+    # V and VD are 0 unless both |p| and |v| are above eps
+    both  = (pp > eps) & (vv > eps)
+    pp_1  = numpy.where(both, pp, 1.0)
+    vv_1  = numpy.where(both, vv, 1.0)
+    sat_v_1 = numpy.where(both, sat_v, 1.0)
+    v_h2  = numpy.sum(v*h2, axis=1)
+    cos2  = (numpy.sum(p*v, axis=1)/(pp_1*vv_1))**2
+
+    V  = beta*kv**2*h1_int                   + \
+         beta*numpy.sum(h1*h2, axis=1)       + \
+         1.0/2.0*vv**2                       + \
+         h1_int                              + \
+         beta*1.0/2.0*(kv**2*vv**2 - numpy.sum(h2*h2, axis=1))
+
+    VD = (-1)*(\
+               beta*numpy.sum(h1*h1, axis=1)*kv*sat_v                                          + \
+               v_h2*beta*kp**2*pp**2*sat_p**2*cos2*(kv*Dsat_v/sigma_v)/(kv*sat_v_1*vv_1)     + \
+               v_h2*(1.0 - beta*kp*(sat_p + Dsat_p/sigma_p*pp*cos2))                          + \
+               beta*v_h2*kv**2*(1.0 - sat_v*(Dsat_v/sigma_v*vv + sat_v))   \
+              )
+
+    V  = numpy.where(both, V, 0.0)
+    VD = numpy.where(both, VD, 0.0)
+
+    # (h_x.T y)[i] = sum_j h_x[j,i] y[j]
+    V_p   = beta*kv**2*h1 + beta*numpy.einsum('kji,kj->ki', h1_p, h2) + h1
+
+    V_v   = beta*numpy.einsum('kji,kj->ki', h2_v, h1 - h2) + (1.0 + beta*kv**2)*v
+
+    V_v_p = beta*numpy.einsum('kji,kjl->kil', h2_v, h1_p)
+
+    V_v_v = beta*numpy.einsum('kabi,ki->kba', h2_v_v, h1 - h2)        + \
+            (1.0 + beta*kv**2)*I                                       + \
+            (-1)*beta*numpy.einsum('kji,kjl->kil', h2_v, h2_v)
+
+    return (u,u_p,u_v,u_p_p,u_v_v,u_p_v,V,VD,V_p,V_v,V_v_p,V_v_v)
+
+
 class DoubleIntegratorController(controller.Controller):
 
     
@@ -43,3 +204,16 @@ class DoubleIntegratorController(controller.Controller):
     
     def output(self, position, velocity): 
         raise NotImplementedError()
+
+
+    def output_batch(self, positions, velocities):
+        """output for N states at once: positions and velocities have one
+        row per state (N,...), and so does every output (N,...)"""
+        raise NotImplementedError()
+
+
+    def output_lazy(self, position, velocity, need=OUTPUTS):
+        """DIOutput with (at least) the outputs in need (names of OUTPUTS):
+        children skip the terms that are not needed (e.g., the tensors).
+        By default, all outputs are computed with output."""
+        return DIOutput(*self.output(position, velocity))
@@ -17,6 +17,10 @@ class NeutralDIC(dic.DoubleIntegratorController):
     def output(self, position, velocity):
         #TODO make the dimension a parameter?
         return numpy.zeros(len(position))
+
+
+    def output_batch(self, positions, velocities):
+        return numpy.zeros(numpy.shape(positions))
         
         
         
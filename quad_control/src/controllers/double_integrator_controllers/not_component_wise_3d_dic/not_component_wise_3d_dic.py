@@ -44,7 +44,16 @@ class NotComponentWise3DDIC(dic.DoubleIntegratorController):
 
 
     def output(self,p,v):
-        return self._DI_Bounded(p,v)
+        return self._DI_Bounded(p,v).as_tuple()
+
+    def output_lazy(self,p,v,need=dic.OUTPUTS):
+        return self._DI_Bounded(p,v,need)
+
+    def output_batch(self,p,v):
+        return dic.bounded_radial_outputs_batch(p, v,
+            self.get_proportional_gain(), self.get_derivative_gain(),
+            self.__position_saturation, self.__velocity_saturation,
+            self.__eps, self._sat)
 
     def __str__(self):
         string = dic.DoubleIntegratorController.__str__(self)
@@ -62,17 +71,18 @@ class NotComponentWise3DDIC(dic.DoubleIntegratorController):
 
     def _sat(self,x):
 
-        sat     =  1.0/numpy.sqrt(1.0 + x**2)
-        Dsat    =  -x*(1.0 + x**2)**(-3.0/2.0)
-        D2sat   =  (-1.0 + 2.0*x**2)*(1.0 + x**2)**(-5.0/2.0)
+        x2      =  1.0 + x**2
+        sat     =  1.0/numpy.sqrt(x2)
+        Dsat    =  -x*x2**(-3.0/2.0)
+        D2sat   =  (-1.0 + 2.0*x**2)*x2**(-5.0/2.0)
         # primitive of sat(x)*x
-        sat_Int =  numpy.sqrt(1.0 + x**2) - 1.0
+        sat_Int =  numpy.sqrt(x2) - 1.0
 
         return (sat,Dsat,D2sat,sat_Int)
 
     # print sat(2.0)
 
-    def  _DI_Bounded(self,p,v):
+    def  _DI_Bounded(self,p,v,need=dic.OUTPUTS):
 
         # gains
         kp = self.get_proportional_gain()
@@ -91,96 +101,107 @@ class NotComponentWise3DDIC(dic.DoubleIntegratorController):
 
         I  = numpy.identity(3) 
 
+        # which derivatives of h1 and h2 are needed (see dic.OUTPUTS)
+        need_h1_p   = 'u_p' in need or 'V_p' in need or 'V_v_p' in need
+        need_h1_p_p = 'u_p_p' in need
+        need_h2_v   = 'u_v' in need or 'V_v' in need or 'V_v_p' in need or 'V_v_v' in need
+        need_h2_v_v = 'u_v_v' in need or 'V_v_v' in need
+
+        out = dic.DIOutput()
+
         # vector
         h1     = kp*sat_p*p
-        if pp >= eps:
-            # matrix
-            h1_p   = kp*Dsat_p/sigma_p*numpy.outer(p,p)/pp + kp*sat_p*I
-            # tensor
-            h1_p_p = numpy.zeros((3,3,3));
-            for i in range(3):
-                ee = I[:,i];
-                h1_p_p[:,:,i] = kp*D2sat_p/sigma_p**2*numpy.outer(p,p)/(pp**2)*numpy.dot(p,ee)       + \
-                                kp*Dsat_p/sigma_p*numpy.dot(p,ee)/pp*I                         + \
-                                kp*Dsat_p/sigma_p*numpy.outer(p,ee)/pp                         + \
-                                (-1)*kp*Dsat_p/sigma_p*numpy.outer(p,p)/pp**3*numpy.dot(p,ee)        + \
-                                kp*Dsat_p/sigma_p*numpy.outer(ee,p)/pp
-        else:
-            h1_p          = kp*I
-            h1_p_p = numpy.zeros((3,3,3))
+        h1_p   = None
+        h1_p_p = None
+        if need_h1_p or need_h1_p_p:
+            if pp >= eps:
+                # matrix and tensor
+                h1_p, h1_p_p = dic.radial_derivatives(p, pp, kp, sigma_p, sat_p, Dsat_p, D2sat_p, need_h1_p_p)
+            else:
+                h1_p   = kp*I
+                h1_p_p = numpy.zeros((3,3,3))
 
         # vector
         h2     = kv*sat_v*v
-        if vv >= eps:   
-            # matrix
-            h2_v   = kv*Dsat_v/sigma_v*numpy.outer(v,v)/vv + kv*sat_v*I
-            # tensor
-            h2_v_v = numpy.zeros((3,3,3))
-            for i in range(3):
-                ee = I[:,i]
-                h2_v_v[:,:,i] = kv*D2sat_v/sigma_v**2*numpy.outer(v,v)/(vv**2)*numpy.dot(v,ee)    + \
-                                kv*Dsat_v/sigma_v*numpy.dot(v,ee)/vv*I                      + \
-                                kv*Dsat_v/sigma_v*numpy.outer(v,ee)/vv                      + \
-                                (-1)*kv*Dsat_v/sigma_v*numpy.outer(v,v)/(vv**3)*numpy.dot(v,ee)   + \
-                                kv*Dsat_v/sigma_v*numpy.outer(ee,v)/vv
-        else:
-            h2_v   = kv*I
-            h2_v_v = numpy.zeros((3,3,3))
+        h2_v   = None
+        h2_v_v = None
+        if need_h2_v or need_h2_v_v:
+            if vv >= eps:
+                # matrix and tensor
+                h2_v, h2_v_v = dic.radial_derivatives(v, vv, kv, sigma_v, sat_v, Dsat_v, D2sat_v, need_h2_v_v)
+            else:
+                h2_v   = kv*I
+                h2_v_v = numpy.zeros((3,3,3))
 
 
         # vector
-        u     = -h1 - h2;
+        out.u = -h1 - h2
 
-        # matrix
-        u_p   = -h1_p;
-        # tensor
-        u_p_p = -h1_p_p;
+        if need_h1_p:
+            # matrix
+            out.u_p   = -h1_p
+        if need_h1_p_p:
+            # tensor
+            out.u_p_p = -h1_p_p
 
-        # matrix
-        u_v   = - h2_v;
-        # tensor
-        u_v_v = - h2_v_v;
+        if need_h2_v:
+            # matrix
+            out.u_v   = -h2_v
+        if need_h2_v_v:
+            # tensor
+            out.u_v_v = -h2_v_v
 
-        u_p_v = numpy.zeros((3,3,3));
+        if 'u_p_v' in need:
+            out.u_p_v = numpy.zeros((3,3,3))
 
 
         beta   = 1.0/(2.0*kp);
-        h1_int = kp*sigma_p**2*sat_Int_p;
-
-        # this part is not really necessary
-        if pp > eps and vv > eps:
-            V  = beta*kv**2*h1_int     + \
-                 beta*numpy.dot(h1,h2)       + \
-                 1.0/2.0*vv**2         + \
-                 h1_int                + \
-                 beta*1.0/2.0*(kv**2*numpy.dot(v,v) - numpy.dot(h2,h2))
-
-            VD = (-1)*(\
-                       beta*numpy.dot(h1,h1)*kv*sat_v                                                        + \
-                       numpy.dot(v,h2)*beta*kp**2*pp**2*sat_p**2*numpy.dot(p/pp,v/vv)**2*(kv*Dsat_v/sigma_v)/(kv*sat_v*vv)   + \
-                       numpy.dot(v,h2)*(1.0 - beta*kp*(sat_p + Dsat_p/sigma_p*pp*numpy.dot(p/pp,v/vv)**2))                   + \
-                       beta*numpy.dot(v,h2)*kv**2*(1.0 - sat_v*(Dsat_v/sigma_v*vv + sat_v))   \
-                      )
-        else:
-            V  = 0
-            VD = 0
+
+        if 'V' in need or 'VD' in need:
+            # this part is not really necessary
+            if pp > eps and vv > eps:
+                h1_int = kp*sigma_p**2*sat_Int_p;
+                h1_h2  = numpy.dot(h1,h2)
+                v_h2   = numpy.dot(v,h2)
+                # squared cosine of the angle between p and v
+                cos2   = (numpy.dot(p,v)/(pp*vv))**2
+
+                out.V  = beta*kv**2*h1_int     + \
+                         beta*h1_h2            + \
+                         1.0/2.0*vv**2         + \
+                         h1_int                + \
+                         beta*1.0/2.0*(kv**2*vv**2 - numpy.dot(h2,h2))
+
+                out.VD = (-1)*(\
+                               beta*numpy.dot(h1,h1)*kv*sat_v                                                  + \
+                               v_h2*beta*kp**2*pp**2*sat_p**2*cos2*(kv*Dsat_v/sigma_v)/(kv*sat_v*vv)           + \
+                               v_h2*(1.0 - beta*kp*(sat_p + Dsat_p/sigma_p*pp*cos2))                          + \
+                               beta*v_h2*kv**2*(1.0 - sat_v*(Dsat_v/sigma_v*vv + sat_v))   \
+                              )
+            else:
+                out.V  = 0
+                out.VD = 0
 
         # V_v         = dV/d(v)
         # V_v_p = d/d(p) [dV/d(v)]
         # V_v_v = d/d(v) [dV/d(v)]
 
-        V_p   = beta*kv**2*h1 + beta*numpy.dot(h1_p.T,h2) + h1
+        if 'V_p' in need:
+            out.V_p   = beta*kv**2*h1 + beta*numpy.dot(h1_p.T,h2) + h1
 
-        V_v   = beta*numpy.dot(h2_v.T,h1) + v + beta*(kv**2*v - numpy.dot(h2_v.T,h2))
+        if 'V_v' in need:
+            out.V_v   = beta*numpy.dot(h2_v.T,h1 - h2) + (1.0 + beta*kv**2)*v
 
-        V_v_p = beta*numpy.dot(h2_v.T,h1_p)
+        if 'V_v_p' in need:
+            out.V_v_p = beta*numpy.dot(h2_v.T,h1_p)
 
-        V_v_v = beta*numpy.dot(h2_v_v,h1).T                                 + \
-                I                                                     + \
-                beta*(kv**2*I - numpy.dot(h2_v_v,h2).T  - numpy.dot(h2_v.T,h2_v))
-  
+        if 'V_v_v' in need:
+            # one contraction of the tensor, for both h1 and h2
+            out.V_v_v = beta*numpy.dot(h2_v_v,h1 - h2).T                    + \
+                        (1.0 + beta*kv**2)*I                                + \
+                        (-1)*beta*numpy.dot(h2_v.T,h2_v)
 
-        return (u,u_p,u_v,u_p_p,u_v_v,u_p_v,V,VD,V_p,V_v,V_v_p,V_v_v)
+        return out
         
         
         
@@ -80,6 +80,9 @@ class OneDimensionalBoundedDIC(dic.DoubleIntegratorController):
     def output(self,p,v):
         return self._DI_Bounded(p,v)
 
+    def output_batch(self,p,v):
+        return self._DI_Bounded_batch(numpy.asarray(p, dtype=float), numpy.asarray(v, dtype=float))
+
     def __str__(self):
         string = dic.DoubleIntegratorController.__str__(self)
         string += "\nPosition saturation: " + str(self.__position_saturation)
@@ -96,11 +99,12 @@ class OneDimensionalBoundedDIC(dic.DoubleIntegratorController):
 
     def _sat(self,x):
 
-        sat     =  1.0/numpy.sqrt(1.0 + x**2)
-        Dsat    =  -x*(1.0 + x**2)**(-3.0/2.0)
-        D2sat   =  (-1.0 + 2.0*x**2)*(1.0 + x**2)**(-5.0/2.0)
+        x2      =  1.0 + x**2
+        sat     =  1.0/numpy.sqrt(x2)
+        Dsat    =  -x*x2**(-3.0/2.0)
+        D2sat   =  (-1.0 + 2.0*x**2)*x2**(-5.0/2.0)
         # primitive of sat(x)*x
-        sat_Int =  numpy.sqrt(1.0 + x**2) - 1.0
+        sat_Int =  numpy.sqrt(x2) - 1.0
 
         return (sat,Dsat,D2sat,sat_Int)
 
@@ -117,8 +121,9 @@ class OneDimensionalBoundedDIC(dic.DoubleIntegratorController):
 
         eps = self.__eps 
 
-        pp  = numpy.linalg.norm(p)
-        vv  = numpy.linalg.norm(v)
+        # p and v are scalars
+        pp  = abs(p)
+        vv  = abs(v)
 
         sat_p,Dsat_p,D2sat_p,sat_Int_p = self._sat(pp/sigma_p)
         sat_v,Dsat_v,D2sat_v,sat_Int_v = self._sat(vv/sigma_v)
@@ -175,17 +180,20 @@ class OneDimensionalBoundedDIC(dic.DoubleIntegratorController):
 
         # this part is not really necessary
         if pp > eps and vv > eps:
+            v_h2 = v*h2
+
             V  = beta*kv**2*h1_int     + \
-                 beta*numpy.dot(h1,h2)       + \
+                 beta*h1*h2            + \
                  1.0/2.0*vv**2         + \
                  h1_int                + \
-                 beta*1.0/2.0*(kv**2*numpy.dot(v,v) - numpy.dot(h2,h2))
+                 beta*1.0/2.0*(kv**2*v*v - h2*h2)
 
+            # in one dimension, the squared cosine of the angle between p and v is 1
             VD = (-1)*(\
-                       beta*numpy.dot(h1,h1)*kv*sat_v                                                        + \
-                       numpy.dot(v,h2)*beta*kp**2*pp**2*sat_p**2*numpy.dot(p/pp,v/vv)**2*(kv*Dsat_v/sigma_v)/(kv*sat_v*vv)   + \
-                       numpy.dot(v,h2)*(1.0 - beta*kp*(sat_p + Dsat_p/sigma_p*pp*numpy.dot(p/pp,v/vv)**2))                   + \
-                       beta*numpy.dot(v,h2)*kv**2*(1.0 - sat_v*(Dsat_v/sigma_v*vv + sat_v))   \
+                       beta*h1*h1*kv*sat_v                                                        + \
+                       v_h2*beta*kp**2*pp**2*sat_p**2*(kv*Dsat_v/sigma_v)/(kv*sat_v*vv)           + \
+                       v_h2*(1.0 - beta*kp*(sat_p + Dsat_p/sigma_p*pp))                          + \
+                       beta*v_h2*kv**2*(1.0 - sat_v*(Dsat_v/sigma_v*vv + sat_v))   \
                       )
         else:
             V  = 0
@@ -210,6 +218,84 @@ class OneDimensionalBoundedDIC(dic.DoubleIntegratorController):
         
         
         
+    def  _DI_Bounded_batch(self,p,v):
+        """_DI_Bounded for N states at once: p and v are (N,) arrays,
+        and the branches on eps are taken row by row (numpy.where)"""
+
+        # gains
+        kp = self.get_proportional_gain()
+        kv = self.get_derivative_gain()
+
+        sigma_p  = self.__position_saturation
+        sigma_v  = self.__velocity_saturation
+
+        eps = self.__eps 
+
+        pp  = numpy.abs(p)
+        vv  = numpy.abs(v)
+
+        sat_p,Dsat_p,D2sat_p,sat_Int_p = self._sat(pp/sigma_p)
+        sat_v,Dsat_v,D2sat_v,sat_Int_v = self._sat(vv/sigma_v)
+
+        # |.| = 1 in the rows below eps, where the formulas are not used
+        large_p = pp >= eps
+        large_v = vv >= eps
+        pp_1    = numpy.where(large_p, pp, 1.0)
+        vv_1    = numpy.where(large_v, vv, 1.0)
+
+        h1     = kp*sat_p*p
+        h1_p   = numpy.where(large_p, kp*Dsat_p/sigma_p*p**2/pp_1 + kp*sat_p, kp)
+        h1_p_p = numpy.where(large_p, kp*D2sat_p/sigma_p**2*p + 3.0*kp*Dsat_p/sigma_p*p/pp_1 - kp*Dsat_p/sigma_p, 0.0)
+
+        h2     = kv*sat_v*v
+        h2_v   = numpy.where(large_v, kv*Dsat_v/sigma_v*v**2/vv_1 + kv*sat_v, kv)
+        h2_v_v = numpy.where(large_v, kv*D2sat_v/sigma_v**2*v + 3.0*kv*Dsat_v/sigma_v*v/vv_1 - kv*Dsat_v/sigma_v, 0.0)
+
+        u     = -h1 - h2
+        u_p   = -h1_p
+        u_p_p = -h1_p_p
+        u_v   = -h2_v
+        u_v_v = -h2_v_v
+        u_p_v = numpy.zeros(p.shape)
+
+        beta   = 1.0/(2.0*kp)
+        h1_int = kp*sigma_p**2*sat_Int_p
+
+        both = (pp > eps) & (vv > eps)
+        sat_v_1 = numpy.where(both, sat_v, 1.0)
+        vv_2    = numpy.where(both, vv, 1.0)
+        v_h2    = v*h2
+
+        V  = beta*kv**2*h1_int     + \
+             beta*h1*h2            + \
+             1.0/2.0*vv**2         + \
+             h1_int                + \
+             beta*1.0/2.0*(kv**2*v*v - h2*h2)
+
+        VD = (-1)*(\
+                   beta*h1*h1*kv*sat_v                                                          + \
+                   v_h2*beta*kp**2*pp**2*sat_p**2*(kv*Dsat_v/sigma_v)/(kv*sat_v_1*vv_2)         + \
+                   v_h2*(1.0 - beta*kp*(sat_p + Dsat_p/sigma_p*pp))                            + \
+                   beta*v_h2*kv**2*(1.0 - sat_v*(Dsat_v/sigma_v*vv + sat_v))   \
+                  )
+
+        V  = numpy.where(both, V, 0.0)
+        VD = numpy.where(both, VD, 0.0)
+
+        V_p   = beta*kv**2*h1 + beta*h1_p*h2 + h1
+
+        V_v   = beta*h2_v*h1 + v + beta*(kv**2*v - h2_v*h2)
+
+        V_v_p = beta*h2_v*h1_p
+
+        V_v_v = beta*h2_v_v*h1                                 + \
+                1.0                                            + \
+                beta*(kv**2 - h2_v_v*h2  - h2_v*h2_v)
+
+        return (u,u_p,u_v,u_p_p,u_v_v,u_p_v,V,VD,V_p,V_v,V_v_p,V_v_v)
+        
+        
+        
 # Test
 # con = NDimensionalBoundedDIC()
 #print con
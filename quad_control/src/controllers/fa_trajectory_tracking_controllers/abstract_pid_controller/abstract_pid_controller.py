@@ -14,11 +14,18 @@ from controllers.double_integrator_controllers import double_integrator_controll
 import rospy
 
 
+# outputs of the double integrator controller used by ThreeDPIDController
+DI_OUTPUTS = ('u', 'V_v')
+
+
 class ThreeDPIDController(controller.Controller):
 
     
     inner = {"double_integrator_controller": double_integrator_controller_database.database}
 
+    # kept when parameters are patched (see Jsonable.patched)
+    state_attributes = ['disturbance_estimate', 'd_est', 't_old']
+
 
     @classmethod
     def description(cls):
@@ -41,7 +48,8 @@ class ThreeDPIDController(controller.Controller):
         self.__bound_integral_z     = bound_integral_z
 
         # di_controller_class_name = 'DefaultDIController'
-        self.DIControllerObject  = double_integrator_controller
+        # (same name as the argument, see Jsonable.get_constructing_string and Jsonable.patched)
+        self.double_integrator_controller = double_integrator_controller
 
         #TODO should these two be inherited by a parent instead?
         # Should the mass be passed as a parameter?
@@ -62,7 +70,7 @@ class ThreeDPIDController(controller.Controller):
     def __str__(self):
         #TODO add the remaining parameters
         string = controller.Controller.__str__(self)
-        string += "\nDouble-integrator controller: " + str(self.DIControllerObject)
+        string += "\nDouble-integrator controller: " + str(self.double_integrator_controller)
         return string
         
 
@@ -86,7 +94,10 @@ class ThreeDPIDController(controller.Controller):
         ep = x - xd
         ev = v - vd
 
-        u,u_p,u_v,u_p_p,u_v_v,u_p_v,Vpv,VpvD,V_p,V_v,V_v_p,V_v_v = self.DIControllerObject.output(ep,ev)
+        # no derivatives of u, and no tensors
+        di_output = self.double_integrator_controller.output_lazy(ep,ev,DI_OUTPUTS)
+        u   = di_output.u
+        V_v = di_output.V_v
 
         Full_actuation = self.MASS*(ad + u + self.GRAVITY*e3 - self.d_est)
 
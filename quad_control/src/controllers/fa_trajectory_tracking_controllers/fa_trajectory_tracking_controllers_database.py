@@ -1,17 +1,14 @@
 #TODO add an abstract fully-actuated controller to import
 
-import rospy
+from utilities.lazy_registry import LazyDatabase
 
-database = {}
+database = LazyDatabase('fully actuated trajectory tracking controllers')
 
-from neutral_controller.neutral_controller import NeutralController
-database["NeutralController"] = NeutralController
+database.register("NeutralController", "controllers.fa_trajectory_tracking_controllers.neutral_controller.neutral_controller:NeutralController")
 
-from simple_pid_controller.simple_pid_controller import SimplePIDController
-database["SimplePIDController"] = SimplePIDController
+database.register("SimplePIDController", "controllers.fa_trajectory_tracking_controllers.simple_pid_controller.simple_pid_controller:SimplePIDController")
 
-from abstract_pid_controller.abstract_pid_controller import ThreeDPIDController
-database["AbstractPIDController"] = ThreeDPIDController
+database.register("AbstractPIDController", "controllers.fa_trajectory_tracking_controllers.abstract_pid_controller.abstract_pid_controller:ThreeDPIDController")
 
-
-database["Default"] = database[rospy.get_param("ControllerDefault","SimplePIDController")]
\ No newline at end of file
+# the ROS parameter is read when "Default" is first used
+database.alias("Default", "SimplePIDController", "ControllerDefault")
@@ -12,6 +12,8 @@ import rospy
 
 class SimplePIDController(controller.Controller):
 
+    # kept when parameters are patched (see Jsonable.patched)
+    state_attributes = ['disturbance_estimate', 't_old']
     
     @classmethod
     def contained_objects(cls):
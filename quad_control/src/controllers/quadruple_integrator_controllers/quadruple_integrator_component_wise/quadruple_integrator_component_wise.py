@@ -1,8 +1,5 @@
 #!/usr/bin/python
 
-# for ploting
-import matplotlib.pyplot as plt
-
 import numpy
 
 from .. import quadruple_integrator_controller
@@ -45,6 +42,9 @@ class LinearQuadrupleIntegratorController(quadruple_integrator_controller.Quadru
     def output(self,x1,x2,x3,x4):
         return self._quadruple_integrator(x1,x2,x3,x4)
 
+    def output_batch(self,x1,x2,x3,x4):
+        return self._quadruple_integrator_batch(x1,x2,x3,x4)
+
     def report(self):
         description = "controller for fourth order integrator: x^(4) = u(x^(0),x^(1),x^(2),x^(3)), where u = K x\n"
         parameters  = "Controller gain: K = " + str(self.K) + " and P is found for PA + A^T P = - I (P is important if gradient of Lyapunov is used)"
@@ -66,5 +66,21 @@ class LinearQuadrupleIntegratorController(quadruple_integrator_controller.Quadru
 
         return (u,V_x,V,VD)
 
+    def _quadruple_integrator_batch(self,x1,x2,x3,x4):
+
+        # states, one per row
+        x   = numpy.concatenate([x1,x2,x3,x4], axis=1)
+
+        # control inputs
+        u   = numpy.dot(x,self.KK.T)
+
+        # gradients of Lyapunov
+        V_x = numpy.dot(x,self.PP.T)
+
+        V  = numpy.sum(x*V_x, axis=1)
+        VD = -numpy.sum(x*x, axis=1)
+
+        return (u,V_x,V,VD)
+
 
 
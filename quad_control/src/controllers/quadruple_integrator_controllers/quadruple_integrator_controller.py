@@ -21,3 +21,8 @@ class QuadrupleIntegratorController(controller.Controller):
     
     def output(self, position, velocity, acceleration, jerk): 
         raise NotImplementedError()
+
+    def output_batch(self, positions, velocities, accelerations, jerks):
+        """output for N states at once: one row per state (N,...),
+        and so for the outputs"""
+        raise NotImplementedError()
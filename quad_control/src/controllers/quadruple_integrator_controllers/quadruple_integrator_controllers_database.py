@@ -1,14 +1,9 @@
 
-import rospy
-
-database = {}
-
-import quadruple_integrator_component_wise.quadruple_integrator_component_wise
-database["LinearQuadrupleIntController"] = quadruple_integrator_component_wise.quadruple_integrator_component_wise.LinearQuadrupleIntegratorController
-
-database["Default"] = database[rospy.get_param("QuadrupleIntegratorController","LinearQuadrupleIntController")]
-
-
+from utilities.lazy_registry import LazyDatabase
 
+database = LazyDatabase('quadruple integrator controllers')
 
+database.register("LinearQuadrupleIntController", "controllers.quadruple_integrator_controllers.quadruple_integrator_component_wise.quadruple_integrator_component_wise:LinearQuadrupleIntegratorController")
 
+# the ROS parameter is read when "Default" is first used
+database.alias("Default", "LinearQuadrupleIntController", "QuadrupleIntegratorController")
@@ -5,12 +5,11 @@
 Database of the controller for a vector thrusted system
 """
 
-import rospy
+from utilities.lazy_registry import LazyDatabase
 
-database = {}
+database = LazyDatabase('single load transportation controllers')
 
-import without_disturbance.load_transport_controller
+database.register("SingleLoadTransportController", "controllers.single_load_transportation_controllers.without_disturbance.load_transport_controller:SingleLoadTransportController")
 
-database["SingleLoadTransportController"] = without_disturbance.load_transport_controller.SingleLoadTransportController
-
-database["Default"] = database[rospy.get_param("SingleLoadTransportationControllerDefault","SingleLoadTransportController")]
\ No newline at end of file
+# the ROS parameter is read when "Default" is first used
+database.alias("Default", "SingleLoadTransportController", "SingleLoadTransportationControllerDefault")
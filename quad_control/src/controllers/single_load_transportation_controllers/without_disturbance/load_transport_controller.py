@@ -1,8 +1,5 @@
 #!/usr/bin/python
 
-# for ploting
-import matplotlib.pyplot as plt
-
 import numpy
 
 from numpy import *
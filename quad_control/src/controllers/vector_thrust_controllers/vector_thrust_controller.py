@@ -4,6 +4,68 @@
 # from .. import controller
 from controllers import controller
 
+import numpy
+
+
+# Batch evaluation (output_batch) of the vector thrust controllers:
+# the state index is the LAST axis (vectors are (3,N), matrices (3,3,N),
+# and scalars (N,)), so that element-wise arithmetic broadcasts as it
+# does for one state; the functions below are numpy.dot, numpy.outer,
+# .T, skew, OP and numpy.linalg.norm of every state at once.
+
+# free indices of batch_dot (not j, k or n)
+_AXES = 'abcdefghi'
+
+
+def batch_dot(a, b):
+    """numpy.dot(a[...,i], b[...,i]) for every i"""
+    if a.ndim == 1 or b.ndim == 1:
+        # a scalar
+        return a*b
+    a_free = _AXES[:a.ndim-2]
+    if b.ndim == 2:
+        b_axes, b_free = 'j', ''
+    else:
+        b_before = _AXES[a.ndim-2:a.ndim+b.ndim-5]
+        b_axes, b_free = b_before + 'jk', b_before + 'k'
+    return numpy.einsum(a_free + 'jn,' + b_axes + 'n->' + a_free + b_free + 'n', a, b)
+
+
+def batch_outer(a, b):
+    """numpy.outer(a[...,i], b[...,i]) for every i"""
+    number = a.shape[-1]
+    return a.reshape(-1,number)[:,None,:]*b.reshape(-1,number)[None,:,:]
+
+
+def batch_transpose(a):
+    """a[...,i].T for every i"""
+    if a.ndim <= 2:
+        return a
+    return a.transpose(tuple(range(a.ndim-2,-1,-1)) + (a.ndim-1,))
+
+
+def batch_skew(x):
+    """skew(x[:,i]) for every i"""
+    out = numpy.zeros((3,3,x.shape[-1]))
+    out[0,1] = -x[2]
+    out[0,2] =  x[1]
+    out[1,0] =  x[2]
+    out[1,2] = -x[0]
+    out[2,0] = -x[1]
+    out[2,1] =  x[0]
+    return out
+
+
+def batch_OP(x):
+    """OP(x[:,i]) for every i"""
+    return numpy.identity(3)[:,:,None] - x[:,None,:]*x[None,:,:]
+
+
+def batch_norm(x):
+    """numpy.linalg.norm(x[:,i]) for every i"""
+    return numpy.sqrt(numpy.sum(x*x, axis=0))
+
+
 class VectorThrustController(controller.Controller):
 
     
@@ -21,3 +83,8 @@ class VectorThrustController(controller.Controller):
     
     def output(self, position, velocity): 
         raise NotImplementedError()
+
+    def output_batch(self, states, gravities):
+        """output for N states at once: states (N,12) and gravities (N,9),
+        one row per state, and so for the outputs"""
+        raise NotImplementedError()
@@ -0,0 +1,534 @@
+# generated by generate_backstepping_kernel.py: do not edit
+"""Kernel of the "generated" backend of BacksteppingVectorThrustController:
+the outputs (Thrust, Tau, V, VD, V_dT, V_dTau) of _VectorThrustController,
+from the state, gravity (ad, jd, sd), the outputs of the double integrator
+controller and the gains (see generate_backstepping_kernel.py).
+
+The arguments are read element by element (x[i], u_p[a][b], ...): they
+are numbers for one state, or arrays with the state index as last axis
+for many states at once.
+"""
+
+from __future__ import division
+
+import numpy
+
+
+SOURCE_HASH = '885cb6fdc31717ecd39d048eed525c5a7e009126'
+
+
+def backstepping_kernel(x, gravity, u, u_p, u_v, u_p_p, u_v_v, u_p_v, Vpv, VpvD, V_v, V_v_p, V_v_v, ktt, ktt2, kw, kw2):
+    v_0 = x[3]
+    v_1 = x[4]
+    v_2 = x[5]
+    n_0 = x[6]
+    n_1 = x[7]
+    n_2 = x[8]
+    w_0 = x[9]
+    w_1 = x[10]
+    w_2 = x[11]
+    ad_0 = gravity[0]
+    ad_1 = gravity[1]
+    ad_2 = gravity[2]
+    jd_0 = gravity[3]
+    jd_1 = gravity[4]
+    jd_2 = gravity[5]
+    sd_0 = gravity[6]
+    sd_1 = gravity[7]
+    sd_2 = gravity[8]
+    u_0 = u[0]
+    u_1 = u[1]
+    u_2 = u[2]
+    u_p_0_0 = u_p[0][0]
+    u_p_0_1 = u_p[0][1]
+    u_p_0_2 = u_p[0][2]
+    u_p_1_0 = u_p[1][0]
+    u_p_1_1 = u_p[1][1]
+    u_p_1_2 = u_p[1][2]
+    u_p_2_0 = u_p[2][0]
+    u_p_2_1 = u_p[2][1]
+    u_p_2_2 = u_p[2][2]
+    u_v_0_0 = u_v[0][0]
+    u_v_0_1 = u_v[0][1]
+    u_v_0_2 = u_v[0][2]
+    u_v_1_0 = u_v[1][0]
+    u_v_1_1 = u_v[1][1]
+    u_v_1_2 = u_v[1][2]
+    u_v_2_0 = u_v[2][0]
+    u_v_2_1 = u_v[2][1]
+    u_v_2_2 = u_v[2][2]
+    u_p_p_0_0_0 = u_p_p[0][0][0]
+    u_p_p_0_1_0 = u_p_p[0][1][0]
+    u_p_p_0_1_1 = u_p_p[0][1][1]
+    u_p_p_0_2_0 = u_p_p[0][2][0]
+    u_p_p_0_2_1 = u_p_p[0][2][1]
+    u_p_p_0_2_2 = u_p_p[0][2][2]
+    u_p_p_1_0_0 = u_p_p[1][0][0]
+    u_p_p_1_1_0 = u_p_p[1][1][0]
+    u_p_p_1_1_1 = u_p_p[1][1][1]
+    u_p_p_1_2_0 = u_p_p[1][2][0]
+    u_p_p_1_2_1 = u_p_p[1][2][1]
+    u_p_p_1_2_2 = u_p_p[1][2][2]
+    u_p_p_2_0_0 = u_p_p[2][0][0]
+    u_p_p_2_1_0 = u_p_p[2][1][0]
+    u_p_p_2_1_1 = u_p_p[2][1][1]
+    u_p_p_2_2_0 = u_p_p[2][2][0]
+    u_p_p_2_2_1 = u_p_p[2][2][1]
+    u_p_p_2_2_2 = u_p_p[2][2][2]
+    u_v_v_0_0_0 = u_v_v[0][0][0]
+    u_v_v_0_1_0 = u_v_v[0][1][0]
+    u_v_v_0_1_1 = u_v_v[0][1][1]
+    u_v_v_0_2_0 = u_v_v[0][2][0]
+    u_v_v_0_2_1 = u_v_v[0][2][1]
+    u_v_v_0_2_2 = u_v_v[0][2][2]
+    u_v_v_1_0_0 = u_v_v[1][0][0]
+    u_v_v_1_1_0 = u_v_v[1][1][0]
+    u_v_v_1_1_1 = u_v_v[1][1][1]
+    u_v_v_1_2_0 = u_v_v[1][2][0]
+    u_v_v_1_2_1 = u_v_v[1][2][1]
+    u_v_v_1_2_2 = u_v_v[1][2][2]
+    u_v_v_2_0_0 = u_v_v[2][0][0]
+    u_v_v_2_1_0 = u_v_v[2][1][0]
+    u_v_v_2_1_1 = u_v_v[2][1][1]
+    u_v_v_2_2_0 = u_v_v[2][2][0]
+    u_v_v_2_2_1 = u_v_v[2][2][1]
+    u_v_v_2_2_2 = u_v_v[2][2][2]
+    u_p_v_0_0_0 = u_p_v[0][0][0]
+    u_p_v_0_0_1 = u_p_v[0][0][1]
+    u_p_v_0_0_2 = u_p_v[0][0][2]
+    u_p_v_0_1_0 = u_p_v[0][1][0]
+    u_p_v_0_1_1 = u_p_v[0][1][1]
+    u_p_v_0_1_2 = u_p_v[0][1][2]
+    u_p_v_0_2_0 = u_p_v[0][2][0]
+    u_p_v_0_2_1 = u_p_v[0][2][1]
+    u_p_v_0_2_2 = u_p_v[0][2][2]
+    u_p_v_1_0_0 = u_p_v[1][0][0]
+    u_p_v_1_0_1 = u_p_v[1][0][1]
+    u_p_v_1_0_2 = u_p_v[1][0][2]
+    u_p_v_1_1_0 = u_p_v[1][1][0]
+    u_p_v_1_1_1 = u_p_v[1][1][1]
+    u_p_v_1_1_2 = u_p_v[1][1][2]
+    u_p_v_1_2_0 = u_p_v[1][2][0]
+    u_p_v_1_2_1 = u_p_v[1][2][1]
+    u_p_v_1_2_2 = u_p_v[1][2][2]
+    u_p_v_2_0_0 = u_p_v[2][0][0]
+    u_p_v_2_0_1 = u_p_v[2][0][1]
+    u_p_v_2_0_2 = u_p_v[2][0][2]
+    u_p_v_2_1_0 = u_p_v[2][1][0]
+    u_p_v_2_1_1 = u_p_v[2][1][1]
+    u_p_v_2_1_2 = u_p_v[2][1][2]
+    u_p_v_2_2_0 = u_p_v[2][2][0]
+    u_p_v_2_2_1 = u_p_v[2][2][1]
+    u_p_v_2_2_2 = u_p_v[2][2][2]
+    V_v_0 = V_v[0]
+    V_v_1 = V_v[1]
+    V_v_2 = V_v[2]
+    V_v_p_0_0 = V_v_p[0][0]
+    V_v_p_0_1 = V_v_p[0][1]
+    V_v_p_0_2 = V_v_p[0][2]
+    V_v_p_1_0 = V_v_p[1][0]
+    V_v_p_1_1 = V_v_p[1][1]
+    V_v_p_1_2 = V_v_p[1][2]
+    V_v_p_2_0 = V_v_p[2][0]
+    V_v_p_2_1 = V_v_p[2][1]
+    V_v_p_2_2 = V_v_p[2][2]
+    V_v_v_0_0 = V_v_v[0][0]
+    V_v_v_0_1 = V_v_v[0][1]
+    V_v_v_0_2 = V_v_v[0][2]
+    V_v_v_1_0 = V_v_v[1][0]
+    V_v_v_1_1 = V_v_v[1][1]
+    V_v_v_1_2 = V_v_v[1][2]
+    V_v_v_2_0 = V_v_v[2][0]
+    V_v_v_2_1 = V_v_v[2][1]
+    V_v_v_2_2 = V_v_v[2][2]
+    t0 = ad_2 + u_2
+    t1 = n_2*t0
+    t2 = ad_0 + u_0
+    t3 = n_0*t2
+    t4 = ad_1 + u_1
+    t5 = n_1*t4
+    t6 = t3 + t5
+    t7 = t2**2
+    t8 = t4**2
+    t9 = t0**2
+    t10 = t7 + t8 + t9
+    t11 = t10**(-1.0)
+    t12 = n_0**2 - 1
+    t13 = n_0*t1 + n_0*t5 + u_0
+    t14 = t12*t2 + t13
+    t15 = n_1**2 - 1
+    t16 = n_1*t1 + n_1*t3 + u_1
+    t17 = t15*t4 + t16
+    t18 = n_2**2 - 1
+    t19 = n_2*t3 + n_2*t5 + u_2
+    t20 = t0*t18 + t19
+    t21 = jd_2 + u_p_2_0*v_0 + u_p_2_1*v_1 + u_p_2_2*v_2
+    t22 = t14*u_v_2_0 + t17*u_v_2_1 + t20*u_v_2_2 + t21
+    t23 = jd_0 + u_p_0_0*v_0 + u_p_0_1*v_1 + u_p_0_2*v_2
+    t24 = t14*u_v_0_0 + t17*u_v_0_1 + t20*u_v_0_2 + t23
+    t25 = V_v_0*n_2 - V_v_2*n_0
+    t26 = ktt**(-1.0)
+    t27 = t10**(1/2)
+    t28 = t26*t27
+    t29 = n_0*t0
+    t30 = t27**(-1.0)
+    t31 = ktt2*t30
+    t32 = n_2*t2
+    t33 = t25*t28 + t29*t31 - t31*t32
+    t34 = t33 + w_1
+    t35 = t11*(-t0*t24 + t2*t22) + t34
+    t36 = jd_1 + u_p_1_0*v_0 + u_p_1_1*v_1 + u_p_1_2*v_2
+    t37 = t14*u_v_1_0 + t17*u_v_1_1 + t20*u_v_1_2 + t36
+    t38 = t2*t37
+    t39 = t24*t4
+    t40 = t38 - t39
+    t41 = V_v_0*n_1 - V_v_1*n_0
+    t42 = n_0*t4
+    t43 = t31*t42
+    t44 = n_1*t2
+    t45 = t31*t44
+    t46 = t43 - t45
+    t47 = t11*t40 + t28*t41 + t46
+    t48 = t47 - w_2
+    t49 = n_1*t48 + n_2*t35
+    t50 = t11*t7
+    t51 = t11*t2
+    t52 = n_0*n_1
+    t53 = t52*u_v_1_1
+    t54 = n_0*n_2
+    t55 = t12*u_v_1_0 + t53 + t54*u_v_1_2
+    t56 = t52*u_v_0_1
+    t57 = t54*u_v_0_2
+    t58 = t12*u_v_0_0
+    t59 = t56 + t57 + t58
+    t60 = t2*t55 - t4*t59
+    t61 = t10**(-2.0)
+    t62 = t40*t61
+    t63 = n_1*t31
+    t64 = t10**(-3/2)
+    t65 = ktt2*t64
+    t66 = -ktt2*n_1*t64*t7 + t3*t4*t65 + t63
+    t67 = t52*u_v_0_0
+    t68 = n_1*n_2
+    t69 = t15*u_v_0_1 + t67 + t68*u_v_0_2
+    t70 = t52*u_v_1_0
+    t71 = t68*u_v_1_2
+    t72 = t15*u_v_1_1
+    t73 = t70 + t71 + t72
+    t74 = -t12
+    t75 = t13 - t2*t74
+    t76 = -t15
+    t77 = t16 - t4*t76
+    t78 = -t18
+    t79 = -t0*t78 + t19
+    t80 = t23 + t75*u_v_0_0 + t77*u_v_0_1 + t79*u_v_0_2
+    t81 = t11*t80
+    t82 = t36 + t75*u_v_1_0 + t77*u_v_1_1 + t79*u_v_1_2
+    t83 = t2*t82
+    t84 = t11*t4
+    t85 = -t2*t73 + t4*t69 - t8*t81 + t80 + t83*t84
+    t86 = n_0*t65
+    t87 = -ktt2*n_0*t30 - ktt2*n_1*t2*t4*t64 + t8*t86
+    t88 = t0*t65
+    t89 = t44*t88
+    t90 = t42*t88
+    t91 = -t90
+    t92 = t26*t30
+    t93 = t41*t92
+    t94 = t0*t37
+    t95 = t51*t94
+    t96 = t54*u_v_0_0
+    t97 = t18*u_v_0_2 + t68*u_v_0_1 + t96
+    t98 = t68*u_v_1_1
+    t99 = t18*u_v_1_2 + t54*u_v_1_0 + t98
+    t100 = -t2*t99 + t4*t97
+    t101 = n_0*t31
+    t102 = t63*u_p_0_0
+    t103 = V_v_p_0_0*n_1 - V_v_p_1_0*n_0
+    t104 = t0*u_p_2_0 + t2*u_p_0_0 + t4*u_p_1_0
+    t105 = t104*t65
+    t106 = t105*t42
+    t107 = t104*t11
+    t108 = t52*u_p_1_0 + t54*u_p_2_0 + u_p_0_0
+    t109 = t108 + t12*u_p_0_0
+    t110 = t52*u_p_0_0 + t68*u_p_2_0 + u_p_1_0
+    t111 = t110 + t15*u_p_1_0
+    t112 = t54*u_p_0_0 + t68*u_p_1_0 + u_p_2_0
+    t113 = t112 + t18*u_p_2_0
+    t114 = u_p_p_1_0_0*v_0 + u_p_p_1_1_0*v_1 + u_p_p_1_2_0*v_2
+    t115 = t109*u_v_1_0 + t111*u_v_1_1 + t113*u_v_1_2 + t114 + t14*u_p_v_1_0_0 + t17*u_p_v_1_0_1 + t20*u_p_v_1_0_2
+    t116 = u_p_p_0_0_0*v_0 + u_p_p_0_1_0*v_1 + u_p_p_0_2_0*v_2
+    t117 = t63*u_p_0_1
+    t118 = V_v_p_0_1*n_1 - V_v_p_1_1*n_0
+    t119 = t0*u_p_2_1 + t2*u_p_0_1 + t4*u_p_1_1
+    t120 = t119*t65
+    t121 = t120*t42
+    t122 = t11*t119
+    t123 = t52*u_p_1_1 + t54*u_p_2_1 + u_p_0_1
+    t124 = t12*u_p_0_1 + t123
+    t125 = t52*u_p_0_1 + t68*u_p_2_1 + u_p_1_1
+    t126 = t125 + t15*u_p_1_1
+    t127 = t54*u_p_0_1 + t68*u_p_1_1 + u_p_2_1
+    t128 = t127 + t18*u_p_2_1
+    t129 = u_p_p_1_1_0*v_0 + u_p_p_1_1_1*v_1 + u_p_p_1_2_1*v_2
+    t130 = t124*u_v_1_0 + t126*u_v_1_1 + t128*u_v_1_2 + t129 + t14*u_p_v_1_1_0 + t17*u_p_v_1_1_1 + t20*u_p_v_1_1_2
+    t131 = u_p_p_0_1_0*v_0 + u_p_p_0_1_1*v_1 + u_p_p_0_2_1*v_2
+    t132 = t63*u_p_0_2
+    t133 = V_v_p_0_2*n_1 - V_v_p_1_2*n_0
+    t134 = t0*u_p_2_2 + t2*u_p_0_2 + t4*u_p_1_2
+    t135 = t134*t65
+    t136 = t135*t42
+    t137 = t11*t134
+    t138 = t52*u_p_1_2 + t54*u_p_2_2 + u_p_0_2
+    t139 = t12*u_p_0_2 + t138
+    t140 = t52*u_p_0_2 + t68*u_p_2_2 + u_p_1_2
+    t141 = t140 + t15*u_p_1_2
+    t142 = t54*u_p_0_2 + t68*u_p_1_2 + u_p_2_2
+    t143 = t142 + t18*u_p_2_2
+    t144 = u_p_p_1_2_0*v_0 + u_p_p_1_2_1*v_1 + u_p_p_1_2_2*v_2
+    t145 = t139*u_v_1_0 + t14*u_p_v_1_2_0 + t141*u_v_1_1 + t143*u_v_1_2 + t144 + t17*u_p_v_1_2_1 + t20*u_p_v_1_2_2
+    t146 = u_p_p_0_2_0*v_0 + u_p_p_0_2_1*v_1 + u_p_p_0_2_2*v_2
+    t147 = t63*u_v_0_0
+    t148 = V_v_v_0_0*n_1 - V_v_v_1_0*n_0
+    t149 = t4*u_v_1_0
+    t150 = t0*u_v_2_0
+    t151 = t149 + t150 + t2*u_v_0_0
+    t152 = t151*t65
+    t153 = t152*t42
+    t154 = t11*t151
+    t155 = t54*u_v_2_0
+    t156 = t155 + t70 + u_v_0_0
+    t157 = t156 + t58
+    t158 = t67 + t68*u_v_2_0 + u_v_1_0
+    t159 = t15*u_v_1_0 + t158
+    t160 = t68*u_v_1_0 + t96 + u_v_2_0
+    t161 = t160 + t18*u_v_2_0
+    t162 = u_p_1_0 + u_p_v_1_0_0*v_0 + u_p_v_1_1_0*v_1 + u_p_v_1_2_0*v_2
+    t163 = t14*u_v_v_1_0_0 + t157*u_v_1_0 + t159*u_v_1_1 + t161*u_v_1_2 + t162 + t17*u_v_v_1_1_0 + t20*u_v_v_1_2_0
+    t164 = u_p_0_0 + u_p_v_0_0_0*v_0 + u_p_v_0_1_0*v_1 + u_p_v_0_2_0*v_2
+    t165 = t101*u_v_1_0 + t11*(-t154*t38 + t154*t39 + t163*t2 - t24*u_v_1_0 + t37*u_v_0_0 - t4*(t14*u_v_v_0_0_0 + t157*u_v_0_0 + t159*u_v_0_1 + t161*u_v_0_2 + t164 + t17*u_v_v_0_1_0 + t20*u_v_v_0_2_0)) - t147 + t148*t28 - t151*t62 + t151*t93 + t152*t44 - t153
+    t166 = t63*u_v_0_1
+    t167 = V_v_v_0_1*n_1 - V_v_v_1_1*n_0
+    t168 = t2*u_v_0_1
+    t169 = t0*u_v_2_1
+    t170 = t168 + t169 + t4*u_v_1_1
+    t171 = t170*t65
+    t172 = t171*t42
+    t173 = t11*t170
+    t174 = t53 + t54*u_v_2_1 + u_v_0_1
+    t175 = t12*u_v_0_1 + t174
+    t176 = t68*u_v_2_1
+    t177 = t176 + t56 + u_v_1_1
+    t178 = t177 + t72
+    t179 = t54*u_v_0_1 + t98 + u_v_2_1
+    t180 = t179 + t18*u_v_2_1
+    t181 = u_p_1_1 + u_p_v_1_0_1*v_0 + u_p_v_1_1_1*v_1 + u_p_v_1_2_1*v_2
+    t182 = t14*u_v_v_1_1_0 + t17*u_v_v_1_1_1 + t175*u_v_1_0 + t178*u_v_1_1 + t180*u_v_1_2 + t181 + t20*u_v_v_1_2_1
+    t183 = u_p_0_1 + u_p_v_0_0_1*v_0 + u_p_v_0_1_1*v_1 + u_p_v_0_2_1*v_2
+    t184 = t101*u_v_1_1 + t11*(-t173*t38 + t173*t39 + t182*t2 - t24*u_v_1_1 + t37*u_v_0_1 - t4*(t14*u_v_v_0_1_0 + t17*u_v_v_0_1_1 + t175*u_v_0_0 + t178*u_v_0_1 + t180*u_v_0_2 + t183 + t20*u_v_v_0_2_1)) - t166 + t167*t28 - t170*t62 + t170*t93 + t171*t44 - t172
+    t185 = t63*u_v_0_2
+    t186 = V_v_v_0_2*n_1 - V_v_v_1_2*n_0
+    t187 = t2*u_v_0_2
+    t188 = t4*u_v_1_2
+    t189 = t0*u_v_2_2 + t187 + t188
+    t190 = t189*t65
+    t191 = t190*t42
+    t192 = t11*t189
+    t193 = t54*u_v_2_2
+    t194 = t193 + t52*u_v_1_2 + u_v_0_2
+    t195 = t12*u_v_0_2 + t194
+    t196 = t68*u_v_2_2
+    t197 = t196 + t52*u_v_0_2 + u_v_1_2
+    t198 = t15*u_v_1_2 + t197
+    t199 = t18*u_v_2_2
+    t200 = t57 + t71 + u_v_2_2
+    t201 = t199 + t200
+    t202 = u_p_1_2 + u_p_v_1_0_2*v_0 + u_p_v_1_1_2*v_1 + u_p_v_1_2_2*v_2
+    t203 = t14*u_v_v_1_2_0 + t17*u_v_v_1_2_1 + t195*u_v_1_0 + t198*u_v_1_1 + t20*u_v_v_1_2_2 + t201*u_v_1_2 + t202
+    t204 = u_p_0_2 + u_p_v_0_0_2*v_0 + u_p_v_0_1_2*v_1 + u_p_v_0_2_2*v_2
+    t205 = t101*u_v_1_2 + t11*(-t192*t38 + t192*t39 + t2*t203 - t24*u_v_1_2 + t37*u_v_0_2 - t4*(t14*u_v_v_0_2_0 + t17*u_v_v_0_2_1 + t195*u_v_0_0 + t198*u_v_0_1 + t20*u_v_v_0_2_2 + t201*u_v_0_2 + t204)) - t185 + t186*t28 - t189*t62 + t189*t93 + t190*t44 - t191
+    t206 = t22*t4
+    t207 = t206 - t94
+    t208 = V_v_1*n_2 - V_v_2*n_1
+    t209 = n_1*t0
+    t210 = t209*t31
+    t211 = n_2*t4
+    t212 = t211*t31
+    t213 = t210 - t212
+    t214 = t11*t207 + t208*t28 + t213
+    t215 = t21 + t75*u_v_2_0 + t77*u_v_2_1 + t79*u_v_2_2
+    t216 = t2*t215
+    t217 = t0*t80
+    t218 = t216 - t217
+    t219 = -t218
+    t220 = -t11*t219 + t33
+    t221 = n_0*t214 - n_1*t220 + n_2*t47
+    t222 = n_1*w_2 - n_2*w_1
+    t223 = t31*t4
+    t224 = V_v_1*t28
+    t225 = t1 + 2*t3 + t5
+    t226 = t225*u_v_1_0 + t32*u_v_1_2 + t44*u_v_1_1
+    t227 = n_1*t168 + n_2*t187 + t225*u_v_0_0
+    t228 = t11*(t2*t226 - t227*t4) + t223 - t224
+    t229 = n_0*w_1 - n_1*w_0
+    t230 = 2*t1 + t6
+    t231 = t209*u_v_1_1 + t230*u_v_1_2 + t29*u_v_1_0
+    t232 = t209*u_v_0_1 + t230*u_v_0_2 + t29*u_v_0_0
+    t233 = t11*(t2*t231 - t232*t4)
+    t234 = n_0*w_2 - n_2*w_0
+    t235 = t1 + t3 + 2*t5
+    t236 = n_0*t149 + n_2*t188 + t235*u_v_1_1
+    t237 = t211*u_v_0_2 + t235*u_v_0_1 + t42*u_v_0_0
+    t238 = V_v_0*t28 - t2*t31
+    t239 = kw**(-1.0)
+    t240 = ktt*t30
+    t241 = t239*t240
+    t242 = -sd_0*t11*t4 + sd_1*t51 + t234*(t11*(t2*t236 - t237*t4) + t238) + t241*t42 - t241*t44
+    t243 = t211*u_v_2_2 + t235*u_v_2_1 + t42*u_v_2_0
+    t244 = n_0*t150 + n_1*t169 + t230*u_v_2_2
+    t245 = t225*u_v_2_0 + t32*u_v_2_2 + t44*u_v_2_1
+    t246 = -V_v_2*t28 + t0*t31
+    t247 = t32*t65
+    t248 = t247*t4
+    t249 = t25*t92
+    t250 = t15*u_v_2_1 + t196 + t52*u_v_2_0
+    t251 = t216*t84
+    t252 = -t0*t11*t4*t80
+    t253 = t219*t61
+    t254 = t155 + t176 + t199
+    t255 = t0*t11
+    t256 = n_2*t31
+    t257 = t12*u_v_2_0 + t193 + t52*u_v_2_1
+    t258 = t29*t65
+    t259 = t108 - t74*u_p_0_0
+    t260 = t110 - t76*u_p_1_0
+    t261 = t112 - t78*u_p_2_0
+    t262 = u_p_p_2_0_0*v_0 + u_p_p_2_1_0*v_1 + u_p_p_2_2_0*v_2
+    t263 = t259*u_v_2_0 + t260*u_v_2_1 + t261*u_v_2_2 + t262 + t75*u_p_v_2_0_0 + t77*u_p_v_2_0_1 + t79*u_p_v_2_0_2
+    t264 = t116 + t259*u_v_0_0 + t260*u_v_0_1 + t261*u_v_0_2 + t75*u_p_v_0_0_0 + t77*u_p_v_0_0_1 + t79*u_p_v_0_0_2
+    t265 = t123 - t74*u_p_0_1
+    t266 = t125 - t76*u_p_1_1
+    t267 = t127 - t78*u_p_2_1
+    t268 = u_p_p_2_1_0*v_0 + u_p_p_2_1_1*v_1 + u_p_p_2_2_1*v_2
+    t269 = t265*u_v_2_0 + t266*u_v_2_1 + t267*u_v_2_2 + t268 + t75*u_p_v_2_1_0 + t77*u_p_v_2_1_1 + t79*u_p_v_2_1_2
+    t270 = t131 + t265*u_v_0_0 + t266*u_v_0_1 + t267*u_v_0_2 + t75*u_p_v_0_1_0 + t77*u_p_v_0_1_1 + t79*u_p_v_0_1_2
+    t271 = t138 - t74*u_p_0_2
+    t272 = t140 - t76*u_p_1_2
+    t273 = t142 - t78*u_p_2_2
+    t274 = u_p_p_2_2_0*v_0 + u_p_p_2_2_1*v_1 + u_p_p_2_2_2*v_2
+    t275 = t271*u_v_2_0 + t272*u_v_2_1 + t273*u_v_2_2 + t274 + t75*u_p_v_2_2_0 + t77*u_p_v_2_2_1 + t79*u_p_v_2_2_2
+    t276 = t146 + t271*u_v_0_0 + t272*u_v_0_1 + t273*u_v_0_2 + t75*u_p_v_0_2_0 + t77*u_p_v_0_2_1 + t79*u_p_v_0_2_2
+    t277 = t174 - t74*u_v_0_1
+    t278 = t177 - t76*u_v_1_1
+    t279 = t179 - t78*u_v_2_1
+    t280 = u_p_2_1 + u_p_v_2_0_1*v_0 + u_p_v_2_1_1*v_1 + u_p_v_2_2_1*v_2
+    t281 = t277*u_v_2_0 + t278*u_v_2_1 + t279*u_v_2_2 + t280 + t75*u_v_v_2_1_0 + t77*u_v_v_2_1_1 + t79*u_v_v_2_2_1
+    t282 = t183 + t277*u_v_0_0 + t278*u_v_0_1 + t279*u_v_0_2 + t75*u_v_v_0_1_0 + t77*u_v_v_0_1_1 + t79*u_v_v_0_2_1
+    t283 = t101*u_v_2_1 - t11*(t0*t282 + t11*t170*t2*t215 - t173*t217 - t2*t281 - t215*u_v_0_1 + t80*u_v_2_1) + t170*t247 + t170*t249 + t170*t253 - t170*t258 - t256*u_v_0_1 + t28*(V_v_v_0_1*n_2 - V_v_v_2_1*n_0)
+    t284 = t156 - t74*u_v_0_0
+    t285 = t158 - t76*u_v_1_0
+    t286 = t160 - t78*u_v_2_0
+    t287 = u_p_2_0 + u_p_v_2_0_0*v_0 + u_p_v_2_1_0*v_1 + u_p_v_2_2_0*v_2
+    t288 = t284*u_v_2_0 + t285*u_v_2_1 + t286*u_v_2_2 + t287 + t75*u_v_v_2_0_0 + t77*u_v_v_2_1_0 + t79*u_v_v_2_2_0
+    t289 = t164 + t284*u_v_0_0 + t285*u_v_0_1 + t286*u_v_0_2 + t75*u_v_v_0_0_0 + t77*u_v_v_0_1_0 + t79*u_v_v_0_2_0
+    t290 = t101*u_v_2_0 - t11*(t0*t289 + t11*t151*t2*t215 - t154*t217 - t2*t288 - t215*u_v_0_0 + t80*u_v_2_0) + t151*t247 + t151*t249 + t151*t253 - t151*t258 - t256*u_v_0_0 + t28*(V_v_v_0_0*n_2 - V_v_v_2_0*n_0)
+    t291 = t194 - t74*u_v_0_2
+    t292 = t197 - t76*u_v_1_2
+    t293 = t200 - t78*u_v_2_2
+    t294 = u_p_2_2 + u_p_v_2_0_2*v_0 + u_p_v_2_1_2*v_1 + u_p_v_2_2_2*v_2
+    t295 = t291*u_v_2_0 + t292*u_v_2_1 + t293*u_v_2_2 + t294 + t75*u_v_v_2_2_0 + t77*u_v_v_2_2_1 + t79*u_v_v_2_2_2
+    t296 = t204 + t291*u_v_0_0 + t292*u_v_0_1 + t293*u_v_0_2 + t75*u_v_v_0_2_0 + t77*u_v_v_0_2_1 + t79*u_v_v_0_2_2
+    t297 = t101*u_v_2_2 - t11*(t0*t296 + t11*t189*t2*t215 - t192*t217 - t2*t295 - t215*u_v_0_2 + t80*u_v_2_2) + t189*t247 + t189*t249 + t189*t253 - t189*t258 - t256*u_v_0_2 + t28*(V_v_v_0_2*n_2 - V_v_v_2_2*n_0)
+    t298 = t4*t80
+    t299 = -t298 + t83
+    t300 = t11*t299
+    t301 = -t41
+    t302 = t28*t301
+    t303 = t300 - t302 + t46
+    t304 = t215*t4
+    t305 = t0*t82
+    t306 = t304 - t305
+    t307 = t11*t306
+    t308 = -t208
+    t309 = t28*t308
+    t310 = t213 + t307 - t309
+    t311 = jd_0*(-n_2*t65*t7 - t11*(-t0*t59 + t2*t257 - t215*t50 + t215 + t217*t51) + t2*t218*t61 - t2*t249 + t256 + t3*t88) + jd_1*(-t11*(-t0*t69 + t2*t250 - t251 - t252) + t218*t4*t61 - t248 - t249*t4 - t91) - jd_2*(t0*t249 + t0*t253 + t1*t2*t65 + t101 - t11*(t0*t97 - t2*t254 + t216*t255 + t80 - t81*t9) - t86*t9) + ktt*n_2*t2*t239*t30 + sd_0*t0*t11 - sd_2*t51 - t11*t234*(-t0*t237 + t2*t243) - t14*t290 - t17*t283 - t20*t297 - t221*(n_0*t303 - n_2*t310) - t222*(-t11*(-t0*t227 + t2*t245) - t246) - t229*(-t11*(-t0*t232 + t2*t244) - t238) - t241*t29 - v_0*(t101*u_p_2_0 + t104*t247 + t104*t249 + t104*t253 - t104*t258 - t11*(t0*t264 + t104*t11*t2*t215 - t107*t217 - t2*t263 - t215*u_p_0_0 + t80*u_p_2_0) - t256*u_p_0_0 + t28*(V_v_p_0_0*n_2 - V_v_p_2_0*n_0)) - v_1*(t101*u_p_2_1 - t11*(t0*t270 + t11*t119*t2*t215 - t122*t217 - t2*t269 - t215*u_p_0_1 + t80*u_p_2_1) + t119*t247 + t119*t249 + t119*t253 - t119*t258 - t256*u_p_0_1 + t28*(V_v_p_0_1*n_2 - V_v_p_2_1*n_0)) - v_2*(t101*u_p_2_2 - t11*(t0*t276 + t11*t134*t2*t215 - t137*t217 - t2*t275 - t215*u_p_0_2 + t80*u_p_2_2) + t134*t247 + t134*t249 + t134*t253 - t134*t258 - t256*u_p_0_2 + t28*(V_v_p_0_2*n_2 - V_v_p_2_2*n_0))
+    t312 = n_0*(-t300 + t302 - t43 + t45 + w_2) - n_2*(-t210 + t212 - t307 + t309 + w_0)
+    t313 = t308*t92
+    t314 = t306*t61
+    t315 = t255*t83
+    t316 = t0*t55 - t257*t4
+    t317 = t11*t8
+    t318 = -t0*t73 + t250*t4
+    t319 = -ktt2*n_2*t64*t8 + t256 + t5*t88
+    t320 = t0*t99 - t11*t82*t9 - t254*t4 + t255*t304 + t82
+    t321 = -ktt2*n_2*t0*t4*t64 + n_1*t65*t9 - t63
+    t322 = t256*u_p_1_0
+    t323 = V_v_p_1_0*n_2 - V_v_p_2_0*n_1
+    t324 = t105*t209
+    t325 = t114 + t259*u_v_1_0 + t260*u_v_1_1 + t261*u_v_1_2 + t75*u_p_v_1_0_0 + t77*u_p_v_1_0_1 + t79*u_p_v_1_0_2
+    t326 = t256*u_p_1_1
+    t327 = V_v_p_1_1*n_2 - V_v_p_2_1*n_1
+    t328 = t120*t209
+    t329 = t129 + t265*u_v_1_0 + t266*u_v_1_1 + t267*u_v_1_2 + t75*u_p_v_1_1_0 + t77*u_p_v_1_1_1 + t79*u_p_v_1_1_2
+    t330 = t256*u_p_1_2
+    t331 = V_v_p_1_2*n_2 - V_v_p_2_2*n_1
+    t332 = t135*t209
+    t333 = t144 + t271*u_v_1_0 + t272*u_v_1_1 + t273*u_v_1_2 + t75*u_p_v_1_2_0 + t77*u_p_v_1_2_1 + t79*u_p_v_1_2_2
+    t334 = -t229
+    t335 = t11*(-t0*t231 + t244*t4) - t223 + t224
+    t336 = -t220
+    t337 = n_0*t310 + n_1*t336 + n_2*t303
+    t338 = t256*u_v_1_0
+    t339 = V_v_v_1_0*n_2 - V_v_v_2_0*n_1
+    t340 = t152*t209
+    t341 = t162 + t284*u_v_1_0 + t285*u_v_1_1 + t286*u_v_1_2 + t75*u_v_v_1_0_0 + t77*u_v_v_1_1_0 + t79*u_v_v_1_2_0
+    t342 = ktt2*n_1*t30*u_v_2_0 + ktt2*n_2*t151*t4*t64 + t11*(-t0*t341 - t154*t304 + t154*t305 + t215*u_v_1_0 + t288*t4 - t82*u_v_2_0) - t151*t313 - t151*t314 + t28*t339 - t338 - t340
+    t343 = t256*u_v_1_1
+    t344 = V_v_v_1_1*n_2 - V_v_v_2_1*n_1
+    t345 = t171*t209
+    t346 = t181 + t277*u_v_1_0 + t278*u_v_1_1 + t279*u_v_1_2 + t75*u_v_v_1_1_0 + t77*u_v_v_1_1_1 + t79*u_v_v_1_2_1
+    t347 = ktt2*n_1*t30*u_v_2_1 + ktt2*n_2*t170*t4*t64 + t11*(-t0*t346 - t173*t304 + t173*t305 + t215*u_v_1_1 + t281*t4 - t82*u_v_2_1) - t170*t313 - t170*t314 + t28*t344 - t343 - t345
+    t348 = t256*u_v_1_2
+    t349 = V_v_v_1_2*n_2 - V_v_v_2_2*n_1
+    t350 = t190*t209
+    t351 = t202 + t291*u_v_1_0 + t292*u_v_1_1 + t293*u_v_1_2 + t75*u_v_v_1_2_0 + t77*u_v_v_1_2_1 + t79*u_v_v_1_2_2
+    t352 = ktt2*n_1*t30*u_v_2_2 + ktt2*n_2*t189*t4*t64 + t11*(-t0*t351 - t192*t304 + t192*t305 + t215*u_v_1_2 + t295*t4 - t82*u_v_2_2) - t189*t313 - t189*t314 + t28*t349 - t348 - t350
+    t353 = -t222
+    t354 = t11*(-t0*t226 + t245*t4)
+    t355 = -sd_1*t255 + sd_2*t84 + t209*t241 - t211*t241 + t234*(t11*(-t0*t236 + t243*t4) + t246)
+    t356 = t299*t61
+    t357 = t301*t92
+    t358 = -t89
+    t359 = ktt2*n_0*t30*u_v_1_0 + ktt2*n_1*t151*t2*t64 + t11*(t154*t298 - t154*t83 + t2*t341 - t289*t4 - t80*u_v_1_0 + t82*u_v_0_0) - t147 + t148*t28 - t151*t356 - t151*t357 - t153
+    t360 = ktt2*n_0*t30*u_v_1_1 + ktt2*n_1*t170*t2*t64 + t11*(t173*t298 - t173*t83 + t2*t346 - t282*t4 - t80*u_v_1_1 + t82*u_v_0_1) - t166 + t167*t28 - t170*t356 - t170*t357 - t172
+    t361 = ktt2*n_0*t30*u_v_1_2 + ktt2*n_1*t189*t2*t64 + t11*(t192*t298 - t192*t83 + t2*t351 - t296*t4 - t80*u_v_1_2 + t82*u_v_0_2) - t185 + t186*t28 - t189*t356 - t189*t357 - t191
+    t362 = t214 - w_0
+    t363 = n_0*t35 + n_1*t362
+    t364 = t208*t92
+    t365 = t207*t61
+    t366 = t11*(-t0*t163 - t154*t206 + t154*t94 + t22*u_v_1_0 - t37*u_v_2_0 + t4*(t14*u_v_v_2_0_0 + t157*u_v_2_0 + t159*u_v_2_1 + t161*u_v_2_2 + t17*u_v_v_2_1_0 + t20*u_v_v_2_2_0 + t287)) + t151*t364 - t151*t365 + t152*t211 + t28*t339 - t338 - t340 + t63*u_v_2_0
+    t367 = t11*(-t0*t182 - t173*t206 + t173*t94 + t22*u_v_1_1 - t37*u_v_2_1 + t4*(t14*u_v_v_2_1_0 + t17*u_v_v_2_1_1 + t175*u_v_2_0 + t178*u_v_2_1 + t180*u_v_2_2 + t20*u_v_v_2_2_1 + t280)) + t170*t364 - t170*t365 + t171*t211 + t28*t344 - t343 - t345 + t63*u_v_2_1
+    t368 = t11*(-t0*t203 - t192*t206 + t192*t94 + t22*u_v_1_2 - t37*u_v_2_2 + t4*(t14*u_v_v_2_2_0 + t17*u_v_v_2_2_1 + t195*u_v_2_0 + t198*u_v_2_1 + t20*u_v_v_2_2_2 + t201*u_v_2_2 + t294)) + t189*t364 - t189*t365 + t190*t211 + t28*t349 - t348 - t350 + t63*u_v_2_2
+    t369 = -t48
+    t370 = -t362
+    t371 = n_0*t369 - n_2*t370
+    t372 = t11*t218 + t34
+    t373 = n_0*t372 - n_1*t370
+    t374 = n_1*t369 - n_2*t372
+    t375 = n_0*t240
+    t376 = n_1*t240
+    t377 = n_2*t240
+    t378 = kw*t312
+    t379 = -t290
+    t380 = kw*t373
+    t381 = kw*t374
+    t382 = -t283
+    t383 = -t297
+
+    return (t1 + t6,
+            numpy.array([-kw2*t49 - n_1*(jd_0*(t11*(-t37*t50 + t37 + t39*t51 + t60) + t2*t26*t30*t41 - t2*t62 - t66) + jd_1*(-t11*t85 + t26*t30*t4*t41 - t4*t62 - t87) + jd_2*(-t0*t62 + t0*t93 + t11*(t0*t11*t24*t4 - t100 - t95) + t89 + t91) + t14*t165 + t17*t184 + t20*t205 - t221*(n_0*t220 + n_1*t214) - t222*t228 - t229*t233 + t242 + v_0*(t101*u_p_1_0 - t102 + t103*t28 - t104*t62 + t104*t93 + t105*t44 - t106 + t11*(-t107*t38 + t107*t39 + t115*t2 - t24*u_p_1_0 + t37*u_p_0_0 - t4*(t109*u_v_0_0 + t111*u_v_0_1 + t113*u_v_0_2 + t116 + t14*u_p_v_0_0_0 + t17*u_p_v_0_0_1 + t20*u_p_v_0_0_2))) + v_1*(t101*u_p_1_1 + t11*(-t122*t38 + t122*t39 + t130*t2 - t24*u_p_1_1 + t37*u_p_0_1 - t4*(t124*u_v_0_0 + t126*u_v_0_1 + t128*u_v_0_2 + t131 + t14*u_p_v_0_1_0 + t17*u_p_v_0_1_1 + t20*u_p_v_0_1_2)) - t117 + t118*t28 - t119*t62 + t119*t93 + t120*t44 - t121) + v_2*(t101*u_p_1_2 + t11*(-t137*t38 + t137*t39 + t145*t2 - t24*u_p_1_2 + t37*u_p_0_2 - t4*(t139*u_v_0_0 + t14*u_p_v_0_2_0 + t141*u_v_0_1 + t143*u_v_0_2 + t146 + t17*u_p_v_0_2_1 + t20*u_p_v_0_2_2)) - t132 + t133*t28 - t134*t62 + t134*t93 + t135*t44 - t136)) + n_2*t311, -kw2*t312 + n_0*(jd_0*(t11*(t298*t51 - t50*t82 + t60 + t82) - t2*t356 - t2*t357 - t66) + jd_1*(-t11*t85 - t356*t4 - t357*t4 - t87) + jd_2*(-t0*t356 - t0*t357 + t11*(-t100 - t252 - t315) - t358 - t90) + t228*t353 + t233*t334 + t242 + t337*(n_0*t336 - n_1*t310) + t359*t75 + t360*t77 + t361*t79 + v_0*(ktt2*n_0*t30*u_p_1_0 + ktt2*n_1*t104*t2*t64 - t102 + t103*t28 - t104*t356 - t104*t357 - t106 + t11*(t107*t298 - t107*t83 + t2*t325 - t264*t4 - t80*u_p_1_0 + t82*u_p_0_0)) + v_1*(ktt2*n_0*t30*u_p_1_1 + ktt2*n_1*t119*t2*t64 + t11*(t122*t298 - t122*t83 + t2*t329 - t270*t4 - t80*u_p_1_1 + t82*u_p_0_1) - t117 + t118*t28 - t119*t356 - t119*t357 - t121) + v_2*(ktt2*n_0*t30*u_p_1_2 + ktt2*n_1*t134*t2*t64 + t11*(t137*t298 - t137*t83 + t2*t333 - t276*t4 - t80*u_p_1_2 + t82*u_p_0_2) - t132 + t133*t28 - t134*t356 - t134*t357 - t136)) - n_2*(jd_0*(t11*(-t251 + t315 - t316) - t2*t313 - t2*t314 + t248 - t89) + jd_1*(t11*(-t215*t317 + t215 + t305*t84 + t318) - t313*t4 - t314*t4 - t319) + jd_2*(-t0*t313 - t0*t314 - t11*t320 - t321) + t334*t335 + t337*(n_1*t303 - n_2*t336) + t342*t75 + t347*t77 + t352*t79 + t353*t354 + t355 + v_0*(ktt2*n_1*t30*u_p_2_0 + ktt2*n_2*t104*t4*t64 - t104*t313 - t104*t314 + t11*(-t0*t325 - t107*t304 + t107*t305 + t215*u_p_1_0 + t263*t4 - t82*u_p_2_0) + t28*t323 - t322 - t324) + v_1*(ktt2*n_1*t30*u_p_2_1 + ktt2*n_2*t119*t4*t64 + t11*(-t0*t329 - t122*t304 + t122*t305 + t215*u_p_1_1 + t269*t4 - t82*u_p_2_1) - t119*t313 - t119*t314 + t28*t327 - t326 - t328) + v_2*(ktt2*n_1*t30*u_p_2_2 + ktt2*n_2*t134*t4*t64 + t11*(-t0*t333 - t137*t304 + t137*t305 + t215*u_p_1_2 + t275*t4 - t82*u_p_2_2) - t134*t313 - t134*t314 + t28*t331 - t330 - t332)), kw2*t363 - n_0*t311 + n_1*(jd_0*(t11*(-t206*t51 - t316 + t95) + t2*t364 - t2*t365 + t248 + t358) + jd_1*(t11*(-t22*t317 + t22 + t318 + t84*t94) + t208*t26*t30*t4 - t319 - t365*t4) + jd_2*(t0*t208*t26*t30 - t0*t365 - t11*t320 - t321) + t14*t366 + t17*t367 + t20*t368 + t221*(n_1*t47 + n_2*t220) - t222*t354 - t229*t335 + t355 + v_0*(t104*t364 - t104*t365 + t105*t211 + t11*(-t0*t115 - t107*t206 + t107*t94 + t22*u_p_1_0 - t37*u_p_2_0 + t4*(t109*u_v_2_0 + t111*u_v_2_1 + t113*u_v_2_2 + t14*u_p_v_2_0_0 + t17*u_p_v_2_0_1 + t20*u_p_v_2_0_2 + t262)) + t28*t323 - t322 - t324 + t63*u_p_2_0) + v_1*(t11*(-t0*t130 - t122*t206 + t122*t94 + t22*u_p_1_1 - t37*u_p_2_1 + t4*(t124*u_v_2_0 + t126*u_v_2_1 + t128*u_v_2_2 + t14*u_p_v_2_1_0 + t17*u_p_v_2_1_1 + t20*u_p_v_2_1_2 + t268)) + t119*t364 - t119*t365 + t120*t211 + t28*t327 - t326 - t328 + t63*u_p_2_1) + v_2*(t11*(-t0*t145 - t137*t206 + t137*t94 + t22*u_p_1_2 - t37*u_p_2_2 + t4*(t139*u_v_2_0 + t14*u_p_v_2_2_0 + t141*u_v_2_1 + t143*u_v_2_2 + t17*u_p_v_2_2_1 + t20*u_p_v_2_2_2 + t274)) + t134*t364 - t134*t365 + t135*t211 + t28*t331 - t330 - t332 + t63*u_p_2_2))]),
+            Vpv - ktt*(t1*t30 + t3*t30 + t30*t5 - 1) + (1/2)*kw*(t363**2 + t371**2 + t49**2),
+            VpvD - ktt*ktt2*t11*((t209 - t211)**2 + (t29 - t32)**2 + (t42 - t44)**2) - kw*kw2*(t312**2 + t373**2 + t374**2),
+            -n_0*(-V_v_0 + t375*(-t151*t51 + u_v_0_0) + t376*(-t151*t84 + u_v_1_0) + t377*(-t151*t255 + u_v_2_0) + t378*(n_0*t165 - n_2*t366) + t380*(n_0*t379 - n_1*t342) + t381*(n_1*t359 - n_2*t379)) - n_1*(-V_v_1 + t375*(-t170*t51 + u_v_0_1) + t376*(-t170*t84 + u_v_1_1) + t377*(-t170*t255 + u_v_2_1) + t378*(n_0*t184 - n_2*t367) + t380*(n_0*t382 - n_1*t347) + t381*(n_1*t360 - n_2*t382)) - n_2*(-V_v_2 + t375*(-t189*t51 + u_v_0_2) + t376*(-t189*t84 + u_v_1_2) + t377*(-t189*t255 + u_v_2_2) + t378*(n_0*t205 - n_2*t368) + t380*(n_0*t383 - n_1*t352) + t381*(n_1*t361 - n_2*t383)),
+            numpy.array([kw*(n_0*n_2*t363 - t12*t49 - t371*t52), kw*(n_1*n_2*t363 - t15*t371 - t49*t52), kw*(t18*t363 - t371*t68 - t49*t54)]))
@@ -0,0 +1,261 @@
+#!/usr/bin/env python
+"""Build step: generates backstepping_kernel.py, the "generated" backend
+of BacksteppingVectorThrustController (vector_thrust_controller.py).
+
+The control law of _VectorThrustController is written here once, with
+sympy, and its derivatives (nTd_p, w_star_v, wdDot, ...) are taken
+symbolically instead of by hand. With the double integrator control u(p,v)
+and the gradient V_v(p,v) as unknown functions, the outputs of the double
+integrator controller are the values of their derivatives:
+    X_y[a,b]   = d X_a/d y_b
+    X_y_z[a,b,c] = d^2 X_a/(d y_b d z_c)
+for X = u, V_v and y, z = p, v. The time derivatives follow the closed loop
+    d/dt ad = jd,  d/dt jd = sd,  d/dt p = v,
+    d/dt v = u - OP(n)*Td,  d/dt n = skew(w)*n.
+
+The outputs (Thrust, Tau, V, VD, V_dT, V_dTau) are simplified by common
+subexpression elimination and printed as NumPy code, with no loop and no
+array allocation but the outputs: the kernel works on one state, and on N
+states at once when every input has the state index as last axis.
+
+sympy is needed only here, not when the controller runs: the generated
+module is kept in the repository, and it is written again only when this
+file changes (its hash is in the generated module), or with --force.
+
+    generate_backstepping_kernel.py [--force]
+"""
+
+import hashlib
+import os
+import sys
+
+import sympy
+
+
+KERNEL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backstepping_kernel.py')
+
+KERNEL_ARGUMENTS = ['x', 'gravity', 'u', 'u_p', 'u_v', 'u_p_p', 'u_v_v', 'u_p_v',
+    'Vpv', 'VpvD', 'V_v', 'V_v_p', 'V_v_v', 'ktt', 'ktt2', 'kw', 'kw2']
+
+
+def source_hash():
+    with open(os.path.abspath(__file__).replace('.pyc', '.py'), 'rb') as file_handle:
+        return hashlib.sha1(file_handle.read()).hexdigest()
+
+
+def vector(name):
+    return sympy.Matrix(sympy.symbols(name + '_0:3'))
+
+
+def skew(x):
+    return sympy.Matrix([[0, -x[2], x[1]], [x[2], 0, -x[0]], [-x[1], x[0], 0]])
+
+
+def OP(x):
+    return sympy.eye(3) - x*x.T
+
+
+def dot(x, y):
+    return (x.T*y)[0, 0]
+
+
+def control_law():
+    """Outputs of _VectorThrustController, and the symbols they depend on,
+    as (outputs, inputs): inputs maps the names in KERNEL_ARGUMENTS to
+    their symbols (as nested lists)"""
+
+    p = vector('p'); v = vector('v'); n = vector('n'); w = vector('w')
+    ad = vector('ad'); jd = vector('jd'); sd = vector('sd')
+    ktt, ktt2, kw, kw2 = sympy.symbols('ktt ktt2 kw kw2')
+    Vpv, VpvD = sympy.symbols('Vpv VpvD')
+
+    # u(p,v) and V_v(p,v) are unknown functions of the position and velocity
+    pv = list(p) + list(v)
+    u_f   = sympy.Matrix([sympy.Function('u_%d' % a)(*pv) for a in range(3)])
+    V_v_f = sympy.Matrix([sympy.Function('V_v_%d' % a)(*pv) for a in range(3)])
+
+    Td = ad + u_f
+
+    # closed loop (see TESTED in _VectorThrustController)
+    def time_derivative(f):
+        return sum((f.diff(ad[i])*jd[i] + f.diff(jd[i])*sd[i] + f.diff(p[i])*v[i] +
+            f.diff(v[i])*(u_f - OP(n)*Td)[i] + f.diff(n[i])*(skew(w)*n)[i]
+            for i in range(3)), sympy.zeros(*f.shape))
+
+    normTd = sympy.sqrt(dot(Td, Td))
+    nTd    = Td/normTd
+
+    # Vtheta(xi) = ktt*xi (see _Vtheta)
+    xi   = 1 - dot(n, nTd)
+    Vtt0 = ktt*xi
+    Vtt1 = ktt
+
+    aux_w_star = time_derivative(Td)
+    w_star     = skew(nTd)*aux_w_star/normTd
+
+    # desired angular velocity
+    wd    = ktt2*skew(n)*nTd + w_star - skew(n)*V_v_f*normTd/Vtt1
+    wdDot = time_derivative(wd)
+
+    Thrust = dot(Td, n)
+
+    ew  = skew(n)*(w - wd)
+    Tau = skew(n)*(-wdDot - Vtt1/kw*skew(n)*nTd - skew(n)*wd*dot(n, wd)) + kw2*ew
+
+    V  = Vpv + Vtt0 + kw/2*dot(ew, ew)
+    VD = VpvD - ktt2*Vtt1*dot(skew(n)*nTd, skew(n)*nTd) - kw2*kw*dot(ew, ew)
+
+    nTd_v  = nTd.jacobian(v)
+    wd_v   = wd.jacobian(v)
+    V_dT   = dot(V_v_f - Vtt1*nTd_v.T*n + kw*wd_v.T*skew(n)*ew, n)
+    V_dTau = -kw*OP(n)*ew
+
+    outputs = [Thrust, list(Tau), V, VD, V_dT, list(V_dTau)]
+
+    # the unknown functions and their derivatives, as the outputs of the
+    # double integrator controller
+    def first(name, function, y):
+        matrix = [[sympy.Symbol('%s_%d_%d' % (name, a, b)) for b in range(3)] for a in range(3)]
+        replace = dict((function[a].diff(y[b]), matrix[a][b]) for a in range(3) for b in range(3))
+        return matrix, replace
+
+    def second(name, y, z):
+        tensor = [[[sympy.Symbol('%s_%d_%d_%d' % (name, a, b, c)) for c in range(3)] for b in range(3)] for a in range(3)]
+        replace = dict((u_f[a].diff(y[b]).diff(z[c]), tensor[a][b][c]) for a in range(3) for b in range(3) for c in range(3))
+        return tensor, replace
+
+    u     = [sympy.Symbol('u_%d' % a) for a in range(3)]
+    V_v   = [sympy.Symbol('V_v_%d' % a) for a in range(3)]
+    u_p,   u_p_replace   = first('u_p', u_f, p)
+    u_v,   u_v_replace   = first('u_v', u_f, v)
+    V_v_p, V_v_p_replace = first('V_v_p', V_v_f, p)
+    V_v_v, V_v_v_replace = first('V_v_v', V_v_f, v)
+    u_p_p, u_p_p_replace = second('u_p_p', p, p)
+    u_v_v, u_v_v_replace = second('u_v_v', v, v)
+    u_p_v, u_p_v_replace = second('u_p_v', p, v)
+
+    # second derivatives first: they contain the first ones
+    replacements = [u_p_p_replace, u_v_v_replace, u_p_v_replace,
+        u_p_replace, u_v_replace, V_v_p_replace, V_v_v_replace,
+        dict(zip(u_f, u)), dict(zip(V_v_f, V_v))]
+
+    def replace(expression):
+        for replacement in replacements:
+            expression = expression.xreplace(replacement)
+        return expression
+
+    outputs = [[replace(e) for e in out] if isinstance(out, list) else replace(out) for out in outputs]
+
+    inputs = {
+        'x': list(p) + list(v) + list(n) + list(w),
+        'gravity': list(ad) + list(jd) + list(sd),
+        'u': u, 'u_p': u_p, 'u_v': u_v, 'u_p_p': u_p_p, 'u_v_v': u_v_v, 'u_p_v': u_p_v,
+        'Vpv': Vpv, 'VpvD': VpvD, 'V_v': V_v, 'V_v_p': V_v_p, 'V_v_v': V_v_v,
+        'ktt': ktt, 'ktt2': ktt2, 'kw': kw, 'kw2': kw2,
+        }
+
+    return outputs, inputs
+
+
+class KernelPrinter(sympy.printing.numpy.NumPyPrinter):
+    """NumPy printer with square roots as powers: for one state, the kernel
+    works on Python floats, that numpy.sqrt would make slower numpy scalars"""
+
+    def _print_Pow(self, expr, rational=False):
+        if expr.exp == sympy.S.Half:
+            return '%s**(1/2)' % self.parenthesize(expr.base, sympy.printing.precedence.PRECEDENCE['Pow'])
+        return sympy.printing.numpy.NumPyPrinter._print_Pow(self, expr, rational)
+
+
+def unpack(name, symbols, indices=()):
+    """Lines that read the symbols from the argument name (nested lists or arrays)"""
+    if isinstance(symbols, sympy.Symbol):
+        if not indices:
+            return []
+        return ['    %s = %s%s' % (symbols, name, ''.join('[%d]' % i for i in indices))]
+    lines = []
+    for i, symbol in enumerate(symbols):
+        lines += unpack(name, symbol, indices + (i,))
+    return lines
+
+
+def kernel_source():
+
+    outputs, inputs = control_law()
+
+    flat = []
+    for out in outputs:
+        flat += out if isinstance(out, list) else [out]
+
+    used = set()
+    for expression in flat:
+        used |= expression.free_symbols
+
+    temporaries, reduced = sympy.cse(flat, symbols=sympy.numbered_symbols('t'), optimizations='basic')
+
+    printer = KernelPrinter({'fully_qualified_modules': True})
+
+    lines = []
+    for name in KERNEL_ARGUMENTS:
+        lines += [line for line in unpack(name, inputs[name]) if sympy.Symbol(line.split()[0]) in used]
+    for symbol, expression in temporaries:
+        lines.append('    %s = %s' % (symbol, printer.doprint(expression)))
+
+    results = []
+    index = 0
+    for out in outputs:
+        if isinstance(out, list):
+            results.append('numpy.array([%s])' % ', '.join(printer.doprint(e) for e in reduced[index:index+len(out)]))
+            index += len(out)
+        else:
+            results.append(printer.doprint(reduced[index]))
+            index += 1
+
+    header = '''# generated by generate_backstepping_kernel.py: do not edit
+"""Kernel of the "generated" backend of BacksteppingVectorThrustController:
+the outputs (Thrust, Tau, V, VD, V_dT, V_dTau) of _VectorThrustController,
+from the state, gravity (ad, jd, sd), the outputs of the double integrator
+controller and the gains (see generate_backstepping_kernel.py).
+
+The arguments are read element by element (x[i], u_p[a][b], ...): they
+are numbers for one state, or arrays with the state index as last axis
+for many states at once.
+"""
+
+from __future__ import division
+
+import numpy
+
+
+SOURCE_HASH = '%s'
+
+
+def backstepping_kernel(%s):
+''' % (source_hash(), ', '.join(KERNEL_ARGUMENTS))
+
+    body = '\n'.join(lines) + '\n\n    return (' + ',\n            '.join(results) + ')\n'
+    return header + body
+
+
+def generated_hash():
+    """SOURCE_HASH of the generated module (None if there is none)"""
+    if not os.path.exists(KERNEL_FILE):
+        return None
+    with open(KERNEL_FILE) as file_handle:
+        for line in file_handle:
+            if line.startswith('SOURCE_HASH'):
+                return line.split("'")[1]
+    return None
+
+
+if __name__ == '__main__':
+
+    force = '--force' in sys.argv[1:]
+    if not force and generated_hash() == source_hash():
+        print(KERNEL_FILE + ' is up to date')
+        sys.exit(0)
+
+    source = kernel_source()
+    with open(KERNEL_FILE, 'w') as file_handle:
+        file_handle.write(source)
+    print('generated ' + KERNEL_FILE)
@@ -1,8 +1,5 @@
 #!/usr/bin/python
 
-# for ploting
-import matplotlib.pyplot as plt
-
 import numpy
 
 from numpy import *
@@ -12,12 +9,36 @@ from numpy import zeros as zeros
 from controllers.double_integrator_controllers import double_integrator_controller_database
 
 from .. import vector_thrust_controller
+# the same operations for N states (the state index is the last axis)
+from ..vector_thrust_controller import batch_dot, batch_outer, batch_transpose, batch_skew, batch_OP, batch_norm
 
 # import orthogonal projection operator
 from utilities.utility_functions import OP as OP
 # import skew symmetric matrix
 from utilities.utility_functions import skew as skew
 
+# control law generated with sympy (see generate_backstepping_kernel.py)
+from . import backstepping_kernel
+
+# outputs of the double integrator controller used by the backstepping (all but V_p)
+DI_OUTPUTS = ('u','u_p','u_v','u_p_p','u_v_v','u_p_v','V','VD','V_v','V_v_p','V_v_v')
+
+# backends of output and output_batch:
+# HAND_WRITTEN: _VectorThrustController, with the derivatives found by hand
+# GENERATED:    backstepping_kernel, with the derivatives found by sympy
+HAND_WRITTEN = 'hand_written'
+GENERATED    = 'generated'
+BACKENDS     = (HAND_WRITTEN, GENERATED)
+
+
+def component_wise(di_controller):
+    """True if the double integrator controller is component-wise: its
+    Jacobians and Hessians are diagonals (vectors), and V and VD are per
+    component, as in ComponentWise3DDIC"""
+    out = di_controller.output_lazy(numpy.zeros(3),numpy.zeros(3),('u','u_p'))
+    return numpy.ndim(out.u_p) == numpy.ndim(out.u)
+
+
 class BacksteppingVectorThrustController(vector_thrust_controller.VectorThrustController): 
 
     inner = {}
@@ -30,7 +51,8 @@ class BacksteppingVectorThrustController(vector_thrust_controller.VectorThrustCo
     ktt           = 200.0,
     ktt2          = 0.5,
     kw            = 200.0,
-    kw2           = 0.5
+    kw2           = 0.5,
+    backend       = HAND_WRITTEN
     ):
 
         self.di_controller = di_controller
@@ -40,10 +62,26 @@ class BacksteppingVectorThrustController(vector_thrust_controller.VectorThrustCo
         self.kw      = kw
         self.kw2     = kw2
 
+        if backend not in BACKENDS:
+            raise ValueError('Unknown backend ' + str(backend) + ': use one of ' + str(BACKENDS))
+        # with a component-wise controller, the hand-written law uses the diagonals
+        # of the Jacobians as vectors: the kernel, derived with full Jacobians, differs
+        if backend == GENERATED and component_wise(di_controller):
+            raise ValueError('Backend ' + str(backend) + ' needs a double integrator controller with Jacobians: ' +
+                di_controller.__class__.__name__ + ' is component-wise, use ' + str(HAND_WRITTEN))
+        self.backend = backend
+
 
     def output(self,x,gravity):
+        if self.backend == GENERATED:
+            return self._VectorThrustController_generated(x,gravity)
         return self._VectorThrustController(x,gravity)
 
+    def output_batch(self,x,gravity):
+        if self.backend == GENERATED:
+            return self._VectorThrustController_generated_batch(x,gravity)
+        return self._VectorThrustController_batch(x,gravity)
+
     def report(self):
         return self.DI_Ctrll.report()
 
@@ -76,7 +114,7 @@ class BacksteppingVectorThrustController(vector_thrust_controller.VectorThrustCo
         w = x[9:12]
 
 
-        u,u_p,u_v,u_p_p,u_v_v,u_p_v,Vpv,VpvD,V_p,V_v,V_v_p,V_v_v = self.di_controller.output(p,v)
+        u,u_p,u_v,u_p_p,u_v_v,u_p_v,Vpv,VpvD,V_p,V_v,V_v_p,V_v_v = self.di_controller.output_lazy(p,v,DI_OUTPUTS).as_tuple()
 
         Td   = ad + u
 
@@ -216,3 +254,147 @@ class BacksteppingVectorThrustController(vector_thrust_controller.VectorThrustCo
         V_dTau = -kw*dot(OP(n),ew)
 
         return (Thrust,Tau,V,VD,V_dT,V_dTau)
+
+
+    def _VectorThrustController_batch(self,x,gravity):
+        """_VectorThrustController for N states (x (N,12), gravity (N,9)):
+        the same expressions, with the state index as last axis"""
+
+        gravity = gravity.T
+        ad  = gravity[0:3]
+        jd  = gravity[3:6]
+        sd  = gravity[6:9]
+
+        # states, one per column
+        x = x.T
+        p = x[0:3]
+        v = x[3:6]
+        n = x[6:9]
+        w = x[9:12]
+
+        dot       = batch_dot
+        outer     = batch_outer
+        transpose = batch_transpose
+        skew      = batch_skew
+        OP        = batch_OP
+
+        # one state per row from the double integrator: state index last
+        u,u_p,u_v,u_p_p,u_v_v,u_p_v,Vpv,VpvD,V_p,V_v,V_v_p,V_v_v = [numpy.moveaxis(numpy.asarray(out), 0, -1)
+            for out in self.di_controller.output_batch(p.T,v.T)]
+
+        Td   = ad + u
+
+        Td_t = jd
+        Td_p = u_p
+        Td_v = u_v
+
+        normTd   = batch_norm(Td)
+        nTd      = Td/normTd
+        normTd_t = dot(nTd,jd)
+        normTd_p = dot(transpose(u_p),nTd)
+        normTd_v = dot(transpose(u_v),nTd)
+
+        nTd_t = dot(OP(nTd),jd/normTd)
+        nTd_p = dot(OP(nTd),u_p/normTd)
+        nTd_v = dot(OP(nTd),u_v/normTd)
+
+        xi = 1.0 - dot(n,nTd)
+        Vtt0,Vtt1,Vtt2 = self._Vtheta(xi)
+        xi_t = -dot(n,nTd_t)
+        xi_p = -dot(n,nTd_p)
+        xi_v = -dot(n,nTd_v)
+        xi_n = -nTd
+
+        aux_w_star   = jd + dot(u_p,v) + dot(u_v,(u - dot(OP(n),Td)))
+        aux_w_star_t = sd - dot(u_v,dot(OP(n),Td_t))
+        aux_w_star_p = transpose(dot(transpose(u_p_p),v)) + dot(u_v,u_p - dot(OP(n),Td_p)) + transpose(dot(transpose(u_p_v),u - dot(OP(n),Td)))
+        aux_w_star_v = u_p + transpose(dot(transpose(u_p_v),v)) + dot(u_v,u_v - dot(OP(n),Td_v))  + transpose(dot(transpose(u_v_v),u - dot(OP(n),Td)))
+        aux_w_star_n = u_v*dot(n,Td) + dot(u_v,outer(n,Td))
+
+        w_star   = dot(skew(nTd),aux_w_star/normTd)
+
+        w_star_t = dot(-skew(aux_w_star/normTd),nTd_t)               + \
+                   dot(skew(nTd),aux_w_star_t/normTd)                + \
+                   dot((-1.0)*skew(nTd),aux_w_star/normTd**2*normTd_t)
+        w_star_p = dot(-skew(aux_w_star/normTd),nTd_p)               + \
+                   dot(skew(nTd),aux_w_star_p/normTd)                + \
+                   dot((-1.0)*skew(nTd),outer(aux_w_star,normTd_p)/normTd**2)
+        w_star_v = dot(-skew(aux_w_star/normTd),nTd_v)               + \
+                   dot(skew(nTd),aux_w_star_v/normTd)                + \
+                   dot((-1.0)*skew(nTd),outer(aux_w_star,normTd_v)/normTd**2)
+        w_star_n = dot(skew(nTd),aux_w_star_n/normTd)    
+
+        # Thrust
+        Thrust = dot(Td,n)
+
+        # gains for angular control
+        ktt2  = self.ktt2
+        # desired angular velocity
+        wd = ktt2*dot(skew(n),nTd)      + \
+             w_star                     + \
+             (-1.0)*dot(skew(n),V_v)*normTd*1.0/Vtt1 
+
+        wd_t = ktt2*dot(skew(n),nTd_t)                  + \
+               w_star_t                                 + \
+               (-1)*dot(skew(n),V_v)*1/Vtt1*normTd_t    + \
+               dot(skew(n),V_v)*normTd*1/Vtt1**2*Vtt2*xi_t
+        wd_p = ktt2*dot(skew(n),nTd_p)                              + \
+               w_star_p                                             + \
+               (-1)*dot(skew(n),normTd*1/Vtt1*V_v_p)                + \
+               (-1)*dot(skew(n),outer(V_v,normTd_p)*1/Vtt1)         + \
+               dot(skew(n),outer(V_v,xi_p)*normTd*1/Vtt1**2*Vtt2)
+        wd_v = ktt2*dot(skew(n),nTd_v)                              + \
+               w_star_v                                             + \
+               (-1)*dot(skew(n),outer(V_v,normTd_v)*1/Vtt1)         + \
+               (-1)*dot(skew(n),normTd*1/Vtt1*V_v_v)                + \
+               dot(skew(n),outer(V_v,xi_v)*normTd*1/Vtt1**2*Vtt2)
+        wd_n = -ktt2*skew(nTd)                          + \
+               w_star_n                                 + \
+               skew(V_v)*normTd*1/Vtt1                  + \
+               dot(skew(n),outer(V_v,xi_n)*normTd*1/Vtt1**2*Vtt2)
+
+        wdDot = wd_t + dot(wd_p,v) + dot(wd_v,(u - dot(OP(n),Td))) + dot(wd_n,dot(skew(w),n))
+
+        kw   = self.kw
+        kw2  = self.kw2
+        ew   = dot(skew(n),w - wd)
+        Tau  = dot(skew(n),-wdDot - 1.0/kw*Vtt1*dot(skew(n),nTd) - dot(skew(n),wd)*dot(n,wd)) + kw2*ew
+
+        ## Lyapunov check
+        V  = Vpv + Vtt0 + 1.0/2.0*kw*dot(ew,ew)
+        VD = VpvD - ktt2*Vtt1*batch_norm(dot(skew(n),nTd))**2 - kw2*kw*dot(ew,ew)
+
+        V_dT   = dot(V_v - Vtt1*dot(transpose(nTd_v),n) + kw*dot(transpose(wd_v),dot(skew(n),ew)),n)
+        V_dTau = -kw*dot(OP(n),ew)
+
+        # back to one state per row
+        return tuple(numpy.moveaxis(out, -1, 0) for out in (Thrust,Tau,V,VD,V_dT,V_dTau))
+
+
+    def _VectorThrustController_generated(self,x,gravity):
+        """_VectorThrustController, with backstepping_kernel (the double integrator
+        controller is not component-wise, see __init__)"""
+
+        u,u_p,u_v,u_p_p,u_v_v,u_p_v,Vpv,VpvD,V_p,V_v,V_v_p,V_v_v = \
+            self.di_controller.output_lazy(x[0:3],x[3:6],DI_OUTPUTS).as_tuple()
+
+        # the kernel is faster on Python floats than on numpy scalars
+        return backstepping_kernel.backstepping_kernel(numpy.asarray(x).tolist(), numpy.asarray(gravity).tolist(),
+            u.tolist(), u_p.tolist(), u_v.tolist(), u_p_p.tolist(), u_v_v.tolist(), u_p_v.tolist(),
+            float(Vpv), float(VpvD), V_v.tolist(), V_v_p.tolist(), V_v_v.tolist(),
+            self.ktt, self.ktt2, self.kw, self.kw2)
+
+
+    def _VectorThrustController_generated_batch(self,x,gravity):
+        """_VectorThrustController_generated for N states (x (N,12), gravity (N,9)):
+        the kernel reads arrays with the state index as last axis"""
+
+        u,u_p,u_v,u_p_p,u_v_v,u_p_v,Vpv,VpvD,V_p,V_v,V_v_p,V_v_v = \
+            [numpy.moveaxis(numpy.asarray(out), 0, -1) for out in self.di_controller.output_batch(x[:,0:3],x[:,3:6])]
+
+        Thrust,Tau,V,VD,V_dT,V_dTau = backstepping_kernel.backstepping_kernel(x.T, gravity.T,
+            u, u_p, u_v, u_p_p, u_v_v, u_p_v, Vpv, VpvD, V_v, V_v_p, V_v_v,
+            self.ktt, self.ktt2, self.kw, self.kw2)
+
+        # back to one state per row
+        return (Thrust,Tau.T,V,VD,V_dT,V_dTau.T)
@@ -1,13 +1,12 @@
 #!/usr/bin/python
 
-# for ploting
-import matplotlib.pyplot as plt
-
 import numpy
 
 from numpy import *
 
 from .. import vector_thrust_controller
+# the same operations for N states (the state index is the last axis)
+from ..vector_thrust_controller import batch_dot, batch_outer, batch_skew, batch_OP
 
 from controllers.double_integrator_controllers import double_integrator_controller_database
 
@@ -48,6 +47,9 @@ class VectorThrustController(vector_thrust_controller.VectorThrustController):
     def output(self,x,gravity):
         return self._VectorThrustController(x,gravity)
 
+    def output_batch(self,x,gravity):
+        return self._VectorThrustController_batch(x,gravity)
+
     def report(self):
         description   = "Vector Thrust Controller based on double integrator for z component, and quadruple integrator for x and y components \n\n"
         controller_z  = "Controller for z component\n" + self.DI_Ctrll.report()
@@ -162,3 +164,109 @@ class VectorThrustController(vector_thrust_controller.VectorThrustController):
         return (Thrust_cl,Tau_cl,V,VD,V_x,V_x)
 
 
+    def _VectorThrustController_batch(self,x,gravity):
+        """_VectorThrustController for N states (x (N,12), gravity (N,9)):
+        the same expressions, with the state index as last axis"""
+
+        e3   = numpy.array([0.0,0.0,1.0])
+        gravity = gravity.T
+        g_0t = gravity[0:3]
+        g_1t = gravity[3:6]
+        g_2t = gravity[6:9]
+
+        # states, one per column
+        x = x.T
+        number = x.shape[1]
+
+        V_x = numpy.zeros((12,number))
+
+        p = x[0:3]
+        v = x[3:6]
+        n = x[6:9]
+        n3 = x[8]
+        w = x[9:12]
+
+        # dot(PP,dot(skew(e3),y)), with PP of _VectorThrustController
+        PP_e3 = numpy.array([[0.0,-1.0,0.0],[1.0, 0.0,0.0]])
+        def PE3(y):
+            return numpy.tensordot(PP_e3,y,axes=1)
+
+        dot   = batch_dot
+        outer = batch_outer
+        skew  = batch_skew
+        OP    = batch_OP
+
+        # z position and velocity
+        z  = x[2]
+        vz = x[5]
+
+        u_z,u_p_z,u_v_z,u_p_p_z,u_v_v_z,u_p_v_z,V_z,VD_z,V_p_z,V_v_z,V_v_p_z,V_v_v_z = self.double_integrator_z.output_batch(z,vz)
+
+        V_x[2] = V_p_z
+        V_x[5] = V_v_z
+
+        Thrust_cl = 1.0/n3*(g_0t[2] + u_z)
+
+        # outer(g_1t,e3)
+        g_1t_e3 = g_1t[:,None,:]*e3[None,:,None]
+        I = numpy.identity(3)[:,:,None]
+
+        xi1 = x[0:2]
+        xi1_grad_x      = numpy.zeros((2,12,number))
+        xi1_grad_x[0,0] = 1.0
+        xi1_grad_x[1,1] = 1.0
+
+        xi2 = x[3:5]
+        xi2_grad_x = numpy.zeros((2,12,number))
+        xi2_grad_x[0,3] = 1
+        xi2_grad_x[1,4] = 1 
+
+        xi3 = 1.0/n3*(u_z + g_0t[2])*n[0:2] - g_0t[0:2]
+        xi3_grad_x = numpy.zeros((2,12,number))
+        xi3_grad_x[0:2,2]   =  1.0/n3*n[0:2]*u_p_z
+        xi3_grad_x[0:2,5]   =  1.0/n3*n[0:2]*u_v_z
+        xi3_grad_x[0:2,6:9] = -1.0/n3**2*(u_z + g_0t[2])*PE3(skew(n))
+
+        OP_n_w = dot(OP(n),w)
+        w_n    = dot(skew(w),n)
+
+        xi3_t =  1.0/n3*PE3(dot(skew(n),g_1t))
+        xi3_x = -1.0/n3**2*(u_z + g_0t[2])*PE3(OP_n_w) + 1.0/n3*n[0:2]*(u_p_z*vz + u_v_z*u_z)
+        xi4   = xi3_t + xi3_x
+        xi4_grad_x = numpy.zeros((2,12,number))
+        xi4_grad_x[0:2,2]     = -1.0/n3**2*u_p_z*PE3(OP_n_w) + 1.0/n3*n[0:2]*(u_p_p_z*vz + u_p_v_z*u_z + u_v_z*u_p_z)
+        xi4_grad_x[0:2,5]     = -1.0/n3**2*u_p_z*PE3(OP_n_w) + 1.0/n3*n[0:2]*(u_p_v_z*vz + u_p_z + u_v_v_z*u_z + u_v_z*u_v_z)
+        xi4_grad_x[0:2,6:9]   = -(1.0/n3*PE3(skew(g_1t)) + 1.0/n3**2*PE3(dot(skew(n),g_1t_e3))) + \
+                                -1.0/n3**2*PE3(skew(n))*(u_p_z*vz + u_v_z*u_z) + \
+                                -1.0/n3**2*(u_p_z*vz + u_v_z*u_z)*PE3(skew(n)) + \
+                                 2.0/n3**5*w_n[2]*(u_z + g_0t[2])*PE3(skew(n)) + \
+                                 1.0/n3**2*(u_z + g_0t[2])*PE3(dot(n,w)*I + outer(n,w))
+        xi4_grad_x[0:2,9:12] = -1.0/n3**2*(u_z + g_0t[2])*PE3(OP(n))
+
+        # 8 by 12 by N
+        xi_grad_x = numpy.concatenate([xi1_grad_x,xi2_grad_x,xi3_grad_x,xi4_grad_x])
+
+        xi3_t_t =  1.0/n3*PE3(dot(skew(n),g_2t))
+        xi3_t_x = -dot(1.0/n3*PE3(skew(g_1t)) + 1.0/n3**2*PE3(dot(skew(n),g_1t_e3)),w_n)
+        xi3_x_t = -1.0/n3**2*g_1t[2]*PE3(OP_n_w)
+        xi3_x_x = -1.0/n3**2*PE3(OP_n_w)*(u_p_z*vz + u_v_z*u_z) + \
+                   1.0/n3*n[0:2]*((u_p_p_z*vz + u_p_v_z*u_z)*vz + (u_p_v_z*vz + u_v_v_z*u_z)*u_z + u_p_z*u_z + u_v_z*(u_p_z*vz + u_v_z*u_z)) + \
+                  -1.0/n3**2*(u_p_z*vz + u_v_z*u_z)*PE3(OP_n_w) + \
+                   2/n3**5*w_n[2]*(u_z + g_0t[2])*PE3(OP_n_w) + \
+                   1.0/n3**2*(u_z + g_0t[2])*PE3(dot(outer(w_n,n) + outer(n,w_n),w))
+
+        xi5 = xi3_t_t + xi3_t_x + xi3_x_t + xi3_x_x
+
+        # control xy directions with quadruple integrator (one state per row)
+        u_quadr_int,V_xi,V_of_xi,VD_of_xi = self.quadruple_integrator_xy.output_batch(xi1.T,xi2.T,xi3.T,xi4.T)
+
+        Tau_cl = n3/(u_z + g_0t[2])*dot(OP(n),numpy.concatenate([u_quadr_int.T - xi5,numpy.zeros((1,number))]))
+
+        # V_xi  is 8 by N
+        V_x = V_x + numpy.einsum('in,ijn->jn',V_xi.T,xi_grad_x)
+
+        V  = V_z  + V_of_xi
+        VD = VD_z + VD_of_xi
+
+        # back to one state per row
+        return (Thrust_cl,Tau_cl.T,V,VD,V_x.T,V_x.T)
@@ -5,15 +5,13 @@
 Database of the controller for a vector thrusted system
 """
 
-import rospy
+from utilities.lazy_registry import LazyDatabase
 
-database = {}
+database = LazyDatabase('vector thrust controllers')
 
-import vector_thrust_controller_quadruple_integrator.vector_thrust_controller_quadruple_integrator
+database.register("VThrustQuadrupleController", "controllers.vector_thrust_controllers.vector_thrust_controller_quadruple_integrator.vector_thrust_controller_quadruple_integrator:VectorThrustController")
 
-database["VThrustQuadrupleController"] = vector_thrust_controller_quadruple_integrator.vector_thrust_controller_quadruple_integrator.VectorThrustController
+database.register("VThrustBacksteppingController", "controllers.vector_thrust_controllers.vector_thrust_controller_double_integrator_and_toque_backstepping.vector_thrust_controller:BacksteppingVectorThrustController")
 
-import vector_thrust_controller_double_integrator_and_toque_backstepping.vector_thrust_controller
-database["VThrustBacksteppingController"] = vector_thrust_controller_double_integrator_and_toque_backstepping.vector_thrust_controller.BacksteppingVectorThrustController
-
-database["Default"] = database[rospy.get_param("VThrustControllerDefault","VThrustQuadrupleController")]
\ No newline at end of file
+# the ROS parameter is read when "Default" is first used
+database.alias("Default", "VThrustQuadrupleController", "VThrustControllerDefault")
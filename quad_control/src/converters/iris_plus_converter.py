@@ -8,6 +8,8 @@
 
 '''
 
+import math
+
 import numpy
 import rospy
 import utilities.utility_functions as uts
@@ -34,10 +36,10 @@ class IrisPlusConverter(object):
     # in RADIANS
     euler_angles = numpy.array([0.0,0.0,0.0])
 
-    # """docstring for IrisPlusConverter"""
-    # def __init__(self, arg):
-    #     super(IrisPlusConverter, self).__init__()
-    #     self.arg = arg
+    def __init__(self):
+        # preallocated: input_conveter writes into these on every call
+        self.rotation_matrix = numpy.identity(3)
+        self.rc_output       = numpy.zeros(4)
 
     def set_mass(self,mass):
         self.__MASS = mass
@@ -78,12 +80,12 @@ class IrisPlusConverter(object):
         return 
 
     def input_conveter(self,desired_3d_force,yaw_rate_desired):
+        # the returned array is the same on every call (it is overwritten)
 
         #---------------------------------------------------------------------#
-        # third canonical basis vector
-        e3 = numpy.array([0.0,0.0,1.0])
-        rotation_matrix      = uts.rot_from_euler_rad(self.euler_angles)
-        throttle_unit_vector = rotation_matrix.dot(e3) 
+        # the throttle unit vector is the third column of the rotation matrix
+        # (rotation_matrix.dot(e3)), and its third component is e3.dot(throttle_unit_vector)
+        rotation_matrix = uts.rot_from_euler_rad(self.euler_angles, out=self.rotation_matrix)
 
         # STABILIZE MODE:APM COPTER
         # The throttle sent to the motors is automatically adjusted based on the tilt angle
@@ -91,9 +93,9 @@ class IrisPlusConverter(object):
         # compensation the pilot must fo as the vehicles attitude changes
 
         # computing desired Throttle, desired roll angle, pitch angle, and desired yaw rate
-        Throttle = numpy.dot(desired_3d_force,throttle_unit_vector)
+        Throttle = desired_3d_force[0]*rotation_matrix[0,2] + desired_3d_force[1]*rotation_matrix[1,2] + desired_3d_force[2]*rotation_matrix[2,2]
         # this decreases the throtle, which will be increased
-        Throttle = Throttle*numpy.dot(throttle_unit_vector,e3)
+        Throttle = Throttle*rotation_matrix[2,2]
 
 
         roll_desired,pitch_desired = self.roll_pitch(desired_3d_force)
@@ -101,15 +103,15 @@ class IrisPlusConverter(object):
         #---------------------------------------------------------------------#
         # degrees per second
         MAX_PSI_SPEED_Deg = self.MAX_PSI_SPEED_Deg
-        MAX_PSI_SPEED_Rad = MAX_PSI_SPEED_Deg*numpy.pi/180.0
+        MAX_PSI_SPEED_Rad = MAX_PSI_SPEED_Deg*math.pi/180.0
 
         MAX_ANGLE_DEG = self.MAX_ANGLE_DEG
-        MAX_ANGLE_RAD = MAX_ANGLE_DEG*numpy.pi/180.0
+        MAX_ANGLE_RAD = MAX_ANGLE_DEG*math.pi/180.0
 
         #---------------------------------------------------------------------#
         # input for IRIS+ comes in specific order
         # [U[0],U[1],U[2],U[3]] = [roll,pitch,throttle,yaw]
-        U = numpy.zeros(4)
+        U = self.rc_output
 
         #---------------------------------------------------------------------#
         # angles comand between 1000 and 2000 PWM
@@ -128,7 +130,9 @@ class IrisPlusConverter(object):
         U[2]  = Throttle*self.__THROTTLE_NEUTRAL/(self.__GRAVITY*self.__MASS);
 
         # need to bound between 1000 and 2000; element-wise operation
-        U     = numpy.clip(U,1000,2000) 
+        # (numpy.clip allocates temporary arrays, even with out=U)
+        for index in range(4):
+            U[index] = min(max(U[index],1000.0),2000.0)
 
         return U
 
@@ -139,18 +143,27 @@ class IrisPlusConverter(object):
         #--------------------------------------#
         # Rz(psi)*Ry(theta_des)*Rx(phi_des) = n_des
         # desired roll and pitch angles
-        n_des     = Full_actuation/numpy.linalg.norm(Full_actuation)
-        n_des_rot = uts.rot_z(-psi).dot(n_des)
-
-
-        sin_phi   = -n_des_rot[1]
-        sin_phi   = numpy.clip(sin_phi,-1,1)
-        phi       = numpy.arcsin(sin_phi)
-
-        sin_theta = n_des_rot[0]/numpy.cos(phi)
-        sin_theta = numpy.clip(sin_theta,-1,1)
-        cos_theta = n_des_rot[2]/numpy.cos(phi)
-        cos_theta = numpy.clip(cos_theta,-1,1)
-        pitch     = numpy.arctan2(sin_theta,cos_theta)
+        # n_des = Full_actuation/norm(Full_actuation), n_des_rot = rot_z(-psi).dot(n_des),
+        # computed component by component
+        norm = math.sqrt(Full_actuation[0]**2 + Full_actuation[1]**2 + Full_actuation[2]**2)
+        if norm == 0.0:
+            # no direction
+            return (float('nan'),float('nan'))
+        c_psi = math.cos(psi)
+        s_psi = math.sin(psi)
+        n_des_rot_x = ( c_psi*Full_actuation[0] + s_psi*Full_actuation[1])/norm
+        n_des_rot_y = (-s_psi*Full_actuation[0] + c_psi*Full_actuation[1])/norm
+        n_des_rot_z = Full_actuation[2]/norm
+
+
+        sin_phi   = -n_des_rot_y
+        sin_phi   = min(max(sin_phi,-1.0),1.0)
+        phi       = math.asin(sin_phi)
+
+        sin_theta = n_des_rot_x/math.cos(phi)
+        sin_theta = min(max(sin_theta,-1.0),1.0)
+        cos_theta = n_des_rot_z/math.cos(phi)
+        cos_theta = min(max(cos_theta,-1.0),1.0)
+        pitch     = math.atan2(sin_theta,cos_theta)
 
         return (phi,pitch)
@@ -211,7 +211,7 @@ class RotorSConverter(object):
 
 		r3  = desired_acceleration
 		r3  = r3/np.linalg.norm(r3)
-		psi = np.arctan2(np.clip(rotation_matrix[1,0],1,-1),np.clip(rotation_matrix[0,0],1,-1))
+		psi = np.arctan2(np.clip(rotation_matrix[1,0],-1,1),np.clip(rotation_matrix[0,0],-1,1))
 		#psi = -20.0*3.142/180.0
 		r1  = np.array([np.cos(psi),np.sin(psi),0.0])
 		r1  = np.dot(np.identity(3) - np.outer(r3,r3),r1)
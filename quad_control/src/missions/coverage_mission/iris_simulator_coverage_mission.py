@@ -64,14 +64,14 @@ class IrisSimulatorCoverageMission(ms.Mission):
         self.__controller = controller
         self.__yaw_controller = yaw_controller
         self.__converter = ipc.IrisPlusConverter()
-        self.__cmd_pub = rospy.Publisher('quad_cmd', qms.quad_cmd, queue_size=10)
+        self.__cmd_pub = rospy.Publisher(self.topic('quad_cmd'), qms.quad_cmd, queue_size=10)
         
         self.__other_quads_names = other_quads_names
         self.__landmarks = landmarks
         self.__waypoint = gms.Pose2D(0.0, 0.0, 0.0)
         
         self.__sim_state = qms.quad_state()
-        self.__sim_sub = rospy.Subscriber('quad_state', qms.quad_state, self.__simulator_callback)
+        self.__sim_sub = rospy.Subscriber(self.topic('quad_state'), qms.quad_state, self.__simulator_callback)
         
         
         
@@ -40,6 +40,14 @@ class FireflyLoadLifting(mission.Mission):
     inner['reference']      = trajectories_database.database
     inner['yaw_controller'] = yaw_controllers_database.database
 
+    # the trajectory and the controller are kept in TrajGenerator and ControllerObject
+    # (self.reference is the output of the trajectory)
+    inner_attributes = {
+        'controller'     : 'ControllerObject',
+        'yaw_controller' : 'YawControllerObject',
+        'reference'      : 'TrajGenerator',
+    }
+
 
     @classmethod
     def description(cls):
@@ -170,6 +178,8 @@ class FireflyLoadLifting(mission.Mission):
         self.RotorSObject.rotor_s_attitude_for_control(odometry_rotor_s)
         # get state from rotorS simulator
         self.state_quad = self.RotorSObject.get_quad_state(odometry_rotor_s)
+        # in event driven mode, publish now
+        self.state_arrived(odometry_rotor_s.header.stamp.to_sec())
 
 
     def update_load_odometry(self,data_odometry):
@@ -133,9 +133,10 @@ class FireflyTrajectoryTracking(mission.Mission):
 
 
     def get_quad_ea_rad(self):
-    	euler_rad     = self.state_quad[6:9]*math.pi/180
-    	euler_rad_dot = numpy.zeros(3)
-    	return numpy.concatenate([euler_rad,euler_rad_dot])
+    	# euler angles (rad), and their time derivatives (zero)
+    	ea_rad = self.workspace.buffer('ea_rad', 6)
+    	numpy.multiply(self.state_quad[6:9], math.pi/180, out=ea_rad[0:3])
+    	return ea_rad
 
     # overriding mission method
     def get_desired_yaw_rad(self,time_instant):
@@ -144,7 +145,9 @@ class FireflyTrajectoryTracking(mission.Mission):
         return self.yaw_reference_object.output(time_instant)
     
     def get_ea_desired(self):
-        return numpy.array([0.0,0.0,self.yaw_desired*180.0/math.pi]) 
+        ea_desired    = self.workspace.buffer('ea_desired', 3)
+        ea_desired[2] = self.yaw_desired*180.0/math.pi
+        return ea_desired
 
     def get_reference(self,time_instant):
         self.current_reference = self.reference.output(time_instant)
@@ -179,6 +182,8 @@ class FireflyTrajectoryTracking(mission.Mission):
         self.RotorSObject.rotor_s_attitude_for_control(odometry_rotor_s)
         # get state from rotorS simulator
         self.state_quad = self.RotorSObject.get_quad_state(odometry_rotor_s)
+        # in event driven mode, publish now
+        self.state_arrived(odometry_rotor_s.header.stamp.to_sec())
         
         
         
@@ -4,14 +4,13 @@
 Database of the missions.
 """
 
-import rospy
+from utilities.lazy_registry import LazyDatabase
 
-database = {}
+database = LazyDatabase('gazebo missions')
 
-import firefly_trajectory_tracking.firefly_trajectory_tracking
-database["FireflyTrajectoryTracking"] = firefly_trajectory_tracking.firefly_trajectory_tracking.FireflyTrajectoryTracking
+database.register("FireflyTrajectoryTracking", "missions.gazebo.firefly_trajectory_tracking.firefly_trajectory_tracking:FireflyTrajectoryTracking")
 
-import firefly_load_lifting.firefly_load_lifting
-database["FireflyLoadLifting"] = firefly_load_lifting.firefly_load_lifting.FireflyLoadLifting
+database.register("FireflyLoadLifting", "missions.gazebo.firefly_load_lifting.firefly_load_lifting:FireflyLoadLifting")
 
-database["Default"] = database[rospy.get_param("MissionDefault","FireflyTrajectoryTracking")]
+# the ROS parameter is read when "Default" is first used
+database.alias("Default", "FireflyTrajectoryTracking", "MissionDefault")
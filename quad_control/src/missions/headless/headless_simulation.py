@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+"""Closed-loop simulation in one process, without ROS, faster than real time.
+
+A HeadlessMission is the mission of the Iris simulator
+(controller, trajectory, yaw controller and IrisPlusConverter), that reads
+the state from a Simulator object and gives the rc command back to it,
+instead of using the topics quad_state and quad_cmd.
+A HeadlessLoadLiftingMission does the same for a quad that carries a
+load (LoadTransportSimulator, and a single load transportation controller).
+A HeadlessSimulation runs mission and simulator in lockstep: the time
+returned by rospy.get_time() is the time of the simulator.
+
+rospy must be replaced by utilities/ros_stub.py before this module
+(and the controllers, simulators, ...) are imported:
+
+    from utilities import ros_stub
+    ros_stub.install()
+    from missions.headless import headless_simulation
+    from simulators.simulators_dictionary import simulators_dictionary
+    from trajectories import trajectories_database
+
+    mission_object = headless_simulation.HeadlessMission(
+        reference = trajectories_database.database["DescribeCircle"](radius=1.0, speed=0.5))
+    simulation = headless_simulation.HeadlessSimulation(
+        mission_object, simulators_dictionary["DoubleIntegratorSimulator"]())
+    flight = simulation.run(60.0)
+    flight.mission_data[:,1:4]      # positions, one row per control tick
+"""
+
+import math
+
+import numpy
+
+from .. import mission
+
+# import list of available trajectories
+from trajectories import trajectories_database
+
+# import yaw controllers dictionary
+from yaw_rate_controllers import yaw_controllers_database
+
+# import controllers dictionary
+from controllers.fa_trajectory_tracking_controllers import fa_trajectory_tracking_controllers_database
+
+# controllers of a quad that carries a load
+from controllers.single_load_transportation_controllers import single_load_transportation_controllers_database
+
+from utilities import ros_stub
+
+# for getting time: simulated time, when ros_stub is installed
+import rospy
+
+
+def _clip(value):
+    return min(max(value, -1.0), 1.0)
+
+
+class HeadlessMission(mission.Mission):
+
+    inner = {}
+
+    inner['controller']     = fa_trajectory_tracking_controllers_database.database
+    inner['reference']      = trajectories_database.database
+    inner['yaw_controller'] = yaw_controllers_database.database
+
+    inner_attributes = {
+        'controller'     : 'controller',
+        'yaw_controller' : 'YawControllerObject',
+        'reference'      : 'TrajGenerator',
+    }
+
+
+    @classmethod
+    def description(cls):
+        return "Iris, simulated in the same process (no ROS), to track a desired trajectory"
+
+
+    def __init__(self,
+            controller     = fa_trajectory_tracking_controllers_database.database["Default"](),
+            reference      = trajectories_database.database["Default"](),
+            yaw_controller = yaw_controllers_database.database["Default"]()
+            ):
+
+        mission.Mission.__init__(self)
+
+        # simulator that receives the rc commands (see HeadlessSimulation)
+        self.simulator = None
+
+        self.TrajGenerator = reference
+        self.reference     = self.TrajGenerator.output(self.time_instant_t0)
+
+        self.controller = controller
+
+        self.YawControllerObject = yaw_controller
+
+        self.iris_plus_converter_object_mission.set_mass(self.vehicle_mass())
+
+        # force before the first publish (see get_complete_data)
+        self.desired_3d_force_quad = numpy.zeros(3)
+
+
+    def vehicle_mass(self):
+        """Mass (kg) of the quad, for the rc command: the nominal mass of the
+        vehicle (parameter mass_quad_ctr), not the one the controller assumes,
+        so that a controller with another quad_mass is mismatched (the thrust
+        of the simulator scales with its own mass, and cannot be)"""
+        return rospy.get_param("mass_quad_ctr", 1.442)
+
+
+    def initialize_state(self):
+        # state of quad: position, velocity and attitude
+        # ROLL, PITCH, AND YAW (EULER ANGLES IN DEGREES)
+        self.state_quad = numpy.zeros(3+3+3)
+
+
+    def read_simulator(self, simulator):
+        """Take the state from the simulator (instead of the topic quad_state)"""
+        self.simulator = simulator
+        self.state_quad[0:6] = simulator.state[0:6]
+        # euler angles (deg), as utility_functions.euler_deg_from_rot
+        R = simulator.get_rotation_matrix()
+        self.state_quad[6] = math.degrees(math.atan2(_clip(R[2,1]), _clip(R[2,2])))
+        self.state_quad[7] = math.degrees(math.asin(-_clip(R[2,0])))
+        self.state_quad[8] = math.degrees(math.atan2(_clip(R[1,0]), _clip(R[0,0])))
+
+
+    def get_quad_ea_rad(self):
+        # euler angles (rad), and their time derivatives (zero)
+        ea_rad = self.workspace.buffer('ea_rad', 6)
+        numpy.multiply(self.state_quad[6:9], math.pi/180, out=ea_rad[0:3])
+        return ea_rad
+
+
+    def get_reference(self, time_instant):
+        self.reference = self.TrajGenerator.output(time_instant)
+        return self.reference
+
+
+    def get_state(self):
+        return self.state_quad
+
+
+    def get_pv(self):
+        return self.state_quad[0:6]
+
+
+    def get_pv_desired(self):
+        return self.reference[0:6]
+
+
+    def get_complementary_data(self):
+        return numpy.array([])
+
+
+    def get_labels_complementary_data(self):
+        return []
+
+
+    def get_euler_angles(self):
+        return self.state_quad[6:9]
+
+
+    def real_publish(self, desired_3d_force_quad, yaw_rate, rc_output):
+        # the simulator reads the rc command when it runs the next step
+        self.simulator.set_control(rc_output[0:4])
+
+
+class HeadlessLoadLiftingMission(HeadlessMission):
+    """Quad that carries a load (LoadTransportSimulator), as FireflyLoadLifting:
+    the reference is the one of the load, and the force of the controller
+    goes to the simulator as it is (no rc command).
+    get_pv is the position and velocity of the load, so that mission_data
+    (and the metrics of parameter_sweep.py) are about the load."""
+
+    inner = {}
+
+    inner['controller']     = single_load_transportation_controllers_database.database
+    inner['reference']      = trajectories_database.database
+    inner['yaw_controller'] = yaw_controllers_database.database
+
+
+    @classmethod
+    def description(cls):
+        return "Quad and load, simulated in the same process (no ROS), for the load to track a desired trajectory"
+
+
+    def __init__(self,
+            controller     = single_load_transportation_controllers_database.database["Default"](),
+            reference      = trajectories_database.database["Default"](),
+            yaw_controller = yaw_controllers_database.database["Default"]()
+            ):
+
+        HeadlessMission.__init__(self, controller, reference, yaw_controller)
+
+
+    def vehicle_mass(self):
+        # the rc command (only recorded) is for the quad, that also carries the load
+        return self.controller.quad_mass
+
+
+    def initialize_state(self):
+        # load position and velocity, quad position and velocity (see get_state)
+        self.state_quad = numpy.zeros(3+3+3+3)
+
+
+    def read_simulator(self, simulator):
+        """Take the state of load and quad from the simulator"""
+        self.simulator = simulator
+        self.state_quad[:] = simulator.get_controller_state()
+
+
+    def get_quad_ea_rad(self):
+        # the simulated quad has no attitude
+        return self.workspace.buffer('ea_rad', 6)
+
+
+    def get_pv(self):
+        return self.state_quad[0:6]
+
+
+    def get_euler_angles(self):
+        return self.workspace.buffer('euler_angles', 3)
+
+
+    def real_publish(self, desired_3d_force_quad, yaw_rate, rc_output):
+        self.simulator.set_control(desired_3d_force_quad)
+
+
+class Flight(object):
+    """Arrays recorded by HeadlessSimulation.run
+
+    times: (ticks,) time of every control tick
+    mission_data: (ticks, columns) get_complete_data() of every tick
+    (time, position, velocity, desired position and velocity,
+    euler angles (deg), force: see Mission.get_complete_data)
+    rc_outputs: (ticks, 4) rc command of every tick (roll, pitch, throttle, yaw)
+    simulator_times, states, controls: samples of the simulator
+    (one per simulator step, see Simulator.recorder)
+    """
+
+    def __init__(self, times, mission_data, rc_outputs, simulator_times, states, controls):
+        self.times = times
+        self.mission_data = mission_data
+        self.rc_outputs = rc_outputs
+        self.simulator_times = simulator_times
+        self.states = states
+        self.controls = controls
+
+    def save_npz(self, file_path):
+        numpy.savez(file_path,
+            times=self.times,
+            mission_data=self.mission_data,
+            rc_outputs=self.rc_outputs,
+            simulator_times=self.simulator_times,
+            states=self.states,
+            controls=self.controls)
+
+
+class HeadlessSimulation(object):
+    """Mission and simulator, run in lockstep in simulated time"""
+
+    def __init__(self, mission_object, simulator, control_period=0.01, simulator_steps=1):
+        """control_period: time (sec) between two publish of the mission
+        simulator_steps: simulator steps for each control period"""
+        stub = ros_stub.installed()
+        if stub is None:
+            raise RuntimeError("HeadlessSimulation needs utilities.ros_stub.install()")
+        self.clock = stub.clock
+
+        self.mission_object = mission_object
+        self.simulator = simulator
+        self.control_period = control_period
+        self.simulator_steps = simulator_steps
+
+    def run(self, duration):
+        """Fly for duration (sec), starting from the current state
+        of the simulator. Returns a Flight."""
+        mission_object = self.mission_object
+        simulator = self.simulator
+        clock = self.clock
+        time_step = self.control_period/self.simulator_steps
+
+        ticks = int(round(duration/self.control_period))
+        times = numpy.zeros(ticks)
+        mission_data = None
+        rc_outputs = numpy.zeros((ticks, 4))
+
+        start_time = simulator.get_time()
+        clock.set_time(start_time)
+        mission_object.reset_initial_time(start_time)
+        mission_object.read_simulator(simulator)
+
+        for tick in range(ticks):
+            clock.set_time(simulator.get_time())
+            mission_object.read_simulator(simulator)
+            mission_object.publish()
+
+            data = mission_object.get_complete_data()
+            if mission_data is None:
+                mission_data = numpy.zeros((ticks, len(data)))
+            times[tick] = clock.get_time()
+            mission_data[tick] = data
+            rc_outputs[tick] = mission_object.rc_output[0:4]
+
+            for step in range(self.simulator_steps):
+                simulator.run(time_step)
+
+        clock.set_time(simulator.get_time())
+        if mission_data is None:
+            mission_data = numpy.zeros((0, 0))
+
+        simulator_times, states, controls = simulator.recorder.window(start_time)
+        return Flight(times, mission_data, rc_outputs,
+            numpy.array(simulator_times), numpy.array(states), numpy.array(controls))
@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+"""Parameter sweeps and Monte Carlo runs over closed-loop simulations.
+
+A sweep is described by a json-like dictionary (see DEFAULT_CONFIG):
+the mission (see MISSIONS), the classes and constructing dictionaries of
+controller, reference, yaw controller and simulator (as in the GUI), a grid of parameters
+(every combination is run), and distributions of parameters (sampled
+`samples` times for every point of the grid). A parameter is named by
+the object and the path of its argument, e.g.:
+    'controller.proportional_gain_xy'
+    'controller.double_integrator_controller.natural_frequency'
+    'controller.quad_mass'              (mass that the controller assumes: the
+                                         vehicle has the mass mass_quad_ctr of
+                                         'parameters', 1.442 if not given)
+    'simulator.initial_state'           (a list, as in the constructing dictionary)
+    'simulator.cable_length'            (with the mission HeadlessLoadLiftingMission)
+A distribution is ['uniform', low, high] or ['normal', mean, standard deviation].
+
+Every run is a flight of missions/headless/headless_simulation.py,
+in a pool of processes, and gives one row of the results table, with:
+    rms_error        root mean square of the distance to the reference (m)
+    final_error      distance to the reference at the end (m)
+    max_error        largest distance to the reference (m)
+    settling_time    time (sec) after which the distance stays below settling_band
+                     (nan if it never does)
+    saturation_time  time (sec) during which some rc command is at 1000 or 2000
+With HeadlessLoadLiftingMission, the distances are those of the load.
+A run that raises an exception has nan metrics, and the error in 'error'.
+
+The table is saved in cache_directory, in a file named by the hash of
+the config: the same sweep is only computed once.
+
+    python -m missions.headless.parameter_sweep sweep.json [--processes N] [--sort rms_error]
+"""
+
+import copy
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy
+
+
+# rc commands are bounded by IrisPlusConverter
+RC_MIN = 1000.0
+RC_MAX = 2000.0
+
+METRICS = ['rms_error', 'final_error', 'max_error', 'settling_time', 'saturation_time']
+
+# bump when the metrics change: tables in the cache are not used anymore
+VERSION = 2
+
+# missions of headless_simulation.py: the controller comes from the database of the mission
+MISSIONS = ['HeadlessMission', 'HeadlessLoadLiftingMission']
+
+DEFAULT_CONFIG = {
+    'mission'        : 'HeadlessMission',
+    # [class name in its database, constructing dictionary (missing arguments: defaults)]
+    'controller'     : ['SimplePIDController', {}],
+    'reference'      : ['DescribeCircle', {}],
+    'yaw_controller' : ['SimpleTrackingYawController', {}],
+    'simulator'      : ['DoubleIntegratorSimulator', {}],
+    # ROS parameters (see utilities/ros_stub.py)
+    'parameters'     : {},
+    # flight
+    'duration'       : 30.0,
+    'control_period' : 0.01,
+    # parameter: list of values
+    'grid'           : {},
+    # parameter: ['uniform', low, high] or ['normal', mean, standard deviation]
+    'distributions'  : {},
+    # runs for each point of the grid (only if there are distributions)
+    'samples'        : 1,
+    'seed'           : 0,
+    # for settling_time (m)
+    'settling_band'  : 0.1,
+}
+
+# objects that a parameter can refer to
+OBJECTS = ['controller', 'reference', 'yaw_controller', 'simulator']
+
+
+def default_cache_directory():
+    return os.path.join(os.path.expanduser('~'), '.ros', 'quad_control_sweeps')
+
+
+def complete_config(config):
+    """config, with the defaults of the missing entries"""
+    complete = copy.deepcopy(DEFAULT_CONFIG)
+    complete.update(copy.deepcopy(config))
+    if complete['mission'] not in MISSIONS:
+        raise ValueError('mission must be one of ' + str(MISSIONS) + ', not ' + str(complete['mission']))
+    for name in list(complete['grid'].keys()) + list(complete['distributions'].keys()):
+        if name.split('.')[0] not in OBJECTS or len(name.split('.')) < 2:
+            raise ValueError('parameter ' + name + ' must start with one of ' + str(OBJECTS))
+    for name, distribution in complete['distributions'].items():
+        if distribution[0] not in ('uniform', 'normal') or len(distribution) != 3:
+            raise ValueError('distribution of ' + name + ' must be [uniform, low, high] or [normal, mean, std], not ' + str(distribution))
+    return complete
+
+
+def config_hash(config):
+    """Hash of a (complete) config"""
+    string = json.dumps([VERSION, config], sort_keys=True)
+    return hashlib.sha1(string.encode('utf-8')).hexdigest()
+
+
+def runs_of(config):
+    """List of runs: dictionaries {parameter: value}, in order"""
+    grid_names = sorted(config['grid'].keys())
+    grid_points = list(itertools.product(*[config['grid'][name] for name in grid_names]))
+
+    distribution_names = sorted(config['distributions'].keys())
+    samples = config['samples'] if distribution_names else 1
+    random_state = numpy.random.RandomState(config['seed'])
+
+    runs = []
+    for point in grid_points:
+        for sample in range(samples):
+            run = dict(zip(grid_names, point))
+            for name in distribution_names:
+                kind, first, second = config['distributions'][name]
+                if kind == 'uniform':
+                    run[name] = float(random_state.uniform(first, second))
+                else:
+                    run[name] = float(random_state.normal(first, second))
+            runs.append(run)
+    return runs
+
+
+def patches_of(run):
+    """{object: patch} (see Jsonable.validate_patch) of the parameters of a run"""
+    patches = {}
+    for name, value in run.items():
+        path = name.split('.')
+        patch = patches.setdefault(path[0], {})
+        for key in path[1:-1]:
+            patch = patch.setdefault(key, {})
+        patch[path[-1]] = value
+    return patches
+
+
+def metrics_of(flight, settling_band):
+    """Metrics (see METRICS) of a headless_simulation.Flight"""
+    # position and desired position (see Mission.get_complete_data)
+    errors = numpy.sqrt(numpy.sum((flight.mission_data[:,1:4] - flight.mission_data[:,7:10])**2, axis=1))
+    times = flight.times
+    period = times[1] - times[0] if len(times) > 1 else 0.0
+
+    outside = numpy.nonzero(errors > settling_band)[0]
+    if len(outside) == 0:
+        settling_time = 0.0
+    elif outside[-1] == len(errors) - 1:
+        # never settles
+        settling_time = float('nan')
+    else:
+        settling_time = times[outside[-1] + 1] - times[0]
+
+    saturated = numpy.any((flight.rc_outputs <= RC_MIN) | (flight.rc_outputs >= RC_MAX), axis=1)
+
+    return {
+        'rms_error'       : float(numpy.sqrt(numpy.mean(errors**2))),
+        'final_error'     : float(errors[-1]),
+        'max_error'       : float(numpy.max(errors)),
+        'settling_time'   : float(settling_time),
+        'saturation_time' : float(numpy.sum(saturated)*period),
+    }
+
+
+#--------------------------------------------------------------------------#
+# in the processes of the pool
+
+def _initialize_process(parameters):
+    # rospy is replaced before anything reads a ROS parameter
+    from utilities import ros_stub
+    if ros_stub.installed() is None:
+        ros_stub.install(parameters)
+
+
+def _construct(Class, base, patch):
+    """Object of Class, from the constructing dictionary base, with patch applied"""
+    # full dictionary (with inner objects), so that inner arguments can be patched
+    dictionary = json.loads(Class().from_object_to_string())
+    dictionary = Class.apply_patch(dictionary, base)
+    Class.validate_patch(patch, dictionary)
+    return Class.from_dictionary(Class.apply_patch(dictionary, patch))
+
+
+def _run(arguments):
+    """One flight: returns a row of the results table"""
+    config, index, run = arguments
+
+    from missions.headless import headless_simulation
+    from simulators.simulators_dictionary import simulators_dictionary
+
+    MissionClass = getattr(headless_simulation, config['mission'])
+    databases = {
+        'controller'     : MissionClass.inner['controller'],
+        'reference'      : MissionClass.inner['reference'],
+        'yaw_controller' : MissionClass.inner['yaw_controller'],
+        'simulator'      : simulators_dictionary,
+    }
+
+    row = {'run': index}
+    row.update(run)
+    start = time.time()
+    try:
+        patches = patches_of(run)
+        objects = {}
+        for name in OBJECTS:
+            class_name, base = config[name]
+            objects[name] = _construct(databases[name][class_name], base, patches.get(name, {}))
+
+        mission_object = MissionClass(
+            controller     = objects['controller'],
+            reference      = objects['reference'],
+            yaw_controller = objects['yaw_controller'])
+        simulation = headless_simulation.HeadlessSimulation(
+            mission_object, objects['simulator'], config['control_period'])
+        # diverging flights give inf and nan: they are results, not errors
+        with numpy.errstate(all='ignore'):
+            flight = simulation.run(config['duration'])
+            row.update(metrics_of(flight, config['settling_band']))
+        row['error'] = None
+    except Exception as exception:
+        for metric in METRICS:
+            row[metric] = float('nan')
+        row['error'] = repr(exception)
+    row['wall_time'] = time.time() - start
+    return row
+
+
+#--------------------------------------------------------------------------#
+
+class ResultsTable(object):
+    """Rows (dictionaries) of a sweep, one per run"""
+
+    def __init__(self, config, rows):
+        self.config = config
+        self.rows = rows
+        self.parameters = sorted(set(list(config['grid'].keys()) + list(config['distributions'].keys())))
+        self.columns = ['run'] + self.parameters + METRICS
+
+    def column(self, name):
+        """Values of a column, as an array (None is nan)"""
+        return numpy.array([numpy.nan if row.get(name) is None else row.get(name) for row in self.rows])
+
+    def sorted_by(self, metric):
+        """Rows, best (smallest) first; nan last"""
+        key = lambda row: (numpy.isnan(row[metric]), row[metric])
+        return sorted(self.rows, key=key)
+
+    def save(self, file_path):
+        with open(file_path, 'w') as file_handle:
+            json.dump({'config': self.config, 'rows': self.rows}, file_handle, indent=1)
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path) as file_handle:
+            content = json.load(file_handle)
+        return cls(content['config'], content['rows'])
+
+    def to_csv(self, file_path):
+        with open(file_path, 'w') as file_handle:
+            file_handle.write(','.join(self.columns + ['error']) + '\n')
+            for row in self.rows:
+                values = [json.dumps(row.get(name)) for name in self.columns]
+                values.append('"' + str(row.get('error') or '').replace('"', "'") + '"')
+                file_handle.write(','.join(values) + '\n')
+
+    def format(self, rows=None):
+        if rows is None:
+            rows = self.rows
+        # parameters by the name of their argument
+        lines = ['  '.join(['%20s' % name.split('.')[-1][-20:] for name in self.columns])]
+        for row in rows:
+            values = []
+            for name in self.columns:
+                value = row.get(name)
+                if isinstance(value, float):
+                    values.append('%20.4g' % value)
+                else:
+                    values.append('%20s' % str(value)[-20:])
+            if row.get('error'):
+                values.append(row['error'])
+            lines.append('  '.join(values))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return self.format()
+
+
+class ParameterSweep(object):
+
+    def __init__(self, config, cache_directory=None, processes=None):
+        """processes: size of the pool (default: number of cpus; 1: no pool)"""
+        self.config = complete_config(config)
+        self.hash = config_hash(self.config)
+        if cache_directory is None:
+            cache_directory = default_cache_directory()
+        self.cache_directory = cache_directory
+        self.processes = processes
+
+    def cache_path(self):
+        return os.path.join(self.cache_directory, self.hash + '.json')
+
+    def runs(self):
+        return runs_of(self.config)
+
+    def run(self, use_cache=True):
+        """Returns the ResultsTable (from the cache, if this sweep was already run)"""
+        if use_cache and os.path.exists(self.cache_path()):
+            return ResultsTable.load(self.cache_path())
+
+        arguments = [(self.config, index, run) for index, run in enumerate(self.runs())]
+        if self.processes == 1:
+            _initialize_process(self.config['parameters'])
+            rows = [_run(argument) for argument in arguments]
+        else:
+            pool = multiprocessing.Pool(self.processes, _initialize_process, (self.config['parameters'],))
+            try:
+                rows = pool.map(_run, arguments, chunksize=1)
+            finally:
+                pool.close()
+                pool.join()
+
+        table = ResultsTable(self.config, rows)
+        if not os.path.isdir(self.cache_directory):
+            os.makedirs(self.cache_directory)
+        table.save(self.cache_path())
+        return table
+
+
+if __name__ == '__main__':
+
+    arguments = sys.argv[1:]
+    config_file = None
+    processes = None
+    sort = None
+    use_cache = True
+    csv = None
+    while arguments:
+        argument = arguments.pop(0)
+        if argument == '--processes':
+            processes = int(arguments.pop(0))
+        elif argument == '--sort':
+            sort = arguments.pop(0)
+        elif argument == '--no-cache':
+            use_cache = False
+        elif argument == '--csv':
+            csv = arguments.pop(0)
+        else:
+            config_file = argument
+    if config_file is None:
+        print(__doc__)
+        sys.exit(1)
+
+    with open(config_file) as file_handle:
+        sweep = ParameterSweep(json.load(file_handle), processes=processes)
+
+    start = time.time()
+    table = sweep.run(use_cache)
+    print(table.format(table.sorted_by(sort) if sort else None))
+    print('%d runs, %.1f s (table: %s)' % (len(table.rows), time.time() - start, sweep.cache_path()))
+    if csv is not None:
+        table.to_csv(csv)
@@ -8,11 +8,16 @@ import numpy
 # for getting time
 import rospy
 
-#plots
-# import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')
-from matplotlib import pyplot as plt
+# event driven mode: publish from the threads of the subscribers
+import threading
+
+#plots: matplotlib is slow to import, and only needed by plot_from_string
+def _pyplot():
+    import matplotlib
+    # this is necessary because of threading and plotting
+    matplotlib.use('Agg')
+    from matplotlib import pyplot
+    return pyplot
 
 # The children import needed dictionaries
 
@@ -36,6 +41,123 @@ from matplotlib import pyplot as plt
 # import converter from 3d_force and yaw rate into iris rc standard 
 from converters.iris_plus_converter import IrisPlusConverter
 
+# for measuring how long each stage of publish takes
+from utilities import loop_timing
+
+# namespace of the vehicle whose missions are being constructed (see vehicle_namespace)
+_vehicle_namespace = ''
+_vehicle_namespace_lock = threading.RLock()
+
+
+class vehicle_namespace(object):
+    """Missions constructed inside this context manager resolve
+    their relative topic names in the namespace of a vehicle:
+        with mission.vehicle_namespace('Iris1'):
+            mission_object = MissionClass()
+    This is needed when several vehicles are controlled from one node.
+    """
+
+    def __init__(self, namespace):
+        self.namespace = namespace
+
+    def __enter__(self):
+        global _vehicle_namespace
+        _vehicle_namespace_lock.acquire()
+        self.previous_namespace = _vehicle_namespace
+        _vehicle_namespace = self.namespace
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        global _vehicle_namespace
+        _vehicle_namespace = self.previous_namespace
+        _vehicle_namespace_lock.release()
+        return False
+
+
+class MissionWorkspace(object):
+    """Arrays that a mission writes into on every tick, instead of allocating
+    new ones (many small allocations per tick cause garbage collection
+    pauses and jitter at high rates). For example:
+        ea_rad = self.workspace.buffer('ea_rad', 6)
+        numpy.multiply(self.state_quad[6:9], math.pi/180, out=ea_rad[0:3])
+
+    State samples arrive in the thread of a subscriber: it writes them
+    with lock held, and the tick copies the latest one (see sample and snapshot).
+    """
+
+    def __init__(self):
+        # name: array
+        self.buffers = {}
+        # name: latest sample written by a subscriber, see sample
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def buffer(self, name, shape):
+        """Array of the given shape, which is the same on every call with the same name"""
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != _shape(shape):
+            buffer = numpy.zeros(shape)
+            self.buffers[name] = buffer
+        return buffer
+
+    def sample(self, name, shape):
+        """Array that a subscriber writes a new sample into, with lock held:
+            with self.workspace.lock:
+                state = self.workspace.sample('state_quad', 9)
+                state[0] = ...
+        The control loop (in another thread) reads it only through snapshot.
+        """
+        sample = self.samples.get(name)
+        if sample is None or sample.shape != _shape(shape):
+            sample = numpy.zeros(shape)
+            self.samples[name] = sample
+        return sample
+
+    def snapshot(self, name, out):
+        """Copy the latest sample of name into out, with lock held: taken once
+        at the start of a tick, so that the whole tick reads the same sample,
+        and never one half written. Returns False if there is no sample yet."""
+        with self.lock:
+            sample = self.samples.get(name)
+            if sample is None:
+                return False
+            out[...] = sample
+        return True
+
+    def concatenate(self, name, parts):
+        """numpy.concatenate(parts), written into the same array on every call.
+        A part is an array, or a number."""
+        size = 0
+        for part in parts:
+            size += _size(part)
+        buffer = self.buffer(name, size)
+        index = 0
+        for part in parts:
+            part_size = _size(part)
+            if isinstance(part, numpy.ndarray):
+                buffer[index:index+part_size] = part
+            elif part_size == 1 and not isinstance(part, (list, tuple)):
+                buffer[index] = part
+            else:
+                buffer[index:index+part_size] = part
+            index += part_size
+        return buffer
+
+
+def _shape(shape):
+    if isinstance(shape, tuple):
+        return shape
+    return (shape,)
+
+
+def _size(part):
+    if isinstance(part, numpy.ndarray):
+        return part.size
+    if isinstance(part, (list, tuple)):
+        return len(part)
+    return 1
+
+
 class Mission(js.Jsonable):
 
     inner = {
@@ -48,6 +170,26 @@ class Mission(js.Jsonable):
 
     # time_instant_t0 = 0.0
 
+    # node replaces this by a loop_timing.LoopTimer to measure publish stages
+    loop_timer = loop_timing.NULL_LOOP_TIMER
+
+    # attribute that holds the object of each inner key
+    # (used when changing and patching inner objects, see request_patch)
+    inner_attributes = {
+        'controller'     : 'controller',
+        'yaw_controller' : 'YawControllerObject',
+        'reference'      : 'reference',
+        'yaw_reference'  : 'yaw_reference_object',
+    }
+
+    # event driven mode (see enable_event_driven):
+    # publish as soon as a new state sample arrives, instead of on the node timer
+    event_driven = False
+
+    # lockstep mode (see enable_lockstep):
+    # publish for every state sample a command stamped with its time
+    lockstep = False
+
     """Labels for the columns of a file that stores data from this mission."""
     file_labels = [
         'time',
@@ -68,6 +210,8 @@ class Mission(js.Jsonable):
 
     @classmethod
     def plot_from_string(cls, string):
+
+        plt = _pyplot()
         
         times        = []
         positions_x  = []
@@ -154,6 +298,9 @@ class Mission(js.Jsonable):
         # Copy the parameters into self variables
         # Subscribe to the necessary topics, if any
 
+        # namespace of the vehicle (empty: namespace of the node)
+        self.namespace = _vehicle_namespace
+
         # initialize initial time
         self.reset_initial_time()         
         
@@ -163,11 +310,27 @@ class Mission(js.Jsonable):
         # for reseting neutral value that makes iris+ stay at desired altitude
         self.DesiredZForceMedian = utility_functions.MedianFilter(10)
               
+        # preallocated arrays for the control tick
+        self.workspace = MissionWorkspace()
+
         self.rc_output = numpy.zeros(4)
 
         # converting our controlller standard into iris+ standard
         self.iris_plus_converter_object_mission = IrisPlusConverter()
 
+        # publish may be called by the node timer and by subscribers
+        self.publish_lock = threading.Lock()
+        # ros time when the last state sample was measured (None if unknown)
+        self.state_stamp = None
+        # monotonic time of the last publish
+        self.time_last_publish = None
+        # monotonic time when the last state sample arrived (None if none did)
+        self.time_last_state = None
+
+        # patched inner objects, to be swapped in before the next publish
+        self.pending_patches = []
+        self.pending_patches_lock = threading.Lock()
+
         pass
         
         
@@ -181,6 +344,15 @@ class Mission(js.Jsonable):
         pass
 
 
+    def topic(self, name):
+        """Name of a topic (or service) of this vehicle:
+        children subscribe and publish to self.topic('quad_state'), etc.
+        Absolute names (e.g., '/firefly/...') are not changed."""
+        if self.namespace == '' or name.startswith('/'):
+            return name
+        return '/' + self.namespace.strip('/') + '/' + name
+
+
     def initialize_state(self):
         raise NotImplementedError()
 
@@ -242,7 +414,7 @@ class Mission(js.Jsonable):
 
     def get_ea_desired(self):
         """Get desired euler angles in degrees for UAV"""
-        return numpy.array([0.0,0.0,0.0])
+        return self.workspace.buffer('ea_desired', 3)
         # return NotImplementedError()        
 
     def get_rc_output(self):
@@ -260,8 +432,9 @@ class Mission(js.Jsonable):
         from this data, mission should be able to do data post-analysis, 
         like ploting or computing average errors
         """        
-        default_array = numpy.concatenate([
-            [rospy.get_time()],
+        # written into the same array on every call: copy it to keep it
+        default_array = self.workspace.concatenate('complete_data', [
+            self.current_time(),
             self.get_pv(),
             self.get_pv_desired(),
             self.get_euler_angles(),
@@ -290,33 +463,33 @@ class Mission(js.Jsonable):
         """Change reference trajectory"""
         if key in self.inner['reference'].keys():
             TrajectoryClass    = self.inner['reference'][key]          
-            self.reference = TrajectoryClass.from_string(string)
+            setattr(self, self.inner_attributes['reference'], TrajectoryClass.from_string(string))
 
 
     def change_yaw_reference(self,key,string):
         """Change yaw reference trajectory"""
         if key in self.inner['yaw_reference'].keys():
             YawTrajectoryClass   = self.inner['yaw_reference'][key]
-            self.yaw_reference_object = YawTrajectoryClass.from_string(string)
+            setattr(self, self.inner_attributes['yaw_reference'], YawTrajectoryClass.from_string(string))
 
 
     def change_controller(self, key, string):
         """Change controller"""
         if key in self.inner['controller'].keys():
             ControllerClass       = self.inner['controller'][key]
-            self.controller = ControllerClass.from_string(string)
+            setattr(self, self.inner_attributes['controller'], ControllerClass.from_string(string))
 
 
     def change_yaw_controller(self,key,string):
         """Change yaw controller"""
         if key in self.inner['yaw_controller'].keys():
             YawControllerClass      = self.inner['yaw_controller'][key]
-            self.YawControllerObject = YawControllerClass.from_string(string)
+            setattr(self, self.inner_attributes['yaw_controller'], YawControllerClass.from_string(string))
 
 
     def reset_initial_time(self,time_instant = None):
         if time_instant == None:
-            self.time_instant_t0 = rospy.get_time()
+            self.time_instant_t0 = self.current_time()
         else:
             self.time_instant_t0 = time_instant
 
@@ -334,22 +507,72 @@ class Mission(js.Jsonable):
 
     def compute_desired_3d_force(self,time_instant):
 
+        timer = self.loop_timer
+
         # reference
-        reference = self.get_reference(time_instant)
+        with timer.stage('get_reference'):
+            reference = self.get_reference(time_instant)
 
         # state
-        state = self.get_state()
+        with timer.stage('get_state'):
+            state = self.get_state()
 
         # compute input to send to QUAD
-        desired_3d_force_quad = self.controller.output(time_instant,
-            state, reference)
+        with timer.stage('controller.output'):
+            controller = getattr(self, self.inner_attributes['controller'])
+            desired_3d_force_quad = controller.output(time_instant,
+                state, reference)
 
         return desired_3d_force_quad
 
 
+    def request_patch(self, key, patch):
+        """Patch the parameters of an inner object (e.g., key = 'controller')
+        without losing its internal state: see Jsonable.patched.
+        The patched copy is constructed now, by the caller, and it replaces
+        the current object right before the next publish.
+        Returns a threading.Event that is set when the patch is in effect.
+        Raises ValueError if the patch is not valid.
+        """
+        if key not in self.inner_attributes:
+            raise ValueError(self.__class__.__name__ + " cannot patch " + str(key) + ": use one of " + str(self.inner_attributes.keys()))
+
+        attribute = self.inner_attributes[key]
+        if not hasattr(self, attribute):
+            raise ValueError(self.__class__.__name__ + " has no " + str(key) + " that can be patched")
+        target = getattr(self, attribute)
+        if not isinstance(target, js.Jsonable):
+            raise ValueError(self.__class__.__name__ + "." + attribute + " is not a Jsonable object: " + str(key) + " cannot be patched")
+        patched_object = target.patched(patch)
+
+        applied = threading.Event()
+        with self.pending_patches_lock:
+            self.pending_patches.append((attribute, patched_object, applied))
+        return applied
+
+
+    def apply_pending_patches(self):
+        """Swap in patched inner objects (called at the start of publish)"""
+        if len(self.pending_patches) == 0:
+            return
+        with self.pending_patches_lock:
+            pending_patches = self.pending_patches
+            self.pending_patches = []
+        for attribute, patched_object, applied in pending_patches:
+            old_object = getattr(self, attribute)
+            # state may have changed since the copy was made
+            patched_object.copy_state_from(old_object)
+            setattr(self, attribute, patched_object)
+            applied.set()
+
+
     def publish(self):
 
-        time_instant = rospy.get_time() - self.time_instant_t0
+        self.apply_pending_patches()
+
+        self.snapshot_state()
+
+        time_instant = self.current_time() - self.time_instant_t0
 
         desired_3d_force_quad = self.compute_desired_3d_force(time_instant)
 
@@ -357,15 +580,125 @@ class Mission(js.Jsonable):
 
         self.DesiredZForceMedian.update_data(desired_3d_force_quad[2])
 
-        yaw_rate = self.yaw_rate(time_instant)
+        timer = self.loop_timer
+
+        with timer.stage('yaw_rate'):
+            yaw_rate = self.yaw_rate(time_instant)
+
+        with timer.stage('rc_command'):
+            self.rc_command(desired_3d_force_quad,yaw_rate)
+
+        with timer.stage('real_publish'):
+            self.real_publish(desired_3d_force_quad,yaw_rate,self.rc_output)
+
+
+        # latency from the measurement of the state to the command
+        if self.state_stamp is not None:
+            self.loop_timer.record('sensor_to_actuator', self.current_time() - self.state_stamp)
+
+        self.time_last_publish = loop_timing.monotonic_time()
+
+
+    def snapshot_state(self):
+        """Copy the latest state sample into the state that this tick reads
+        (see MissionWorkspace.snapshot). Missions that receive the state in
+        another thread redefine this."""
+        pass
+
 
-        self.rc_command(desired_3d_force_quad,yaw_rate)
+    def enable_event_driven(self, maximum_frequency, stale_timeout):
+        """Publish when a new state sample arrives (see state_arrived),
+        at most at maximum_frequency (Hz). If no sample has arrived for
+        stale_timeout (sec), the node timer publishes instead."""
+        self.minimum_event_period = 1.0/maximum_frequency
+        self.stale_timeout = stale_timeout
+        self.event_driven = True
 
-        self.real_publish(desired_3d_force_quad,yaw_rate,self.rc_output)
+
+    def disable_event_driven(self):
+        self.event_driven = False
+        self.lockstep = False
+
+
+    def enable_lockstep(self):
+        """Publish for every state sample (see state_arrived). The command
+        is stamped with the time of the sample (current_time), and it is the
+        acknowledgement that the simulator (quad_simulator.py with ~lockstep)
+        waits for before advancing its time: children stamp their commands
+        (e.g., quad_cmd.time). The node timer does not publish."""
+        self.lockstep = True
+
+
+    def enable_shared_memory(self):
+        """Exchange state and commands with a simulator on the same host
+        through shared memory (see utilities/shared_memory.py), instead of
+        topics. Missions of simulated vehicles redefine this; returns False
+        if this mission cannot."""
+        return False
+
+
+    def disable_shared_memory(self):
+        """Back to the topics, and remove the rings that this mission writes
+        from /dev/shm (when the mission is replaced, or the node shuts down)"""
+        pass
+
+
+    def current_time(self):
+        """Ros time (sec); in lockstep mode, the stamp of the last state sample
+        (the /clock of the simulator may arrive after the sample)"""
+        if self.lockstep and self.state_stamp is not None:
+            return self.state_stamp
+        return rospy.get_time()
+
+
+    def state_arrived(self, stamp=None):
+        """Children call this when they receive a new state sample
+        (e.g., in the odometry callback), after updating their state.
+        stamp: ros time (sec) when the sample was measured; by default, now.
+        """
+        self.time_last_state = loop_timing.monotonic_time()
+        if stamp is None:
+            stamp = rospy.get_time()
+        self.state_stamp = stamp
+
+        if self.lockstep:
+            # the command, stamped with this sample, acknowledges it
+            with self.publish_lock:
+                self.publish()
+            return
+
+        if not self.event_driven:
+            return
+
+        # rate limit
+        if self.time_last_publish is not None:
+            if loop_timing.monotonic_time() - self.time_last_publish < self.minimum_event_period:
+                return
+
+        # if a publish is running, this sample is used by the next one
+        if self.publish_lock.acquire(False):
+            try:
+                self.publish()
+            finally:
+                self.publish_lock.release()
+
+
+    def timer_publish(self):
+        """Called by the node on every tick of its loop"""
+        if self.lockstep:
+            # the simulator waits for this mission: state samples always arrive
+            return
+        if self.event_driven and self.time_last_state is not None:
+            # fallback: state samples stopped arriving
+            if loop_timing.monotonic_time() - self.time_last_state < self.stale_timeout:
+                return
+        with self.publish_lock:
+            self.publish()
 
 
     def rc_command(self,desired_3d_force_quad,yaw_rate):
-        euler_rad          = self.get_euler_angles()*numpy.pi/180
+        euler_angles       = self.get_euler_angles()
+        euler_rad          = numpy.multiply(euler_angles, numpy.pi/180, out=self.workspace.buffer('euler_rad', len(euler_angles)))
         self.iris_plus_converter_object_mission.set_rotation_matrix(euler_rad)
         iris_plus_rc_input = self.iris_plus_converter_object_mission.input_conveter(desired_3d_force_quad,yaw_rate)
         self.rc_output     = iris_plus_rc_input
\ No newline at end of file
@@ -37,6 +37,14 @@ class IrisRealTrajectoryTracking(mission.Mission):
     inner['reference']      = trajectories_database.database
     inner['yaw_controller'] = yaw_controllers_database.database
 
+    # the trajectory and the controller are kept in TrajGenerator and ControllerObject
+    # (self.reference is the output of the trajectory)
+    inner_attributes = {
+        'controller'     : 'ControllerObject',
+        'yaw_controller' : 'YawControllerObject',
+        'reference'      : 'TrajGenerator',
+    }
+
 
     @classmethod
     def description(cls):
@@ -61,7 +69,7 @@ class IrisRealTrajectoryTracking(mission.Mission):
         self.Qs = mocap_source.Mocap(info=0)
 
         # publisher: command firefly motor speeds    
-        self.rc_override = rospy.Publisher('mavros/rc/override', OverrideRCIn, queue_size=100)
+        self.rc_override = rospy.Publisher(self.topic('mavros/rc/override'), OverrideRCIn, queue_size=100)
 
         self.body_id = body_id
 
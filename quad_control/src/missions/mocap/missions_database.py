@@ -4,11 +4,11 @@
 Database of the missions.
 """
 
-import rospy
+from utilities.lazy_registry import LazyDatabase
 
-database = {}
+database = LazyDatabase('mocap missions')
 
-import iris_real_trajectory_tracking.iris_real_trajectory_tracking
-database["IrisRealTrajectoryTracking"] = iris_real_trajectory_tracking.iris_real_trajectory_tracking.IrisRealTrajectoryTracking
+database.register("IrisRealTrajectoryTracking", "missions.mocap.iris_real_trajectory_tracking.iris_real_trajectory_tracking:IrisRealTrajectoryTracking")
 
-database["Default"] = database[rospy.get_param("MissionDefault","IrisRealTrajectoryTracking")]
+# the ROS parameter is read when "Default" is first used
+database.alias("Default", "IrisRealTrajectoryTracking", "MissionDefault")
@@ -20,10 +20,14 @@ from controllers.fa_trajectory_tracking_controllers import fa_trajectory_trackin
 
 import math
 import numpy
+import time
 
 # for subscribing to topics, and publishing
 import rospy
 
+# state and commands in shared memory (see enable_shared_memory)
+from utilities import shared_memory
+
 
 
 class IrisSimulatorTrajectoryTracking(mission.Mission):
@@ -35,6 +39,14 @@ class IrisSimulatorTrajectoryTracking(mission.Mission):
     inner['reference']      = trajectories_database.database
     inner['yaw_controller'] = yaw_controllers_database.database
 
+    # the trajectory and the controller are kept in TrajGenerator and ControllerObject
+    # (self.reference is the output of the trajectory)
+    inner_attributes = {
+        'controller'     : 'ControllerObject',
+        'yaw_controller' : 'YawControllerObject',
+        'reference'      : 'TrajGenerator',
+    }
+
 
     @classmethod
     def description(cls):
@@ -52,10 +64,11 @@ class IrisSimulatorTrajectoryTracking(mission.Mission):
         mission.Mission.__init__(self)        
 
         # controller needs to have access to STATE: comes from simulator
-        self.SubToSim = rospy.Subscriber("quad_state", quad_state, self.get_state_from_simulator)
+        self.SubToSim = rospy.Subscriber(self.topic("quad_state"), quad_state, self.get_state_from_simulator)
 
         # message published by quad_control that simulator will subscribe to 
-        self.pub_cmd = rospy.Publisher('quad_cmd', quad_cmd, queue_size=10)
+        self.pub_cmd = rospy.Publisher(self.topic('quad_cmd'), quad_cmd, queue_size=10)
+        self.cmd     = quad_cmd()
         
         # by default, desired reference is staying still in origin
         self.TrajGenerator = reference
@@ -71,14 +84,83 @@ class IrisSimulatorTrajectoryTracking(mission.Mission):
         # self.IrisPlusConverterObject.set_mass(self.ControllerObject.MASS)
 
         self.iris_plus_converter_object_mission.set_mass(self.ControllerObject.MASS)
+
+        # shared memory mode (see enable_shared_memory)
+        self.state_ring_path = None
+        self.state_ring      = None
+        self.command_ring    = None
+        # number of the last state read from the ring (0: none, states come from quad_state)
+        self.state_number    = 0
         
         pass
 
 
+    def enable_shared_memory(self):
+        # commands written for the simulator, and state read at every tick of the node
+        # (the state ring is opened when the simulator has created it)
+        self.command_ring   = shared_memory.SeqlockRing(
+            shared_memory.path_of(rospy.resolve_name(self.topic('quad_cmd'))), shared_memory.COMMAND_COLUMNS, create=True)
+        self.command_record = numpy.zeros(shared_memory.COMMAND_COLUMNS)
+        self.state_ring_path = shared_memory.path_of(rospy.resolve_name(self.topic('quad_state')))
+        self.state_record    = numpy.zeros(shared_memory.STATE_COLUMNS)
+        return True
+
+
+    def disable_shared_memory(self):
+        # back to the topics; the command ring is removed from /dev/shm
+        # (not closed: the control loop may still be writing a command)
+        command_ring = self.command_ring
+        self.command_ring    = None
+        self.state_ring_path = None
+        self.state_ring      = None
+        self.state_number    = 0
+        if command_ring is not None:
+            command_ring.unlink()
+
+
+    def read_state_ring(self):
+        """Take the latest state of the simulator from shared memory, if any"""
+        if self.state_ring is None:
+            try:
+                self.state_ring = shared_memory.SeqlockRing(self.state_ring_path, shared_memory.STATE_COLUMNS)
+            except (IOError, OSError, ValueError):
+                # no simulator in shared memory mode (yet)
+                return
+        number = self.state_ring.read_latest(self.state_record)
+        if number == 0 or not shared_memory.is_fresh(self.state_record):
+            # left in /dev/shm by a simulator that is gone: states come from
+            # quad_state, and the ring is opened again (a new simulator makes a new one)
+            self.state_ring   = None
+            self.state_number = 0
+            return
+        if number == self.state_number:
+            return
+        self.state_number = number
+        # copied by the tick (see snapshot_state)
+        with self.workspace.lock:
+            self.workspace.sample('state_quad', 3+3+3)[:] = self.state_record[1:10]
+        # in lockstep mode, simulator time is ros time (see get_state_from_simulator)
+        if self.lockstep:
+            self.state_arrived(self.state_record[0])
+        else:
+            self.state_arrived()
+
+
+    def timer_publish(self):
+        if self.state_ring_path is not None:
+            self.read_state_ring()
+        mission.Mission.timer_publish(self)
+
+
     def initialize_state(self):
         # state of quad: position, velocity and attitude 
         # ROLL, PITCH, AND YAW (EULER ANGLES IN DEGREES)
         self.state_quad = numpy.zeros(3+3+3) 
+
+
+    def snapshot_state(self):
+        # state read by this tick: the latest sample of the simulator
+        self.workspace.snapshot('state_quad', self.state_quad)
         
         
     def __str__(self):
@@ -92,9 +174,10 @@ class IrisSimulatorTrajectoryTracking(mission.Mission):
 
 
     def get_quad_ea_rad(self):
-    	euler_rad     = self.state_quad[6:9]*math.pi/180
-    	euler_rad_dot = numpy.zeros(3)
-    	return numpy.concatenate([euler_rad,euler_rad_dot])
+    	# euler angles (rad), and their time derivatives (zero)
+    	ea_rad = self.workspace.buffer('ea_rad', 6)
+    	numpy.multiply(self.state_quad[6:9], math.pi/180, out=ea_rad[0:3])
+    	return ea_rad
 
 
     def get_reference(self,time_instant):
@@ -128,8 +211,9 @@ class IrisSimulatorTrajectoryTracking(mission.Mission):
 
     def real_publish(self,desired_3d_force_quad,yaw_rate,rc_output):
 
-        # create a message of the type quad_cmd, that the simulator subscribes to 
-        cmd  = quad_cmd()
+        # message of the type quad_cmd, that the simulator subscribes to
+        # (the same message on every call: publish serializes it right away)
+        cmd  = self.cmd
         
         cmd.cmd_1 = rc_output[0]
         cmd.cmd_2 = rc_output[1]
@@ -140,21 +224,45 @@ class IrisSimulatorTrajectoryTracking(mission.Mission):
         cmd.cmd_6 = 1500.0
         cmd.cmd_7 = 1500.0
         cmd.cmd_8 = 1500.0
-        
+
+        # in lockstep mode, the stamp of the state: the command acknowledges it
+        cmd.time = self.current_time()
+
+        # the ring first: when the command on quad_cmd arrives, it is in the ring
+        command_ring = self.command_ring
+        if command_ring is not None:
+            record = self.command_record
+            record[0] = cmd.time
+            record[1:5] = rc_output[0:4]
+            record[-1] = time.time()
+            command_ring.write(record)
+
         self.pub_cmd.publish(cmd)
 
 
     # callback when simulator publishes states
     def get_state_from_simulator(self, simulator_message):
 
-        # position
-        p = numpy.array([simulator_message.x,simulator_message.y,simulator_message.z])
-        # velocity
-        v = numpy.array([simulator_message.vx,simulator_message.vy,simulator_message.vz])
-        #v = self.VelocityEstimator.out(p,rospy.get_time())
-        # attitude: euler angles
-        ee = numpy.array([simulator_message.roll,simulator_message.pitch,simulator_message.yaw])
-        # collect all components of state
-        self.state_quad = numpy.concatenate([p,v,ee])  
+        if self.state_number > 0:
+            # state comes from shared memory: the topic is a mirror
+            return
+
+        # written in the thread of the subscriber: copied by the tick (see snapshot_state)
+        with self.workspace.lock:
+            state = self.workspace.sample('state_quad', 3+3+3)
+            # position
+            state[0] = simulator_message.x; state[1] = simulator_message.y; state[2] = simulator_message.z
+            # velocity
+            state[3] = simulator_message.vx; state[4] = simulator_message.vy; state[5] = simulator_message.vz
+            #v = self.VelocityEstimator.out(p,rospy.get_time())
+            # attitude: euler angles
+            state[6] = simulator_message.roll; state[7] = simulator_message.pitch; state[8] = simulator_message.yaw
+        # in event driven mode, publish now
+        # (message time is simulator time, so sample is stamped on arrival,
+        # except in lockstep mode, where simulator time is ros time)
+        if self.lockstep:
+            self.state_arrived(simulator_message.time)
+        else:
+            self.state_arrived()
 
 
@@ -4,11 +4,11 @@
 Database of the missions.
 """
 
-import rospy
+from utilities.lazy_registry import LazyDatabase
 
-database = {}
+database = LazyDatabase('rviz missions')
 
-import iris_simulator_trajectory_tracking.iris_simulator_trajectory_tracking
-database["IrisSimulatorTrajectoryTracking"] = iris_simulator_trajectory_tracking.iris_simulator_trajectory_tracking.IrisSimulatorTrajectoryTracking
+database.register("IrisSimulatorTrajectoryTracking", "missions.rviz.iris_simulator_trajectory_tracking.iris_simulator_trajectory_tracking:IrisSimulatorTrajectoryTracking")
 
-database["Default"] = database[rospy.get_param("MissionDefault","IrisSimulatorTrajectoryTracking")]
\ No newline at end of file
+# the ROS parameter is read when "Default" is first used
+database.alias("Default", "IrisSimulatorTrajectoryTracking", "MissionDefault")
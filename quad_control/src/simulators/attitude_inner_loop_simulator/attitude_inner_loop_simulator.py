@@ -7,6 +7,7 @@ with attitude inner loop.
 import numpy as np
 import utilities.utility_functions as uts
 from simulators import simulator
+from simulators.integrators import integrators_database
 import rospy
 import numpy as np
 
@@ -19,6 +20,9 @@ class AttitudeInnerLoopSimulator(simulator.Simulator):
         return "Iris+ simulator with attitude inner loop"
 
     
+    # position, velocity and rotation matrix
+    STATE_LAYOUT = simulator.ROTATION_MATRIX_LAYOUT
+
     @classmethod
     def get_state_size(cls):
         return 15
@@ -33,16 +37,17 @@ class AttitudeInnerLoopSimulator(simulator.Simulator):
     # instead of hardcoding them
     # (also in the parameters_to_string method)
     def __init__(self, initial_time=0.0,
-            initial_state=None,
+            initial_state=np.concatenate([np.zeros(3+3),np.reshape(np.identity(3),9)]),
             initial_control=None,
             mass=1.442,
             neutral_throttle=1484,
             acro_rpp=4.5,
-            gain_inner_loop = 1.0
+            gain_inner_loop = 1.0,
+            integrator=integrators_database.database["Default"]()
             ):
             
         simulator.Simulator.__init__(self, initial_time, initial_state,
-            initial_control)
+            initial_control, integrator)
         self.mass = mass
         self.neutral_throttle = neutral_throttle
         self.acro_rpp = acro_rpp
@@ -55,14 +60,13 @@ class AttitudeInnerLoopSimulator(simulator.Simulator):
         
         
     def get_attitude(self):
-        return uts.euler_deg_from_rot(np.reshape(self.state, (3,3)))
+        return uts.euler_deg_from_rot(np.reshape(self.state[6:15], (3,3)))
         
         
     def set_control(self, command):
-        throttle, ang_vel = simulator.acro_mode_command_to_throttle_and_angular_velocity(
-            command, self.mass, self.throttle_gain, self.acro_rpp)
-        self.control[0] = throttle
-        self.control[1:4] = ang_vel
+        # rc command in stabilize mode: the 3D force depends on the current yaw,
+        # so it is computed in the vector field
+        self.control[:] = command
         
         
     def vector_field(self, time, state, control):
@@ -72,15 +76,14 @@ class AttitudeInnerLoopSimulator(simulator.Simulator):
         #TODO make sure that this is a rotation matrix
         # for example, convert to euler angles and back
         rotation = np.reshape(state[6:15], (3,3))
-        # Not sure about this... check with Pedro
-        current_psi = uts.GetEulerAnglesDeg(rotation)[2]
+        # current yaw (rad), as in uts.euler_rad_from_rot
+        current_psi = np.arctan2(np.clip(rotation[1,0],-1,1),np.clip(rotation[0,0],-1,1))
         unit_vector   = rotation.dot(uts.E3_VERSOR)
-        throttle = control[0]
 
         force_3d, yaw_rate = simulator.stabilize_mode_command_to_thrust_and_yaw_rate(
             control,
             current_psi,
-            self.MASS,
+            self.mass,
             self.THROTTLE_NEUTRAL,
             self.MAX_PSI_SPEED_RAD,
             self.MAX_ANGLE_RAD
@@ -0,0 +1,77 @@
+"""This module implements the simulator of N quads
+with attitude inner loop (see AttitudeInnerLoopSimulator).
+"""
+
+
+import numpy as np
+
+import utilities.utility_functions as uts
+from simulators import simulator
+from simulators import batch_simulator
+from simulators.integrators import integrators_database
+
+
+
+class BatchAttitudeInnerLoopSimulator(batch_simulator.BatchSimulator):
+
+
+    @classmethod
+    def description(cls):
+        return "N Iris+ simulated with attitude inner loop"
+
+
+    def __init__(self,
+            number_of_vehicles = 1,
+            initial_time       = 0.0,
+            initial_positions  = None,
+            mass               = 1.442,
+            gain_inner_loop    = 1.0,
+            integrator         = integrators_database.database["Default"]()
+            ):
+
+        batch_simulator.BatchSimulator.__init__(self,
+            number_of_vehicles,
+            initial_time,
+            initial_positions,
+            integrator
+            )
+
+        self.mass = mass
+        self.gain_inner_loop = gain_inner_loop
+
+
+    def vector_field(self, time, states, commands):
+
+        rotations = np.reshape(states[:,6:15], (len(states),3,3))
+        # current yaw of each vehicle
+        current_psi  = np.arctan2(np.clip(rotations[:,1,0],-1,1),np.clip(rotations[:,0,0],-1,1))
+        # third column: rotation.dot(e3)
+        unit_vectors = rotations[:,:,2]
+
+        # the rc commands are in stabilize mode
+        forces_3d, yaw_rates = simulator.stabilize_mode_commands_to_thrusts_and_yaw_rates(
+            commands,
+            current_psi,
+            self.mass,
+            self.THROTTLE_NEUTRAL,
+            self.MAX_PSI_SPEED_RAD,
+            self.MAX_ANGLE_RAD
+            )
+
+        throttles = np.sum(forces_3d*unit_vectors, axis=1)
+
+        # gain of inner loop for attitude control
+        ktt              = self.gain_inner_loop
+        unit_vectors_des = forces_3d/np.linalg.norm(forces_3d, axis=1)[:,np.newaxis]
+        # skew(unit_vector).dot(unit_vector_des)
+        omegas           = ktt*np.cross(unit_vectors, unit_vectors_des)
+
+        derivative = np.zeros(states.shape)
+        # dot_p
+        derivative[:,0:3] = states[:,3:6]
+        # dot_v
+        derivative[:,3:6] = throttles[:,np.newaxis]/self.mass*unit_vectors - uts.GRAVITY*uts.E3_VERSOR
+        # dot_r = rotation.dot(skew(omega))
+        derivative[:,6:15] = np.reshape(np.matmul(rotations, uts.skew_batch(omegas)), (len(states),9))
+
+        return derivative
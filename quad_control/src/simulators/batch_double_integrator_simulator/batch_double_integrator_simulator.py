@@ -0,0 +1,60 @@
+"""This module implements the simulator of N quads
+as 3D double integrators (see DoubleIntegratorSimulator).
+"""
+
+
+import numpy as np
+
+import utilities.utility_functions as uts
+from simulators import simulator
+from simulators import batch_simulator
+from simulators.integrators import integrators_database
+
+
+
+class BatchDoubleIntegratorSimulator(batch_simulator.BatchSimulator):
+
+
+    @classmethod
+    def description(cls):
+        return "N Iris+ simulated as 3D double integrators"
+
+
+    def __init__(self,
+            number_of_vehicles = 1,
+            initial_time       = 0.0,
+            initial_positions  = None,
+            mass               = 1.442,
+            integrator         = integrators_database.database["Default"]()
+            ):
+
+        batch_simulator.BatchSimulator.__init__(self,
+            number_of_vehicles,
+            initial_time,
+            initial_positions,
+            integrator
+            )
+
+        self.mass = mass
+
+
+    def vector_field(self, time, states, commands):
+
+        # psi is always zero, as in DoubleIntegratorSimulator
+        forces_3d, yaw_rates = simulator.stabilize_mode_commands_to_thrusts_and_yaw_rates(
+            commands,
+            0.0,
+            self.mass,
+            self.THROTTLE_NEUTRAL,
+            self.MAX_PSI_SPEED_RAD,
+            self.MAX_ANGLE_RAD
+            )
+
+        derivative = np.zeros(states.shape)
+        # dot_p
+        derivative[:,0:3] = states[:,3:6]
+        # dot_v
+        derivative[:,3:6] = forces_3d/self.mass - uts.GRAVITY*uts.E3_VERSOR
+        # dot_r is zero
+
+        return derivative
@@ -0,0 +1,63 @@
+"""This module implements the simulator of N quads
+with no attitude inner loop (see NoAttitudeInnerLoopSimulator).
+"""
+
+
+import numpy as np
+
+import utilities.utility_functions as uts
+from simulators import simulator
+from simulators import batch_simulator
+from simulators.integrators import integrators_database
+
+
+
+class BatchNoAttitudeInnerLoopSimulator(batch_simulator.BatchSimulator):
+
+
+    @classmethod
+    def description(cls):
+        return "N Iris+ simulated without attitude inner loop"
+
+
+    def __init__(self,
+            number_of_vehicles = 1,
+            initial_time       = 0.0,
+            initial_positions  = None,
+            mass               = 1.442,
+            neutral_throttle   = 1484,
+            acro_rpp           = 4.5,
+            integrator         = integrators_database.database["Default"]()
+            ):
+
+        batch_simulator.BatchSimulator.__init__(self,
+            number_of_vehicles,
+            initial_time,
+            initial_positions,
+            integrator
+            )
+
+        self.mass = mass
+        self.neutral_throttle = neutral_throttle
+        self.acro_rpp = acro_rpp
+        self.throttle_gain = mass*uts.GRAVITY/neutral_throttle
+
+
+    def vector_field(self, time, states, commands):
+
+        throttles, omegas = simulator.acro_mode_commands_to_throttles_and_angular_velocities(
+            commands, self.mass, self.throttle_gain, self.acro_rpp)
+
+        rotations = np.reshape(states[:,6:15], (len(states),3,3))
+        # third column: rotation.dot(e3)
+        versors   = rotations[:,:,2]
+
+        derivative = np.zeros(states.shape)
+        # dot_p
+        derivative[:,0:3] = states[:,3:6]
+        # dot_v
+        derivative[:,3:6] = throttles[:,np.newaxis]/self.mass*versors - uts.GRAVITY*uts.E3_VERSOR
+        # dot_r = rotation.dot(skew(omega))
+        derivative[:,6:15] = np.reshape(np.matmul(rotations, uts.skew_batch(omegas)), (len(states),9))
+
+        return derivative
@@ -0,0 +1,177 @@
+"""This file implements the parent class for a simulator of N quadrotors.
+
+The state of all vehicles is one (N,15) array: the state of vehicle i
+is state[i], with position, velocity and rotation matrix as in Simulator.
+The rc commands of all vehicles are one (N,4) array.
+The vector field of a child class computes the derivatives of all vehicles
+at once (with numpy operations over the first axis), and one integrator
+(see integrators/integrators.py) moves all of them.
+"""
+
+
+import numpy as np
+from utilities import jsonable as js
+from utilities import utility_functions
+from utilities import trajectory_recorder
+
+from simulators import simulator
+from simulators.integrators import integrators_database
+
+
+
+class BatchSimulator(js.Jsonable):
+
+    inner = {'integrator': integrators_database.database}
+
+    # parameters of the vehicles (the same as for one vehicle)
+    MASS              = simulator.Simulator.MASS
+    THROTTLE_NEUTRAL  = simulator.Simulator.THROTTLE_NEUTRAL
+    MAX_ANGLE_RAD     = simulator.Simulator.MAX_ANGLE_RAD
+    MAX_PSI_SPEED_RAD = simulator.Simulator.MAX_PSI_SPEED_RAD
+    RECORD_CAPACITY   = simulator.Simulator.RECORD_CAPACITY
+
+    # position, velocity and rotation matrix
+    STATE_SIZE   = 3+3+9
+    STATE_LAYOUT = simulator.ROTATION_MATRIX_LAYOUT
+    # rc command
+    COMMAND_SIZE = 4
+
+
+    @classmethod
+    def description(cls):
+        return "Abstract Batch Simulator"
+
+
+    def __init__(self,
+            number_of_vehicles = 1,
+            initial_time       = 0.0,
+            initial_positions  = None,
+            integrator         = None
+            ):
+        """initial_positions: list of the initial positions of the vehicles
+        (by default, the vehicles are 1 m apart along x)"""
+
+        self.number_of_vehicles = number_of_vehicles
+
+        if initial_positions is None:
+            initial_positions = [[float(index), 0.0, 0.0] for index in range(number_of_vehicles)]
+        assert len(initial_positions) == number_of_vehicles
+
+        self.initial_state = self.initial_states(initial_positions)
+
+        self.time  = initial_time
+        self.state = np.array(self.initial_state)
+
+        # written by the subscribers, one row per vehicle
+        self.commands = np.zeros((number_of_vehicles, self.COMMAND_SIZE))
+        # commands used in the current integration step
+        self.step_commands = np.array(self.commands)
+        # vehicles that are not running keep their state
+        self.running = np.ones(number_of_vehicles, dtype=bool)
+
+        if integrator is None:
+            integrator = integrators_database.database["Default"]()
+        integrator.set_layout(self.STATE_LAYOUT)
+        self.integrator = integrator
+
+        # (time, states, commands) before every step
+        self.recorder = trajectory_recorder.TrajectoryRecorder(
+            (number_of_vehicles, self.STATE_SIZE), (number_of_vehicles, self.COMMAND_SIZE), self.RECORD_CAPACITY)
+
+
+    def __str__(self):
+        string = self.description()
+        string += "\nTime: " + str(self.time)
+        string += "\nVehicles: " + str(self.number_of_vehicles)
+        return string
+
+
+    def initial_states(self, initial_positions):
+        """(N,STATE_SIZE) initial states, from the initial positions
+        (children with a different state redefine this)"""
+        states = np.zeros((self.number_of_vehicles, self.STATE_SIZE))
+        states[:,0:3] = initial_positions
+        # rotation matrices: identity
+        states[:,6:15] = np.reshape(np.identity(3), 9)
+        return states
+
+
+    def get_time(self):
+        return self.time
+
+
+    def get_state(self):
+        return np.array(self.state)
+
+
+    def get_positions(self):
+        return self.state[:,0:3]
+
+
+    def get_velocities(self):
+        return self.state[:,3:6]
+
+
+    def get_rotations(self):
+        return np.reshape(self.state[:,6:15], (self.number_of_vehicles,3,3))
+
+
+    def get_attitudes(self):
+        """Euler angles (deg) of all vehicles, (N,3)"""
+        return utility_functions.euler_deg_from_rot_batch(self.get_rotations())
+
+
+    def set_command(self, index, command):
+        """Rc command of vehicle index (used from the next integration step)"""
+        self.commands[index,:] = command
+
+
+    def set_commands(self, commands):
+        """Rc commands of all vehicles, (N,4)"""
+        self.commands[:,:] = commands
+
+
+    def reset(self, initial_time=0.0, initial_state=None):
+        if initial_state is None:
+            initial_state = self.initial_state
+        self.time  = initial_time
+        self.state = np.array(initial_state)
+        # time starts again
+        self.recorder.clear()
+
+
+    def reset_vehicle(self, index):
+        """Vehicle index goes back to its initial state"""
+        self.state[index,:] = self.initial_state[index,:]
+
+
+    def vector_field(self, time, states, commands):
+        """Derivatives of the (N,15) states, when the (N,4) rc commands are applied"""
+        raise NotImplementedError()
+
+
+    def project(self, states):
+        """States back onto their manifold after a step, as Simulator.project"""
+        return states
+
+
+    def step_vector_field(self, time, states):
+        """Vector field with the commands of the current step:
+        the vehicles that are not running do not move"""
+        derivative = self.vector_field(time, states, self.step_commands)
+        derivative[~self.running] = 0.0
+        return derivative
+
+
+    def run(self, time_step, running=None):
+        """Integrate all vehicles for time_step.
+        running: (N,) booleans, the vehicles that move (by default, all of them)"""
+        if running is None:
+            self.running[:] = True
+        else:
+            self.running[:] = running
+        # commands are constant during the step
+        self.step_commands[:,:] = self.commands
+        self.recorder.append(self.time, self.state, self.step_commands)
+        self.state = self.project(self.integrator.integrate(self.step_vector_field, self.time, self.state, time_step))
+        self.time += time_step
@@ -0,0 +1,25 @@
+
+# simulators of N quads in one state array (see batch_simulator.py)
+
+from utilities.lazy_registry import LazyDatabase
+
+batch_simulators_dictionary = LazyDatabase('batch simulators')
+
+batch_simulators_dictionary.register("BatchDoubleIntegratorSimulator", "simulators.batch_double_integrator_simulator.batch_double_integrator_simulator:BatchDoubleIntegratorSimulator")
+
+batch_simulators_dictionary.register("BatchNoAttitudeInnerLoopSimulator", "simulators.batch_no_attitude_inner_loop_simulator.batch_no_attitude_inner_loop_simulator:BatchNoAttitudeInnerLoopSimulator")
+
+batch_simulators_dictionary.register("BatchAttitudeInnerLoopSimulator", "simulators.batch_attitude_inner_loop_simulator.batch_attitude_inner_loop_simulator:BatchAttitudeInnerLoopSimulator")
+
+batch_simulators_dictionary.register("BatchLoadTransportSimulator", "simulators.load_transport_simulator.load_transport_simulator:BatchLoadTransportSimulator")
+
+batch_simulators_dictionary.alias("Default", "BatchDoubleIntegratorSimulator")
+
+# batch simulator of the vehicles of a simulator of simulators_dictionary.py
+# (the name that the GUI gives to ServiceChangeSimulator)
+batch_simulator_of = {
+    "DoubleIntegratorSimulator"    : "BatchDoubleIntegratorSimulator",
+    "NoAttitudeInnerLoopSimulator" : "BatchNoAttitudeInnerLoopSimulator",
+    "AttitudeInnerLoopSimulator"   : "BatchAttitudeInnerLoopSimulator",
+    "LoadTransportSimulator"       : "BatchLoadTransportSimulator",
+    }
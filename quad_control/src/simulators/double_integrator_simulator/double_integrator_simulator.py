@@ -8,6 +8,7 @@ import numpy as np
 
 import utilities.utility_functions as uts
 from simulators import simulator
+from simulators.integrators import integrators_database
 import rospy
 
 
@@ -19,6 +20,9 @@ class DoubleIntegratorSimulator(simulator.Simulator):
     def description(cls):
         return "Iris+ simulator as 3D double integrator"
 
+    # position, velocity and rotation matrix
+    STATE_LAYOUT = simulator.ROTATION_MATRIX_LAYOUT
+
     @classmethod
     def get_state_size(cls):
         return 3+3+9
@@ -37,13 +41,15 @@ class DoubleIntegratorSimulator(simulator.Simulator):
             initial_control  = None,
             mass             = 1.442,
             neutral_throttle = 1484,
-            acro_rpp         = 4.5
+            acro_rpp         = 4.5,
+            integrator       = integrators_database.database["Default"]()
             ):
             
         simulator.Simulator.__init__(self,
             initial_time,
             initial_state,
-            initial_control
+            initial_control,
+            integrator
             )
             
         self.mass = mass
@@ -77,14 +83,17 @@ class DoubleIntegratorSimulator(simulator.Simulator):
     # def vector_field(self, time, state, control1, control2, control3, control4):
     def vector_field(self, time, state, control):        
         
-        position = np.array(state[0:3])
-        velocity = np.array(state[3:6])
+        # called several times per step by the integrator: one array, written in place
+        derivative = np.zeros(3+3+9)
 
         force_3d = control[0:3]
         # force_3d = np.array([control1, control2, control3])
         # rospy.logwarn(force_3d)
 
-        dot_p = np.array(velocity)
-        dot_v = force_3d/self.mass - uts.GRAVITY*uts.E3_VERSOR
+        # dot_p
+        derivative[0:3] = state[3:6]
+        # dot_v = force_3d/self.mass - uts.GRAVITY*uts.E3_VERSOR
+        np.divide(force_3d, self.mass, out=derivative[3:6])
+        derivative[5] -= uts.GRAVITY
         
-        return np.concatenate([dot_p, dot_v,np.zeros(9)])
+        return derivative
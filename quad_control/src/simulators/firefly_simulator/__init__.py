@@ -0,0 +1,3 @@
+"""This module implements the simulator of the Firefly hexacopter
+(the vehicle of RotorS), driven by motor speeds.
+"""
@@ -0,0 +1,156 @@
+"""This module implements the rigid body simulator of the Firefly,
+with six rotors, driven by motor speeds (as the Firefly of RotorS).
+
+The thrust and the moments come from the squared motor speeds, with the
+same parameters that RotorSConverter uses to compute the motor speeds
+(converters/firefly_parameters.py): [torque, thrust] = K A n^2, so that
+the motor speeds of RotorSConverter.rotor_s_standard_converter produce
+the torque and thrust it asked for.
+
+State: position (3), velocity (3), rotation matrix (9, by rows),
+angular velocity in the body frame (3) and motor speeds (6, rad/s).
+Control: commanded motor speeds (6, rad/s). With a motor time constant,
+the motor speeds follow the commanded ones as a first order system;
+with 0, they are the commanded ones.
+
+With ground, the vehicle cannot go below z = 0 (as in Gazebo, where it
+starts on the ground): there, it stops falling, and it rests level.
+"""
+
+
+import numpy as np
+import utilities.utility_functions as uts
+from simulators import simulator
+from simulators.integrators import integrators_database
+
+from converters import firefly_parameters
+
+
+# from squared motor speeds to [torque (body frame), thrust]
+MATRIX_TORQUE_THRUST = np.dot(firefly_parameters.K, firefly_parameters.A)
+
+INERTIA = firefly_parameters.J
+INERTIA_INVERSE = np.linalg.inv(firefly_parameters.J)
+
+# maximum rotor velocity (rad/s) of the Firefly of RotorS
+MAX_MOTOR_SPEED = 838.0
+
+POSITION         = slice(0, 3)
+VELOCITY         = slice(3, 6)
+ROTATION         = slice(6, 15)
+ANGULAR_VELOCITY = slice(15, 18)
+MOTOR_SPEEDS     = slice(18, 24)
+
+
+class FireflySimulator(simulator.Simulator):
+
+
+    @classmethod
+    def description(cls):
+        return "Firefly (RotorS) rigid body simulator, driven by motor speeds"
+
+
+    # position, velocity and rotation matrix
+    STATE_LAYOUT = simulator.ROTATION_MATRIX_LAYOUT
+
+    @classmethod
+    def get_state_size(cls):
+        return 3+3+9+3+6
+
+
+    @classmethod
+    def get_control_size(cls):
+        return 6
+
+
+    def __init__(self, initial_time=0.0,
+            initial_position=np.zeros(3),
+            initial_velocity=np.zeros(3),
+            initial_rotation=np.zeros(3),
+            mass=firefly_parameters.kDefaultMass,
+            motor_time_constant=0.0,
+            max_motor_speed=MAX_MOTOR_SPEED,
+            ground=True,
+            integrator=integrators_database.database["Default"]()
+            ):
+
+        rot = np.reshape(uts.rot_from_euler_deg(np.array(initial_rotation, dtype=float)), 9)
+        initial_state = np.concatenate([initial_position, initial_velocity, rot, np.zeros(3+6)])
+        simulator.Simulator.__init__(self, initial_time, initial_state, np.zeros(6), integrator)
+        self.mass = mass
+        self.motor_time_constant = motor_time_constant
+        self.max_motor_speed = max_motor_speed
+        self.ground = ground
+
+
+    def get_position(self):
+        return self.state[POSITION]
+
+
+    def get_velocity(self):
+        return self.state[VELOCITY]
+
+
+    def get_angular_velocity(self):
+        """Angular velocity (rad/s) in the body frame"""
+        return self.state[ANGULAR_VELOCITY]
+
+
+    def get_motor_speeds(self):
+        return self.state[MOTOR_SPEEDS]
+
+
+    def get_attitude(self):
+        return uts.euler_deg_from_rot(self.get_rotation_matrix())
+
+
+    def set_control(self, command):
+        # motor speeds (rad/s): RotorS bounds them in the same way
+        self.control[:] = np.clip(command, 0.0, self.max_motor_speed)
+        if self.motor_time_constant <= 0.0:
+            # no motor lag: motors are at the commanded speed right away
+            self.state[MOTOR_SPEEDS] = self.control
+
+
+    def project(self, state):
+        if self.ground and state[2] < 0.0:
+            # on the ground: no falling through it, and no tilting
+            state[2] = 0.0
+            state[VELOCITY] = np.maximum(state[VELOCITY]*[0.0, 0.0, 1.0], 0.0)
+            rotation = np.reshape(state[ROTATION], (3,3))
+            psi = np.arctan2(rotation[1,0], rotation[0,0])
+            state[ROTATION] = np.reshape(uts.rot_z(psi), 9)
+            state[ANGULAR_VELOCITY] = 0.0
+        return state
+
+
+    def thrust_and_torque(self, motor_speeds):
+        """Thrust (N) and torque (body frame, N m) of the rotors"""
+        torque_thrust = np.dot(MATRIX_TORQUE_THRUST, motor_speeds*motor_speeds)
+        return torque_thrust[3], torque_thrust[0:3]
+
+
+    def vector_field(self, time, state, control):
+
+        rotation     = np.reshape(state[ROTATION], (3,3))
+        omega        = state[ANGULAR_VELOCITY]
+        motor_speeds = state[MOTOR_SPEEDS]
+
+        thrust, torque = self.thrust_and_torque(motor_speeds)
+
+        derivative = np.zeros(self.get_state_size())
+        # dot_p
+        derivative[POSITION] = state[VELOCITY]
+        # dot_v
+        derivative[VELOCITY] = thrust/self.mass*rotation[:,2]
+        derivative[5]       -= uts.GRAVITY
+        # dot_r
+        derivative[ROTATION] = np.reshape(rotation.dot(uts.skew(omega)), 9)
+        # dot_omega: J dot_omega = torque - omega x J omega
+        derivative[ANGULAR_VELOCITY] = np.dot(INERTIA_INVERSE,
+            torque - np.dot(uts.skew(omega), np.dot(INERTIA, omega)))
+        # dot_n: first order motor lag
+        if self.motor_time_constant > 0.0:
+            derivative[MOTOR_SPEEDS] = (control - motor_speeds)/self.motor_time_constant
+
+        return derivative
@@ -0,0 +1,181 @@
+"""This module implements the integrators used by the simulators.
+
+An integrator moves a state forward in time:
+    state = integrator.integrate(vector_field, time, state, time_step)
+where vector_field(time, state) returns the derivative of state.
+
+The fixed-step integrators do sub_steps steps of time_step/sub_steps.
+The state is an array of one vehicle (size,) or of N vehicles (N,size);
+the vector field must accept the same shape. RK4 and dopri5 work for any
+state. The semi-implicit Euler and the geometric integrators need to know
+where some parts of the state are: every simulator declares its layout
+(STATE_LAYOUT, a dictionary from the names of the parts to slices, e.g.
+simulator.ROTATION_MATRIX_LAYOUT), and gives it to its integrator with set_layout,
+that raises ValueError if a part the integrator needs is not in it:
+    semi-implicit Euler: 'position' and 'velocity'
+    geometric:           'position', 'velocity' and 'rotation' (a rotation matrix)
+"""
+
+
+import numpy as np
+import scipy.integrate as spi
+
+from utilities import jsonable as js
+
+
+def _skew(vectors):
+    """Skew matrices of vectors with shape (...,3)"""
+    out = np.zeros(vectors.shape + (3,))
+    out[...,0,1] = -vectors[...,2]
+    out[...,0,2] =  vectors[...,1]
+    out[...,1,0] =  vectors[...,2]
+    out[...,1,2] = -vectors[...,0]
+    out[...,2,0] = -vectors[...,1]
+    out[...,2,1] =  vectors[...,0]
+    return out
+
+
+def _exp_so3(rotation_vectors):
+    """Rotation matrices exp(skew(w)) of vectors w with shape (...,3) (Rodrigues formula)"""
+    theta  = np.sqrt(np.sum(rotation_vectors**2, axis=-1))[...,np.newaxis,np.newaxis]
+    K      = _skew(rotation_vectors)
+    K2     = np.matmul(K, K)
+    small  = theta < 1e-6
+    # sin(theta)/theta and (1 - cos(theta))/theta^2, with their series for small angles
+    safe   = np.where(small, 1.0, theta)
+    a      = np.where(small, 1.0 - theta**2/6.0, np.sin(safe)/safe)
+    b      = np.where(small, 0.5 - theta**2/24.0, (1.0 - np.cos(safe))/safe**2)
+    return np.identity(3) + a*K + b*K2
+
+
+class Integrator(js.Jsonable):
+
+    @classmethod
+    def description(cls):
+        return "Abstract Integrator"
+
+
+    # parts of the state layout that step uses (see set_layout)
+    LAYOUT_PARTS = ()
+
+
+    def __init__(self, sub_steps = 1):
+        # number of steps in each call of integrate
+        self.sub_steps = sub_steps
+        # parts of the state, given by the simulator
+        self.layout = {}
+
+
+    def set_layout(self, layout):
+        """Layout of the state of the simulator (see STATE_LAYOUT)"""
+        for part in self.LAYOUT_PARTS:
+            if part not in layout:
+                raise ValueError(self.__class__.__name__ + ' needs the ' + part + ' in the state, which has ' +
+                    str(sorted(layout.keys())) + ': use RK4Integrator or Dopri5Integrator')
+        self.layout = layout
+
+
+    def step(self, vector_field, time, state, time_step):
+        raise NotImplementedError()
+
+
+    def integrate(self, vector_field, time, state, time_step):
+        step = time_step/self.sub_steps
+        for index in range(self.sub_steps):
+            state = self.step(vector_field, time + index*step, state, step)
+        return state
+
+
+class RK4Integrator(Integrator):
+
+    @classmethod
+    def description(cls):
+        return "Runge-Kutta of order 4, with fixed step"
+
+
+    def step(self, vector_field, time, state, time_step):
+        k1 = vector_field(time, state)
+        k2 = vector_field(time + 0.5*time_step, state + 0.5*time_step*k1)
+        k3 = vector_field(time + 0.5*time_step, state + 0.5*time_step*k2)
+        k4 = vector_field(time + time_step, state + time_step*k3)
+        return state + time_step/6.0*(k1 + 2.0*k2 + 2.0*k3 + k4)
+
+
+class SemiImplicitEulerIntegrator(Integrator):
+
+    LAYOUT_PARTS = ('position', 'velocity')
+
+    @classmethod
+    def description(cls):
+        return """Semi-implicit (symplectic) Euler, with fixed step:
+            the velocity is updated first, and the new velocity moves the position.
+            One evaluation of the vector field per step."""
+
+
+    def step(self, vector_field, time, state, time_step):
+        position = self.layout['position']
+        velocity = self.layout['velocity']
+        derivative = vector_field(time, state)
+        new_state  = state + time_step*derivative
+        new_state[...,position] = state[...,position] + time_step*new_state[...,velocity]
+        return new_state
+
+
+class GeometricIntegrator(Integrator):
+
+    LAYOUT_PARTS = ('position', 'velocity', 'rotation')
+
+    @classmethod
+    def description(cls):
+        return """Lie-Euler integrator, with fixed step: semi-implicit Euler for position and velocity,
+            and the rotation matrix is multiplied by the exponential of the angular velocity,
+            so that it stays a rotation matrix (no drift)."""
+
+
+    def step(self, vector_field, time, state, time_step):
+        position = self.layout['position']
+        velocity = self.layout['velocity']
+        rotation_part = self.layout['rotation']
+        derivative = vector_field(time, state)
+        new_state  = state + time_step*derivative
+        new_state[...,position] = state[...,position] + time_step*new_state[...,velocity]
+
+        shape    = state.shape[:-1] + (3,3)
+        rotation = np.reshape(state[...,rotation_part], shape)
+        # dot_r = rotation.dot(skew(omega)): omega in the body frame
+        omega_skew = np.matmul(np.swapaxes(rotation, -1, -2), np.reshape(derivative[...,rotation_part], shape))
+        omega      = np.stack([omega_skew[...,2,1], omega_skew[...,0,2], omega_skew[...,1,0]], axis=-1)
+        new_rotation = np.matmul(rotation, _exp_so3(time_step*omega))
+        new_state[...,rotation_part] = np.reshape(new_rotation, state.shape[:-1] + (9,))
+        return new_state
+
+
+class Dopri5Integrator(Integrator):
+
+    @classmethod
+    def description(cls):
+        return """Adaptive Dormand-Prince (scipy ode dopri5),
+            restarted on every call (the integrator of the simulators until now)"""
+
+
+    def __init__(self, sub_steps = 1, rtol = 1e-6, atol = 1e-12):
+        # tolerances: the defaults of scipy
+        Integrator.__init__(self, sub_steps)
+        self.rtol = rtol
+        self.atol = atol
+        self.vector_field = None
+        self.shape = None
+        # the vector field and the shape are those of the current call
+        def f(t, x):
+            return np.reshape(self.vector_field(t, np.reshape(x, self.shape)), -1)
+        self.solver = spi.ode(f).set_integrator('dopri5', rtol=rtol, atol=atol)
+
+
+    def integrate(self, vector_field, time, state, time_step):
+        self.vector_field = vector_field
+        self.shape = state.shape
+        self.solver.set_initial_value(np.reshape(state, -1), time)
+        step = time_step/self.sub_steps
+        for index in range(self.sub_steps):
+            self.solver.integrate(time + (index + 1)*step)
+        return np.array(np.reshape(self.solver.y, self.shape))
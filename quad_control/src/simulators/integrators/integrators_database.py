@@ -0,0 +1,17 @@
+#!/usr/bin/env python
+# this line is just used to define the type of document
+
+from utilities.lazy_registry import LazyDatabase
+
+database = LazyDatabase('integrators')
+
+database.register("RK4Integrator", "simulators.integrators.integrators:RK4Integrator")
+
+database.register("SemiImplicitEulerIntegrator", "simulators.integrators.integrators:SemiImplicitEulerIntegrator")
+
+database.register("GeometricIntegrator", "simulators.integrators.integrators:GeometricIntegrator")
+
+database.register("Dopri5Integrator", "simulators.integrators.integrators:Dopri5Integrator")
+
+# the ROS parameter is read when "Default" is first used
+database.alias("Default", "RK4Integrator", "SimulatorIntegratorDefault")
@@ -0,0 +1,3 @@
+"""This module implements the simulator of a quad that carries
+a load hanging from a cable (a spherical pendulum).
+"""
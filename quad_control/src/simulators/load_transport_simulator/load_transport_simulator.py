@@ -0,0 +1,269 @@
+"""This module implements the simulator of a quad that carries a load,
+hanging from a cable of fixed length (the system of the single load
+transportation controllers, see
+controllers/single_load_transportation_controllers).
+
+The quad is a point mass (as in DoubleIntegratorSimulator), driven by
+a 3D force U (N); the load is a point mass at the end of the cable.
+With n the direction of the cable (from load to quad) and w its angular
+velocity (perpendicular to n):
+    quad position   pm = pM + L n
+    dot_pM = vM
+    dot_vM = (n.U + m L |w|^2)/(m + M) n - g e3
+    dot_n  = w x n
+    dot_w  = n x U/(m L)
+with m the mass of the quad, M the mass of the load, and L the length
+of the cable (the cable is always taut).
+
+State: load position (3), load velocity (3), n (3), w (3).
+Control: 3D force on the quad (3).
+
+The vector field works on one state (12,) or on a batch of them (N,12):
+BatchLoadTransportSimulator moves N systems at once (see batch_simulator.py),
+e.g. from N initial conditions.
+"""
+
+
+import numpy as np
+import utilities.utility_functions as uts
+from simulators import simulator
+from simulators import batch_simulator
+from simulators.integrators import integrators_database
+
+import rospy
+
+
+LOAD_POSITION    = slice(0, 3)
+LOAD_VELOCITY    = slice(3, 6)
+CABLE_DIRECTION  = slice(6, 9)
+ANGULAR_VELOCITY = slice(9, 12)
+
+
+def cross(a, b):
+    """Cross product over the last axis (faster than np.cross on small arrays)"""
+    out = np.empty(np.broadcast(a, b).shape)
+    out[...,0] = a[...,1]*b[...,2] - a[...,2]*b[...,1]
+    out[...,1] = a[...,2]*b[...,0] - a[...,0]*b[...,2]
+    out[...,2] = a[...,0]*b[...,1] - a[...,1]*b[...,0]
+    return out
+
+
+def load_transport_vector_field(states, forces, quad_mass, load_mass, cable_length):
+    """Derivatives of the states (...,12), with the forces (...,3) on the quads"""
+    m = quad_mass
+    M = load_mass
+    L = cable_length
+
+    n = states[...,CABLE_DIRECTION]
+    w = states[...,ANGULAR_VELOCITY]
+
+    # tension of the cable, over the load mass
+    tension = (np.sum(n*forces, axis=-1) + m*L*np.sum(w*w, axis=-1))/(m + M)
+
+    derivative = np.empty(states.shape)
+    # dot_pM
+    derivative[...,LOAD_POSITION] = states[...,LOAD_VELOCITY]
+    # dot_vM
+    derivative[...,LOAD_VELOCITY] = tension[...,np.newaxis]*n
+    derivative[...,5] -= uts.GRAVITY
+    # dot_n
+    derivative[...,CABLE_DIRECTION] = cross(w, n)
+    # dot_w
+    derivative[...,ANGULAR_VELOCITY] = cross(n, forces)/(m*L)
+
+    return derivative
+
+
+def project_load_transport_states(states):
+    """n back to unit norm, and w back to perpendicular to n
+    (the integrators only keep them approximately); in place"""
+    n = states[...,CABLE_DIRECTION]
+    n /= np.sqrt(np.sum(n*n, axis=-1))[...,np.newaxis]
+    w = states[...,ANGULAR_VELOCITY]
+    w -= np.sum(w*n, axis=-1)[...,np.newaxis]*n
+    return states
+
+
+def controller_states(states, cable_length):
+    """States (...,12) as the load transportation controllers read them:
+    load position, load velocity, quad position, quad velocity (...,12)"""
+    n = states[...,CABLE_DIRECTION]
+    w = states[...,ANGULAR_VELOCITY]
+    out = np.empty(states.shape)
+    out[...,0:6]  = states[...,0:6]
+    out[...,6:9]  = states[...,LOAD_POSITION] + cable_length*n
+    out[...,9:12] = states[...,LOAD_VELOCITY] + cable_length*cross(w, n)
+    return out
+
+
+class LoadTransportSimulator(simulator.Simulator):
+
+
+    @classmethod
+    def description(cls):
+        return "Quad (point mass) carrying a load hanging from a cable"
+
+
+    # the load moves as a point mass (the cable direction is not a rotation matrix)
+    STATE_LAYOUT = {'position': LOAD_POSITION, 'velocity': LOAD_VELOCITY}
+
+    @classmethod
+    def get_state_size(cls):
+        return 3+3+3+3
+
+
+    @classmethod
+    def get_control_size(cls):
+        return 3
+
+
+    # same parameters as SingleLoadTransportController
+    def __init__(self, initial_time = 0.0,
+            initial_state    = np.array([0.0,0.0,0.0, 0.0,0.0,0.0, 0.0,0.0,1.0, 0.0,0.0,0.0]),
+            initial_control  = None,
+            load_mass        = rospy.get_param("load_mass",0.1),
+            quad_mass        = rospy.get_param("quadrotor_mass",1.442),
+            cable_length     = rospy.get_param("cable_length",0.6),
+            integrator       = integrators_database.database["Default"]()
+            ):
+
+        if initial_control is None:
+            # hovering
+            initial_control = (quad_mass + load_mass)*uts.GRAVITY*uts.E3_VERSOR
+
+        simulator.Simulator.__init__(self,
+            initial_time,
+            initial_state,
+            initial_control,
+            integrator
+            )
+
+        self.load_mass    = load_mass
+        self.quad_mass    = quad_mass
+        self.cable_length = cable_length
+
+
+    def get_position(self):
+        """Position of the quad"""
+        return self.state[LOAD_POSITION] + self.cable_length*self.state[CABLE_DIRECTION]
+
+
+    def get_load_position(self):
+        return self.state[LOAD_POSITION]
+
+
+    def get_cable_direction(self):
+        """Unit vector from the load to the quad"""
+        return self.state[CABLE_DIRECTION]
+
+
+    def get_controller_state(self):
+        """Load position, load velocity, quad position, quad velocity"""
+        return controller_states(self.state, self.cable_length)
+
+
+    def get_rotation_matrix(self):
+        # the quad is a point mass: it has no attitude
+        return np.identity(3)
+
+
+    def get_attitude(self):
+        return np.zeros(3)
+
+
+    def set_control(self, command):
+        """command: 3D force on the quad (N)"""
+        self.control[:] = command[0:3]
+
+
+    def project(self, state):
+        return project_load_transport_states(state)
+
+
+    def vector_field(self, time, state, control):
+        return load_transport_vector_field(state, control,
+            self.quad_mass, self.load_mass, self.cable_length)
+
+
+
+class BatchLoadTransportSimulator(batch_simulator.BatchSimulator):
+
+    # load position, load velocity, cable direction and angular velocity
+    STATE_SIZE   = 3+3+3+3
+    STATE_LAYOUT = LoadTransportSimulator.STATE_LAYOUT
+    # 3D force on the quad
+    COMMAND_SIZE = 3
+
+
+    @classmethod
+    def description(cls):
+        return "N quads (point masses), each carrying a load hanging from a cable"
+
+
+    def __init__(self,
+            number_of_vehicles = 1,
+            initial_time       = 0.0,
+            initial_positions  = None,
+            initial_directions = None,
+            load_mass          = rospy.get_param("load_mass",0.1),
+            quad_mass          = rospy.get_param("quadrotor_mass",1.442),
+            cable_length       = rospy.get_param("cable_length",0.6),
+            integrator         = integrators_database.database["Default"]()
+            ):
+        """initial_positions: list of the initial positions of the loads
+        initial_directions: list of the initial directions of the cables
+        (by default, every quad is right above its load)"""
+
+        self.load_mass    = load_mass
+        self.quad_mass    = quad_mass
+        self.cable_length = cable_length
+        self.initial_directions = initial_directions
+
+        batch_simulator.BatchSimulator.__init__(self,
+            number_of_vehicles,
+            initial_time,
+            initial_positions,
+            integrator
+            )
+
+        # hovering
+        self.commands[:,2] = (quad_mass + load_mass)*uts.GRAVITY
+
+
+    def initial_states(self, initial_positions):
+        states = np.zeros((self.number_of_vehicles, self.STATE_SIZE))
+        states[:,LOAD_POSITION] = initial_positions
+        if self.initial_directions is None:
+            states[:,CABLE_DIRECTION] = uts.E3_VERSOR
+        else:
+            assert len(self.initial_directions) == self.number_of_vehicles
+            states[:,CABLE_DIRECTION] = self.initial_directions
+        return project_load_transport_states(states)
+
+
+    def get_positions(self):
+        """Positions of the quads, (N,3)"""
+        return self.state[:,LOAD_POSITION] + self.cable_length*self.state[:,CABLE_DIRECTION]
+
+
+    def get_load_positions(self):
+        return self.state[:,LOAD_POSITION]
+
+
+    def get_controller_states(self):
+        """Load position, load velocity, quad position, quad velocity, (N,12)"""
+        return controller_states(self.state, self.cable_length)
+
+
+    def get_rotations(self):
+        # the quads are point masses: they have no attitude
+        return np.tile(np.identity(3), (self.number_of_vehicles,1,1))
+
+
+    def project(self, states):
+        return project_load_transport_states(states)
+
+
+    def vector_field(self, time, states, commands):
+        return load_transport_vector_field(states, commands,
+            self.quad_mass, self.load_mass, self.cable_length)
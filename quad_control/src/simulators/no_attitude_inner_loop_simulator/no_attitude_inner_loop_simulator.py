@@ -8,6 +8,7 @@ with no attitude inner loop.
 import numpy as np
 import utilities.utility_functions as uts
 from simulators import simulator as sm
+from simulators.integrators import integrators_database
 import rospy
 
 
@@ -19,6 +20,9 @@ class NoAttitudeInnerLoopSimulator(sm.Simulator):
         return "Iris+ simulator without attitude inner loop"
 
     
+    # position, velocity and rotation matrix
+    STATE_LAYOUT = sm.ROTATION_MATRIX_LAYOUT
+
     @classmethod
     def get_state_size(cls):
         return 15
@@ -39,14 +43,15 @@ class NoAttitudeInnerLoopSimulator(sm.Simulator):
             initial_control=np.zeros(4),
             mass=1.442,
             neutral_throttle=1484,
-            acro_rpp=4.5
+            acro_rpp=4.5,
+            integrator=integrators_database.database["Default"]()
             ):
         
         pos = initial_position
         vel = initial_velocity
         rot = np.reshape(uts.rot_from_euler_deg(np.array(initial_rotation)), 9)
         initial_state = np.concatenate([pos, vel, rot])
-        sm.Simulator.__init__(self, initial_time, initial_state, initial_control)
+        sm.Simulator.__init__(self, initial_time, initial_state, initial_control, integrator)
         self.mass = mass
         self.neutral_throttle = neutral_throttle
         self.acro_rpp = acro_rpp
@@ -82,7 +87,6 @@ class NoAttitudeInnerLoopSimulator(sm.Simulator):
         
         dot_p = np.array(velocity)
         dot_v = throttle/self.mass*versor - uts.GRAVITY*uts.E3_VERSOR
-        rospy.logwarn(dot_v)
         dot_r = rotation.dot(uts.skew(omega))
         
         return np.concatenate([dot_p, dot_v, np.reshape(dot_r, 9)])
@@ -0,0 +1,81 @@
+"""This module implements the simulator of the quad
+with attitude inner loop (see AttitudeInnerLoopSimulator),
+with a quaternion for the attitude.
+"""
+
+
+import numpy as np
+import utilities.utility_functions as uts
+from simulators import simulator
+from simulators import quaternion_simulator as qs
+from simulators.integrators import integrators_database
+
+
+class QuaternionAttitudeInnerLoopSimulator(qs.QuaternionSimulator):
+
+
+    @classmethod
+    def description(cls):
+        return "Iris+ simulator with attitude inner loop (quaternion state)"
+
+
+    def __init__(self, initial_time=0.0,
+            initial_position=np.zeros(3),
+            initial_velocity=np.zeros(3),
+            initial_rotation=np.zeros(3),
+            initial_control=np.zeros(4),
+            mass=1.442,
+            gain_inner_loop=1.0,
+            integrator=integrators_database.database["Default"]()
+            ):
+
+        initial_state = self.initial_state_from(initial_position, initial_velocity, initial_rotation)
+        qs.QuaternionSimulator.__init__(self, initial_time, initial_state, initial_control, integrator)
+        self.mass = mass
+        self.gain_inner_loop = gain_inner_loop
+
+
+    def set_control(self, command):
+        # rc command in stabilize mode: the 3D force depends on the current yaw,
+        # so it is computed in the vector field
+        self.control[:] = command
+
+
+    def vector_field(self, time, state, control):
+
+        quaternion  = state[6:10]
+        # attitude: only what is needed, once
+        unit_vector = qs.third_column(quaternion)
+        current_psi = qs.yaw_rad(quaternion)
+
+        force_3d, yaw_rate = simulator.stabilize_mode_command_to_thrust_and_yaw_rate(
+            control,
+            current_psi,
+            self.mass,
+            self.THROTTLE_NEUTRAL,
+            self.MAX_PSI_SPEED_RAD,
+            self.MAX_ANGLE_RAD
+            )
+
+        throttle = np.dot(force_3d, unit_vector)
+
+        # gain of inner loop for attitude control
+        ktt             = self.gain_inner_loop
+        unit_vector_des = force_3d/np.linalg.norm(force_3d)
+        # skew(unit_vector).dot(unit_vector_des), written out (np.cross is slow)
+        n, d            = unit_vector, unit_vector_des
+        omega           = ktt*np.array([
+            n[1]*d[2] - n[2]*d[1],
+            n[2]*d[0] - n[0]*d[2],
+            n[0]*d[1] - n[1]*d[0]])
+
+        derivative = np.empty(3+3+4)
+        # dot_p
+        derivative[0:3] = state[3:6]
+        # dot_v
+        derivative[3:6] = throttle/self.mass*unit_vector
+        derivative[5]  -= uts.GRAVITY
+        # dot_q
+        derivative[6:10] = qs.quaternion_derivative(quaternion, omega)
+
+        return derivative
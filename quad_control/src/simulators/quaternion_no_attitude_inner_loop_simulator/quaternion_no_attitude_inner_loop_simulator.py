@@ -0,0 +1,63 @@
+"""This module implements the simulator of the quad
+with no attitude inner loop (see NoAttitudeInnerLoopSimulator),
+with a quaternion for the attitude.
+"""
+
+
+import numpy as np
+import utilities.utility_functions as uts
+from simulators import simulator as sm
+from simulators import quaternion_simulator as qs
+from simulators.integrators import integrators_database
+
+
+class QuaternionNoAttitudeInnerLoopSimulator(qs.QuaternionSimulator):
+
+
+    @classmethod
+    def description(cls):
+        return "Iris+ simulator without attitude inner loop (quaternion state)"
+
+
+    def __init__(self, initial_time=0.0,
+            initial_position=np.zeros(3),
+            initial_velocity=np.zeros(3),
+            initial_rotation=np.zeros(3),
+            initial_control=np.zeros(4),
+            mass=1.442,
+            neutral_throttle=1484,
+            acro_rpp=4.5,
+            integrator=integrators_database.database["Default"]()
+            ):
+
+        initial_state = self.initial_state_from(initial_position, initial_velocity, initial_rotation)
+        qs.QuaternionSimulator.__init__(self, initial_time, initial_state, initial_control, integrator)
+        self.mass = mass
+        self.neutral_throttle = neutral_throttle
+        self.acro_rpp = acro_rpp
+        self.throttle_gain = mass*uts.GRAVITY/neutral_throttle
+
+
+    def set_control(self, command):
+        throttle, ang_vel = sm.acro_mode_command_to_throttle_and_angular_velocity(
+            command, self.mass, self.throttle_gain, self.acro_rpp)
+        self.control[0] = throttle
+        self.control[1:4] = ang_vel
+
+
+    def vector_field(self, time, state, control):
+
+        quaternion = state[6:10]
+        versor     = qs.third_column(quaternion)
+        throttle   = control[0]
+
+        derivative = np.empty(3+3+4)
+        # dot_p
+        derivative[0:3] = state[3:6]
+        # dot_v
+        derivative[3:6] = throttle/self.mass*versor
+        derivative[5]  -= uts.GRAVITY
+        # dot_q
+        derivative[6:10] = qs.quaternion_derivative(quaternion, control[1:4])
+
+        return derivative
@@ -0,0 +1,124 @@
+"""This file implements the parent class for simulators whose attitude
+is a unit quaternion, instead of a rotation matrix.
+
+The state is position (3), velocity (3) and quaternion (4), 10 numbers
+instead of 15. The quaternion is [q_x, q_y, q_z, q_w] (vector part first,
+as in ROS and in utility_functions.rot_from_quaternion), and it is
+normalized after every step (see project).
+
+The vector field of a child class only needs a few entries of the
+rotation matrix (e.g., its third column, for the thrust): they are
+computed from the quaternion once per evaluation, with the functions
+below. The full rotation matrix and the euler angles are only computed
+when the state is published (get_rotation_matrix, get_attitude).
+"""
+
+
+import math
+
+import numpy as np
+
+from utilities import utility_functions as uts
+
+from simulators import simulator
+
+
+
+def third_column(q):
+    """rotation.dot(e3), for the rotation of quaternion q"""
+    x, y, z, w = q.tolist()
+    return np.array([
+        2.0*(x*z + w*y),
+        2.0*(y*z - w*x),
+        w*w - x*x - y*y + z*z])
+
+
+
+def yaw_rad(q):
+    """Yaw (rad) of the rotation of quaternion q, as in uts.euler_rad_from_rot"""
+    x, y, z, w = q.tolist()
+    return math.atan2(2.0*(x*y + w*z), w*w + x*x - y*y - z*z)
+
+
+
+def quaternion_derivative(q, omega):
+    """Time derivative of quaternion q, when the angular velocity
+    in the body frame is omega: dot_q = q*[omega, 0]/2
+    (the same as dot_r = rotation.dot(skew(omega)))"""
+    x, y, z, w = q.tolist()
+    p, r, s = omega.tolist()
+    return 0.5*np.array([
+         w*p - z*r + y*s,
+         z*p + w*r - x*s,
+        -y*p + x*r + w*s,
+        -x*p - y*r - z*s])
+
+
+
+def quaternion_from_rot(rotation):
+    """Unit quaternion [q_x, q_y, q_z, q_w] of a rotation matrix (q_w >= 0)"""
+    R = rotation
+    trace = R[0,0] + R[1,1] + R[2,2]
+    if trace > 0.0:
+        s = 2.0*math.sqrt(trace + 1.0)
+        q = [(R[2,1] - R[1,2])/s, (R[0,2] - R[2,0])/s, (R[1,0] - R[0,1])/s, 0.25*s]
+    elif R[0,0] > R[1,1] and R[0,0] > R[2,2]:
+        s = 2.0*math.sqrt(1.0 + R[0,0] - R[1,1] - R[2,2])
+        q = [0.25*s, (R[0,1] + R[1,0])/s, (R[0,2] + R[2,0])/s, (R[2,1] - R[1,2])/s]
+    elif R[1,1] > R[2,2]:
+        s = 2.0*math.sqrt(1.0 + R[1,1] - R[0,0] - R[2,2])
+        q = [(R[0,1] + R[1,0])/s, 0.25*s, (R[1,2] + R[2,1])/s, (R[0,2] - R[2,0])/s]
+    else:
+        s = 2.0*math.sqrt(1.0 + R[2,2] - R[0,0] - R[1,1])
+        q = [(R[0,2] + R[2,0])/s, (R[1,2] + R[2,1])/s, 0.25*s, (R[1,0] - R[0,1])/s]
+    q = np.array(q)
+    if q[3] < 0.0:
+        q = -q
+    return q/np.linalg.norm(q)
+
+
+
+class QuaternionSimulator(simulator.Simulator):
+
+
+    @classmethod
+    def description(cls):
+        return "Abstract Simulator, with a quaternion for the attitude"
+
+
+    # position and velocity (the attitude is a quaternion)
+    STATE_LAYOUT = {'position': slice(0, 3), 'velocity': slice(3, 6)}
+
+    @classmethod
+    def get_state_size(cls):
+        return 3+3+4
+
+
+    @classmethod
+    def get_control_size(cls):
+        return 4
+
+
+    @classmethod
+    def initial_state_from(cls, position, velocity, euler_angles_deg):
+        """State with the given position, velocity and euler angles (deg)"""
+        rotation = uts.rot_from_euler_deg(np.array(euler_angles_deg, dtype=float))
+        return np.concatenate([position, velocity, quaternion_from_rot(rotation)])
+
+
+    def get_position(self):
+        return self.state[0:3]
+
+
+    def get_rotation_matrix(self):
+        return uts.rot_from_quaternion(self.state[6:10])
+
+
+    def get_attitude(self):
+        return uts.euler_deg_from_rot(self.get_rotation_matrix())
+
+
+    def project(self, state):
+        # the integrators do not keep the norm of the quaternion
+        state[6:10] /= math.sqrt(state[6]**2 + state[7]**2 + state[8]**2 + state[9]**2)
+        return state
@@ -3,14 +3,25 @@
 
 import numpy as np
 import numpy
-import scipy.integrate as spi
 import json
 from utilities import jsonable as js
 from utilities import utility_functions
+from utilities import trajectory_recorder
+
+from simulators.integrators import integrators_database
 
 import rospy
 
 
+# layout of the state of the simulators with a rotation matrix
+# (position, velocity, rotation matrix: see scripts/README.md)
+ROTATION_MATRIX_LAYOUT = {
+    'position': slice(0, 3),
+    'velocity': slice(3, 6),
+    'rotation': slice(6, 15),
+    }
+
+
 
 def acro_mode_command_to_throttle_and_angular_velocity(
         command,
@@ -75,9 +86,66 @@ def stabilize_mode_command_to_thrust_and_yaw_rate(
 
 
 
+#--------------------------------------------------------------------------#
+# batched versions, for N vehicles at once (see batch_simulator.py):
+# commands are (N,4) arrays
+
+def acro_mode_commands_to_throttles_and_angular_velocities(
+        commands,
+        mass,
+        throttle_gain,
+        acro_rpp):
+
+    ths = acro_rpp*4500.0/100.0*np.pi/180.0
+    throttles = throttle_gain*commands[:,2]
+    ang_vels = np.empty((len(commands),3))
+    ang_vels[:,0] =  (commands[:,0] - 1500.0)/500.0*ths
+    ang_vels[:,1] = -(commands[:,1] - 1500.0)/500.0*ths
+    ang_vels[:,2] = -(commands[:,3] - 1500.0)/500.0*ths
+
+    return throttles, ang_vels
+
+
+
+def stabilize_mode_commands_to_thrusts_and_yaw_rates(
+        joysticks,
+        current_psi,
+        mass,
+        throttle_neutral,
+        max_psi_speed_rad,
+        max_angle_rad,
+        ):
+    """Convert the joysticks inputs of N vehicles to 3D forces (in newtons, (N,3))
+    and psi rates (in rad/sec, (N,)); current_psi is an (N,) array"""
+
+    yaw_rates = -(joysticks[:,3] - 1500.0)*max_psi_speed_rad/500.0
+
+    # desired euler angles in (rad)
+    ee_des = np.empty((len(joysticks),3))
+    ee_des[:,0] =  (joysticks[:,0] - 1500.0)*max_angle_rad/500.0
+    ee_des[:,1] = -(joysticks[:,1] - 1500.0)*max_angle_rad/500.0
+    ee_des[:,2] = current_psi
+
+    # third column of each rotation matrix
+    unit_vectors_des = utility_functions.rot_from_euler_rad_batch(ee_des)[:,:,2]
+
+    # see stabilize_mode_command_to_thrust_and_yaw_rate
+    throttles = joysticks[:,2]/unit_vectors_des[:,2]
+    throttles *= mass*utility_functions.GRAVITY/throttle_neutral
+    forces_3d = throttles[:,np.newaxis]*unit_vectors_des
+
+    return forces_3d, yaw_rates
+
+
+
 class Simulator(js.Jsonable):
 
-    # 
+    # the integrator that moves the state in run (see integrators/integrators.py)
+    inner = {'integrator': integrators_database.database}
+
+    # parts of the state that the integrator may need (e.g., ROTATION_MATRIX_LAYOUT):
+    # with none, only the integrators that work for any state can be used
+    STATE_LAYOUT = {}
 
     # mass of vehicles (kg)
     MASS = rospy.get_param("mass_quad_sim",1.442)
@@ -93,6 +161,9 @@ class Simulator(js.Jsonable):
     MAX_PSI_SPEED_DEG = rospy.get_param("MAX_PSI_SPEED_Deg",200.0)  
     MAX_PSI_SPEED_RAD = MAX_PSI_SPEED_DEG*numpy.pi/180.0
 
+    # samples kept by the recorder (the oldest are overwritten): 10 minutes at 100 Hz
+    RECORD_CAPACITY = rospy.get_param("simulator_record_capacity", 60000)
+
 
     @classmethod
     def description(cls):
@@ -112,13 +183,14 @@ class Simulator(js.Jsonable):
     def __init__(self,
             initial_time    = 0.0,
             initial_state   = None,
-            initial_control = None
+            initial_control = None,
+            integrator      = None
             ):
         
-        if initial_state==None:
+        if initial_state is None:
             initial_state = np.zeros(self.get_state_size())
             
-        if initial_control==None:
+        if initial_control is None:
             initial_control = np.zeros(self.get_control_size())
             
         self.time = initial_time
@@ -129,16 +201,14 @@ class Simulator(js.Jsonable):
         assert len(initial_control) == self.get_control_size()
         self.control = np.array(initial_control)
         
-        #TODO This is not very nice stylistically.
-        # We should change f into a descriptive name
-        # or use a lambda function.
-        def f(t,x):
-            return self.vector_field(t, x, self.control)
-        self.solver = spi.ode(f).set_integrator('dopri5')
+        if integrator is None:
+            integrator = integrators_database.database["Default"]()
+        integrator.set_layout(self.STATE_LAYOUT)
+        self.integrator = integrator
                 
-        self.time_record = []
-        self.state_record = [[] for index in range(self.get_state_size())]
-        self.control_record = [[] for index in range(self.get_control_size())]
+        # (time, state, control) before every step
+        self.recorder = trajectory_recorder.TrajectoryRecorder(
+            self.get_state_size(), self.get_control_size(), self.RECORD_CAPACITY)
                 
                 
     def __str__(self):
@@ -163,6 +233,12 @@ class Simulator(js.Jsonable):
         
     def get_attitude(self):
         raise NotImplementedError()
+
+
+    def get_rotation_matrix(self):
+        """Rotation matrix of the vehicle (state[6:15], by rows);
+        simulators with another attitude state redefine this"""
+        return np.reshape(self.state[6:15], (3,3))
         
         
     def set_control(self, command):
@@ -173,10 +249,10 @@ class Simulator(js.Jsonable):
             initial_state=None,
             initial_control=None):
         
-        if initial_state==None:
+        if initial_state is None:
             initial_state = np.zeros(self.get_state_size())
             
-        if initial_control==None:
+        if initial_control is None:
             initial_control = np.zeros(self.get_control_size())
         
         self.time = initial_time
@@ -186,22 +262,38 @@ class Simulator(js.Jsonable):
         
         assert len(initial_control) == self.get_control_size()
         self.control = np.array(initial_control)
-        
-        self.solver.set_initial_value(initial_time, initial_state)
+
+        # time starts again
+        self.recorder.clear()
+
+
+    def hold(self, time):
+        """Time goes on until time, and the vehicle stays where it is, with
+        no control (simulation stopped): unlike reset, the trajectory
+        recorded so far is kept"""
+        self.time = time
+        self.control[:] = 0.0
 
                 
     def vector_field(self, time, state, control):
         raise NotImplementedError()
+
+
+    def project(self, state):
+        """Called after every step: bring the state back to where it must be
+        (e.g., normalize a quaternion). By default, nothing."""
+        return state
+
+
+    def current_vector_field(self, time, state):
+        """Vector field with the current control (constant during a step)"""
+        return self.vector_field(time, state, self.control)
         
         
     def run(self, time_step):
-        self.time_record.append(self.time)
-        self.state_record.append(list(self.state))
-        self.control_record.append(list(self.control))
-        self.solver.set_initial_value(np.array(self.state), self.time)
-        self.solver.integrate(self.time + time_step)
-        self.time = self.solver.t
-        self.state = np.array(self.solver.y)
+        self.recorder.append(self.time, self.state, self.control)
+        self.state = self.project(self.integrator.integrate(self.current_vector_field, self.time, self.state, time_step))
+        self.time += time_step
  
   
         
@@ -1,23 +1,22 @@
 
 #TODO some nice description
 
-simulators_dictionary = {}
+from utilities.lazy_registry import LazyDatabase
 
+simulators_dictionary = LazyDatabase('simulators')
 
-import attitude_inner_loop_simulator.attitude_inner_loop_simulator as ails
-simulators_dictionary["AttitudeInnerLoopSimulator"] = ails.AttitudeInnerLoopSimulator
+simulators_dictionary.register("AttitudeInnerLoopSimulator", "simulators.attitude_inner_loop_simulator.attitude_inner_loop_simulator:AttitudeInnerLoopSimulator")
 
+simulators_dictionary.register("NoAttitudeInnerLoopSimulator", "simulators.no_attitude_inner_loop_simulator.no_attitude_inner_loop_simulator:NoAttitudeInnerLoopSimulator")
 
-import no_attitude_inner_loop_simulator.no_attitude_inner_loop_simulator as nails
-simulators_dictionary["NoAttitudeInnerLoopSimulator"] = nails.NoAttitudeInnerLoopSimulator
+simulators_dictionary.register("DoubleIntegratorSimulator", "simulators.double_integrator_simulator.double_integrator_simulator:DoubleIntegratorSimulator")
 
+simulators_dictionary.register("ZeroSimulator", "simulators.zero_simulator.zero_simulator:ZeroSimulator")
 
-import double_integrator_simulator.double_integrator_simulator
-simulators_dictionary["DoubleIntegratorSimulator"] = double_integrator_simulator.double_integrator_simulator.DoubleIntegratorSimulator
+simulators_dictionary.register("QuaternionNoAttitudeInnerLoopSimulator", "simulators.quaternion_no_attitude_inner_loop_simulator.quaternion_no_attitude_inner_loop_simulator:QuaternionNoAttitudeInnerLoopSimulator")
 
+simulators_dictionary.register("QuaternionAttitudeInnerLoopSimulator", "simulators.quaternion_attitude_inner_loop_simulator.quaternion_attitude_inner_loop_simulator:QuaternionAttitudeInnerLoopSimulator")
 
-from zero_simulator.zero_simulator import ZeroSimulator
-simulators_dictionary["ZeroSimulator"] = ZeroSimulator
+simulators_dictionary.register("LoadTransportSimulator", "simulators.load_transport_simulator.load_transport_simulator:LoadTransportSimulator")
 
-
-simulators_dictionary["Default"] = double_integrator_simulator.double_integrator_simulator.DoubleIntegratorSimulator
+simulators_dictionary.alias("Default", "DoubleIntegratorSimulator")
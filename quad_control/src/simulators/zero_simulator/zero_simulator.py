@@ -6,6 +6,7 @@ from utilities import utility_functions
 import rospy
 
 from .. import simulator as sim
+from ..integrators import integrators_database
 
 
 
@@ -22,6 +23,9 @@ class ZeroSimulator(sim.Simulator):
             """
         
        
+    # position, velocity and rotation matrix
+    STATE_LAYOUT = sim.ROTATION_MATRIX_LAYOUT
+
     @classmethod
     def get_state_size(cls):
         return 15
@@ -34,11 +38,12 @@ class ZeroSimulator(sim.Simulator):
                 
     def __init__(self,
         initial_time        = 0.0,
-        position            = np.array([0.0, 0.0, 1.0])
+        position            = np.array([0.0, 0.0, 1.0]),
+        integrator          = integrators_database.database["Default"]()
         ):
         
         initial_state = np.concatenate([position, np.zeros(12)])
-        sim.Simulator.__init__(self, initial_time, initial_state)
+        sim.Simulator.__init__(self, initial_time, initial_state, None, integrator)
                 
                 
     def __str__(self):
@@ -1,14 +1,13 @@
 #!/usr/bin/env python
 # this line is just used to define the type of document
 
-import rospy
+from utilities.lazy_registry import LazyDatabase
 
-database = {}
+database = LazyDatabase('trajectories')
 
-from fixed_point_trajectory.fixed_point_trajectory import FixedPointTrajectory
-database['StayAtRest'] = FixedPointTrajectory
+database.register("StayAtRest", "trajectories.fixed_point_trajectory.fixed_point_trajectory:FixedPointTrajectory")
 
-from circle_trajectory.circle_trajectory import CircleTrajectory
-database['DescribeCircle'] = CircleTrajectory
+database.register("DescribeCircle", "trajectories.circle_trajectory.circle_trajectory:CircleTrajectory")
 
-database["Default"] = database[rospy.get_param("TrajectoryDefault","StayAtRest")]
\ No newline at end of file
+# the ROS parameter is read when "Default" is first used
+database.alias("Default", "StayAtRest", "TrajectoryDefault")
@@ -1,8 +1,10 @@
 """This module implements the class Jsonable."""
 
 
+import copy
 import json
 import inspect
+import numbers
 import numpy as np
 
 # dictionary = {
@@ -40,6 +42,55 @@ def update_input_dictionary(dictionary, list_of_keys, NestedClassName, nested_di
 #print check_completeness(dictionary)
 
 
+
+def _getargspec(function):
+    """Names of the arguments of a function, and their default values"""
+    try:
+        spec = inspect.getfullargspec(function)
+    except AttributeError:
+        # python 2
+        spec = inspect.getargspec(function)
+    return spec.args, spec.defaults
+
+
+def _name_in_database(database, InnerClass):
+    """Name of InnerClass in a database of classes
+    (a LazyDatabase does not import its other classes for this)"""
+    if hasattr(database, 'name_of'):
+        return database.name_of(InnerClass)
+    return [key for key, value in database.items() if value is InnerClass][0]
+
+
+
+class JsonableSchema(object):
+    """What a Jsonable class needs to know about its constructor:
+    computed once per class, see Jsonable.get_schema.
+    """
+
+    def __init__(self, cls):
+        args, defaults = _getargspec(cls.__init__)
+        if defaults is None:
+            defaults = ()
+
+        # arguments of the constructor that have a default value, in order
+        self.arg_names = list(args[len(args)-len(defaults):])
+        self.defaults  = dict(zip(self.arg_names, defaults))
+
+        # arguments whose default is a numpy array
+        self.ndarray_args = set([arg for arg in self.arg_names if type(self.defaults[arg]) is np.ndarray])
+
+        # arguments that are Jsonable objects, and their possible classes
+        self.inner = cls.inner
+        self.inner_args = [arg for arg in self.arg_names if arg in cls.inner.keys()]
+
+        # strings returned by to_string, for each choice of inner classes
+        self.strings = {}
+
+
+# one schema per class
+_schemas = {}
+
+
 class Jsonable:
     """A Jsonable object is an object that can be constructed
     from a json string.
@@ -78,6 +129,17 @@ class Jsonable:
         return cls.inner
 
 
+    @classmethod
+    def get_schema(cls):
+        """Schema of this class (built on the first call)"""
+        try:
+            return _schemas[cls]
+        except KeyError:
+            schema = JsonableSchema(cls)
+            _schemas[cls] = schema
+            return schema
+
+
     inner = dict()
     """This is the only object that needs to be redefined by the children.
     Each key is one of the arguments in the constructor that is itself a
@@ -89,6 +151,16 @@ class Jsonable:
     Then we have `QuadController.inner = {'db_int_con': {"PCon": PCon,
     "PICon": PICon, "PIDCon", PIDCon}}.
     """
+
+    inner_attributes = dict()
+    """Attribute that holds the object of an inner argument, for the
+    children that do not keep it in the attribute of the same name
+    (e.g., a mission with {'controller': 'ControllerObject'}).
+    """
+
+    def get_inner_object(self, arg):
+        """The object of the inner argument `arg` (None if there is none)"""
+        return getattr(self, self.inner_attributes.get(arg, arg), None)
     
     
     @classmethod
@@ -100,25 +172,24 @@ class Jsonable:
         as cls.inner.) The corresponding value is a 
         the chosen class name for that object.
         """
-        
-        spec = inspect.getargspec(cls.__init__)
-        args = spec.args
-        defs = spec.defaults
 
-        if defs is None:
-            defs = []
+        schema = cls.get_schema()
+
+        # the string only depends on the choice of inner classes
+        strings_key = json.dumps(inner, sort_keys=True)
+        if strings_key in schema.strings:
+            return schema.strings[strings_key]
+
         arg_dic = dict()
-        max_length = 0
-        for i in range(len(defs)):
-            arg = args[i+1]
-            if arg in cls.inner.keys():
+        for arg in schema.arg_names:
+            if arg in schema.inner_args:
                 inner_key = inner[arg][0]
                 inner_inner = inner[arg][1]
                 val = (inner_key, json.loads(cls.inner[arg][inner_key].to_string(inner_inner)))
-            elif type(defs[i]) is np.ndarray:
-                val = str(list(defs[i]))
+            elif arg in schema.ndarray_args:
+                val = str(list(schema.defaults[arg]))
             else:
-                val = defs[i]
+                val = schema.defaults[arg]
             arg_dic[arg] = val
         # string = json.dumps(arg_dic)
         # string = json.dumps(arg_dic, indent=4, separators=(', ', ':\n\t'))
@@ -141,31 +212,28 @@ class Jsonable:
         # string = string.replace(', \n9',', 9')
 
         #string = string.replace('"','')
+        schema.strings[strings_key] = string
         return string
         
     def from_object_to_string(self):
         """Returns a string that can be used to REconstruct the object.
         Unlike the to_string method, no inner is neccessary
         """
-        
-        spec = inspect.getargspec(self.__init__)
-        args = spec.args 
-        defs = spec.defaults
 
-        if defs is None:
-            defs = []
+        schema = self.get_schema()
+
         arg_dic = dict()
         
-        for i in range(len(defs)):
-            arg = args[i+1]
-            if arg in self.inner.keys():
-                inner_key   = inner[arg][0]
-                inner_inner = inner[arg][1]
-                val         = (inner_key, json.loads(self.inner[arg][inner_key].from_object_to_string(inner_inner)))
-            elif type(defs[i]) is np.ndarray:
-                val = str(list(defs[i]))
+        for arg in schema.arg_names:
+            if arg in schema.inner_args:
+                # the inner object, and the name of its class
+                inner_object = self.get_inner_object(arg)
+                inner_key    = _name_in_database(self.inner[arg], inner_object.__class__)
+                val          = (inner_key, json.loads(inner_object.from_object_to_string()))
+            elif arg in schema.ndarray_args:
+                val = schema.defaults[arg].tolist()
             else:
-                val = defs[i]
+                val = schema.defaults[arg]
             arg_dic[arg] = val
 
         string = json.dumps(arg_dic)
@@ -193,29 +261,51 @@ class Jsonable:
         `string`.
         """
         
-        arg_dic = json.loads(string)
-        for key, value in arg_dic.items():
-            if key in cls.inner.keys():
+        obj = cls.from_dictionary(json.loads(string))
+        obj.constructing_string = string
+        return obj        
+
+    @classmethod
+    def from_dictionary(cls, dictionary):
+        """Returns an object of this class constructed from
+        the (already parsed) json dictionary `dictionary`.
+        Inner objects are constructed directly from their dictionaries.
+        """
+
+        arg_dic = dict(dictionary)
+        for key in cls.get_schema().inner.keys():
+            if key in arg_dic:
+                value        = arg_dic[key]
                 InnerObjType = cls.inner[key][value[0]]
-                inner_obj            = InnerObjType.from_string(json.dumps(value[1]))
-                arg_dic[key] = inner_obj
+                arg_dic[key] = InnerObjType.from_dictionary(value[1])
 
         obj = cls(**arg_dic)
-        obj.constructing_string = string
-        return obj        
+        obj.constructing_dictionary = dictionary
+        return obj
+
+    def get_constructing_dictionary(self):
+        """Returns (parsed) json dictionary that constructs object.
+        """
+        if hasattr(self, 'constructing_dictionary'):
+            return self.constructing_dictionary
+        if hasattr(self, 'constructing_string'):
+            return json.loads(self.constructing_string)
+        # object was constructed with the default arguments
+        return json.loads(self.from_object_to_string())
 
     def get_constructing_string(self):
         """Returns string that constructs object.
         """
         
-        constructing_string     = self.constructing_string
-        constructing_string_dic = json.loads(constructing_string)
+        constructing_string_dic = dict(self.get_constructing_dictionary())
 
         for key in self.inner.keys():
-            if hasattr(self,key):
+            inner_object = self.get_inner_object(key)
+            if inner_object is not None:
+                inner_constructing_string = inner_object.get_constructing_string()
                 print(key)
-                print(getattr(self,key).get_constructing_string())
-                constructing_string_dic[key] = getattr(self,key).get_constructing_string()
+                print(inner_constructing_string)
+                constructing_string_dic[key] = inner_constructing_string
             else:
                 print(self.__class__.__name__+" has no attribute "+key)
 
@@ -223,6 +313,98 @@ class Jsonable:
 
         return constructing_string
     
+    state_attributes = []
+    """Child classes redefine this with the names of the attributes
+    that hold their internal state (e.g., integrators): those are kept
+    when the object is patched (see patched).
+    """
+
+    @classmethod
+    def validate_patch(cls, patch, dictionary):
+        """Raises ValueError if `patch` cannot be applied to an object
+        of this class, constructed from `dictionary`.
+        A patch is a partial constructing dictionary: 
+            {"integral_gain_z": 0.2, "double_integrator_controller": {"kp": 2.0}}
+        For an inner argument, the value is either the patch of the inner object
+        or [class name, dictionary] to construct a new inner object.
+        """
+
+        if not isinstance(patch, dict):
+            raise ValueError(cls.__name__ + ": a patch must be a dictionary, not " + str(patch))
+
+        schema = cls.get_schema()
+
+        for arg, value in patch.items():
+
+            if arg not in schema.arg_names:
+                raise ValueError(cls.__name__ + " has no parameter " + str(arg) + ": use one of " + str(schema.arg_names))
+
+            if arg in schema.inner_args:
+                if isinstance(value, dict):
+                    # patch of the inner object
+                    inner_key = dictionary[arg][0]
+                    cls.inner[arg][inner_key].validate_patch(value, dictionary[arg][1])
+                elif isinstance(value, list) and len(value) == 2 and value[0] in cls.inner[arg].keys():
+                    # new inner object
+                    pass
+                else:
+                    raise ValueError(cls.__name__ + "." + arg + ": expected a patch or [class name, dictionary], got " + str(value))
+                continue
+
+            default = schema.defaults[arg]
+            if isinstance(default, bool):
+                valid = isinstance(value, bool)
+            elif isinstance(default, numbers.Number):
+                valid = isinstance(value, numbers.Number) and not isinstance(value, bool)
+            elif isinstance(default, (list, tuple, np.ndarray)):
+                valid = isinstance(value, list) and len(value) == len(default) and all([isinstance(number, numbers.Number) for number in value])
+            elif isinstance(default, str):
+                valid = isinstance(value, type(u"")) or isinstance(value, str)
+            else:
+                valid = True
+
+            if not valid:
+                raise ValueError(cls.__name__ + "." + arg + ": " + str(value) + " is not compatible with " + str(default))
+
+    @classmethod
+    def apply_patch(cls, dictionary, patch):
+        """Returns a new constructing dictionary: `dictionary` with `patch` applied"""
+        patched_dictionary = dict(dictionary)
+        for arg, value in patch.items():
+            if arg in cls.inner.keys() and isinstance(value, dict):
+                inner_key, inner_dictionary = dictionary[arg]
+                patched_dictionary[arg] = [inner_key, cls.inner[arg][inner_key].apply_patch(inner_dictionary, value)]
+            else:
+                patched_dictionary[arg] = value
+        return patched_dictionary
+
+    def patched(self, patch):
+        """Returns a copy of this object, with the parameters in `patch` changed
+        (see validate_patch), and the same internal state (see state_attributes).
+        The copy is constructed without touching this object, so that
+        it can be swapped in between two iterations of a control loop.
+        """
+        dictionary = self.get_constructing_dictionary()
+        self.validate_patch(patch, dictionary)
+
+        new_object = self.from_dictionary(self.apply_patch(dictionary, patch))
+        new_object.copy_state_from(self)
+        return new_object
+
+    def copy_state_from(self, other):
+        """Copy internal state (see state_attributes) of `other`,
+        and of its inner objects of the same class"""
+        for name in self.state_attributes:
+            if hasattr(other, name):
+                setattr(self, name, copy.deepcopy(getattr(other, name)))
+
+        for arg in self.inner.keys():
+            inner_object = self.get_inner_object(arg)
+            other_object = other.get_inner_object(arg)
+            if inner_object is not None and other_object is not None:
+                if inner_object.__class__ is other_object.__class__:
+                    inner_object.copy_state_from(other_object)
+
     def get_parameters(self):
         """Child classes redefine this
         and return a dictionary of their parameters,
@@ -293,24 +475,17 @@ class Jsonable:
     @classmethod
     def combined_description(cls, inner=dict()):
         """Returns a string of the combined description of all jsonable classes (class + its inners)"""
-        
-        spec = inspect.getargspec(cls.__init__)
-        args = spec.args
-        defs = spec.defaults
 
-        if defs is None:
-            defs = []
-        arg_dic = dict()
+        schema = cls.get_schema()
 
         string = "<p>"+cls.description()+"<\p>"
 
-        if len(defs) != 0:
+        if len(schema.arg_names) != 0:
             # start list
             string += "<ul>"
             # for every inner we have a item list, and a description, since an inner is a jsonable object
-            for i in range(len(defs)):
-                arg = args[i+1]
-                if arg in cls.inner.keys():
+            for arg in schema.arg_names:
+                if arg in schema.inner_args:
                     inner_key   = inner[arg][0]
                     inner_inner = inner[arg][1]
                     string += "<li>"+arg+"="+inner_key+":"+cls.inner[arg][inner_key].combined_description(inner_inner)+"</li>"
@@ -327,9 +502,10 @@ class Jsonable:
 
         string += "<ul>"
         for arg in self.inner.keys():
-            if hasattr(self,arg):
+            inner_object = self.get_inner_object(arg)
+            if inner_object is not None:
                 print(arg)
-                string += "<li>"+getattr(self, arg).object_combined_description()+"</li>"
+                string += "<li>"+inner_object.object_combined_description()+"</li>"
             else:
                 print(self.__class__.__name__+" has no attribute "+arg)
         # end list
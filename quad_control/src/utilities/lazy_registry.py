@@ -0,0 +1,157 @@
+"""This module implements the class LazyDatabase.
+
+A LazyDatabase maps names (e.g., "SimplePIDController") to the import
+paths of Jsonable classes, and imports a class only when it is selected.
+It can be used as the dictionaries in the *_database.py modules:
+    database["SimplePIDController"]   imports and returns the class
+    database.keys(), "name" in database   do not import anything
+
+"Default" is an alias, possibly read from a ROS parameter the first time
+it is used.
+
+Every import is timed, so that import_report() tells what each entry costs.
+"""
+
+import importlib
+import time
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    # python 2
+    from collections import Mapping
+
+
+class _Entry(object):
+
+    def __init__(self, name, import_path, description):
+        self.name = name
+        # "package.module:ClassName"
+        self.import_path = import_path
+        self.description = description
+        self.value = None
+        # time (sec) taken by the import of the module of this entry
+        self.import_time = None
+
+
+class LazyDatabase(Mapping):
+    """Dictionary of classes, that imports a class the first time it is used"""
+
+    def __init__(self, name=''):
+        # name of the database (for reports)
+        self.name = name
+        self.__entries = {}
+        # names, in order of registration
+        self.__names = []
+        # alias -> (name, ros parameter with name)
+        self.__aliases = {}
+
+    def register(self, name, import_path, description=None):
+        """Register the class `import_path` ("package.module:ClassName") as `name`.
+        description: html description for the GUI (by default, the class is imported
+        and its description() is used).
+        """
+        if name not in self.__entries:
+            self.__names.append(name)
+        self.__entries[name] = _Entry(name, import_path, description)
+
+    def register_value(self, name, value):
+        """Register an object that is already imported"""
+        self.register(name, None)
+        entry = self.__entries[name]
+        entry.value = value
+        entry.import_time = 0.0
+
+    def alias(self, alias, name, parameter=None):
+        """`alias` (e.g., "Default") is the same as `name`,
+        or as the value of the ROS parameter `parameter` if it is set.
+        The parameter is read when the alias is first used.
+        """
+        if alias not in self.__names:
+            self.__names.append(alias)
+        self.__aliases[alias] = (name, parameter)
+
+    def resolve(self, name):
+        """Name of the entry that `name` refers to (follows aliases)"""
+        if name in self.__aliases:
+            target, parameter = self.__aliases[name]
+            if parameter is not None:
+                import rospy
+                target = rospy.get_param(parameter, target)
+            # parameter was read: do not read it again
+            self.__aliases[name] = (target, None)
+            return self.resolve(target)
+        return name
+
+    def __load(self, entry):
+        if entry.value is None:
+            module_name, class_name = entry.import_path.split(':')
+            start = time.time()
+            module = importlib.import_module(module_name)
+            entry.import_time = time.time() - start
+            entry.value = getattr(module, class_name)
+        return entry.value
+
+    def __getitem__(self, name):
+        resolved = self.resolve(name)
+        if resolved not in self.__entries:
+            raise KeyError(name)
+        return self.__load(self.__entries[resolved])
+
+    def __contains__(self, name):
+        return name in self.__entries or name in self.__aliases
+
+    def __iter__(self):
+        return iter(list(self.__names))
+
+    def __len__(self):
+        return len(self.__names)
+
+    def keys(self):
+        return list(self.__names)
+
+    def is_loaded(self, name):
+        return self.__entries[self.resolve(name)].value is not None
+
+    def description(self, name):
+        """Description of an entry, importing the class only if needed"""
+        entry = self.__entries[self.resolve(name)]
+        if entry.description is not None:
+            return entry.description
+        return self[name].description()
+
+    def name_of(self, value):
+        """Name of an entry whose class is `value`: first among the
+        entries that are already imported, then by import path
+        (nothing is imported)
+        """
+        for name in self.__names:
+            if name in self.__entries and self.__entries[name].value is value:
+                return name
+        # the class was imported directly, not from this database
+        import_path = getattr(value, '__module__', '') + ':' + getattr(value, '__name__', '')
+        for name in self.__names:
+            if name in self.__entries and self.__entries[name].import_path == import_path:
+                return name
+        raise KeyError(value)
+
+    def import_path(self, name):
+        return self.__entries[self.resolve(name)].import_path
+
+    def load_all(self):
+        for name in self.__names:
+            self[name]
+
+    def import_report(self):
+        """List of (name, import path, import time in sec or None if not imported),
+        most expensive first. The time of an entry includes the modules
+        that were imported for the first time by it.
+        """
+        report = []
+        for name in self.__names:
+            if name in self.__aliases:
+                continue
+            entry = self.__entries[name]
+            report.append((name, entry.import_path, entry.import_time))
+        report.sort(key=lambda item: -1.0 if item[2] is None else item[2], reverse=True)
+        return report
@@ -0,0 +1,269 @@
+"""This module implements the timing instrumentation of a control loop.
+
+A LoopTimer measures, with a monotonic clock, how long each stage of
+a control loop iteration takes (e.g., get_state, controller.output,
+real_publish), keeps a rolling window of samples for percentiles,
+keeps a lifetime histogram for every stage,
+and counts the iterations that overrun the loop period.
+"""
+
+import bisect
+import json
+import time
+
+import numpy
+
+
+#--------------------------------------------------------------------------#
+# monotonic clock: time.time() can jump (ntp, user changing the date)
+
+try:
+    monotonic_time = time.monotonic
+except AttributeError:
+    # python 2: read CLOCK_MONOTONIC directly from librt
+    try:
+        import ctypes
+        import os
+
+        class _TimeSpec(ctypes.Structure):
+            _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+        __CLOCK_MONOTONIC = 1
+        __librt = ctypes.CDLL('librt.so.1', use_errno=True)
+        __clock_gettime = __librt.clock_gettime
+        __clock_gettime.argtypes = [ctypes.c_int, ctypes.POINTER(_TimeSpec)]
+
+        def monotonic_time():
+            """Seconds from CLOCK_MONOTONIC (arbitrary origin)"""
+            timespec = _TimeSpec()
+            if __clock_gettime(__CLOCK_MONOTONIC, ctypes.pointer(timespec)) != 0:
+                errno = ctypes.get_errno()
+                raise OSError(errno, os.strerror(errno))
+            return timespec.tv_sec + timespec.tv_nsec*1e-9
+
+        monotonic_time()
+    except (OSError, AttributeError):
+        # last resort: wall clock
+        monotonic_time = time.time
+
+
+#--------------------------------------------------------------------------#
+
+# the stages of Mission.publish, in the order they run
+MISSION_STAGES = [
+    'get_state',
+    'get_reference',
+    'controller.output',
+    'yaw_rate',
+    'rc_command',
+    'real_publish'
+]
+
+# the stages of the node, after Mission.publish
+NODE_STAGES = [
+    'gui_publish',
+    'logging'
+]
+
+# edges (in seconds) of the bins of the lifetime histograms:
+# 10us up to 1s, logarithmically spaced, plus everything above 1s
+HISTOGRAM_EDGES = list(numpy.logspace(-5, 0, 51))
+
+
+class StageStatistics(object):
+    """Durations (in seconds) of one stage of the loop"""
+
+    def __init__(self, name, window_size=1000):
+        self.name = name
+
+        # rolling window of the last samples, used for percentiles
+        self.window = numpy.zeros(window_size)
+        self.window_size = window_size
+        self.index = 0
+
+        # lifetime statistics
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        # one bin below the first edge, and one above the last edge
+        self.histogram = [0]*(len(HISTOGRAM_EDGES) + 1)
+
+    def add(self, duration):
+        self.window[self.index % self.window_size] = duration
+        self.index += 1
+
+        self.count += 1
+        self.total += duration
+        if duration > self.maximum:
+            self.maximum = duration
+        self.histogram[bisect.bisect_right(HISTOGRAM_EDGES, duration)] += 1
+
+    def samples(self):
+        """Samples in the rolling window (not ordered in time)"""
+        return self.window[0:min(self.index, self.window_size)]
+
+    def percentiles(self, percents=(50, 95, 99)):
+        samples = self.samples()
+        if len(samples) == 0:
+            return [0.0]*len(percents)
+        return list(numpy.percentile(samples, percents))
+
+    def mean(self):
+        if self.count == 0:
+            return 0.0
+        return self.total/self.count
+
+    def to_dictionary(self):
+        p50, p95, p99 = self.percentiles()
+        return {
+            'count'           : self.count,
+            'mean'            : self.mean(),
+            'max'             : self.maximum,
+            'p50'             : p50,
+            'p95'             : p95,
+            'p99'             : p99,
+            'histogram_edges' : HISTOGRAM_EDGES,
+            'histogram'       : self.histogram,
+            'window'          : list(self.samples())
+        }
+
+
+class _Stage(object):
+    """Context manager that times one stage; one object per stage name,
+    so that timing a stage does not create new objects."""
+
+    def __init__(self, timer, statistics):
+        self.timer = timer
+        self.statistics = statistics
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = self.timer.clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.statistics.add(self.timer.clock() - self.start)
+        return False
+
+
+class LoopTimer(object):
+    """Timing of every stage of a periodic loop.
+
+    Usage:
+        timer.begin_iteration()
+        with timer.stage('get_state'):
+            state = ...
+        ...
+        timer.end_iteration()
+    """
+
+    def __init__(self, period, window_size=1000, clock=monotonic_time):
+        # nominal period of the loop (sec)
+        self.period = period
+        self.window_size = window_size
+        self.clock = clock
+
+        self.statistics = {}
+        self.__stages = {}
+
+        # the whole iteration is also a stage
+        self.iteration = self.get_statistics('iteration')
+        self.iteration_start = None
+        # iterations that took longer than the period
+        self.overruns = 0
+
+        for name in MISSION_STAGES + NODE_STAGES:
+            self.stage(name)
+
+    def get_statistics(self, name):
+        if name not in self.statistics:
+            self.statistics[name] = StageStatistics(name, self.window_size)
+        return self.statistics[name]
+
+    def stage(self, name):
+        """Context manager that times the stage `name`"""
+        if name not in self.__stages:
+            self.__stages[name] = _Stage(self, self.get_statistics(name))
+        return self.__stages[name]
+
+    def record(self, name, duration):
+        """Add a duration (sec) measured elsewhere"""
+        self.get_statistics(name).add(duration)
+
+    def set_period(self, period):
+        self.period = period
+
+    def begin_iteration(self):
+        self.iteration_start = self.clock()
+
+    def end_iteration(self):
+        if self.iteration_start is None:
+            return
+        duration = self.clock() - self.iteration_start
+        self.iteration.add(duration)
+        if duration > self.period:
+            self.overruns += 1
+        self.iteration_start = None
+
+    def stage_names(self):
+        """Known stages in loop order, followed by any other stage"""
+        names = [name for name in MISSION_STAGES + NODE_STAGES + ['iteration'] if name in self.statistics]
+        names += sorted([name for name in self.statistics.keys() if name not in names])
+        return names
+
+    def summary(self):
+        """Compact statistics: per stage, mean, p50, p95, p99 and max (sec)"""
+        names = self.stage_names()
+        summary = {'stage_names': names, 'mean': [], 'p50': [], 'p95': [], 'p99': [], 'max': []}
+        for name in names:
+            statistics = self.statistics[name]
+            p50, p95, p99 = statistics.percentiles()
+            summary['mean'].append(statistics.mean())
+            summary['p50'].append(p50)
+            summary['p95'].append(p95)
+            summary['p99'].append(p99)
+            summary['max'].append(statistics.maximum)
+        return summary
+
+    def histograms_to_string(self):
+        """Full statistics of every stage, as a json string"""
+        dictionary = {
+            'period'     : self.period,
+            'iterations' : self.iteration.count,
+            'overruns'   : self.overruns,
+            'stages'     : dict((name, statistics.to_dictionary()) for name, statistics in self.statistics.items())
+        }
+        return json.dumps(dictionary)
+
+
+class _NullStage(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class NullLoopTimer(object):
+    """LoopTimer that measures nothing: used when nobody asked for timing"""
+
+    __stage = _NullStage()
+
+    def stage(self, name):
+        return self.__stage
+
+    def record(self, name, duration):
+        pass
+
+    def set_period(self, period):
+        pass
+
+    def begin_iteration(self):
+        pass
+
+    def end_iteration(self):
+        pass
+
+
+NULL_LOOP_TIMER = NullLoopTimer()
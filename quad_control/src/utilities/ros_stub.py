@@ -0,0 +1,149 @@
+"""This module stands in for the parts of rospy that are used by
+simulators, controllers, trajectories and missions, so that they can be
+run in one process, without a ROS master, in simulated time
+(see missions/headless/headless_simulation.py).
+
+install must be called before the modules that read ROS parameters
+are imported (many classes read them when they are defined):
+    from utilities import ros_stub
+    clock = ros_stub.install({'ControllerDefault': 'SimplePIDController'})
+    from missions.headless import headless_simulation
+    ...
+    clock.set_time(1.5)          # rospy.get_time() returns 1.5
+
+If rospy is installed, its functions get_time, get_param, ... are replaced
+(uninstall puts them back); otherwise, a module 'rospy' with only these
+functions is added to sys.modules.
+"""
+
+import sys
+import types
+
+
+class SimulatedClock(object):
+    """Time returned by rospy.get_time(), moved by the caller"""
+
+    def __init__(self, time=0.0):
+        self.time = time
+
+    def get_time(self):
+        return self.time
+
+    def set_time(self, time):
+        self.time = time
+
+    def advance(self, time_step):
+        self.time += time_step
+
+
+class ROSInterruptException(Exception):
+    pass
+
+
+# no default given to get_param
+_NO_DEFAULT = object()
+
+
+class RosStub(object):
+    """Functions of rospy, reading the time from a SimulatedClock
+    and the parameters from a dictionary"""
+
+    def __init__(self, parameters=None, clock=None, verbose=False):
+        # parameter names without leading '/' or '~'
+        self.parameters = {}
+        for name, value in (parameters or {}).items():
+            self.set_param(name, value)
+        self.clock = SimulatedClock() if clock is None else clock
+        # print rospy.log* messages (they are dropped otherwise)
+        self.verbose = verbose
+
+    def key(self, name):
+        return name.lstrip('/~')
+
+    def get_time(self):
+        return self.clock.get_time()
+
+    def get_param(self, name, default=_NO_DEFAULT):
+        key = self.key(name)
+        if key in self.parameters:
+            return self.parameters[key]
+        if default is _NO_DEFAULT:
+            raise KeyError(name)
+        return default
+
+    def set_param(self, name, value):
+        self.parameters[self.key(name)] = value
+
+    def has_param(self, name):
+        return self.key(name) in self.parameters
+
+    def is_shutdown(self):
+        return False
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
+
+    def functions(self):
+        """Attributes of the rospy module that are replaced"""
+        return {
+            'get_time'  : self.get_time,
+            'get_param' : self.get_param,
+            'set_param' : self.set_param,
+            'has_param' : self.has_param,
+            'is_shutdown' : self.is_shutdown,
+            'logdebug'  : self.log,
+            'loginfo'   : self.log,
+            'logwarn'   : self.log,
+            'logerr'    : self.log,
+            'logerror'  : self.log,
+        }
+
+
+# stub that is installed, and original attributes of rospy (None: rospy is the stub module)
+_installed = None
+_originals = None
+
+
+def install(parameters=None, clock=None, verbose=False):
+    """Make rospy use simulated time and the given parameters.
+    Returns the SimulatedClock."""
+    global _installed, _originals
+    uninstall()
+    stub = RosStub(parameters, clock, verbose)
+    try:
+        import rospy
+        _originals = dict((name, getattr(rospy, name, None)) for name in stub.functions())
+    except ImportError:
+        rospy = types.ModuleType('rospy')
+        rospy.__doc__ = 'Stand-in for rospy (see utilities/ros_stub.py)'
+        rospy.ROSInterruptException = ROSInterruptException
+        sys.modules['rospy'] = rospy
+        _originals = None
+    for name, function in stub.functions().items():
+        setattr(rospy, name, function)
+    _installed = stub
+    return stub.clock
+
+
+def uninstall():
+    """Undo install"""
+    global _installed, _originals
+    if _installed is None:
+        return
+    if _originals is None:
+        del sys.modules['rospy']
+    else:
+        rospy = sys.modules['rospy']
+        for name, function in _originals.items():
+            if function is None:
+                delattr(rospy, name)
+            else:
+                setattr(rospy, name, function)
+    _installed = None
+    _originals = None
+
+
+def installed():
+    """The RosStub that is installed (None if none is)"""
+    return _installed
@@ -0,0 +1,184 @@
+"""This module implements a drift-free scheduler for periodic loops.
+
+Deadlines are absolute times on a monotonic clock: the k-th tick is due
+at start + k*period, so that the time taken by the loop (and by sleeping)
+does not accumulate as drift (as it happens with sleep(period)).
+
+When an iteration takes longer than the period (an overrun), the
+scheduler applies one of the following policies:
+    CATCH_UP: run the missed ticks back to back, until on schedule again
+    SKIP:     drop the missed ticks, and wait for the next deadline in the future
+    STRETCH:  run the next tick right away, and restart the schedule from then
+
+Tasks that run at a lower rate (e.g., publishing to the GUI at 10Hz)
+are added with add_task, and they run after a tick when they are due.
+"""
+
+import time
+
+from utilities import loop_timing
+
+
+CATCH_UP = 'catch_up'
+SKIP     = 'skip'
+STRETCH  = 'stretch'
+
+OVERRUN_POLICIES = [CATCH_UP, SKIP, STRETCH]
+
+
+class PeriodicTask(object):
+    """Task that runs at a (lower) rate, after the ticks of a scheduler"""
+
+    def __init__(self, name, frequency, callback):
+        self.name = name
+        self.period = 1.0/frequency
+        self.callback = callback
+        self.deadline = None
+        self.runs = 0
+
+    def set_frequency(self, frequency):
+        self.period = 1.0/frequency
+
+
+class DeadlineScheduler(object):
+    """Periodic loop with absolute deadlines on a monotonic clock.
+
+    Usage:
+        scheduler = DeadlineScheduler(frequency=100.0, overrun_policy=SKIP)
+        scheduler.add_task('gui', 10.0, publish_to_gui)
+        scheduler.run(tick, rospy.is_shutdown)
+
+    If a LoopTimer is given, a tick and the tasks that follow it are
+    one iteration of the timer, and the lateness of every wake up is
+    recorded in the stage 'jitter'.
+    """
+
+    def __init__(self, frequency, overrun_policy=SKIP, loop_timer=None,
+            max_catch_up=10, clock=loop_timing.monotonic_time, sleep=time.sleep):
+
+        if overrun_policy not in OVERRUN_POLICIES:
+            raise ValueError('Unknown overrun policy ' + str(overrun_policy) + ': use one of ' + str(OVERRUN_POLICIES))
+
+        self.period = 1.0/frequency
+        self.overrun_policy = overrun_policy
+        # when more than max_catch_up ticks late, CATCH_UP gives up and restarts the schedule
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.sleep = sleep
+
+        if loop_timer is None:
+            loop_timer = loop_timing.NULL_LOOP_TIMER
+        else:
+            loop_timer.set_period(self.period)
+        self.loop_timer = loop_timer
+
+        # lateness (sec) of every wake up
+        self.jitter = loop_timing.StageStatistics('jitter')
+
+        self.tasks = []
+
+        # deadline of the next tick
+        self.deadline = None
+        self.ticks = 0
+        # ticks that finished after the deadline of the next tick
+        self.overruns = 0
+        # ticks dropped by SKIP
+        self.skipped = 0
+
+    def add_task(self, name, frequency, callback):
+        task = PeriodicTask(name, frequency, callback)
+        self.tasks.append(task)
+        if self.deadline is not None:
+            task.deadline = self.clock()
+        return task
+
+    def get_task(self, name):
+        for task in self.tasks:
+            if task.name == name:
+                return task
+        return None
+
+    def set_frequency(self, frequency):
+        """Change the frequency of the ticks, from the next tick on"""
+        self.period = 1.0/frequency
+        self.loop_timer.set_period(self.period)
+
+    def start(self):
+        """Restart the schedule: the first tick is due now"""
+        now = self.clock()
+        self.deadline = now
+        for task in self.tasks:
+            task.deadline = now
+
+    def run_due_tasks(self):
+        now = self.clock()
+        for task in self.tasks:
+            if now >= task.deadline:
+                with self.loop_timer.stage(task.name):
+                    task.callback()
+                task.runs += 1
+                # tasks never catch up: next deadline in the future
+                task.deadline += task.period
+                if task.deadline <= now:
+                    task.deadline += (int((now - task.deadline)/task.period) + 1)*task.period
+
+    def wait_next(self):
+        """Sleep until the deadline of the next tick, handling overruns"""
+
+        if self.deadline is None:
+            self.start()
+
+        self.deadline += self.period
+        now = self.clock()
+
+        if now > self.deadline:
+            # overrun: the next tick is already late
+            self.overruns += 1
+            if self.overrun_policy == SKIP:
+                missed = int((now - self.deadline)/self.period) + 1
+                self.skipped += missed
+                self.deadline += missed*self.period
+            elif self.overrun_policy == STRETCH:
+                self.deadline = now
+            elif now - self.deadline > self.max_catch_up*self.period:
+                # CATCH_UP, but too late: restart schedule
+                self.deadline = now
+
+        remaining = self.deadline - now
+        if remaining > 0:
+            self.sleep(remaining)
+
+        lateness = self.clock() - self.deadline
+        self.jitter.add(max(lateness, 0.0))
+        self.loop_timer.record('jitter', max(lateness, 0.0))
+
+    def tick(self, callback):
+        """One iteration: callback, tasks that are due, then wait"""
+        self.loop_timer.begin_iteration()
+        callback()
+        self.run_due_tasks()
+        self.loop_timer.end_iteration()
+        self.ticks += 1
+        self.wait_next()
+
+    def run(self, callback, should_stop):
+        """Call callback periodically until should_stop() is True"""
+        self.start()
+        while not should_stop():
+            self.tick(callback)
+
+    def statistics(self):
+        """Jitter (sec) and overrun counts"""
+        p50, p95, p99 = self.jitter.percentiles()
+        return {
+            'period'       : self.period,
+            'policy'       : self.overrun_policy,
+            'ticks'        : self.ticks,
+            'overruns'     : self.overruns,
+            'skipped'      : self.skipped,
+            'jitter_mean'  : self.jitter.mean(),
+            'jitter_p50'   : p50,
+            'jitter_p95'   : p95,
+            'jitter_p99'   : p99,
+            'jitter_max'   : self.jitter.maximum
+        }
@@ -0,0 +1,175 @@
+"""This module implements a channel in shared memory, between nodes on the same host.
+
+A SeqlockRing is a file in /dev/shm, memory mapped by one writer and by
+any number of readers, with a ring of fixed-size float64 records. The
+writer never waits for the readers, and the readers never lock: every
+slot has a sequence number, that is odd while the slot is being written
+(a seqlock), so a reader that sees it odd, or changed while it was copying
+the slot, reads again. Nothing is serialized, and no thread of ROS is
+involved: a record goes from the writer to the readers with one copy into
+the mapped file, and one copy out of it (into a preallocated array).
+
+The seqlock relies on the stores of the writer being seen by the readers
+in program order, as they are on x86 (numpy does not emit memory barriers).
+
+File layout (native byte order):
+    header: MAGIC (8 bytes), slots (uint64), columns (uint64), head (uint64)
+        head: number of records written so far
+    slots: slot, slot, ... where every slot is
+        sequence (uint64), columns float64
+
+The simulator node (quad_simulator.py with ~shared_memory) writes the
+state in the ring of the topic quad_state (STATE_COLUMNS), and reads the
+rc commands from the ring of the topic quad_cmd (COMMAND_COLUMNS); the
+mission (see IrisSimulatorTrajectoryTracking.enable_shared_memory)
+does the opposite. The topics are still published, for the GUI.
+
+The last column of these records is the wall time of the write: a reader
+takes a record only if it is fresh (see is_fresh), so that a ring left in
+/dev/shm by a node that is gone does not replace the topic. The writer
+removes its ring when its node shuts down.
+
+    ring = SeqlockRing(path_of('/Iris1/quad_state'), STATE_COLUMNS, create=True)
+    record[-1] = time.time()
+    ring.write(record)
+
+    ring = SeqlockRing(path_of('/Iris1/quad_state'), STATE_COLUMNS)
+    record = numpy.zeros(STATE_COLUMNS)
+    number = ring.read_latest(record)   # 0 if nothing was written yet
+    if number > 0 and is_fresh(record): ...
+"""
+
+import mmap
+import os
+import time
+
+import numpy
+
+
+MAGIC = b'SMLSHM01'
+
+DIRECTORY = '/dev/shm'
+
+# time, position, velocity, roll, pitch, yaw (deg), wall time of the write
+STATE_COLUMNS = 1+3+3+3+1
+# time, rc command (roll, pitch, throttle, yaw), wall time of the write
+COMMAND_COLUMNS = 1+4+1
+
+# age (wall time, sec) after which a record is stale
+MAXIMUM_AGE = 1.0
+
+HEADER_BYTES = 8+3*8
+
+# indices of the header, as an array of uint64
+_SLOTS   = 1
+_COLUMNS = 2
+_HEAD    = 3
+
+
+def path_of(topic, directory=DIRECTORY):
+    """File of the ring that carries a (resolved) topic, e.g.
+    /Iris1/quad_state -> /dev/shm/quad_control_Iris1_quad_state"""
+    return os.path.join(directory, 'quad_control_' + topic.strip('/').replace('/', '_'))
+
+
+def is_fresh(record, maximum_age=MAXIMUM_AGE):
+    """True if the record (wall time of the write in its last column)
+    was written less than maximum_age seconds ago"""
+    return time.time() - record[-1] < maximum_age
+
+
+class SeqlockRing(object):
+    """Ring of float64 records in a memory mapped file: one writer, many readers.
+
+    create=True (writer): the file is created if needed, and it is
+    initialized if it does not have the same slots and columns; in any
+    case, the ring starts empty (head 0), so that the records of a
+    previous writer are not read again.
+    create=False (reader): raises IOError/OSError if the file does not
+    exist (yet), and ValueError if it does not have the same columns.
+    """
+
+    def __init__(self, file_path, columns, slots=64, create=False):
+        self.file_path = file_path
+        self.columns = columns
+
+        if create:
+            fd = os.open(file_path, os.O_RDWR | os.O_CREAT, 0o666)
+        else:
+            fd = os.open(file_path, os.O_RDWR)
+        try:
+            if create:
+                size = HEADER_BYTES + slots*8*(1 + columns)
+                if os.fstat(fd).st_size != size:
+                    os.ftruncate(fd, size)
+            else:
+                size = os.fstat(fd).st_size
+                if size < HEADER_BYTES:
+                    raise ValueError(file_path + ' is not a ring (yet)')
+            self.__map = mmap.mmap(fd, size)
+        finally:
+            # the mapping keeps the file
+            os.close(fd)
+
+        self.__header = numpy.ndarray(shape=(4,), dtype=numpy.uint64, buffer=self.__map)
+        magic = self.__map[0:8]
+        if create:
+            if magic != MAGIC or self.__header[_SLOTS] != slots or self.__header[_COLUMNS] != columns:
+                self.__map[:] = b'\x00'*size
+                self.__header[_SLOTS] = slots
+                self.__header[_COLUMNS] = columns
+                self.__map[0:8] = MAGIC
+            self.__header[_HEAD] = 0
+        else:
+            if magic != MAGIC or self.__header[_COLUMNS] != columns:
+                raise ValueError(file_path + ' is not a ring with ' + str(columns) + ' columns')
+            slots = int(self.__header[_SLOTS])
+        self.slots = slots
+
+        slot_bytes = 8*(1 + columns)
+        self.__sequences = numpy.ndarray(shape=(slots,), dtype=numpy.uint64,
+            buffer=self.__map, offset=HEADER_BYTES, strides=(slot_bytes,))
+        self.__records = numpy.ndarray(shape=(slots, columns), dtype=numpy.float64,
+            buffer=self.__map, offset=HEADER_BYTES+8, strides=(slot_bytes, 8))
+
+    def head(self):
+        """Number of records written so far"""
+        return int(self.__header[_HEAD])
+
+    def write(self, record):
+        """Write a record (columns floats); only one process may write"""
+        head = int(self.__header[_HEAD])
+        index = head % self.slots
+        sequence = self.__sequences[index]
+        # odd: readers of this slot retry
+        self.__sequences[index] = sequence + 1
+        self.__records[index] = record
+        self.__sequences[index] = sequence + 2
+        self.__header[_HEAD] = head + 1
+
+    def read_latest(self, out, retries=100):
+        """Copy the latest record into out (an array of columns floats).
+        Returns the number of the record (1 for the first record written),
+        or 0 if there is none (or the writer stopped in the middle of a write)"""
+        for attempt in range(retries):
+            head = int(self.__header[_HEAD])
+            if head == 0:
+                return 0
+            index = (head - 1) % self.slots
+            sequence = self.__sequences[index]
+            if sequence % 2 == 1:
+                continue
+            out[:] = self.__records[index]
+            if self.__sequences[index] == sequence:
+                return head
+        return 0
+
+    def close(self):
+        self.__map.close()
+
+    def unlink(self):
+        """Remove the file (the mappings of other processes are still valid)"""
+        try:
+            os.unlink(self.file_path)
+        except OSError:
+            pass
@@ -0,0 +1,249 @@
+"""This module implements a buffered binary logger for the control loop.
+
+The control loop appends fixed-size float64 records to a preallocated
+block in memory; full blocks are written to a binary file by a
+background thread, so that logging never formats text or touches the
+disk inside the control loop.
+
+Mission headers (see Jsonable.parametric_description) are stored in the
+same file, together with the index of the first record they refer to.
+A telemetry file can be converted back to the text format written by
+numpy.savetxt, that is read by plot_experiment.py.
+
+File format (little endian):
+    MAGIC
+    chunk, chunk, ...
+where every chunk starts with CHUNK_HEADER = (kind, record_index, size_a, size_b)
+    HEAD: size_a bytes of utf-8 text (a parametric description)
+    NOTE: size_a bytes of utf-8 text (e.g., a change of parameters)
+    DATA: size_a records with size_b columns of float64
+"""
+
+import struct
+import threading
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+import numpy
+
+
+MAGIC = b'SMLTLM01'
+
+# extension of telemetry files
+EXTENSION = '.tlm'
+
+CHUNK_HEADER = struct.Struct('<4sQII')
+
+HEADER_KIND = b'HEAD'
+NOTE_KIND   = b'NOTE'
+DATA_KIND   = b'DATA'
+
+RECORD_DTYPE = numpy.dtype('<f8')
+
+
+class TelemetryWriter(object):
+    """Writes records (1d arrays of floats) to a binary telemetry file.
+
+    append, write_header, write_note and close are safe to call
+    from different threads (e.g., control loop and ROS services).
+    """
+
+    def __init__(self, file_path, block_size=1024, number_of_blocks=8):
+        self.file_path = file_path
+        self.block_size = block_size
+        self.number_of_blocks = number_of_blocks
+
+        self.__file = open(file_path, 'wb')
+        self.__file.write(MAGIC)
+
+        self.__lock = threading.Lock()
+        self.__closed = False
+
+        # records appended so far
+        self.records = 0
+        # blocks allocated because the writer thread was late
+        self.extra_blocks = 0
+
+        # block currently being filled
+        self.__columns = None
+        self.__block = None
+        self.__row = 0
+        self.__first_record = 0
+        self.__free_blocks = None
+
+        # chunks waiting to be written, in order
+        self.__chunks = queue.Queue()
+        self.__thread = threading.Thread(target=self.__write_chunks)
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def __allocate_blocks(self, columns):
+        """Preallocate the blocks for records with `columns` columns"""
+        self.__columns = columns
+        self.__free_blocks = queue.Queue()
+        for index in range(self.number_of_blocks - 1):
+            self.__free_blocks.put(numpy.zeros((self.block_size, columns), dtype=RECORD_DTYPE))
+        self.__block = numpy.zeros((self.block_size, columns), dtype=RECORD_DTYPE)
+        self.__row = 0
+        self.__first_record = self.records
+
+    def __next_block(self):
+        try:
+            self.__block = self.__free_blocks.get_nowait()
+        except queue.Empty:
+            # never wait for the disk: allocate one more block instead
+            self.extra_blocks += 1
+            self.__block = numpy.zeros((self.block_size, self.__columns), dtype=RECORD_DTYPE)
+        self.__row = 0
+        self.__first_record = self.records
+
+    def __flush_block(self):
+        if self.__row > 0:
+            self.__chunks.put((DATA_KIND, self.__first_record, self.__block, self.__row, self.__free_blocks))
+            self.__next_block()
+
+    def append(self, record):
+        with self.__lock:
+            if self.__closed:
+                return
+            if len(record) != self.__columns:
+                # a new mission may log a different number of columns
+                self.__flush_block()
+                self.__allocate_blocks(len(record))
+            self.__block[self.__row, :] = record
+            self.__row += 1
+            self.records += 1
+            if self.__row == self.block_size:
+                self.__flush_block()
+
+    def __write_text(self, kind, string):
+        with self.__lock:
+            if self.__closed:
+                return
+            # records before the text are written before it
+            self.__flush_block()
+            self.__chunks.put((kind, self.records, string.encode('utf-8'), None, None))
+
+    def write_header(self, string):
+        """Write a mission header (Jsonable.parametric_description)"""
+        self.__write_text(HEADER_KIND, string)
+
+    def write_note(self, string):
+        """Write some text that is not a mission header"""
+        self.__write_text(NOTE_KIND, string)
+
+    def flush(self):
+        with self.__lock:
+            self.__flush_block()
+
+    def close(self):
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__flush_block()
+            self.__closed = True
+            self.__chunks.put(None)
+        self.__thread.join()
+        self.__file.close()
+
+    def __write_chunks(self):
+        while True:
+            chunk = self.__chunks.get()
+            if chunk is None:
+                break
+            kind, record_index, payload, rows, free_blocks = chunk
+            if kind == DATA_KIND:
+                self.__file.write(CHUNK_HEADER.pack(kind, record_index, rows, payload.shape[1]))
+                self.__file.write(numpy.ascontiguousarray(payload[0:rows]).data)
+                # block can be filled again
+                free_blocks.put(payload)
+            else:
+                self.__file.write(CHUNK_HEADER.pack(kind, record_index, len(payload), 0))
+                self.__file.write(payload)
+        self.__file.flush()
+
+
+class TelemetryReader(object):
+    """Reads a telemetry file written by TelemetryWriter.
+
+    headers: list of (record_index, string), one per mission header
+    notes: list of (record_index, string)
+    data: all records, as a list of 2d arrays (one per data chunk)
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.headers = []
+        self.notes = []
+        # list of (record_index, array)
+        self.data_chunks = []
+
+        with open(file_path, 'rb') as file_handle:
+            content = file_handle.read()
+
+        if content[0:len(MAGIC)] != MAGIC:
+            raise ValueError(file_path + ' is not a telemetry file')
+
+        offset = len(MAGIC)
+        while offset + CHUNK_HEADER.size <= len(content):
+            kind, record_index, size_a, size_b = CHUNK_HEADER.unpack_from(content, offset)
+            offset += CHUNK_HEADER.size
+            if kind == DATA_KIND:
+                size = size_a*size_b*RECORD_DTYPE.itemsize
+                if offset + size > len(content):
+                    # file was not closed properly: ignore incomplete chunk
+                    break
+                array = numpy.frombuffer(content, dtype=RECORD_DTYPE, count=size_a*size_b, offset=offset)
+                self.data_chunks.append((record_index, numpy.reshape(array, (size_a, size_b))))
+                offset += size
+            else:
+                string = content[offset:offset + size_a].decode('utf-8')
+                if kind == HEADER_KIND:
+                    self.headers.append((record_index, string))
+                else:
+                    self.notes.append((record_index, string))
+                offset += size_a
+
+    def segments(self):
+        """List of (header, records): the records logged under each header.
+        Records logged before the first header have header None.
+        """
+        boundaries = [(0, None)] + self.headers
+        segments = []
+        for index, (first, header) in enumerate(boundaries):
+            if index + 1 < len(boundaries):
+                last = boundaries[index + 1][0]
+            else:
+                last = float('inf')
+            records = [chunk for (start, chunk) in self.data_chunks if first <= start < last]
+            if header is None and len(records) == 0:
+                continue
+            segments.append((header, records))
+        return segments
+
+
+def telemetry_to_text(telemetry_path, text_path=None):
+    """Convert a telemetry file into the text format that is written by
+    numpy.savetxt in the control loop (and read by plot_experiment.py).
+    Returns the path of the text file.
+    """
+
+    if text_path is None:
+        if telemetry_path.endswith(EXTENSION):
+            text_path = telemetry_path[:-len(EXTENSION)] + '.txt'
+        else:
+            text_path = telemetry_path + '.txt'
+
+    reader = TelemetryReader(telemetry_path)
+
+    with open(text_path, 'w') as file_handle:
+        for header, records in reader.segments():
+            if header is not None:
+                numpy.savetxt(file_handle, [header], fmt="%s")
+            for chunk in records:
+                numpy.savetxt(file_handle, chunk, delimiter=' ')
+
+    return text_path
@@ -0,0 +1,151 @@
+"""This module implements the recorder of the trajectory of a simulator.
+
+A TrajectoryRecorder keeps (time, state, control) samples in numpy arrays:
+the arrays grow (doubling) up to `capacity` samples, and then the oldest
+samples are overwritten (ring buffer), so that a long session uses
+bounded memory. With capacity None, nothing is overwritten.
+
+The state and the control can have any shape: (15,) for one vehicle,
+(N,15) for a batch of vehicles (see simulators/batch_simulator.py).
+
+The samples can be queried by time window, and exported to a .npz file,
+or to three .npy files that can be opened as memory maps:
+    recorder.save_npy('/tmp/flight')
+    times, states, controls = load_npy('/tmp/flight')
+"""
+
+import numpy
+from numpy.lib import format as npy_format
+
+
+# first allocation, in samples
+INITIAL_SIZE = 1024
+
+# suffixes of the files written by save_npy
+NPY_SUFFIXES = ('_time.npy', '_state.npy', '_control.npy')
+
+
+def _as_shape(shape):
+    if isinstance(shape, int):
+        return (shape,)
+    return tuple(shape)
+
+
+class TrajectoryRecorder(object):
+    """Samples of (time, state, control), in order of time"""
+
+    def __init__(self, state_shape, control_shape, capacity=None):
+        self.state_shape = _as_shape(state_shape)
+        self.control_shape = _as_shape(control_shape)
+        # largest number of samples kept (None: no limit)
+        self.capacity = capacity
+
+        # samples overwritten because the buffer was full
+        self.dropped = 0
+
+        self.__allocate(INITIAL_SIZE if capacity is None else min(INITIAL_SIZE, capacity))
+
+    def __allocate(self, size):
+        self.__times = numpy.zeros(size)
+        self.__states = numpy.zeros((size,) + self.state_shape)
+        self.__controls = numpy.zeros((size,) + self.control_shape)
+        # row of the oldest sample, and number of samples
+        self.__start = 0
+        self.__count = 0
+
+    def __grow(self):
+        size = len(self.__times)*2
+        if self.capacity is not None:
+            size = min(size, self.capacity)
+        times, states, controls, count = self.__times, self.__states, self.__controls, self.__count
+        self.__allocate(size)
+        # the buffer only grows before it is full, so the samples start at row 0
+        self.__times[0:count] = times[0:count]
+        self.__states[0:count] = states[0:count]
+        self.__controls[0:count] = controls[0:count]
+        self.__count = count
+
+    def __len__(self):
+        return self.__count
+
+    def clear(self):
+        self.__start = 0
+        self.__count = 0
+        self.dropped = 0
+
+    def append(self, time, state, control):
+        """Copy one sample into the buffer"""
+        rows = len(self.__times)
+        if self.__count == rows:
+            if self.capacity is None or rows < self.capacity:
+                self.__grow()
+                rows = len(self.__times)
+            else:
+                # full: overwrite the oldest sample
+                self.__start = (self.__start + 1) % rows
+                self.__count -= 1
+                self.dropped += 1
+        row = (self.__start + self.__count) % rows
+        self.__times[row] = time
+        self.__states[row] = state
+        self.__controls[row] = control
+        self.__count += 1
+
+    def __ordered(self, array, first=0, last=None):
+        """Samples first to last (in order of time) of array;
+        a view when they are contiguous in the buffer"""
+        if last is None:
+            last = self.__count
+        rows = len(self.__times)
+        begin = self.__start + first
+        end = self.__start + last
+        if end <= rows:
+            return array[begin:end]
+        if begin >= rows:
+            return array[begin-rows:end-rows]
+        return numpy.concatenate([array[begin:rows], array[0:end-rows]])
+
+    def times(self):
+        return self.__ordered(self.__times)
+
+    def states(self):
+        return self.__ordered(self.__states)
+
+    def controls(self):
+        return self.__ordered(self.__controls)
+
+    def window(self, start_time=None, end_time=None):
+        """(times, states, controls) of the samples with
+        start_time <= time <= end_time (None: no bound).
+        The arrays may be views of the buffer: copy them to keep them."""
+        times = self.times()
+        first = 0 if start_time is None else int(numpy.searchsorted(times, start_time, 'left'))
+        last = self.__count if end_time is None else int(numpy.searchsorted(times, end_time, 'right'))
+        last = max(first, last)
+        return (
+            self.__ordered(self.__times, first, last),
+            self.__ordered(self.__states, first, last),
+            self.__ordered(self.__controls, first, last))
+
+    def save_npz(self, file_path):
+        """Save all samples to a .npz file, with arrays time, state and control"""
+        numpy.savez(file_path, time=self.times(), state=self.states(), control=self.controls())
+
+    def save_npy(self, prefix):
+        """Save all samples to prefix_time.npy, prefix_state.npy and prefix_control.npy,
+        that can be opened as memory maps (see load_npy). Returns the file names."""
+        file_names = []
+        for suffix, array in zip(NPY_SUFFIXES, [self.times(), self.states(), self.controls()]):
+            file_name = prefix + suffix
+            out = npy_format.open_memmap(file_name, mode='w+', dtype=array.dtype, shape=array.shape)
+            out[...] = array
+            out.flush()
+            del out
+            file_names.append(file_name)
+        return file_names
+
+
+def load_npy(prefix, mmap_mode='r'):
+    """(times, states, controls) saved by TrajectoryRecorder.save_npy,
+    as memory maps (mmap_mode None: read into memory)"""
+    return tuple(numpy.load(prefix + suffix, mmap_mode=mmap_mode) for suffix in NPY_SUFFIXES)
@@ -9,6 +9,8 @@
 # If we use the convention THIS_to_THAT,
 # the call look like that = THIS_to_THAT(this), which is a little psychic.
 
+import math
+
 import numpy as np
 
 from numpy import cos as c
@@ -109,14 +111,81 @@ def euler_deg_from_rot(R):
     return euler_rad_from_rot(R)*180.0/np.pi
 
 
-def rot_from_euler_rad(ee_rad):
-    return rot_z(ee_rad[2]).dot(rot_y(ee_rad[1]).dot(rot_x(ee_rad[0])))
+def rot_from_euler_rad(ee_rad, out=None):
+    """Rotation matrix rot_z(psi)*rot_y(theta)*rot_x(phi),
+    written into the 3x3 array `out` if given (no array is allocated)"""
+    if out is None:
+        out = np.empty((3,3))
+
+    c_phi   = math.cos(ee_rad[0]); s_phi   = math.sin(ee_rad[0])
+    c_theta = math.cos(ee_rad[1]); s_theta = math.sin(ee_rad[1])
+    c_psi   = math.cos(ee_rad[2]); s_psi   = math.sin(ee_rad[2])
+
+    out[0,0] = c_psi*c_theta
+    out[0,1] = c_psi*s_theta*s_phi - s_psi*c_phi
+    out[0,2] = c_psi*s_theta*c_phi + s_psi*s_phi
+    out[1,0] = s_psi*c_theta
+    out[1,1] = s_psi*s_theta*s_phi + c_psi*c_phi
+    out[1,2] = s_psi*s_theta*c_phi - c_psi*s_phi
+    out[2,0] = -s_theta
+    out[2,1] = c_theta*s_phi
+    out[2,2] = c_theta*c_phi
+
+    return out
 
 
 def rot_from_euler_deg(ee_deg):
     return rot_from_euler_rad(ee_deg*np.pi/180.0)
 
 
+#--------------------------------------------------------------------------#
+# batched versions, for N vehicles at once:
+# vectors are (N,3) arrays, and matrices are (N,3,3) arrays
+
+def skew_batch(xx):
+    """Skew matrices of the rows of xx"""
+    out = np.zeros((len(xx),3,3))
+    out[:,0,1] = -xx[:,2]
+    out[:,0,2] =  xx[:,1]
+    out[:,1,0] =  xx[:,2]
+    out[:,1,2] = -xx[:,0]
+    out[:,2,0] = -xx[:,1]
+    out[:,2,1] =  xx[:,0]
+    return out
+
+
+def rot_from_euler_rad_batch(ee_rad):
+    """Rotation matrices rot_z(psi)*rot_y(theta)*rot_x(phi) of the rows of ee_rad"""
+    c_phi   = np.cos(ee_rad[:,0]); s_phi   = np.sin(ee_rad[:,0])
+    c_theta = np.cos(ee_rad[:,1]); s_theta = np.sin(ee_rad[:,1])
+    c_psi   = np.cos(ee_rad[:,2]); s_psi   = np.sin(ee_rad[:,2])
+
+    out = np.empty((len(ee_rad),3,3))
+    out[:,0,0] = c_psi*c_theta
+    out[:,0,1] = c_psi*s_theta*s_phi - s_psi*c_phi
+    out[:,0,2] = c_psi*s_theta*c_phi + s_psi*s_phi
+    out[:,1,0] = s_psi*c_theta
+    out[:,1,1] = s_psi*s_theta*s_phi + c_psi*c_phi
+    out[:,1,2] = s_psi*s_theta*c_phi - c_psi*s_phi
+    out[:,2,0] = -s_theta
+    out[:,2,1] = c_theta*s_phi
+    out[:,2,2] = c_theta*c_phi
+    return out
+
+
+def euler_rad_from_rot_batch(R):
+    """Euler angles (roll, pitch, yaw) of the rotation matrices in R, as rows"""
+    euler = np.empty((len(R),3))
+    euler[:,0] = np.arctan2(np.clip(R[:,2,1],-1,1),np.clip(R[:,2,2],-1,1))
+    euler[:,1] = np.arcsin(-np.clip(R[:,2,0],-1,1))
+    euler[:,2] = np.arctan2(np.clip(R[:,1,0],-1,1),np.clip(R[:,0,0],-1,1))
+    return euler
+
+
+def euler_deg_from_rot_batch(R):
+    return euler_rad_from_rot_batch(R)*180.0/np.pi
+
+
 
 # testing skew matrix    
 # print skew(np.array([1,2,3]))
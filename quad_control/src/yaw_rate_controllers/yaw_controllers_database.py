@@ -1,15 +1,13 @@
 #!/usr/bin/env python
 # this line is just used to define the type of document
 
-import rospy
+from utilities.lazy_registry import LazyDatabase
 
-database = {}
+database = LazyDatabase('yaw controllers')
 
-from neutral_yaw_controller.neutral_yaw_controller import NeutralYawController
-database["NeutralYawController"] = NeutralYawController
+database.register("NeutralYawController", "yaw_rate_controllers.neutral_yaw_controller.neutral_yaw_controller:NeutralYawController")
 
-from simple_tracking_yaw_controller.simple_tracking_yaw_controller import SimpleTrackingYawController
-database["SimpleTrackingYawController"] = SimpleTrackingYawController
+database.register("SimpleTrackingYawController", "yaw_rate_controllers.simple_tracking_yaw_controller.simple_tracking_yaw_controller:SimpleTrackingYawController")
 
-
-database["Default"] = database[rospy.get_param("YawControllerDefault","SimpleTrackingYawController")]
\ No newline at end of file
+# the ROS parameter is read when "Default" is first used
+database.alias("Default", "SimpleTrackingYawController", "YawControllerDefault")
@@ -1,14 +1,13 @@
 #!/usr/bin/env python
 # this line is just used to define the type of document
 
-import rospy
+from utilities.lazy_registry import LazyDatabase
 
-database = {}
+database = LazyDatabase('yaw trajectories')
 
-from fixed_yaw_trajectory.fixed_yaw_trajectory import FixedYawTrajectory
-database['FixedYaw'] = FixedYawTrajectory
+database.register("FixedYaw", "yaw_trajectories.fixed_yaw_trajectory.fixed_yaw_trajectory:FixedYawTrajectory")
 
-from sinusoidal_yaw_trajectory.sinusoidal_yaw_trajectory import SinusoidalYawTrajectory
-database['SinusoidalYaw'] = SinusoidalYawTrajectory
+database.register("SinusoidalYaw", "yaw_trajectories.sinusoidal_yaw_trajectory.sinusoidal_yaw_trajectory:SinusoidalYawTrajectory")
 
-database["Default"] = database[rospy.get_param("YawTrajectoryDefault","FixedYaw")]
\ No newline at end of file
+# the ROS parameter is read when "Default" is first used
+database.alias("Default", "FixedYaw", "YawTrajectoryDefault")